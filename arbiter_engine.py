@@ -8,28 +8,49 @@ import os
 import time
 import threading
 from datetime import datetime
-from collections import deque
+from combat_log_parser import Dispatcher, parse_line
+from combat_log_tailer import COMBAT_LOG_PATH, get_tailer
+from encounter_store import EncounterStore, EncounterWriter
+from unit_tracker import UnitTracker
+
+PLAYER_NAME = "MyPlayerName" # Need real player name
+RECAP_SECONDS = 10   # history shown in a death recap
+DPS_WINDOW = 30      # rolling window compared against the sim target
 
 class ArbiterEngine:
-    def __init__(self, skillweaver_engine=None):
+    def __init__(self, skillweaver_engine=None, tailer=None, store=None):
         self.skillweaver = skillweaver_engine
         self.log_path = self._find_combat_log()
+        self.tailer = tailer
+        self.subscription = None
         self.running = False
         self.thread = None
         
         # State
         self.mistake_count = 0
         self.performance_score = 0.0 # 0-100%
-        self.death_log = deque(maxlen=50) # Buffer of last 50 events
+        self.units = UnitTracker()  # per-player history + rolling damage done/taken
+        self.player_guid = None
         self.last_death_recap = None
+
+        # Live encounters are recorded column-wise and saved on ENCOUNTER_END
+        self.store = store or EncounterStore()
+        self.recording = None
+        self.last_encounter = None
+
+        self.dispatch = Dispatcher()
+        self.dispatch.on("SPELL_CAST_SUCCESS")(self._on_cast)
+        self.dispatch.on("UNIT_DIED")(self._on_death)
+        self.dispatch.on("ENCOUNTER_START")(self._on_encounter_start)
+        self.dispatch.on("ENCOUNTER_END")(self._on_encounter_end)
         
         # Mock Sim Data (Replace with real SimC integration)
         self.target_dps = 100000.0 
         self.current_dps = 0.0
 
     def _find_combat_log(self):
-        # Default macOS path, should be configurable
-        return "/Applications/World of Warcraft/_retail_/Logs/WoWCombatLog.txt"
+        # Default macOS path, overridable with HOLOCRON_COMBAT_LOG
+        return COMBAT_LOG_PATH
 
     def start(self):
         if self.running: return
@@ -40,27 +61,28 @@ class ArbiterEngine:
 
     def stop(self):
         self.running = False
+        if self.subscription:
+            self.tailer.unsubscribe(self.subscription)
         if self.thread:
             self.thread.join()
 
     def _monitor_log(self):
-        """Tail the combat log and process events"""
+        """Consume combat log events from the shared tailer"""
         if not os.path.exists(self.log_path):
             print(f"Combat log not found at {self.log_path}. Using mock mode.")
             self._mock_monitor()
             return
 
-        with open(self.log_path, "r") as f:
-            # Seek to end
-            f.seek(0, 2)
-            
-            while self.running:
-                line = f.readline()
-                if not line:
-                    time.sleep(0.1)
-                    continue
-                
-                self._process_line(line)
+        # Every event feeds the death buffer, so no event filter
+        self.tailer = self.tailer or get_tailer(self.log_path)
+        self.subscription = self.tailer.subscribe("arbiter")
+        if not self.running:  # stopped while subscribing
+            self.tailer.unsubscribe(self.subscription)
+        for event in self.subscription:
+            if not self.running:
+                break
+            self._process_event(event)
+        self.tailer.unsubscribe(self.subscription)
 
     def _mock_monitor(self):
         """Simulate events for testing"""
@@ -74,34 +96,52 @@ class ArbiterEngine:
 
     def _process_line(self, line):
         """Parse raw log line"""
-        # Format: Timestamp, Event, SourceGUID, SourceName, DestGUID, DestName, SpellID, SpellName, ...
+        event = parse_line(line)
+        if event:
+            self._process_event(event)
+
+    def _process_event(self, event):
+        """Handle one parsed combat log record"""
         try:
-            parts = line.split(',')
-            if len(parts) < 10: return
-            
-            timestamp = parts[0]
-            event = parts[1] # SPELL_CAST_SUCCESS, UNIT_DIED, etc.
-            source_name = parts[3].strip('"')
-            
-            # Add to death buffer
-            self.death_log.append({
-                "timestamp": timestamp,
-                "event": event,
-                "source": source_name,
-                "details": line
-            })
-            
-            if event == "SPELL_CAST_SUCCESS" and source_name == "MyPlayerName": # Need real player name
-                spell_id = int(parts[6])
-                spell_name = parts[7].strip('"')
-                self._audit_rotation(spell_id, spell_name)
-                
-            elif event == "UNIT_DIED" and parts[6].strip('"') == "MyPlayerName":
-                self._analyze_death()
-                
+            self.units.record(event)
+            self.dispatch.dispatch(event)
+            if self.recording is not None:
+                self.recording.append(event)
         except Exception as e:
             pass # Ignore parse errors
 
+    @staticmethod
+    def _is_player(name):
+        return bool(name) and (name == PLAYER_NAME or name.startswith(f"{PLAYER_NAME}-"))
+
+    def _on_cast(self, event):
+        if self._is_player(event.source_name):
+            self.player_guid = event.source_guid
+            self._audit_rotation(event.spell_id, event.spell_name)
+            self._update_performance()
+
+    def _on_death(self, event):
+        if self._is_player(event.dest_name):
+            self.player_guid = event.dest_guid
+            self._analyze_death(event)
+
+    def _on_encounter_start(self, event):
+        self.recording = EncounterWriter()
+
+    def _on_encounter_end(self, event):
+        if self.recording is None:
+            return  # started watching mid-encounter
+        writer, self.recording = self.recording, None
+        writer.append(event)
+        key = f"{event.timestamp.replace('/', '-').replace(' ', '_').replace(':', '')}_{event.get('encounter_id')}"
+        meta = {"encounter_id": event.get("encounter_id"), "name": event.get("encounter_name"),
+                "difficulty_id": event.get("difficulty_id"), "success": event.get("success")}
+        try:
+            self.store.save(key, writer, meta)
+            self.last_encounter = key
+        except OSError as e:
+            print(f"⚠️ Could not save encounter {meta['name']}: {e}")
+
     def _audit_rotation(self, cast_spell_id, cast_spell_name):
         """Compare cast spell vs SkillWeaver recommendation"""
         if not self.skillweaver: return
@@ -119,26 +159,46 @@ class ArbiterEngine:
             self.skillweaver.report_mistake(cast_spell_id, recommended.get("spell_id"))
 
     def _update_performance(self):
-        """Update Live Benchmarking score"""
+        """Update Live Benchmarking score from the player's rolling DPS"""
+        if self.player_guid:
+            self.current_dps = self.units.dps(self.player_guid)[DPS_WINDOW]
         if self.target_dps > 0:
             self.performance_score = (self.current_dps / self.target_dps) * 100.0
             self.performance_score = min(100.0, self.performance_score)
 
-    def _analyze_death(self):
-        """Forensics on death"""
-        # Analyze self.death_log
-        # For MVP, just return the last 3 events
-        recap = list(self.death_log)[-3:]
+    def _analyze_death(self, event):
+        """Forensics on death: the dead unit's own last RECAP_SECONDS"""
+        history = self.units.recent(event.dest_guid, RECAP_SECONDS)
+        died_at = self.units.now
+        recap = [{
+            "timestamp": record.timestamp,
+            "seconds_before_death": round(died_at - when, 3),
+            "event": record.event,
+            "source": record.source_name,
+            "spell": record.spell_name,
+            "amount": record.amount,
+            "details": record.raw
+        } for when, record in history if record is not event]
+        unit = self.units.get(event.dest_guid)
+        taken = unit.taken.sums(died_at) if unit else {}
         self.last_death_recap = {
             "verdict": "User Error", # Logic needed
+            "damage_taken": {f"{window}s": total for window, total in taken.items()},
             "events": recap
         }
         print("💀 Player Died. Analyzing...")
 
+    def audit_log(self, path=None, workers=None):
+        """Offline audit of a finished log (e.g. last night's raid), one result per encounter"""
+        from encounter_analysis import analyze_log
+        return analyze_log(path or self.log_path, workers=workers, players=[PLAYER_NAME])
+
     def get_status(self):
+        rates = self.units.dps(self.player_guid) if self.player_guid else {}
         return {
             "mistakes": self.mistake_count,
             "performance": f"{self.performance_score:.1f}%",
+            "dps": {f"{window}s": round(rate, 1) for window, rate in rates.items()},
             "last_death": self.last_death_recap
         }
 
@@ -0,0 +1,6 @@
+"""
+benchmarks - Hot-path benchmarks on seeded synthetic data
+
+See `python -m benchmarks --help`. Generators live in generators.py,
+the benchmarked code paths in cases.py.
+"""
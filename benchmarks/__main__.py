@@ -0,0 +1,65 @@
+"""
+Benchmark command line
+
+    python -m benchmarks list
+    python -m benchmarks run [--scale tiny|small|medium|large] [-k pattern] [-o out.json]
+    python -m benchmarks compare base.json head.json [--threshold 0.1]
+
+`compare` exits with status 1 when any case regressed past the threshold.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.cases import CASES, SCALES
+from benchmarks import runner
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Holocron hot-path benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="List benchmark cases")
+
+    run_p = sub.add_parser("run", help="Run benchmarks and save JSON results")
+    run_p.add_argument("--scale", choices=list(SCALES), default="small")
+    run_p.add_argument("-k", dest="patterns", action="append", help="Only cases matching (repeatable)")
+    run_p.add_argument("--repeat", type=int, default=3)
+    run_p.add_argument("--seed", type=int, default=0)
+    run_p.add_argument("--workdir", help="Keep generated input files here between runs")
+    run_p.add_argument("-o", "--output", help="Results file (default .cache/benchmarks/<commit>-<scale>.json)")
+
+    cmp_p = sub.add_parser("compare", help="Compare two result files")
+    cmp_p.add_argument("base")
+    cmp_p.add_argument("head")
+    cmp_p.add_argument("--threshold", type=float, default=runner.DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for name, spec in CASES.items():
+            print(f"  {name:40} [{spec['unit']}] {spec['doc']}")
+        return 0
+
+    if args.command == "run":
+        print(f"🏁 Running benchmarks at scale '{args.scale}'")
+        results = runner.run(args.scale, args.patterns, args.repeat, args.seed, args.workdir)
+        output = args.output or runner.default_output(results)
+        runner.save(results, output)
+        print(f"\nResults saved to {output}")
+        return 0
+
+    report = runner.compare(runner.load(args.base), runner.load(args.head), args.threshold)
+    runner.print_comparison(report, os.path.basename(args.base), os.path.basename(args.head))
+    if report["regressions"]:
+        print(f"\n❌ {len(report['regressions'])} regression(s): {', '.join(report['regressions'])}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
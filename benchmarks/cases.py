@@ -0,0 +1,328 @@
+"""
+benchmarks/cases.py - The hot paths, each driven by synthetic data
+
+A case is a setup function registered with @case. It receives the scale
+parameters and a scratch directory, builds its inputs (not timed) and
+returns (fn, units): fn is the timed call, units the amount of work it
+does in the case's unit (rows, MB, queries...) for throughput figures.
+
+Code that normally talks to PostgreSQL runs against FakeConnection, which
+answers the handful of queries it issues from the generated data.
+"""
+
+import os
+import random
+from typing import Callable, Dict, List, Tuple
+from unittest.mock import patch
+
+from benchmarks import generators
+
+SCALES = {
+    "tiny": {"sv_bytes": 32 * 1024, "scan_rows": 2_000, "recipes": 200, "zones": 40,
+             "characters": 5, "campaigns": 3, "campaign_steps": 8, "combat_lines": 2_000,
+             "path_queries": 10, "plan_targets": 10, "combat_log_mb": 1},
+    "small": {"sv_bytes": 1024 * 1024, "scan_rows": 10_000, "recipes": 2_000, "zones": 200,
+              "characters": 20, "campaigns": 10, "campaign_steps": 15, "combat_lines": 50_000,
+              "path_queries": 50, "plan_targets": 50, "combat_log_mb": 16},
+    "medium": {"sv_bytes": 10 * 1024 * 1024, "scan_rows": 100_000, "recipes": 20_000, "zones": 1_000,
+               "characters": 100, "campaigns": 20, "campaign_steps": 25, "combat_lines": 500_000,
+               "path_queries": 100, "plan_targets": 200, "combat_log_mb": 128},
+    "large": {"sv_bytes": 100 * 1024 * 1024, "scan_rows": 500_000, "recipes": 20_000, "zones": 1_000,
+              "characters": 100, "campaigns": 40, "campaign_steps": 30, "combat_lines": 2_000_000,
+              "path_queries": 200, "plan_targets": 500, "combat_log_mb": 1024},
+}
+
+CASES: Dict[str, Dict] = {}
+
+
+def case(name: str, unit: str):
+    """Register a benchmark setup function under `name`"""
+    def register(setup: Callable[[Dict, str], Tuple[Callable, float]]):
+        CASES[name] = {"setup": setup, "unit": unit, "doc": (setup.__doc__ or '').strip()}
+        return setup
+    return register
+
+
+class FakeCursor:
+    """DB-API cursor answering queries from a list of (substring, handler) routes"""
+
+    def __init__(self, routes: List[Tuple[str, Callable]]):
+        self.routes = routes
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        for fragment, handler in self.routes:
+            if fragment in sql:
+                self.rows = handler(*params)
+                return
+        raise ValueError(f"FakeCursor has no route for: {sql.strip()[:80]}")
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, routes: List[Tuple[str, Callable]]):
+        self.routes = routes
+
+    def cursor(self):
+        return FakeCursor(self.routes)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# ============================================================================
+# Lua parsers
+# ============================================================================
+
+def _saved_variables_file(scale: Dict, workdir: str, seed: int) -> str:
+    path = os.path.join(workdir, f"DataStore_Bench_{scale['sv_bytes']}_{seed}.lua")
+    if not os.path.exists(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generators.saved_variables(scale['sv_bytes'], seed))
+    return path
+
+
+@case("lua_parser.parse_lua_table", unit="MB")
+def lua_slpp(scale, workdir, seed=0):
+    """SLPP-based parser used by /upload_data and DiplomatEngine"""
+    from lua_parser import parse_lua_table
+    path = _saved_variables_file(scale, workdir, seed)
+    return (lambda: parse_lua_table(path)), os.path.getsize(path) / 1e6
+
+
+@case("utils.lua_parser.LuaParser", unit="MB")
+def lua_utils(scale, workdir, seed=0):
+    """Hand-written recursive parser in utils/"""
+    from utils.lua_parser import LuaParser
+    path = _saved_variables_file(scale, workdir, seed)
+    parser = LuaParser()
+    return (lambda: parser.parse_file(path)), os.path.getsize(path) / 1e6
+
+
+# ============================================================================
+# Goblin market
+# ============================================================================
+
+def _goblin_engine(scale, seed):
+    from goblin_engine import GoblinEngine, Item, ItemType, Profession, Recipe
+    from goblin_market_registry import PriceBook
+
+    dag = generators.recipe_dag(scale['recipes'], seed)
+    total_items = 500 + len(dag)
+    item_ids, prices, quantities = generators.ah_scan(scale['scan_rows'], seed, items=total_items,
+                                                      first_item=1)
+    engine = GoblinEngine(tsm_engine=PriceBook.from_listings(item_ids, prices, quantities))
+    engine.items = [Item(i, f"Item {i}", ItemType.MATERIAL, 10 + i % 90, 0.5)
+                    for i in range(1, total_items + 1)]
+    engine.recipes = [Recipe(r["recipe_id"], r["name"], Profession.ALCHEMY, r["reagents"],
+                             r["crafted_item_id"]) for r in dag]
+    return engine
+
+
+@case("goblin.analyze_market", unit="recipes")
+def analyze_market(scale, workdir, seed=0):
+    """Crafting opportunities over every recipe, priced from a scan"""
+    engine = _goblin_engine(scale, seed)
+    return engine.analyze_market, len(engine.recipes)
+
+
+@case("goblin.scan_ingest", unit="rows")
+def scan_ingest(scale, workdir, seed=0):
+    """Loading a shard: the latest scan's listing rows into a PriceBook via ScanLoader"""
+    from goblin_market_registry import DEFAULT_REGION, ScanLoader, make_key
+
+    item_ids, prices, quantities = generators.ah_scan(scale['scan_rows'], seed)
+    # Rows as psycopg2 returns them: one tuple of Python ints per listing
+    rows = list(zip(item_ids.tolist(), prices.tolist(), quantities.tolist()))
+    loader = ScanLoader(lambda: FakeConnection([("FROM auctionhouse.scan_items", lambda realms, faction: rows)]),
+                        realm_groups={})
+    key = make_key(DEFAULT_REGION, "benchmark", "horde")
+    return (lambda: loader(key)), len(rows)
+
+
+# ============================================================================
+# Fabricator
+# ============================================================================
+
+@case("fabricator.build_dependency_graph", unit="nodes")
+def build_dependency_graph(scale, workdir, seed=0):
+    """Dependency graphs for the newest recipes (up to three queries per node)"""
+    from fabricator import Fabricator
+
+    dag = generators.recipe_dag(scale['recipes'], seed)
+    by_item = {r["crafted_item_id"]: r for r in dag}
+    by_recipe = {r["recipe_id"]: r for r in dag}
+
+    def recipe_for(item_id):
+        r = by_item.get(item_id)
+        return [(r["recipe_id"], r["name"], r["min_yield"], r["max_yield"])] if r else []
+
+    routes = [
+        ("FROM fabricator.recipes", recipe_for),
+        ("FROM fabricator.character_recipes", lambda recipe_id: [("Player-1-0000BEEF",)]),
+        ("FROM fabricator.reagents", lambda recipe_id: list(by_recipe[recipe_id]["reagents"].items())),
+    ]
+    fabricator = Fabricator("benchmark")
+    fabricator.get_db = lambda: FakeConnection(routes)
+    targets = [r["crafted_item_id"] for r in dag[-scale['plan_targets']:]]
+
+    def run():
+        return [fabricator.build_dependency_graph(target, 1) for target in targets]
+
+    nodes = sum(graph.number_of_nodes() for graph in run())
+    return run, nodes
+
+
+# ============================================================================
+# Pathfinder
+# ============================================================================
+
+def _pathfinder(scale, seed):
+    from pathfinder_engine import PathfinderEngine
+
+    zones, edges = generators.zone_graph(scale['zones'], seed)
+    engine = PathfinderEngine(db_url=None)
+    for zone_id, info in zones.items():
+        engine.zones[zone_id] = info
+        engine.graph.add_node(zone_id, **info)
+    for source, dest, method, seconds, requirements in edges:
+        engine.graph.add_edge(source, dest, method=method, time=seconds, requirements=requirements)
+    return engine
+
+
+@case("pathfinder.find_shortest_path", unit="queries")
+def pathfinder_queries(scale, workdir, seed=0):
+    """Random point-to-point routes for a Mage"""
+    engine = _pathfinder(scale, seed)
+    rng = random.Random(seed)
+    zone_ids = list(engine.zones)
+    pairs = [(rng.choice(zone_ids), rng.choice(zone_ids)) for _ in range(scale['path_queries'])]
+
+    def run():
+        return [engine.find_shortest_path(a, b, character_class="Mage") for a, b in pairs]
+
+    return run, len(pairs)
+
+
+@case("pathfinder.get_reachable_zones", unit="zones")
+def pathfinder_reachable(scale, workdir, seed=0):
+    """Every zone within 10 minutes of zone 1"""
+    engine = _pathfinder(scale, seed)
+    return (lambda: engine.get_reachable_zones(1, max_time=600)), len(engine.zones)
+
+
+# ============================================================================
+# Codex
+# ============================================================================
+
+@case("codex.build_campaign_matrix", unit="cells")
+def campaign_matrix(scale, workdir, seed=0):
+    """Characters x campaigns status matrix, resolving prerequisites per cell"""
+    import server
+
+    camps, dependencies, titles = generators.campaigns(scale['campaigns'], scale['campaign_steps'], seed)
+    characters = generators.roster(scale['characters'], seed)
+    done = generators.completions(characters, camps, seed)
+    routes = [
+        ("FROM codex.quest_dependencies", lambda quest_id: [(q,) for q in dependencies.get(quest_id, [])]),
+        ("FROM codex.quest_definitions", lambda quest_id: [(titles[quest_id],)] if quest_id in titles else []),
+    ]
+
+    def run():
+        with patch.object(server, 'get_db_connection', lambda: FakeConnection(routes)):
+            return server.build_campaign_matrix(camps, characters, done)
+
+    return run, len(characters) * len(camps)
+
+
+# ============================================================================
+# Combat log
+# ============================================================================
+
+@case("arbiter.process_line", unit="lines")
+def combat_log(scale, workdir, seed=0):
+    """ArbiterEngine's per-line combat log handling"""
+    from arbiter_engine import ArbiterEngine
+
+    lines = generators.combat_log(scale['combat_lines'], seed)
+    engine = ArbiterEngine()
+
+    def run():
+        for line in lines:
+            engine._process_line(line)
+
+    return run, len(lines)
+
+
+def _combat_log_file(scale: Dict, workdir: str, seed: int) -> str:
+    path = os.path.join(workdir, f"WoWCombatLog_{scale['combat_log_mb']}MB_{seed}.txt")
+    if not os.path.exists(path):
+        generators.combat_log_file(path, scale['combat_log_mb'] * 1024 * 1024, seed)
+    return path
+
+
+@case("combat_log.parse", unit="MB")
+def combat_log_parse(scale, workdir, seed=0):
+    """Block reads + timestamp/event per line, parameters left undecoded (target 40 MB/s)"""
+    from combat_log_parser import CombatLogParser
+    path = _combat_log_file(scale, workdir, seed)
+
+    def run():
+        count = 0
+        for _ in CombatLogParser().iter_file(path):
+            count += 1
+        return count
+
+    return run, os.path.getsize(path) / 1e6
+
+
+@case("combat_log.decode", unit="MB")
+def combat_log_decode(scale, workdir, seed=0):
+    """As combat_log.parse, plus splitting every line's quoted parameters (target 15 MB/s)"""
+    from combat_log_parser import CombatLogParser
+    path = _combat_log_file(scale, workdir, seed)
+
+    def run():
+        fields = 0
+        for record in CombatLogParser().iter_file(path):
+            fields += len(record.fields)
+        return fields
+
+    return run, os.path.getsize(path) / 1e6
+
+
+@case("combat_log.encounters", unit="MB")
+def combat_log_encounters(scale, workdir, seed=0):
+    """Offline audit: segment scan + per-encounter analysis on a process pool, cache off"""
+    from encounter_analysis import analyze_log
+    path = os.path.join(workdir, f"WoWCombatLog_encounters_{scale['combat_log_mb']}MB_{seed}.txt")
+    if not os.path.exists(path):
+        generators.combat_log_file(path, scale['combat_log_mb'] * 1024 * 1024, seed, encounters=True)
+
+    def run():
+        return len(analyze_log(path, players=["MyPlayerName"], cache_dir=None)["encounters"])
+
+    return run, os.path.getsize(path) / 1e6
@@ -0,0 +1,205 @@
+"""
+benchmarks/generators.py - Seeded synthetic data at configurable scale
+
+The mock data sets (2 recipes, 8 zones, 3 raids) hide every scaling
+problem. Each generator here takes a size and a seed and returns the same
+data for the same arguments, so timings are comparable across commits.
+"""
+
+import random
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+REALMS = ["Area 52", "Stormrage", "Illidan", "Tichondrius", "Zul'jin", "Mal'Ganis"]
+CLASSES = ["Warrior", "Mage", "Druid", "Priest", "Rogue", "Hunter", "Paladin", "Shaman"]
+METHODS = ["FLIGHT_PATH", "PORTAL", "BOAT", "HEARTHSTONE", "MAGE_TELEPORT", "ENGINEER_WORMHOLE"]
+COMBAT_EVENTS = ["SPELL_DAMAGE", "SPELL_CAST_SUCCESS", "SPELL_PERIODIC_DAMAGE", "SWING_DAMAGE",
+                 "SPELL_HEAL", "SPELL_AURA_APPLIED", "SPELL_ENERGIZE", "UNIT_DIED"]
+
+
+def _lua_string(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def saved_variables(target_bytes: int, seed: int = 0, name: str = "DataStore_ReputationsDB") -> str:
+    """
+    A DataStore-style SavedVariables file of roughly `target_bytes`:
+    characters with nested reputation and item tables.
+    """
+    rng = random.Random(seed)
+    parts = [f"{name} = {{\n", '\t["global"] = {\n', '\t\t["Characters"] = {\n']
+    size = sum(len(p) for p in parts)
+    index = 0
+    while size < target_bytes:
+        realm = REALMS[index % len(REALMS)]
+        lines = [f'\t\t\t["Default.{realm}.Char{index}"] = {{\n',
+                 f'\t\t\t\t["lastUpdate"] = {1700000000 + rng.randrange(10**7)},\n',
+                 f'\t\t\t\t["class"] = {_lua_string(rng.choice(CLASSES))},\n',
+                 '\t\t\t\t["Factions"] = {\n']
+        for _ in range(40):
+            lines.append(f'\t\t\t\t\t[{rng.randrange(2000, 2700)}] = {rng.randrange(0, 42000)},\n')
+        lines.append('\t\t\t\t},\n\t\t\t\t["Items"] = {\n')
+        for _ in range(60):
+            lines.append(f'\t\t\t\t\t"|cff0070dd|Hitem:{rng.randrange(1, 230000)}::::::::70:::::|h[Item]|h|r", -- {rng.randrange(1, 200)}\n')
+        lines.append('\t\t\t\t},\n\t\t\t\t["isOnline"] = false,\n\t\t\t},\n')
+        chunk = ''.join(lines)
+        parts.append(chunk)
+        size += len(chunk)
+        index += 1
+    parts.append('\t\t},\n\t},\n\t["profileKeys"] = {\n\t},\n}\n')
+    return ''.join(parts)
+
+
+def ah_scan(rows: int, seed: int = 0, items: int = None,
+            first_item: int = 190000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(item_ids, unit prices in copper, quantities) for `rows` auction listings"""
+    rng = np.random.default_rng(seed)
+    items = items or max(rows // 20, 1)
+    item_ids = rng.integers(first_item, first_item + items, size=rows, dtype=np.int64)
+    base = 10000 + (item_ids % 997) * 2500
+    prices = (base * rng.lognormal(0.0, 0.25, size=rows)).astype(np.int64)
+    quantities = rng.integers(1, 200, size=rows, dtype=np.int64)
+    return item_ids, prices, quantities
+
+
+def recipe_dag(recipes: int, seed: int = 0, base_materials: int = 500,
+               max_reagents: int = 5) -> List[Dict]:
+    """
+    Recipes whose reagents are either base materials or the output of an
+    earlier recipe, so the crafting graph is acyclic by construction.
+
+    Item ids: base materials are 1..base_materials, recipe i crafts
+    base_materials + 1 + i.
+    """
+    rng = random.Random(seed)
+    result = []
+    for i in range(recipes):
+        crafted = base_materials + 1 + i
+        reagents = {}
+        for _ in range(rng.randint(1, max_reagents)):
+            if i and rng.random() < 0.35:
+                reagent = base_materials + 1 + rng.randrange(i)
+            else:
+                reagent = rng.randint(1, base_materials)
+            reagents[reagent] = rng.randint(1, 10)
+        min_yield = rng.randint(1, 3)
+        result.append({
+            "recipe_id": 400000 + i,
+            "name": f"Synthetic Recipe {i}",
+            "crafted_item_id": crafted,
+            "min_yield": min_yield,
+            "max_yield": min_yield + rng.randint(0, 2),
+            "reagents": reagents,
+        })
+    return result
+
+
+def zone_graph(zones: int, seed: int = 0, degree: int = 4) -> Tuple[Dict[int, Dict], List[Tuple]]:
+    """
+    ({zone_id: {name, expansion}}, [(source, dest, method, seconds, requirements)])
+    A ring keeps every zone reachable; random shortcuts add realistic fan-out.
+    """
+    rng = random.Random(seed)
+    zone_ids = list(range(1, zones + 1))
+    zone_info = {z: {"name": f"Zone {z}", "expansion": f"Expansion {z % 10}"} for z in zone_ids}
+    edges = []
+    for z in zone_ids:
+        nxt = z % zones + 1
+        edges.append((z, nxt, "FLIGHT_PATH", rng.randint(30, 240), ""))
+        edges.append((nxt, z, "FLIGHT_PATH", rng.randint(30, 240), ""))
+        for _ in range(degree - 2):
+            dest = rng.choice(zone_ids)
+            if dest == z:
+                continue
+            method = rng.choice(METHODS)
+            requirements = {"MAGE_TELEPORT": "Mage", "ENGINEER_WORMHOLE": "Engineer"}.get(method, "")
+            edges.append((z, dest, method, rng.randint(5, 120), requirements))
+    return zone_info, edges
+
+
+def roster(characters: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [{
+        "guid": f"Player-{1000 + i}-{i:08X}",
+        "name": f"Alt{i}",
+        "realm": rng.choice(REALMS),
+        "class": rng.choice(CLASSES),
+        "level": 80,
+    } for i in range(characters)]
+
+
+def campaigns(count: int, steps: int, seed: int = 0) -> Tuple[List[Dict], Dict[int, List[int]], Dict[int, str]]:
+    """
+    (campaigns, {quest_id: [required quest ids]}, {quest_id: title}).
+    Each campaign is a prerequisite chain with occasional side requirements.
+    """
+    rng = random.Random(seed)
+    result, dependencies, titles = [], {}, {}
+    quest_id = 80000
+    for c in range(count):
+        quest_ids = []
+        for s in range(steps):
+            quest_id += 1
+            titles[quest_id] = f"Campaign {c} Step {s}"
+            requires = [quest_ids[-1]] if quest_ids else []
+            if len(quest_ids) > 2 and rng.random() < 0.2:
+                requires.append(rng.choice(quest_ids[:-1]))
+            dependencies[quest_id] = requires
+            quest_ids.append(quest_id)
+        result.append({"campaign_id": c + 1, "name": f"Campaign {c}", "quest_ids": quest_ids})
+    return result, dependencies, titles
+
+
+def completions(characters: List[Dict], campaign_list: List[Dict], seed: int = 0) -> Dict[str, set]:
+    """Each character has completed a random prefix of every campaign"""
+    rng = random.Random(seed)
+    done = {}
+    for char in characters:
+        ids = set()
+        for camp in campaign_list:
+            ids.update(camp["quest_ids"][:rng.randint(0, len(camp["quest_ids"]))])
+        done[char["guid"]] = ids
+    return done
+
+
+def combat_log(lines: int, seed: int = 0, player: str = "MyPlayerName", start: int = 0) -> List[str]:
+    """WoWCombatLog.txt lines (advanced logging off) with a realistic event mix"""
+    rng = random.Random(seed)
+    out = []
+    for i in range(start, start + lines):
+        seconds = i * 0.05
+        stamp = f"10/18 21:{int(seconds // 60) % 60:02d}:{seconds % 60:06.3f}"
+        event = rng.choices(COMBAT_EVENTS, weights=[30, 15, 20, 15, 10, 6, 3, 1])[0]
+        source = player if rng.random() < 0.3 else f"Raider{rng.randrange(20)}-Area52"
+        spell_id = rng.randrange(1000, 450000)
+        guid = f"Player-1-{zlib.crc32(source.encode()):08X}"    # one stable GUID per unit
+        fields = [f"{stamp}  {event}", guid, f'"{source}"', "0x511", "0x0",
+                  f"Creature-0-{rng.randrange(10**6)}", '"Training Dummy"', "0x10a48", "0x0",
+                  str(spell_id), '"Synthetic, Spell"', "0x1",
+                  str(rng.randrange(100, 250000)), "-1", "1", "0", "0", "0", "nil", "nil", "nil"]
+        out.append(','.join(fields) + '\n')
+    return out
+
+
+def combat_log_file(path: str, size_bytes: int, seed: int = 0, batch: int = 50_000,
+                    encounters: bool = False) -> int:
+    """
+    Write a synthetic combat log of about `size_bytes` without holding it in memory.
+    With `encounters`, every batch is wrapped in ENCOUNTER_START/ENCOUNTER_END lines.
+    """
+    written, start = 0, 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < size_bytes:
+            lines = combat_log(batch, seed + start, start=start)
+            if encounters:
+                first, last = lines[0][:lines[0].index('  ')], lines[-1][:lines[-1].index('  ')]
+                encounter_id = 2900 + start // batch
+                lines = ([f'{first}  ENCOUNTER_START,{encounter_id},"Synthetic Boss",16,20,2657\n'] + lines +
+                         [f'{last}  ENCOUNTER_END,{encounter_id},"Synthetic Boss",16,20,1,{batch * 50}\n'])
+            chunk = ''.join(lines)
+            f.write(chunk)
+            written += len(chunk)
+            start += batch
+    return written
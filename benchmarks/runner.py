@@ -0,0 +1,149 @@
+"""
+benchmarks/runner.py - Run cases, save JSON results, compare two runs
+"""
+
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.cases import CASES, SCALES
+
+DEFAULT_THRESHOLD = 0.10   # flag cases more than 10% slower
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.check_output(['git', *args], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def environment() -> Dict:
+    return {
+        "commit": _git('rev-parse', 'HEAD'),
+        "dirty": bool(_git('status', '--porcelain', '--untracked-files=no')),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.time(),
+    }
+
+
+def select(patterns: List[str] = None) -> List[str]:
+    names = list(CASES)
+    if not patterns:
+        return names
+    return [n for n in names if any(fnmatch.fnmatch(n, p) or p in n for p in patterns)]
+
+
+def run_case(name: str, scale: Dict, workdir: str, repeat: int = 3, seed: int = 0) -> Dict:
+    """Set up one case and time `repeat` calls; setup is not timed"""
+    spec = CASES[name]
+    fn, units = spec["setup"](scale, workdir, seed)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        "unit": spec["unit"],
+        "units": units,
+        "seconds": [round(t, 6) for t in times],
+        "min": round(best, 6),
+        "median": round(statistics.median(times), 6),
+        "throughput": round(units / best, 3) if best > 0 else None,
+    }
+
+
+def run(scale_name: str = "small", patterns: List[str] = None, repeat: int = 3,
+        seed: int = 0, workdir: str = None, quiet: bool = False) -> Dict:
+    scale = SCALES[scale_name]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="holocron-bench-") as tmp:
+        for name in select(patterns):
+            try:
+                results[name] = run_case(name, scale, workdir or tmp, repeat, seed)
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+            if not quiet:
+                _print_result(name, results[name])
+    return {"meta": {**environment(), "scale": scale_name, "params": scale,
+                     "seed": seed, "repeat": repeat},
+            "results": results}
+
+
+def _print_result(name: str, result: Dict):
+    if "error" in result:
+        print(f"  {name:40} ERROR {result['error']}")
+        return
+    print(f"  {name:40} {result['min'] * 1000:10.1f} ms   "
+          f"{result['throughput']:>12,.1f} {result['unit']}/s")
+
+
+def compare(base: Dict, head: Dict, threshold: float = DEFAULT_THRESHOLD) -> Dict:
+    """
+    Compare best times case by case. A case regresses when head is more than
+    `threshold` slower than base; it improves when more than `threshold` faster.
+    """
+    rows = []
+    for name in sorted(set(base["results"]) | set(head["results"])):
+        b = base["results"].get(name, {})
+        h = head["results"].get(name, {})
+        if "min" not in b or "min" not in h:
+            rows.append({"case": name, "status": "missing" if b and h else ("new" if h else "removed"),
+                         "base": b.get("min"), "head": h.get("min")})
+            continue
+        ratio = h["min"] / b["min"] if b["min"] else float('inf')
+        status = "same"
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improvement"
+        rows.append({"case": name, "status": status, "base": b["min"], "head": h["min"],
+                     "ratio": round(ratio, 3)})
+
+    warnings = []
+    if base["meta"].get("scale") != head["meta"].get("scale"):
+        warnings.append(f"scales differ: {base['meta'].get('scale')} vs {head['meta'].get('scale')}")
+    return {
+        "rows": rows,
+        "regressions": [r["case"] for r in rows if r["status"] == "regression"],
+        "warnings": warnings,
+    }
+
+
+def print_comparison(report: Dict, base_label: str, head_label: str):
+    print(f"\n{'case':40} {base_label[:12]:>12} {head_label[:12]:>12}   change")
+    print("-" * 80)
+    for row in report["rows"]:
+        if "ratio" in row:
+            change = f"{(row['ratio'] - 1) * 100:+7.1f}%"
+            marker = {"regression": "  ❌", "improvement": "  ✅"}.get(row["status"], "")
+            print(f"{row['case']:40} {row['base'] * 1000:10.1f}ms {row['head'] * 1000:10.1f}ms   {change}{marker}")
+        else:
+            print(f"{row['case']:40} {'':>12} {'':>12}   {row['status']}")
+    for warning in report["warnings"]:
+        print(f"⚠️  {warning}")
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(results: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def default_output(results: Dict) -> str:
+    commit = (results["meta"]["commit"] or "nocommit")[:10]
+    return os.path.join('.cache', 'benchmarks', f"{commit}-{results['meta']['scale']}.json")
@@ -0,0 +1,293 @@
+"""
+blizzard_client.py - Shared client for Blizzard's WoW Game Data API
+
+One client for every importer (recipes, reagents, quests, journal):
+- OAuth token cached per process and refreshed before expiry
+- Keep-alive connection pooling (one Session per worker thread)
+- Token-bucket rate limiting under Blizzard's per-second quota
+- On-disk ETag/Last-Modified cache; unchanged resources cost a 304
+- Concurrent fetch_many() for crawling lists of IDs
+- BulkUpserter: execute_values batches + resumable crawl checkpoints
+
+Usage:
+    from blizzard_client import get_client, BulkUpserter
+
+    client = get_client()
+    for recipe_id, details in client.fetch_many(recipe_ids, lambda r: f"/data/wow/recipe/{r}"):
+        ...
+
+Docs: https://develop.battle.net/documentation/world-of-warcraft/game-data-apis
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from utils.http_fetch import TokenBucket, ResponseCache, Checkpoint, thread_session
+
+# Blizzard allows 100 requests/second per client; stay a little under
+DEFAULT_RATE = 90
+DEFAULT_WORKERS = 8
+
+
+class BlizzardAPIClient:
+    """Client for Blizzard's WoW Game Data API"""
+
+    def __init__(self, client_id, client_secret, region='us', locale='en_US',
+                 rate: float = DEFAULT_RATE, max_workers: int = DEFAULT_WORKERS,
+                 cache_dir: Optional[str] = '.cache/blizzard',
+                 oauth_url: str = None, api_url: str = None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.region = region
+        self.locale = locale
+        self.max_workers = max_workers
+        self.oauth_url = oauth_url or f"https://{region}.battle.net/oauth/token"
+        self.api_url = (api_url or f"https://{region}.api.blizzard.com").rstrip('/')
+
+        self.rate_limiter = TokenBucket(rate)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+
+        self.token = None
+        self.token_expires = 0
+        self._token_lock = threading.Lock()
+
+        self.stats = {"requests": 0, "not_modified": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Auth
+    # ------------------------------------------------------------------
+
+    def get_access_token(self, force_refresh: bool = False):
+        """Get OAuth access token (shared by all worker threads)"""
+        with self._token_lock:
+            if not force_refresh and self.token and time.time() < self.token_expires:
+                return self.token
+
+            response = thread_session(self.max_workers).post(
+                self.oauth_url,
+                data={'grant_type': 'client_credentials'},
+                auth=(self.client_id, self.client_secret),
+                timeout=15,
+            )
+            response.raise_for_status()
+
+            data = response.json()
+            self.token = data['access_token']
+            self.token_expires = time.time() + data['expires_in'] - 60  # 60s buffer
+
+            return self.token
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get(self, path: str, namespace: str = 'static', params: Dict = None,
+            retries: int = 3) -> Optional[Dict]:
+        """
+        GET an API path (e.g. "/data/wow/recipe/1234")
+
+        Returns the decoded JSON body, or None for non-200 responses.
+        Cached bodies are revalidated with If-None-Match/If-Modified-Since.
+        """
+        query = {'namespace': f'{namespace}-{self.region}', 'locale': self.locale}
+        if params:
+            query.update(params)
+
+        cache_key = (self.region, path, sorted(query.items()))
+        cached = self.cache.get(cache_key) if self.cache else None
+
+        for attempt in range(retries + 1):
+            headers = {'Authorization': f'Bearer {self.get_access_token()}'}
+            if cached:
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    headers['If-Modified-Since'] = cached['last_modified']
+
+            self.rate_limiter.acquire()
+            self._count('requests')
+            response = thread_session(self.max_workers).get(
+                f"{self.api_url}{path}", params=query, headers=headers, timeout=15,
+            )
+
+            if response.status_code == 304 and cached:
+                self._count('not_modified')
+                return cached['body']
+
+            if response.status_code == 200:
+                body = response.json()
+                if self.cache and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+                    self.cache.set(cache_key, {
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'body': body,
+                    })
+                return body
+
+            if response.status_code == 401 and attempt < retries:
+                self.get_access_token(force_refresh=True)
+                continue
+
+            if response.status_code in (429, 500, 502, 503, 504) and attempt < retries:
+                retry_after = response.headers.get('Retry-After')
+                time.sleep(float(retry_after) if retry_after else 0.5 * (2 ** attempt))
+                continue
+
+            break
+
+        self._count('errors')
+        print(f"❌ {path} failed: {response.status_code}")
+        return None
+
+    def fetch_many(self, keys: Iterable, path_for: Callable[[object], str],
+                   namespace: str = 'static',
+                   checkpoint: Checkpoint = None) -> Iterator[Tuple[object, Optional[Dict]]]:
+        """
+        Fetch one resource per key concurrently.
+
+        Yields (key, body) on the calling thread as responses arrive (order is
+        not preserved). Keys already recorded in `checkpoint` are skipped.
+        """
+        keys = [k for k in keys if checkpoint is None or not checkpoint.is_done(k)]
+        if not keys:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.get, path_for(key), namespace): key for key in keys}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    body = future.result()
+                except Exception as e:
+                    self._count('errors')
+                    print(f"  ⚠️  Error fetching {key}: {e}")
+                    body = None
+                yield key, body
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+
+    def get_profession_index(self):
+        """Get list of all professions"""
+        return self.get("/data/wow/profession/index") or {}
+
+    def get_profession_details(self, profession_id):
+        """Get profession details including skill tiers"""
+        return self.get(f"/data/wow/profession/{profession_id}") or {}
+
+    def get_skill_tier(self, profession_id, skill_tier_id):
+        """Get specific skill tier with recipes"""
+        return self.get(f"/data/wow/profession/{profession_id}/skill-tier/{skill_tier_id}") or {}
+
+    def get_recipe_details(self, recipe_id):
+        """Get detailed recipe information including materials"""
+        return self.get(f"/data/wow/recipe/{recipe_id}")
+
+    def get_quest_categories(self):
+        """Get list of quest categories"""
+        return self.get("/data/wow/quest/category/index") or {}
+
+    def get_quests_by_category(self, category_id):
+        """Get quests in a specific category"""
+        return self.get(f"/data/wow/quest/category/{category_id}") or {}
+
+    def get_quest_details(self, quest_id):
+        """Get detailed quest information"""
+        return self.get(f"/data/wow/quest/{quest_id}")
+
+    def get_journal_instance(self, instance_id):
+        """Get instance data from the encounter journal"""
+        return self.get(f"/data/wow/journal-instance/{instance_id}")
+
+    def get_journal_encounter(self, encounter_id):
+        """Get encounter details including loot and abilities"""
+        return self.get(f"/data/wow/journal-encounter/{encounter_id}")
+
+
+class BulkUpserter:
+    """
+    Buffers rows and writes them with psycopg2's execute_values.
+
+    `sql` must contain a single `VALUES %s` placeholder (typically an
+    INSERT ... ON CONFLICT DO UPDATE). Checkpoint keys attached to rows are
+    only recorded after the batch containing them has been committed, so a
+    crash never marks unwritten work as done.
+
+    Set `unique_column` to the index of the conflict key: Postgres rejects an
+    ON CONFLICT DO UPDATE that touches the same row twice in one statement,
+    so only the last row per key in a batch is sent.
+    """
+
+    def __init__(self, conn, sql: str, page_size: int = 500,
+                 checkpoint: Checkpoint = None, template: str = None,
+                 unique_column: int = None):
+        self.conn = conn
+        self.sql = sql
+        self.page_size = page_size
+        self.checkpoint = checkpoint
+        self.template = template
+        self.unique_column = unique_column
+        self.rows = []
+        self.pending_keys = []
+        self.written = 0
+
+    def add(self, row: Tuple):
+        self.rows.append(row)
+        if len(self.rows) >= self.page_size:
+            self.flush()
+
+    def complete(self, key):
+        """Mark a crawl key done once everything added so far is committed"""
+        if self.checkpoint is not None:
+            self.pending_keys.append(key)
+        if not self.rows:
+            self.flush()
+
+    def flush(self):
+        from psycopg2.extras import execute_values
+
+        if self.rows:
+            rows = self.rows
+            if self.unique_column is not None:
+                rows = list({row[self.unique_column]: row for row in rows}.values())
+            cur = self.conn.cursor()
+            execute_values(cur, self.sql, rows, template=self.template,
+                           page_size=self.page_size)
+            self.conn.commit()
+            cur.close()
+            self.written += len(rows)
+            self.rows = []
+
+        if self.pending_keys:
+            self.checkpoint.mark_done_many(self.pending_keys)
+            self.pending_keys = []
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(**kwargs) -> Optional[BlizzardAPIClient]:
+    """
+    Process-wide client built from BLIZZARD_CLIENT_ID/BLIZZARD_CLIENT_SECRET,
+    so every importer shares one token and connection pool.
+    Returns None when credentials are missing.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            client_id = os.getenv('BLIZZARD_CLIENT_ID')
+            client_secret = os.getenv('BLIZZARD_CLIENT_SECRET')
+            if not client_id or not client_secret:
+                return None
+            _client = BlizzardAPIClient(client_id, client_secret, **kwargs)
+    return _client
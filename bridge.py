@@ -8,11 +8,14 @@ import hashlib
 from datetime import datetime
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from delta_sync import DeltaClient, encode_payload
+from lua_parser import parse_lua_string
 
 # CONFIGURATION
 # TODO: User needs to set the correct Account Name
 WOW_SAVED_VARIABLES_PATH = "/Applications/World of Warcraft/_retail_/WTF/Account/YOUR_ACCOUNT_NAME_HERE/SavedVariables"
 SERVER_URL = "http://localhost:5001/upload_data"
+DELTA_URL = SERVER_URL.replace("/upload_data", "/upload_delta")
 
 class MirrorClient:
     def __init__(self, server_url, wtf_path):
@@ -105,6 +108,11 @@ class MirrorClient:
             print(f"[Mirror] Sync failed: {e}")
 
 class SavedVariablesHandler(FileSystemEventHandler):
+    def __init__(self):
+        super().__init__()
+        self.delta = DeltaClient()
+        self.last_sent = {}  # source -> hash of the file content last accepted by the server
+
     def on_modified(self, event):
         if event.is_directory:
             return
@@ -138,31 +146,78 @@ class SavedVariablesHandler(FileSystemEventHandler):
 
     def process_lua_file(self, filepath, filename):
         """
-        Reads the Lua file, attempts to parse it (naive parsing or using a library),
-        and sends it to the server.
+        Reads the Lua file, parses it locally and sends only the changed
+        subtrees to /upload_delta (see delta_sync.py). Falls back to a full
+        upload of the raw content when parsing fails or the server has no
+        delta endpoint.
         """
         try:
-            # TODO: Implement robust Lua to JSON parsing. 
-            # For now, we will just read the raw content and send it wrapped.
-            # In a real scenario, we'd use slpp or similar to parse Lua tables to Python dicts.
-            
             with open(filepath, 'r', encoding='utf-8') as f:
                 content = f.read()
 
+            source = filename.replace(".lua", "")
+            content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            if self.last_sent.get(source) == content_hash:
+                print(f"{filename} unchanged since last upload")
+                return
+
+            parsed = parse_lua_string(content, filename)
+            if parsed and self.send_delta(source, parsed):
+                self.last_sent[source] = content_hash
+                return
+
             payload = {
-                "source": filename.replace(".lua", ""),
-                "data": content # Sending raw content for server to parse for now
+                "source": source,
+                "data": content # Raw content, parsed by the server
             }
 
             response = requests.post(SERVER_URL, json=payload)
-            if response.status_code == 200:
+            if response.status_code == 202:
+                print(f"Uploaded {filename} (queued as job {response.json().get('job_id')})")
+            elif response.status_code == 200:
                 print(f"Successfully uploaded {filename}")
             else:
                 print(f"Failed to upload {filename}: {response.text}")
+                return
+            # The server's stored state was replaced wholesale
+            self.delta.forget(source)
+            self.last_sent[source] = content_hash
 
         except Exception as e:
             print(f"Error processing {filename}: {e}")
 
+    def send_delta(self, source, parsed):
+        """
+        Upload the subtrees that changed since the server's last acknowledged
+        state. Returns False when the caller should fall back to a full upload.
+        """
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        for full in (False, True):
+            payload, hashes = self.delta.build(source, parsed, full=full)
+            if payload is None:
+                print(f"{source}: no changed sections")
+                return True
+
+            body = encode_payload(payload)
+            try:
+                response = requests.post(DELTA_URL, data=body, headers=headers)
+            except requests.exceptions.RequestException as e:
+                print(f"Delta upload of {source} failed: {e}")
+                return False
+
+            if response.status_code == 200:
+                self.delta.acknowledge(source, hashes)
+                print(f"Uploaded {len(payload['changed'])} changed / {len(payload['removed'])} removed "
+                      f"sections of {source} ({len(body)} bytes gzipped)")
+                return True
+            if response.status_code != 409:
+                print(f"Delta upload of {source} rejected ({response.status_code}), sending full file")
+                return False
+            # Server state differs from what we last sent: resend every section
+            print(f"{source}: server state out of sync, resending all sections")
+            self.delta.forget(source)
+        return False
+
 if __name__ == "__main__":
     print(f"Starting Holocron Bridge...")
     print(f"Watching: {WOW_SAVED_VARIABLES_PATH}")
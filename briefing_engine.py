@@ -8,11 +8,27 @@ from typing import List, Dict, Any
 from datetime import datetime
 import random
 
+from fanout import FanOut, Section
+
 class BriefingEngine:
     """
     Aggregates data from other engines to generate a prioritized briefing.
     """
     
+    # Section -> (deadline seconds, memo TTL seconds)
+    SECTION_POLICY = {
+        "summary": (1.0, 60),
+        "emissaries": (1.0, 120),
+        "scout": (1.0, 30),
+        "paragon": (1.0, 120),
+        "vault": (1.0, 300),
+        "knowledge": (1.0, 300),
+        "logistics": (1.0, 60),
+        "museum": (2.0, 300),
+        "market": (2.0, 60),
+        "progression": (1.0, 600),
+    }
+    
     def __init__(self, scout, diplomat, warden, vault, knowledge, goblin, quartermaster=None, museum=None):
         self.scout = scout
         self.diplomat = diplomat
@@ -22,43 +38,54 @@ class BriefingEngine:
         self.goblin = goblin
         self.quartermaster = quartermaster
         self.museum = museum
+        self._fanout = None
         
     def generate_briefing(self) -> Dict[str, Any]:
         """
         Generate the full briefing data structure.
+        
+        Sections run in parallel with their own deadlines; late or failing
+        sections fall back to their last value (or empty) and are flagged in
+        "sections".
         """
-        print("DEBUG: Starting generate_briefing")
         now = datetime.now()
         
-        # 1. Executive Summary
-        print("DEBUG: Generating Executive Summary...")
-        summary = self._generate_executive_summary()
-        print("DEBUG: Executive Summary Done")
+        builders = {
+            # 1. Executive Summary
+            "summary": (self._generate_executive_summary, {}),
+            # 2. Action Items, one section per source engine (in display order)
+            "emissaries": (self._emissary_items, []),
+            "scout": (self._scout_items, []),
+            "paragon": (self._paragon_items, []),
+            "vault": (self._vault_items, []),
+            "knowledge": (self._knowledge_items, []),
+            "logistics": (self._collect_logistics_items, []),
+            "museum": (self._collect_museum_items, []),
+            # 3. Market Opportunities
+            "market": (self._get_market_highlights, []),
+            # 4. Progression Status
+            "progression": (self._get_progression_status, {}),
+        }
+        if self._fanout is None:
+            self._fanout = FanOut(max_workers=len(builders), name="briefing")
+        results = self._fanout.run({
+            name: Section(fn, timeout=self.SECTION_POLICY[name][0],
+                          ttl=self.SECTION_POLICY[name][1], fallback=fallback)
+            for name, (fn, fallback) in builders.items()
+        })
         
-        # 3. Collect Action Items
         action_items = []
-        action_items.extend(self._collect_action_items())
-        action_items.extend(self._collect_logistics_items())
-        action_items.extend(self._collect_museum_items())
-        print("DEBUG: Action Items Done")
-        
-        # 3. Market Opportunities
-        print("DEBUG: Getting Market Highlights...")
-        market_opps = self._get_market_highlights()
-        print("DEBUG: Market Highlights Done")
-        
-        # 4. Progression Status
-        print("DEBUG: Getting Progression Status...")
-        progression = self._get_progression_status()
-        print("DEBUG: Progression Status Done")
+        for name in ("emissaries", "scout", "paragon", "vault", "knowledge", "logistics", "museum"):
+            action_items.extend(results[name].value)
         
         return {
             "date": now.strftime("%A, %B %d, %Y"),
             "greeting": self._get_greeting(now),
-            "summary": summary,
+            "summary": results["summary"].value,
             "action_items": action_items,
-            "market": market_opps,
-            "progression": progression
+            "market": results["market"].value,
+            "progression": results["progression"].value,
+            "sections": {name: result.to_dict() for name, result in results.items()}
         }
         
     def _get_greeting(self, now: datetime) -> str:
@@ -82,9 +109,12 @@ class BriefingEngine:
         
     def _collect_action_items(self) -> List[Dict]:
         """Aggregate and sort actionable items"""
-        items = []
+        return (self._emissary_items() + self._scout_items() + self._paragon_items()
+                + self._vault_items() + self._knowledge_items())
         
-        # Diplomat Emissaries
+    def _emissary_items(self) -> List[Dict]:
+        """Diplomat Emissaries"""
+        items = []
         emissaries = self.diplomat.get_active_emissaries()
         for emissary in emissaries:
             if emissary['is_urgent'] or emissary['days_remaining'] <= 1:
@@ -103,8 +133,11 @@ class BriefingEngine:
                     "action": "Plan Route",
                     "link": "/diplomat"
                 })
-
-        # Scout Alerts (Critical)
+        return items
+        
+    def _scout_items(self) -> List[Dict]:
+        """Scout Alerts (Critical)"""
+        items = []
         alerts = self.scout.get_alerts()
         for alert in alerts:
             if alert['urgency'] == 'Critical':
@@ -115,8 +148,11 @@ class BriefingEngine:
                     "action": "Go Now",
                     "link": "/scout"
                 })
-                
-        # Diplomat Opportunities (High)
+        return items
+        
+    def _paragon_items(self) -> List[Dict]:
+        """Diplomat Opportunities (High)"""
+        items = []
         diplomat_data = self.diplomat.get_opportunities()
         for opp in diplomat_data:
             if opp.get('percent', 0) >= 90:
@@ -127,8 +163,11 @@ class BriefingEngine:
                     "action": "Complete WQs",
                     "link": "/diplomat"
                 })
-                
-        # Vault (Medium)
+        return items
+        
+    def _vault_items(self) -> List[Dict]:
+        """Vault (Medium)"""
+        items = []
         vault_summary = self.vault.get_status()['summary']
         if vault_summary['unlocked_slots'] < 3:
              items.append({
@@ -138,8 +177,11 @@ class BriefingEngine:
                 "action": "Run M+ or Raid",
                 "link": "/vault"
             })
-            
-        # Knowledge (Medium)
+        return items
+        
+    def _knowledge_items(self) -> List[Dict]:
+        """Knowledge (Medium)"""
+        items = []
         knowledge = self.knowledge.get_status()
         if knowledge['weekly_progress'] < 100:
             items.append({
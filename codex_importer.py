@@ -1,62 +1,19 @@
-import requests
 import json
-import os
 from dataclasses import dataclass, asdict
 from typing import List, Dict, Optional
 
+from blizzard_client import get_client
+
 # CONFIGURATION
-CLIENT_ID = os.getenv("BLIZZARD_CLIENT_ID")
-CLIENT_SECRET = os.getenv("BLIZZARD_CLIENT_SECRET")
 REGION = "us"
 LOCALE = "en_US"
 
-class BlizzardAPI:
-    def __init__(self, client_id, client_secret):
-        self.client_id = client_id
-        self.client_secret = client_secret
-        self.token = None
-        
-    def get_token(self):
-        """Get OAuth token"""
-        url = f"https://{REGION}.battle.net/oauth/token"
-        data = {"grant_type": "client_credentials"}
-        auth = (self.client_id, self.client_secret)
-        response = requests.post(url, data=data, auth=auth)
-        if response.status_code == 200:
-            self.token = response.json()["access_token"]
-            return True
-        print(f"Failed to get token: {response.text}")
-        return False
-        
-    def get_journal_instance(self, instance_id):
-        """Get instance details from Journal API"""
-        url = f"https://{REGION}.api.blizzard.com/data/wow/journal-instance/{instance_id}"
-        params = {
-            "namespace": f"static-{REGION}",
-            "locale": LOCALE,
-            "access_token": self.token
-        }
-        return requests.get(url, params=params).json()
-
-    def get_journal_encounter(self, encounter_id):
-        """Get encounter details including loot and abilities"""
-        url = f"https://{REGION}.api.blizzard.com/data/wow/journal-encounter/{encounter_id}"
-        params = {
-            "namespace": f"static-{REGION}",
-            "locale": LOCALE,
-            "access_token": self.token
-        }
-        return requests.get(url, params=params).json()
-
 def main():
-    if not CLIENT_ID or not CLIENT_SECRET:
+    api = get_client(region=REGION, locale=LOCALE)
+    if api is None:
         print("Please set BLIZZARD_CLIENT_ID and BLIZZARD_CLIENT_SECRET env vars.")
         return
 
-    api = BlizzardAPI(CLIENT_ID, CLIENT_SECRET)
-    if not api.get_token():
-        return
-
     # Target Instances (Nerub-ar Palace, The Stonevault)
     target_instances = [1293, 1269] 
     
@@ -68,6 +25,8 @@ def main():
     for inst_id in target_instances:
         print(f"Fetching Instance {inst_id}...")
         inst_data = api.get_journal_instance(inst_id)
+        if not inst_data:
+            continue
         
         codex_data["instances"].append({
             "id": inst_data["id"],
@@ -77,10 +36,15 @@ def main():
             "location": inst_data.get("location", {}).get("name", "Unknown")
         })
         
-        for enc_ref in inst_data.get("encounters", []):
-            enc_id = enc_ref["id"]
-            print(f"  Fetching Encounter {enc_id} ({enc_ref['name']})...")
-            enc_data = api.get_journal_encounter(enc_id)
+        # Fetch every encounter in the instance concurrently
+        enc_refs = {enc_ref["id"]: enc_ref for enc_ref in inst_data.get("encounters", [])}
+        print(f"  Fetching {len(enc_refs)} encounters...")
+        instance_encounters = []
+        for enc_id, enc_data in api.fetch_many(
+                enc_refs, lambda eid: f"/data/wow/journal-encounter/{eid}"):
+            if not enc_data:
+                continue
+            enc_ref = enc_refs[enc_id]
             
             # Process Abilities (Sections)
             abilities = []
@@ -105,7 +69,7 @@ def main():
                     "ilvl": 0 # Requires context
                 })
 
-            codex_data["encounters"].append({
+            instance_encounters.append({
                 "id": enc_data["id"],
                 "name": enc_data["name"],
                 "instance_id": inst_id,
@@ -114,6 +78,10 @@ def main():
                 "abilities": abilities[:5], # Limit for demo
                 "loot": loot[:5]
             })
+        
+        # Responses arrive out of order; keep journal boss order
+        instance_encounters.sort(key=lambda enc: enc["order"])
+        codex_data["encounters"].extend(instance_encounters)
 
     # Save to JSON
     with open("codex_data.json", "w") as f:
@@ -0,0 +1,374 @@
+"""
+combat_log_parser.py - WoWCombatLog.txt line parser
+
+Consumers used to line.split(',') every line (which breaks on quoted names
+such as "Synthetic, Spell") and then scan the raw text for event names and
+player names. CombatLogParser does the minimum per line and defers the rest:
+
+- parse() only finds the timestamp and event name; parameters stay
+  undecoded in the record until a field is asked for
+- quoted fields may contain commas; quotes are stripped on decode
+- field positions come from a layout table keyed by event name (base unit
+  parameters, prefix, advanced-logging block, suffix), built once per event
+  type and cached; COMBAT_LOG_VERSION lines switch advanced logging on/off
+- timestamps ("10/18 21:00:00.000" or "10/18/2024 21:00:00.0000-4") are
+  matched with one precompiled pattern and converted to epoch seconds
+  using a per-day cache, only when .time is read; a Clock goes further and
+  parses each distinct second once (for consumers that time every event)
+- CombatRecord uses __slots__: 88 bytes per record plus the line itself
+- Dispatcher maps event names to handlers (engines register instead of
+  chaining `if "SPELL_CAST_SUCCESS" in line` checks)
+
+Throughput targets (CPython 3.11): 40 MB/s reading a file with parse()
+(timestamp + event name, parameters untouched) and 15 MB/s with every
+line's parameters split. Measured by the combat_log.parse and
+combat_log.decode benchmark cases; the "large" scale runs a 1 GB
+synthetic log:
+
+    python -m benchmarks run --scale large -k combat_log
+"""
+
+import re
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Parameters shared by every unit event
+BASE_FIELDS = ("source_guid", "source_name", "source_flags", "source_raid_flags",
+               "dest_guid", "dest_name", "dest_flags", "dest_raid_flags")
+
+SPELL_FIELDS = ("spell_id", "spell_name", "spell_school")
+
+# Longest prefix first
+PREFIXES = (
+    ("SPELL_PERIODIC", SPELL_FIELDS),
+    ("SPELL_BUILDING", SPELL_FIELDS),
+    ("SPELL", SPELL_FIELDS),
+    ("RANGE", SPELL_FIELDS),
+    ("DAMAGE_SPLIT", SPELL_FIELDS),
+    ("DAMAGE_SHIELD", SPELL_FIELDS),
+    ("SWING", ()),
+    ("ENVIRONMENTAL", ("environmental_type",)),
+)
+
+# Leading suffix parameters (later ones vary between game versions)
+SUFFIXES = {
+    "_DAMAGE": ("amount",),
+    "_DAMAGE_LANDED": ("amount",),
+    "_MISSED": ("miss_type",),
+    "_HEAL": ("amount",),
+    "_HEAL_ABSORBED": ("extra_guid", "extra_name"),
+    "_ABSORBED": (),
+    "_ENERGIZE": ("amount", "over_energize", "power_type", "max_power"),
+    "_DRAIN": ("amount", "power_type", "extra_amount"),
+    "_LEECH": ("amount", "power_type", "extra_amount"),
+    "_INTERRUPT": ("extra_spell_id", "extra_spell_name", "extra_school"),
+    "_DISPEL": ("extra_spell_id", "extra_spell_name", "extra_school", "aura_type"),
+    "_STOLEN": ("extra_spell_id", "extra_spell_name", "extra_school", "aura_type"),
+    "_AURA_APPLIED": ("aura_type",),
+    "_AURA_REMOVED": ("aura_type",),
+    "_AURA_APPLIED_DOSE": ("aura_type", "stacks"),
+    "_AURA_REMOVED_DOSE": ("aura_type", "stacks"),
+    "_AURA_REFRESH": ("aura_type",),
+    "_AURA_BROKEN": ("aura_type",),
+    "_AURA_BROKEN_SPELL": ("extra_spell_id", "extra_spell_name", "extra_school", "aura_type"),
+    "_CAST_START": (),
+    "_CAST_SUCCESS": (),
+    "_CAST_FAILED": ("failed_type",),
+    "_INSTAKILL": (),
+    "_DURABILITY_DAMAGE": (),
+    "_DURABILITY_DAMAGE_ALL": (),
+    "_CREATE": (),
+    "_SUMMON": (),
+    "_RESURRECT": (),
+}
+
+# Suffixes that carry the advanced-logging block when it is enabled
+ADVANCED_SUFFIXES = {"_DAMAGE", "_DAMAGE_LANDED", "_HEAL", "_ENERGIZE", "_DRAIN", "_LEECH", "_CAST_SUCCESS"}
+ADVANCED_FIELDS = ("info_guid", "owner_guid", "current_hp", "max_hp", "attack_power", "spell_power",
+                   "armor", "absorb", "power_type_adv", "current_power", "max_power_adv", "power_cost",
+                   "position_x", "position_y", "ui_map_id", "facing", "item_level")
+
+# Events with their own parameter lists
+SPECIAL_EVENTS = {
+    "UNIT_DIED": BASE_FIELDS + ("recap_id", "unconscious_on_death"),
+    "UNIT_DESTROYED": BASE_FIELDS + ("recap_id", "unconscious_on_death"),
+    "UNIT_DISSIPATES": BASE_FIELDS + ("recap_id", "unconscious_on_death"),
+    "PARTY_KILL": BASE_FIELDS,
+    "ENCOUNTER_START": ("encounter_id", "encounter_name", "difficulty_id", "group_size", "instance_id"),
+    "ENCOUNTER_END": ("encounter_id", "encounter_name", "difficulty_id", "group_size", "success", "fight_time"),
+    "CHALLENGE_MODE_START": ("zone_name", "instance_id", "challenge_mode_id", "keystone_level"),
+    "CHALLENGE_MODE_END": ("instance_id", "success", "keystone_level", "total_time"),
+    "ZONE_CHANGE": ("instance_id", "zone_name", "difficulty_id"),
+    "MAP_CHANGE": ("ui_map_id", "map_name"),
+    "COMBATANT_INFO": ("player_guid", "faction"),
+    "COMBAT_LOG_VERSION": ("version", "advanced_label", "advanced", "build_label", "build",
+                           "project_label", "project_id"),
+}
+
+# Events carrying damage / healing amounts (for DPS/HPS)
+DAMAGE_EVENTS = ("SWING_DAMAGE", "RANGE_DAMAGE", "SPELL_DAMAGE", "SPELL_PERIODIC_DAMAGE", "SPELL_BUILDING_DAMAGE")
+HEAL_EVENTS = ("SPELL_HEAL", "SPELL_PERIODIC_HEAL")
+
+INT_FIELDS = {"spell_id", "spell_school", "amount", "over_energize", "power_type", "max_power",
+              "extra_amount", "extra_spell_id", "extra_school", "stacks", "encounter_id",
+              "difficulty_id", "group_size", "instance_id", "success", "fight_time", "recap_id",
+              "challenge_mode_id", "keystone_level", "total_time", "ui_map_id", "current_hp",
+              "max_hp", "version", "advanced", "item_level"}
+
+_TIMESTAMP = re.compile(r'(\d{1,2})/(\d{1,2})(?:/(\d{4}))? (\d{1,2}):(\d{2}):(\d{2})\.(\d+)')
+_midnights: Dict[Tuple[int, int, int], float] = {}
+
+
+def parse_timestamp(stamp: str) -> Optional[float]:
+    """Combat log timestamp -> epoch seconds (local time; year defaults to the current one)"""
+    match = _TIMESTAMP.match(stamp)
+    if not match:
+        return None
+    month, day, year, hour, minute, second, fraction = match.groups()
+    key = (int(year) if year else time.localtime().tm_year, int(month), int(day))
+    midnight = _midnights.get(key)
+    if midnight is None:
+        midnight = _midnights[key] = datetime(*key).timestamp()
+    return (midnight + int(hour) * 3600 + int(minute) * 60 + int(second)
+            + int(fraction) / 10 ** len(fraction))
+
+
+class Clock:
+    """Record -> epoch seconds; the date/time part is parsed once per distinct second"""
+
+    def __init__(self):
+        self._seconds: Dict[str, float] = {}
+        self.last: Optional[float] = None
+
+    def __call__(self, record) -> Optional[float]:
+        stamp = record.timestamp
+        dot = stamp.rfind('.')
+        whole = stamp[:dot] if dot >= 0 else stamp
+        base = self._seconds.get(whole)
+        if base is None:
+            parsed = parse_timestamp(stamp)
+            if parsed is None:
+                return self.last
+            if len(self._seconds) >= 4096:
+                self._seconds.clear()
+            base = self._seconds[whole] = parsed // 1
+        digits = stamp[dot + 1:dot + 4] if dot >= 0 else ''
+        self.last = base + (int(digits) / 10 ** len(digits) if digits.isdigit() else 0.0)
+        return self.last
+
+
+def split_fields(body: str) -> List[str]:
+    """Comma-separated parameters; quoted values may contain commas and lose their quotes"""
+    if '"' not in body:
+        return body.split(',')
+    chunks = body.split('"')
+    fields = chunks[0].split(',')
+    for i in range(1, len(chunks), 2):
+        # chunks[i] is a quoted value; the empty piece before its opening quote becomes it
+        fields[-1] = chunks[i]
+        if i + 1 < len(chunks):
+            fields.extend(chunks[i + 1].split(',')[1:])
+    return fields
+
+
+def build_layout(event: str, advanced: bool) -> Dict[str, int]:
+    """Field name -> parameter index for one event type"""
+    if event in SPECIAL_EVENTS:
+        return {name: i for i, name in enumerate(SPECIAL_EVENTS[event])}
+
+    for prefix, prefix_fields in PREFIXES:
+        if event.startswith(prefix):
+            # DAMAGE_SPLIT / DAMAGE_SHIELD carry damage parameters without a suffix
+            suffix = event[len(prefix):] or "_DAMAGE"
+            break
+    else:
+        return {}
+
+    names = list(BASE_FIELDS) + list(prefix_fields)
+    if advanced and suffix in ADVANCED_SUFFIXES:
+        names += ADVANCED_FIELDS
+    names += SUFFIXES.get(suffix, ())
+    return {name: i for i, name in enumerate(names)}
+
+
+class CombatRecord:
+    """One log line; parameters are split and converted on first access"""
+
+    __slots__ = ("raw", "event", "offset", "_sep", "_start", "_layout", "_fields")
+
+    def __init__(self, raw: str, event: str, sep: int, start: int, offset: int, layout: Dict[str, int]):
+        self.raw = raw
+        self.event = event
+        self.offset = offset          # byte offset just past this line (when read from a file)
+        self._sep = sep               # end of the timestamp in raw
+        self._start = start           # start of the parameters in raw (-1: none)
+        self._layout = layout
+        self._fields = None
+
+    @property
+    def timestamp(self) -> str:
+        """As written in the log"""
+        return self.raw[:self._sep]
+
+    @property
+    def body(self) -> str:
+        """Undecoded parameters"""
+        return self.raw[self._start:] if self._start >= 0 else ''
+
+    @property
+    def fields(self) -> List[str]:
+        if self._fields is None:
+            self._fields = split_fields(self.raw[self._start:]) if self._start >= 0 else []
+        return self._fields
+
+    @property
+    def time(self) -> Optional[float]:
+        return parse_timestamp(self.timestamp)
+
+    def get(self, name: str, default=None):
+        index = self._layout.get(name)
+        if index is None:
+            return default
+        fields = self.fields
+        if index >= len(fields):
+            return default
+        value = fields[index]
+        if name in INT_FIELDS:
+            try:
+                return int(value, 0) if value.startswith('0x') else int(value)
+            except ValueError:
+                return default
+        return value
+
+    def involves(self, name_or_guid: str) -> bool:
+        """True if the unit (name, Name-Realm or GUID) is the source or destination"""
+        for key in ("source_guid", "source_name", "dest_guid", "dest_name"):
+            value = self.get(key)
+            if value and (value == name_or_guid or value.startswith(f"{name_or_guid}-")):
+                return True
+        return False
+
+    source_guid = property(lambda self: self.get("source_guid"))
+    source_name = property(lambda self: self.get("source_name"))
+    dest_guid = property(lambda self: self.get("dest_guid"))
+    dest_name = property(lambda self: self.get("dest_name"))
+    spell_id = property(lambda self: self.get("spell_id"))
+    spell_name = property(lambda self: self.get("spell_name"))
+    amount = property(lambda self: self.get("amount"))
+
+    def to_dict(self) -> Dict:
+        record = {"timestamp": self.timestamp, "event": self.event}
+        record.update((name, self.get(name)) for name in self._layout)
+        return record
+
+    def __repr__(self):
+        return f"CombatRecord({self.timestamp!r}, {self.event!r})"
+
+
+class CombatLogParser:
+    """Turns lines into CombatRecords; tracks advanced logging from COMBAT_LOG_VERSION"""
+
+    def __init__(self, advanced: bool = False):
+        self.advanced = advanced
+        self._layouts: Dict[str, Dict[str, int]] = {}
+
+    def layout(self, event: str) -> Dict[str, int]:
+        layout = self._layouts.get(event)
+        if layout is None:
+            layout = self._layouts[event] = build_layout(event, self.advanced)
+        return layout
+
+    def parse(self, line: str, offset: int = 0) -> Optional[CombatRecord]:
+        line = line.rstrip('\r\n')
+        sep = line.find('  ', 0, 48)
+        if sep >= 0:
+            begin = sep + 2
+        else:
+            # Comma-separated timestamp (mock logs)
+            sep = line.find(',')
+            if sep < 0:
+                return None
+            begin = sep + 1
+
+        comma = line.find(',', begin)
+        if comma >= 0:
+            event, start = line[begin:comma], comma + 1
+        else:
+            event, start = line[begin:], -1
+        if not event:
+            return None
+
+        layout = self._layouts.get(event)
+        if layout is None:
+            layout = self.layout(event)
+        record = CombatRecord(line, event, sep, start, offset, layout)
+        if event == "COMBAT_LOG_VERSION":
+            self._set_advanced(record.get("advanced") == 1)
+        return record
+
+    def _set_advanced(self, advanced: bool):
+        if advanced != self.advanced:
+            self.advanced = advanced
+            self._layouts.clear()
+
+    def iter_file(self, path: str, block_size: int = 1 << 20, start: int = 0,
+                  end: Optional[int] = None) -> Iterator[CombatRecord]:
+        """Records from a (finished) log file, read in large blocks, optionally a byte range"""
+        with open(path, 'rb') as f:
+            f.seek(start)
+            position, pending = start, b''     # position: byte offset where `pending` starts
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                block = f.read(block_size if remaining is None else min(block_size, remaining))
+                if not block:
+                    break
+                if remaining is not None:
+                    remaining -= len(block)
+                lines = (pending + block).split(b'\n')
+                pending = lines.pop()
+                for raw in lines:
+                    position += len(raw) + 1
+                    record = self.parse(raw.decode('utf-8', errors='replace'), position)
+                    if record is not None:
+                        yield record
+            if pending:
+                record = self.parse(pending.decode('utf-8', errors='replace'), position + len(pending))
+                if record is not None:
+                    yield record
+
+
+_default_parser = CombatLogParser()
+
+
+def parse_line(line: str, offset: int = 0) -> Optional[CombatRecord]:
+    """Parse with the shared default parser"""
+    return _default_parser.parse(line, offset)
+
+
+class Dispatcher:
+    """Event name -> handlers table"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable[[CombatRecord], None]]] = {}
+
+    def on(self, *events: str):
+        """Decorator (or plain call) registering a handler for `events`"""
+        def register(handler):
+            for event in events:
+                self._handlers.setdefault(event, []).append(handler)
+            return handler
+        return register
+
+    @property
+    def events(self) -> frozenset:
+        """Event names with a handler (use as a tailer subscription filter)"""
+        return frozenset(self._handlers)
+
+    def dispatch(self, record: CombatRecord) -> bool:
+        handlers = self._handlers.get(record.event)
+        if not handlers:
+            return False
+        for handler in handlers:
+            handler(record)
+        return True
@@ -0,0 +1,341 @@
+"""
+combat_log_tailer.py - One reader for WoWCombatLog.txt, shared by every consumer
+
+ArbiterEngine, SkillWeaverEngine and Lumos used to open the combat log
+separately, each with its own readline()/sleep poll loop and its own
+line.split(','). CombatLogTailer reads the file once:
+
+- large binary block reads, split into lines without per-line syscalls
+- each line is parsed once (combat_log_parser.CombatRecord, fields decoded
+  lazily) and published to subscribers
+- every subscriber gets a bounded queue, optionally filtered by event type;
+  a full queue either blocks the tailer ("block": the log file itself is the
+  buffer, nothing is lost) or drops the oldest event ("drop_oldest": for
+  real-time consumers such as lighting, where stale events are useless)
+- truncation and rotation (file replaced or shortened) restart from byte 0
+- the byte offset of the last published line is checkpointed, so a restart
+  resumes where it left off instead of skipping or replaying the log
+
+Usage:
+    tailer = get_tailer(log_path)
+    sub = tailer.subscribe("arbiter", events={"SPELL_CAST_SUCCESS", "UNIT_DIED"})
+    for event in sub:          # ends after tailer.unsubscribe(sub)
+        handle(event)
+"""
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from combat_log_parser import CombatLogParser, CombatRecord
+
+COMBAT_LOG_PATH = os.getenv('HOLOCRON_COMBAT_LOG', "/Applications/World of Warcraft/_retail_/Logs/WoWCombatLog.txt")
+CHECKPOINT_DIR = os.getenv('HOLOCRON_COMBAT_LOG_STATE', '.cache/combat_log')
+
+BLOCK_SIZE = 1 << 20
+POLL_INTERVAL = 0.02      # seconds to wait when the log has no new data
+CHECKPOINT_INTERVAL = 5   # seconds between checkpoint writes
+
+
+class Subscription:
+    """A subscriber's bounded queue of CombatRecords"""
+
+    _CLOSED = object()
+
+    def __init__(self, name: str, events: Optional[Iterable[str]] = None,
+                 maxsize: int = 10000, overflow: str = "block"):
+        if overflow not in ("block", "drop_oldest"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.name = name
+        self.events = frozenset(events) if events else None
+        self.overflow = overflow
+        self.queue: "queue.Queue" = queue.Queue(maxsize)
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+
+    def wants(self, event: CombatRecord) -> bool:
+        return self.events is None or event.event in self.events
+
+    def offer(self, event: CombatRecord, running=lambda: True) -> bool:
+        """Queue an event according to the overflow policy; False if closed meanwhile"""
+        while not self.closed:
+            try:
+                self.queue.put_nowait(event)
+                self.delivered += 1
+                return True
+            except queue.Full:
+                if self.overflow == "drop_oldest":
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+                elif not running():
+                    return False
+                else:
+                    time.sleep(POLL_INTERVAL)
+        return False
+
+    def get(self, timeout: float = None) -> Optional[CombatRecord]:
+        """Next event, or None on timeout or once closed"""
+        try:
+            event = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return None if event is self._CLOSED else event
+
+    def close(self):
+        self.closed = True
+        try:
+            self.queue.put_nowait(self._CLOSED)
+        except queue.Full:
+            pass  # the consumer sees `closed` on its next get()
+
+    def __iter__(self):
+        while not self.closed:
+            event = self.get(timeout=0.5)
+            if event is not None:
+                yield event
+
+
+class CombatLogTailer:
+    """Reads the combat log in blocks and fans parsed events out to subscribers"""
+
+    def __init__(self, path: str = COMBAT_LOG_PATH, checkpoint_path: Optional[str] = None,
+                 block_size: int = BLOCK_SIZE, poll_interval: float = POLL_INTERVAL,
+                 from_start: bool = False):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self.block_size = block_size
+        self.poll_interval = poll_interval
+        self.from_start = from_start
+        self.parser = CombatLogParser()
+
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._inode = None
+        self._buffer = b''
+        self.offset = 0           # byte offset of the next unread line
+        self.running = False
+        self.thread = None
+        self._last_checkpoint = 0.0
+        self.counters = {"lines": 0, "bytes": 0, "rotations": 0}
+
+    # --- subscribers ---
+
+    def subscribe(self, name: str, events: Optional[Iterable[str]] = None,
+                  maxsize: int = 10000, overflow: str = "block", start: bool = True) -> Subscription:
+        sub = Subscription(name, events, maxsize, overflow)
+        with self._lock:
+            self._subscribers.append(sub)
+        if start:
+            self.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        """Close `sub`; the tailer stops (and checkpoints) after its last subscriber leaves"""
+        sub.close()
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+            last = not self._subscribers
+        if last:
+            self.stop()
+
+    def publish(self, event: CombatRecord) -> bool:
+        """
+        Offer an event to every interested subscriber. False if one still
+        subscribed refused it (a full "block" queue while the tailer stops).
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        accepted = True
+        for sub in subscribers:
+            if sub.wants(event) and not sub.offer(event, running=lambda: self.running) and not sub.closed:
+                accepted = False
+        return accepted
+
+    # --- file handling ---
+
+    def _open(self) -> bool:
+        try:
+            self._file = open(self.path, 'rb')
+        except OSError:
+            return False
+        stat = os.fstat(self._file.fileno())
+        self._buffer = b''
+
+        checkpoint = self._load_checkpoint()
+        if self._inode == stat.st_ino and self.offset <= stat.st_size:
+            pass  # reopened after an error: carry on from the last published line
+        elif checkpoint and checkpoint.get("inode") == stat.st_ino and checkpoint.get("offset", 0) <= stat.st_size:
+            self.offset = checkpoint["offset"]
+        elif self.from_start:
+            self.offset = 0
+        else:
+            self.offset = stat.st_size
+        self._inode = stat.st_ino
+        self._file.seek(self.offset)
+        return True
+
+    def _reopen_from_start(self):
+        self._close()
+        self.counters["rotations"] += 1
+        self._file = open(self.path, 'rb')
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._buffer = b''
+        self.offset = 0
+
+    def _close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _check_rotation(self) -> bool:
+        """True if the log was replaced or truncated (and has been reopened)"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False  # removed; keep the old handle until a new file appears
+        if stat.st_ino != self._inode or stat.st_size < self.offset + len(self._buffer):
+            self._reopen_from_start()
+            return True
+        return False
+
+    def poll(self) -> int:
+        """Read whatever is available and publish it. Returns the number of events."""
+        if self._file is None and not self._open():
+            return 0
+
+        published = 0
+        while True:
+            block = self._file.read(self.block_size)
+            if not block:
+                if self._check_rotation():
+                    continue
+                break
+            self.counters["bytes"] += len(block)
+            data = self._buffer + block
+            end = data.rfind(b'\n')
+            if end < 0:
+                self._buffer = data
+                continue
+            self._buffer = data[end + 1:]
+
+            for raw in data[:end].split(b'\n'):
+                offset = self.offset + len(raw) + 1
+                event = self.parser.parse(raw.decode('utf-8', errors='replace'), offset)
+                self.counters["lines"] += 1
+                if event is not None:
+                    if not self.publish(event):
+                        # Stopping with a full subscriber: the offset stays before this
+                        # line, so a restart delivers it again rather than losing it
+                        self._close()
+                        return published
+                    published += 1
+                self.offset = offset
+                if not self.running and self.thread is not None:
+                    # Stopping: the checkpoint keeps whatever was not published yet
+                    self._close()
+                    return published
+
+        if self.checkpoint_path and time.monotonic() - self._last_checkpoint > CHECKPOINT_INTERVAL:
+            self.checkpoint()
+        return published
+
+    # --- checkpoints ---
+
+    def _load_checkpoint(self) -> Optional[Dict]:
+        if not self.checkpoint_path:
+            return None
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return checkpoint if checkpoint.get("path") == self.path else None
+
+    def checkpoint(self):
+        """Persist the offset of the last published line"""
+        if not self.checkpoint_path or self._inode is None:
+            return
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"path": self.path, "inode": self._inode, "offset": self.offset,
+                       "saved_at": time.time()}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._last_checkpoint = time.monotonic()
+
+    # --- thread ---
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="combat-log-tailer", daemon=True)
+        self.thread.start()
+        print(f"📜 Tailing combat log: {self.path}")
+
+    def stop(self):
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+            thread = self.thread
+        if thread and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        try:
+            while self.running:
+                try:
+                    if not self.poll():
+                        time.sleep(self.poll_interval)
+                except Exception as e:
+                    print(f"⚠️ Combat log tailer error: {e}")
+                    self._close()
+                    time.sleep(1)
+        finally:
+            self.checkpoint()
+            self._close()
+            self.thread = None
+
+    def stats(self) -> Dict:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = None
+        with self._lock:
+            subscribers = [{"name": s.name, "queued": s.queue.qsize(), "delivered": s.delivered,
+                            "dropped": s.dropped, "overflow": s.overflow} for s in self._subscribers]
+        return {
+            "path": self.path,
+            "running": self.running,
+            "offset": self.offset,
+            "lag_bytes": size - self.offset if size is not None else None,
+            "counters": dict(self.counters),
+            "subscribers": subscribers,
+        }
+
+
+_tailers: Dict[str, CombatLogTailer] = {}
+_tailers_lock = threading.Lock()
+
+
+def get_tailer(path: str = COMBAT_LOG_PATH) -> CombatLogTailer:
+    """The process-wide tailer for `path` (checkpointed under CHECKPOINT_DIR)"""
+    with _tailers_lock:
+        tailer = _tailers.get(path)
+        if tailer is None:
+            name = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+            tailer = _tailers[path] = CombatLogTailer(
+                path, checkpoint_path=os.path.join(CHECKPOINT_DIR, f"{name}.json"))
+        return tailer
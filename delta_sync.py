@@ -0,0 +1,277 @@
+"""
+delta_sync.py - Delta uploads of SavedVariables between bridge.py and server.py
+
+bridge.py used to post the whole Lua file on every write (tens of MB for
+DataStore_Containers after each /reload) and the server re-parsed all of it.
+Both sides now agree on a split of the parsed table into subtrees:
+
+- every top-level key is a subtree, except that per-character containers
+  (Characters, Toons, Inventory), found at the top level or one level down,
+  are split into one subtree per character
+- each subtree is hashed (SHA-1 of canonical JSON); a manifest digest
+  covers all (path, hash) pairs
+
+DeltaClient (bridge side) remembers the manifest the server acknowledged
+and sends only changed and removed subtrees, gzip-compressed. The payload
+names the manifest it builds on ("base") and the one it expects after
+applying ("digest"). DeltaStore (server side) keeps the merged table per
+source in memory, applies the delta in time proportional to the change,
+and answers with DeltaConflict when either digest does not match, after
+which the client re-sends everything.
+
+Payload:
+    {"source": "DataStore_Containers", "base": "<digest>|null", "digest": "<digest>",
+     "changed": [{"path": ["global", "Characters", "Default.Realm.Name"], "value": {...}}],
+     "removed": [["global", "Characters", "Default.Realm.Old"]]}
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+CHARACTER_CONTAINERS = ('Characters', 'Toons', 'Inventory')
+MAX_SPLIT_DEPTH = 2
+
+Path = Tuple[str, ...]
+
+
+class DeltaConflict(Exception):
+    """The delta does not apply to the server's current state"""
+
+    def __init__(self, message: str, digest: Optional[str]):
+        super().__init__(message)
+        self.digest = digest
+
+
+def normalize(tree):
+    """JSON round trip: what the server stores (all keys become strings)"""
+    return json.loads(json.dumps(tree))
+
+
+def subtree_hash(value) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def split_subtrees(tree: Dict, prefix: Path = (), depth: int = 0) -> Dict[Path, object]:
+    """{path: subtree} for a normalized SavedVariables table"""
+    out = {}
+    for key, value in tree.items():
+        path = prefix + (key,)
+        if isinstance(value, dict) and key in CHARACTER_CONTAINERS:
+            if not value:
+                out[path] = {}
+            for child, sub in value.items():
+                out[path + (child,)] = sub
+        elif (isinstance(value, dict) and depth < MAX_SPLIT_DEPTH - 1
+              and any(k in CHARACTER_CONTAINERS for k in value)):
+            out.update(split_subtrees(value, path, depth + 1))
+        else:
+            out[path] = value
+    return out
+
+
+def assemble(subtrees: Dict[Path, object]) -> Dict:
+    """Inverse of split_subtrees (also builds partial tables from a few paths)"""
+    tree = {}
+    for path, value in subtrees.items():
+        set_path(tree, path, value)
+    return tree
+
+
+def set_path(tree: Dict, path: Path, value):
+    node = tree
+    for key in path[:-1]:
+        node = node.setdefault(key, {})
+    node[path[-1]] = value
+
+
+def delete_path(tree: Dict, path: Path):
+    node = tree
+    for key in path[:-1]:
+        node = node.get(key)
+        if not isinstance(node, dict):
+            return
+    node.pop(path[-1], None)
+
+
+def manifest_digest(hashes: Dict[Path, str]) -> str:
+    digest = hashlib.sha1()
+    for path in sorted(hashes):
+        digest.update(json.dumps(path).encode('utf-8'))
+        digest.update(hashes[path].encode('ascii'))
+    return digest.hexdigest()
+
+
+def encode_payload(payload: Dict) -> bytes:
+    return gzip.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_payload(body: bytes, encoding: str = None, max_bytes: int = 256 * 1024 * 1024) -> Dict:
+    """Request body -> payload; gzip bodies are capped at `max_bytes` inflated"""
+    if encoding == 'gzip':
+        with gzip.GzipFile(fileobj=io.BytesIO(body)) as f:
+            body = f.read(max_bytes + 1)
+        if len(body) > max_bytes:
+            raise ValueError("Delta payload too large")
+    return json.loads(body)
+
+
+# ============================================================================
+# Client
+# ============================================================================
+
+class DeltaClient:
+    """Bridge-side state: the manifest the server last acknowledged per source"""
+
+    def __init__(self):
+        self.acked: Dict[str, Dict[Path, str]] = {}
+
+    def build(self, source: str, tree: Dict, full: bool = False) -> Tuple[Optional[Dict], Dict[Path, str]]:
+        """
+        Returns (payload, hashes). payload is None when nothing changed since
+        the last acknowledged upload. Pass the hashes to acknowledge() once
+        the server accepts the payload.
+        """
+        subtrees = split_subtrees(normalize(tree))
+        hashes = {path: subtree_hash(value) for path, value in subtrees.items()}
+        previous = None if full else self.acked.get(source)
+
+        if previous is None:
+            changed, removed, base = list(subtrees), [], None
+        else:
+            changed = [p for p, h in hashes.items() if previous.get(p) != h]
+            removed = [p for p in previous if p not in hashes]
+            base = manifest_digest(previous)
+            if not changed and not removed:
+                return None, hashes
+
+        payload = {
+            "source": source,
+            "base": base,
+            "digest": manifest_digest(hashes),
+            "changed": [{"path": list(p), "value": subtrees[p]} for p in changed],
+            "removed": [list(p) for p in removed],
+        }
+        return payload, hashes
+
+    def acknowledge(self, source: str, hashes: Dict[Path, str]):
+        self.acked[source] = hashes
+
+    def forget(self, source: str):
+        self.acked.pop(source, None)
+
+
+# ============================================================================
+# Server
+# ============================================================================
+
+class DeltaStore:
+    """
+    Server-side merged state per source, mirrored to {directory}/{source}.json
+    (the file the engines read). Writes are debounced by `flush_delay`
+    seconds so a burst of deltas costs one file write.
+    """
+
+    def __init__(self, directory: str = '.', flush_delay: float = 2.0):
+        self.directory = directory
+        self.flush_delay = flush_delay
+        self._states: Dict[str, Tuple[Dict, Dict[Path, str]]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, source: str) -> str:
+        return os.path.join(self.directory, f"{source}.json")
+
+    def _source_lock(self, source: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(source, threading.Lock())
+
+    def _state(self, source: str) -> Tuple[Dict, Dict[Path, str]]:
+        state = self._states.get(source)
+        if state is None:
+            try:
+                with open(self._path(source)) as f:
+                    tree = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                tree = {}
+            hashes = {p: subtree_hash(v) for p, v in split_subtrees(tree).items()}
+            state = self._states[source] = (tree, hashes)
+        return state
+
+    def digest(self, source: str) -> str:
+        with self._source_lock(source):
+            return manifest_digest(self._state(source)[1])
+
+    def apply(self, source: str, payload: Dict) -> Tuple[Dict, str]:
+        """
+        Merge a delta. Returns (partial table holding only the changed
+        subtrees, new digest). Raises DeltaConflict if the payload's base or
+        resulting digest does not match the stored state.
+        """
+        changed = {tuple(item["path"]): item["value"] for item in payload.get("changed", [])}
+        removed = [tuple(path) for path in payload.get("removed", [])]
+
+        with self._source_lock(source):
+            tree, hashes = self._state(source)
+            if payload.get("base") is None:
+                tree = assemble(changed)
+                hashes = {p: subtree_hash(v) for p, v in changed.items()}
+            else:
+                current = manifest_digest(hashes)
+                if payload["base"] != current:
+                    raise DeltaConflict("Delta base does not match server state", current)
+                tree, hashes = tree, dict(hashes)
+                for path in removed:
+                    delete_path(tree, path)
+                    hashes.pop(path, None)
+                for path, value in changed.items():
+                    set_path(tree, path, value)
+                    hashes[path] = subtree_hash(value)
+
+            digest = manifest_digest(hashes)
+            if payload.get("digest") and payload["digest"] != digest:
+                # Partially applied to a shared tree: reload it from disk next time
+                self._states.pop(source, None)
+                raise DeltaConflict("Merged state does not match client digest", None)
+
+            self._states[source] = (tree, hashes)
+        self._schedule_flush(source)
+        return assemble(changed), digest
+
+    def invalidate(self, source: str):
+        """Forget the in-memory state (e.g. after a full upload rewrote the file)"""
+        with self._source_lock(source):
+            self._states.pop(source, None)
+
+    def _schedule_flush(self, source: str):
+        with self._lock:
+            if source in self._timers:
+                return
+            timer = threading.Timer(self.flush_delay, self.flush, args=(source,))
+            timer.daemon = True
+            self._timers[source] = timer
+        timer.start()
+
+    def flush(self, source: str = None):
+        """Write pending state to disk now (one source, or all)"""
+        sources = [source] if source else list(self._states)
+        for name in sources:
+            with self._lock:
+                timer = self._timers.pop(name, None)
+            if timer:
+                timer.cancel()
+            with self._source_lock(name):
+                state = self._states.get(name)
+                if state is None:
+                    continue
+                path = self._path(name)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(state[0], f)
+                os.replace(tmp_path, path)
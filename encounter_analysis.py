@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+encounter_analysis.py - Offline audit of a saved WoWCombatLog.txt
+
+The Arbiter only sees live lines from the end of the log. This audits a
+whole night of raiding after the fact:
+
+1. find_segments() locates ENCOUNTER_START / ENCOUNTER_END lines with a
+   byte scan over an mmap of the file (no line parsing), and pairs them
+   into encounter segments (byte ranges). A START without an END (reload,
+   disconnect) runs until the next START or the end of the file.
+2. Each segment is analysed in its own process (ProcessPoolExecutor), so a
+   multi-GB log is parsed on every core instead of one.
+3. Per encounter: DPS and HPS per-second timelines, totals per player,
+   death recaps (last damage taken before each player death) and rotation
+   mistakes (player casts replayed against SkillWeaver's WarriorRotation).
+4. Results are cached per segment fingerprint (the boundary lines, length
+   and sampled blocks of the segment, plus the analysis options), so
+   re-running over a log that has grown only analyses the new encounters.
+5. Optionally (--store) every encounter is kept as columnar arrays in an
+   EncounterStore for later vectorized queries.
+
+Usage:
+    python encounter_analysis.py WoWCombatLog.txt [-j 8] [--player Name] [--store [DIR]] [-o report.json]
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from combat_log_parser import DAMAGE_EVENTS, HEAL_EVENTS, Clock, CombatLogParser, Dispatcher
+from encounter_store import STORE_DIR, EncounterStore, EncounterWriter
+
+CACHE_DIR = os.getenv('HOLOCRON_ENCOUNTER_CACHE', '.cache/encounters')
+ANALYSIS_VERSION = 1
+RECAP_EVENTS = 10          # damage events kept per player for death recaps
+SAMPLE_BLOCKS = 16         # blocks hashed into a segment fingerprint
+SAMPLE_SIZE = 4096
+
+
+# ============================================================================
+# Segmenting
+# ============================================================================
+
+def _line_bounds(mm, index: int):
+    start = mm.rfind(b'\n', 0, index) + 1
+    end = mm.find(b'\n', index)
+    return start, (len(mm) if end < 0 else end + 1)
+
+
+def _markers(mm, token: bytes):
+    position = mm.find(token)
+    while position >= 0:
+        start, end = _line_bounds(mm, position)
+        yield start, end
+        position = mm.find(token, end)
+
+
+def _fingerprint(mm, start: int, end: int, begin_line: bytes, end_line: bytes) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(begin_line)
+    digest.update(end_line)
+    digest.update(str(end - start).encode())
+    step = max(1, (end - start) // SAMPLE_BLOCKS)
+    for offset in range(start, end, step):
+        digest.update(mm[offset:min(offset + SAMPLE_SIZE, end)])
+    return digest.hexdigest()
+
+
+def find_segments(path: str) -> List[Dict]:
+    """Encounter byte ranges, in log order"""
+    if os.path.getsize(path) == 0:
+        return []
+    parser = CombatLogParser()
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        markers = sorted([(s, e, "START") for s, e in _markers(mm, b"  ENCOUNTER_START,")] +
+                         [(s, e, "END") for s, e in _markers(mm, b"  ENCOUNTER_END,")] +
+                         [(s, e, "VERSION") for s, e in _markers(mm, b"  COMBAT_LOG_VERSION,")])
+
+        segments, current = [], None
+
+        def close(end: int, end_line: bytes, record=None):
+            segment = dict(current, end=end)
+            if record is not None:
+                segment.update(success=record.get("success"), fight_time_ms=record.get("fight_time"))
+            segment["bytes"] = segment["end"] - segment["start"]
+            segment["fingerprint"] = _fingerprint(mm, segment["start"], end, current["_line"], end_line)
+            del segment["_line"]
+            segments.append(segment)
+
+        for start, end, kind in markers:
+            line = mm[start:end]
+            record = parser.parse(line.decode('utf-8', errors='replace'))
+            if kind == "VERSION":
+                continue                        # parse() tracked ADVANCED_LOG_ENABLED
+            if kind == "START":
+                if current:
+                    close(start, b'')           # no END: the encounter was abandoned
+                current = {"encounter_id": record.get("encounter_id"), "name": record.get("encounter_name"),
+                           "difficulty_id": record.get("difficulty_id"), "group_size": record.get("group_size"),
+                           "success": None, "fight_time_ms": None, "advanced": parser.advanced,
+                           "start": start, "_line": line}
+            elif current and record.get("encounter_id") == current["encounter_id"]:
+                close(end, line, record)
+                current = None
+        if current:
+            close(len(mm), b'')
+    return segments
+
+
+# ============================================================================
+# Per-segment analysis (runs in worker processes)
+# ============================================================================
+
+class _RotationState:
+    """Just the GameState fields WarriorRotation reads, without its logging"""
+
+    def __init__(self):
+        self.rage = 0
+        self.target_hp_pct = 1.0
+
+
+class SegmentAnalysis:
+    """Accumulates one encounter's statistics from its records"""
+
+    def __init__(self, players: Optional[List[str]] = None):
+        from skillweaver_engine import WarriorRotation
+
+        self.audited = set(players or [])
+        self.rotations = {}
+        self._rotation_cls = WarriorRotation
+        self.start_time = None
+        self.last_second = 0
+        self._clock = Clock()
+
+        self.damage = defaultdict(int)
+        self.healing = defaultdict(int)
+        self.dps_timeline = defaultdict(int)
+        self.hps_timeline = defaultdict(int)
+        self.incoming = defaultdict(lambda: deque(maxlen=RECAP_EVENTS))
+        self.deaths = []
+        self.casts = defaultdict(int)
+        self.mistakes = defaultdict(int)
+
+        self.dispatch = Dispatcher()
+        self.dispatch.on(*DAMAGE_EVENTS)(self._on_damage)
+        self.dispatch.on(*HEAL_EVENTS)(self._on_heal)
+        self.dispatch.on("UNIT_DIED")(self._on_death)
+        if self.audited:
+            self.dispatch.on("SPELL_CAST_SUCCESS")(self._on_cast)
+            self.dispatch.on("SPELL_ENERGIZE")(self._on_energize)
+
+    def _second(self, record) -> int:
+        """Whole seconds since the encounter started"""
+        now = self._clock(record)
+        if now is None:
+            return self.last_second
+        if self.start_time is None:
+            self.start_time = now // 1
+        second = int(now // 1 - self.start_time)
+        if second > self.last_second:
+            self.last_second = second
+        return second
+
+    def feed(self, record):
+        if record.event in ("ENCOUNTER_START", "ENCOUNTER_END"):
+            self._second(record)                # anchors the timeline to the encounter bounds
+        else:
+            self.dispatch.dispatch(record)
+
+    def _on_damage(self, record):
+        amount = record.amount or 0
+        second = self._second(record)
+        dest_guid = record.dest_guid or ''
+        if dest_guid.startswith("Player-"):
+            self.incoming[record.dest_name].append({
+                "time": second, "source": record.source_name,
+                "spell": record.spell_name or "Melee", "amount": amount})
+        if (record.source_guid or '').startswith("Player-"):
+            self.damage[record.source_name] += amount
+            self.dps_timeline[second] += amount
+
+    def _on_heal(self, record):
+        if (record.source_guid or '').startswith("Player-"):
+            amount = record.amount or 0
+            self.healing[record.source_name] += amount
+            self.hps_timeline[self._second(record)] += amount
+
+    def _on_death(self, record):
+        if (record.dest_guid or '').startswith("Player-"):
+            player = record.dest_name
+            self.deaths.append({"time": self._second(record), "player": player,
+                                "recap": list(self.incoming.pop(player, []))})
+
+    def _rotation(self, name):
+        rotation = self.rotations.get(name)
+        if rotation is None:
+            rotation = self.rotations[name] = self._rotation_cls(_RotationState())
+        return rotation
+
+    def _audited_name(self, name) -> Optional[str]:
+        if not name:
+            return None
+        base = name.split('-', 1)[0]
+        return base if base in self.audited or name in self.audited else None
+
+    def _on_energize(self, record):
+        player = self._audited_name(record.dest_name)
+        if player and record.amount:
+            state = self._rotation(player).state
+            state.rage = min(100, max(0, state.rage + record.amount))
+
+    def _on_cast(self, record):
+        player = self._audited_name(record.source_name)
+        if not player:
+            return
+        rotation = self._rotation(player)
+        self.casts[player] += 1
+        _, _, expected = rotation.get_suggestion()
+        if record.spell_id != expected:
+            self.mistakes[player] += 1
+        if record.spell_name == "Rampage":
+            rotation.state.rage = max(0, rotation.state.rage - 80)
+
+    def result(self) -> Dict:
+        duration = self.last_second + 1 if self.start_time is not None else 0
+        per_second = lambda timeline: [timeline.get(s, 0) for s in range(duration)]
+        rate = lambda totals: {name: round(total / duration, 1) if duration else 0.0
+                               for name, total in sorted(totals.items(), key=lambda kv: -kv[1])}
+        return {
+            "duration": duration,
+            "damage": {"total": sum(self.damage.values()), "by_player": rate(self.damage)},
+            "healing": {"total": sum(self.healing.values()), "by_player": rate(self.healing)},
+            "dps_timeline": per_second(self.dps_timeline),
+            "hps_timeline": per_second(self.hps_timeline),
+            "deaths": self.deaths,
+            "casts": dict(self.casts),
+            "mistakes": dict(self.mistakes),
+        }
+
+
+def analyze_segment(path: str, start: int, end: int, players: Optional[List[str]] = None,
+                    advanced: bool = False, store_dir: Optional[str] = None, key: Optional[str] = None) -> Dict:
+    """
+    Analyse bytes [start, end) of the log (top-level so process pools can pickle it).
+    With `store_dir`, the parsed records are also saved there as columns under `key`.
+    """
+    analysis = SegmentAnalysis(players)
+    writer = EncounterWriter() if store_dir else None
+    lines = 0
+    for record in CombatLogParser(advanced).iter_file(path, start=start, end=end):
+        analysis.feed(record)
+        if writer is not None:
+            writer.append(record)
+        lines += 1
+    result = analysis.result()
+    if writer is not None:
+        EncounterStore(store_dir).save(key, writer, {"path": path, "start": start, "end": end})
+    result["lines"] = lines
+    return result
+
+
+# ============================================================================
+# Driver
+# ============================================================================
+
+def _cache_path(cache_dir: str, segment: Dict, players: Optional[List[str]]) -> str:
+    key = hashlib.blake2b(json.dumps([ANALYSIS_VERSION, segment["fingerprint"], segment["advanced"],
+                                          sorted(players or [])]).encode(),
+                          digest_size=16).hexdigest()
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def analyze_log(path: str, workers: Optional[int] = None, players: Optional[List[str]] = None,
+                cache_dir: Optional[str] = CACHE_DIR, store_dir: Optional[str] = None) -> Dict:
+    """
+    Split `path` into encounters and analyse them in parallel.
+    `players` are the names whose casts are audited against the rotation.
+    Pass cache_dir=None to disable the per-segment cache. With `store_dir`,
+    every encounter is also kept as an EncounterStore file keyed by its
+    fingerprint (reported as "store_key").
+    """
+    started = time.perf_counter()
+    segments = find_segments(path)
+    scanned = time.perf_counter() - started
+
+    results: Dict[int, Dict] = {}
+    pending = []
+    for index, segment in enumerate(segments):
+        cached = None
+        if cache_dir:
+            try:
+                with open(_cache_path(cache_dir, segment, players)) as f:
+                    cached = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        if store_dir:
+            segment["store_key"] = segment["fingerprint"]
+            if segment["store_key"] not in EncounterStore(store_dir):
+                cached = None
+        if cached is not None:
+            results[index] = dict(cached, cached=True)
+        else:
+            pending.append(index)
+
+    workers = workers or os.cpu_count() or 1
+    if pending:
+        jobs = {i: (path, segments[i]["start"], segments[i]["end"], players, segments[i]["advanced"],
+                    store_dir, segments[i].get("store_key"))
+                for i in pending}
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+                futures = {i: pool.submit(analyze_segment, *job) for i, job in jobs.items()}
+                computed = {i: future.result() for i, future in futures.items()}
+        else:
+            computed = {i: analyze_segment(*job) for i, job in jobs.items()}
+
+        for i, result in computed.items():
+            results[i] = dict(result, cached=False)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+                cache_path = _cache_path(cache_dir, segments[i], players)
+                tmp_path = f"{cache_path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(result, f)
+                os.replace(tmp_path, cache_path)
+
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(path)
+    return {
+        "path": path,
+        "bytes": size,
+        "encounters": [dict(segment, **results[i]) for i, segment in enumerate(segments)],
+        "analyzed": len(pending),
+        "cached": len(segments) - len(pending),
+        "seconds": round(elapsed, 3),
+        "scan_seconds": round(scanned, 3),
+        "mb_per_second": round(size / elapsed / 1e6, 1) if elapsed else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Audit every encounter in a saved combat log")
+    parser.add_argument("log", help="Path to WoWCombatLog.txt")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--player", action="append", dest="players", help="Audit this player's rotation (repeatable)")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--store", nargs="?", const=STORE_DIR, metavar="DIR",
+                        help=f"Also keep each encounter as columnar arrays (default dir: {STORE_DIR})")
+    parser.add_argument("-o", "--output", help="Write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    report = analyze_log(args.log, args.workers, args.players, None if args.no_cache else CACHE_DIR, args.store)
+    print(f"⚖️ {len(report['encounters'])} encounters in {report['bytes'] / 1e6:.1f} MB "
+          f"({report['seconds']}s, {report['mb_per_second']} MB/s, {report['cached']} cached)")
+    for encounter in report["encounters"]:
+        outcome = {1: "kill", 0: "wipe"}.get(encounter["success"], "incomplete")
+        print(f"  {encounter['name']:<30} {outcome:<10} {encounter['duration']:>5}s "
+              f"dmg {encounter['damage']['total']:>14,} deaths {len(encounter['deaths']):>3} "
+              f"mistakes {sum(encounter['mistakes'].values()):>4}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+encounter_store.py - Columnar on-disk storage for parsed encounters
+
+Parsed combat events used to be thrown away once handled. An encounter is
+stored here as one file of NumPy columns, so questions such as "damage
+taken by X in the 5 s before death", per-second DPS or ability usage
+counts are array slices rather than another pass over the log text.
+
+File layout (<directory>/<key>.enc):
+
+    b"HOLOENC1" | uint64 header length | JSON header | padding | columns
+
+The JSON header holds the row count, each column's dtype and byte offset,
+the interned string tables (event names, units as [guid, name], spell
+names by id) and free-form encounter metadata. Every column starts on a
+64-byte boundary and is opened with np.memmap, so reading an encounter
+only touches the pages a query actually uses.
+
+Columns (one row per log line):
+    time    float64  epoch seconds
+    event   uint16   index into header["events"]
+    source  int32    index into header["units"] (-1: none)
+    dest    int32    index into header["units"] (-1: none)
+    spell   int32    spell id (0: none)
+    amount  int64    damage / healing / power amount (0: none)
+"""
+
+import json
+import os
+import struct
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from combat_log_parser import DAMAGE_EVENTS, HEAL_EVENTS, Clock
+
+STORE_DIR = os.getenv('HOLOCRON_ENCOUNTER_STORE', '.cache/encounters/columns')
+MAGIC = b"HOLOENC1"
+ALIGN = 64
+NIL_GUID = "0000000000000000"
+
+COLUMNS = (("time", "<f8", 'd'), ("event", "<u2", 'H'), ("source", "<i4", 'i'),
+           ("dest", "<i4", 'i'), ("spell", "<i4", 'i'), ("amount", "<i8", 'q'))
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class EncounterWriter:
+    """Accumulates records column by column, interning strings as it goes"""
+
+    def __init__(self):
+        self.columns = {name: array(code) for name, _, code in COLUMNS}
+        self.events: List[str] = []
+        self._event_ids: Dict[str, int] = {}
+        self.units: List[List[str]] = []
+        self._unit_ids: Dict[str, int] = {}
+        self.spells: Dict[int, str] = {}
+        self._clock = Clock()
+
+    def __len__(self):
+        return len(self.columns["time"])
+
+    def _time(self, record) -> float:
+        value = self._clock(record)
+        return value if value is not None else 0.0
+
+    def _unit(self, guid: Optional[str], name: Optional[str]) -> int:
+        if not guid or guid == NIL_GUID:
+            return -1
+        unit = self._unit_ids.get(guid)
+        if unit is None:
+            unit = self._unit_ids[guid] = len(self.units)
+            self.units.append([guid, name or ''])
+        return unit
+
+    def append(self, record):
+        event = self._event_ids.get(record.event)
+        if event is None:
+            event = self._event_ids[record.event] = len(self.events)
+            self.events.append(record.event)
+
+        spell = record.spell_id or 0
+        if spell and spell not in self.spells:
+            self.spells[spell] = record.spell_name or ''
+        columns = self.columns
+        columns["time"].append(self._time(record))
+        columns["event"].append(event)
+        columns["source"].append(self._unit(record.source_guid, record.source_name))
+        columns["dest"].append(self._unit(record.dest_guid, record.dest_name))
+        columns["spell"].append(spell)
+        columns["amount"].append(record.amount or 0)
+
+    def extend(self, records: Iterable):
+        for record in records:
+            self.append(record)
+
+    def write(self, path: str, meta: Optional[Dict] = None) -> str:
+        """Write atomically (temp file + rename) and return `path`"""
+        rows = len(self)
+        header = {"version": 1, "rows": rows, "events": self.events, "units": self.units,
+                  "spells": {str(k): v for k, v in self.spells.items()}, "meta": meta or {}, "columns": {}}
+
+        # Column offsets depend on the header size, which depends on the offsets
+        layout_size = 0
+        while True:
+            offset = _aligned(len(MAGIC) + 8 + layout_size)
+            for name, dtype, _ in COLUMNS:
+                header["columns"][name] = {"dtype": dtype, "offset": offset}
+                offset = _aligned(offset + rows * np.dtype(dtype).itemsize)
+            encoded = json.dumps(header).encode()
+            if len(encoded) <= layout_size:
+                break
+            layout_size = len(encoded) + 256
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', len(encoded)) + encoded)
+            for name, dtype, _ in COLUMNS:
+                f.seek(header["columns"][name]["offset"])
+                f.write(np.frombuffer(self.columns[name], dtype=dtype).tobytes())
+            f.truncate(offset)
+        os.replace(tmp_path, path)
+        return path
+
+
+class Encounter:
+    """A stored encounter; columns are read-only memory maps"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an encounter file")
+            length, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(length))
+
+        self.rows = header["rows"]
+        self.meta = header["meta"]
+        self.events: List[str] = header["events"]
+        self.units: List[List[str]] = header["units"]
+        self.spells: Dict[int, str] = {int(k): v for k, v in header["spells"].items()}
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, column in header["columns"].items():
+            if self.rows:
+                self.columns[name] = np.memmap(path, dtype=column["dtype"], mode='r',
+                                               offset=column["offset"], shape=(self.rows,))
+            else:
+                self.columns[name] = np.empty(0, dtype=column["dtype"])
+
+    def __len__(self):
+        return self.rows
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @property
+    def start(self) -> float:
+        return float(self.columns["time"][0]) if self.rows else 0.0
+
+    # -- lookups -------------------------------------------------------------
+
+    def event_mask(self, *events: str) -> np.ndarray:
+        codes = [i for i, event in enumerate(self.events) if event in events]
+        return np.isin(self.columns["event"], codes)
+
+    def unit_ids(self, unit: str) -> List[int]:
+        """Units matching a GUID, a name or the Name part of "Name-Realm" """
+        return [i for i, (guid, name) in enumerate(self.units)
+                if unit == guid or unit == name or name.startswith(f"{unit}-")]
+
+    def _unit_mask(self, column: str, unit: Optional[str]) -> np.ndarray:
+        if unit is None:
+            return np.ones(self.rows, dtype=bool)
+        return np.isin(self.columns[column], self.unit_ids(unit))
+
+    def window(self, start: float, end: float) -> slice:
+        """Rows with start <= time < end (log lines are in time order)"""
+        times = self.columns["time"]
+        return slice(int(np.searchsorted(times, start, 'left')), int(np.searchsorted(times, end, 'left')))
+
+    # -- queries -------------------------------------------------------------
+
+    def deaths(self, unit: Optional[str] = None) -> np.ndarray:
+        """Times of UNIT_DIED for `unit` (all units if None)"""
+        return self.columns["time"][self.event_mask("UNIT_DIED") & self._unit_mask("dest", unit)]
+
+    def damage_taken(self, unit: str, before: float, seconds: float = 5.0) -> Dict[str, np.ndarray]:
+        """Damage rows against `unit` in the `seconds` before time `before` (inclusive)"""
+        rows = self.window(before - seconds, np.nextafter(before, np.inf))
+        mask = self.event_mask(*DAMAGE_EVENTS)[rows] & self._unit_mask("dest", unit)[rows]
+        return {name: column[rows][mask] for name, column in self.columns.items()}
+
+    def per_second(self, events=DAMAGE_EVENTS, source: Optional[str] = None) -> np.ndarray:
+        """Summed amounts per second since the first row (DPS timeline by default)"""
+        mask = self.event_mask(*events) & self._unit_mask("source", source)
+        if not self.rows:
+            return np.zeros(0, dtype=np.int64)
+        seconds = (self.columns["time"] - self.start).astype(np.int64)
+        length = int(seconds[-1]) + 1
+        return np.bincount(seconds[mask], weights=self.columns["amount"][mask], minlength=length).astype(np.int64)
+
+    def hps(self, source: Optional[str] = None) -> np.ndarray:
+        return self.per_second(HEAL_EVENTS, source)
+
+    def ability_counts(self, source: Optional[str] = None, events=("SPELL_CAST_SUCCESS",)) -> Dict[str, int]:
+        """Uses per spell name, most used first"""
+        mask = self.event_mask(*events) & self._unit_mask("source", source)
+        spells, counts = np.unique(self.columns["spell"][mask], return_counts=True)
+        order = np.argsort(-counts, kind='stable')
+        return {self.spells.get(int(spells[i]), str(spells[i])): int(counts[i]) for i in order}
+
+    def describe(self, rows: Dict[str, np.ndarray]) -> List[Dict]:
+        """Column slices back to readable dicts"""
+        unit_name = lambda i: self.units[i][1] if i >= 0 else None
+        return [{"time": float(t), "event": self.events[e], "source": unit_name(s), "dest": unit_name(d),
+                 "spell": self.spells.get(int(sp)), "amount": int(a)}
+                for t, e, s, d, sp, a in zip(rows["time"], rows["event"], rows["source"], rows["dest"],
+                                             rows["spell"], rows["amount"])]
+
+
+class EncounterStore:
+    """A directory of encounter files keyed by name (e.g. a segment fingerprint)"""
+
+    def __init__(self, directory: str = STORE_DIR):
+        self.directory = directory
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.enc")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def keys(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith(".enc"))
+
+    def save(self, key: str, writer: EncounterWriter, meta: Optional[Dict] = None) -> str:
+        return writer.write(self.path(key), meta)
+
+    def open(self, key: str) -> Encounter:
+        return Encounter(self.path(key))
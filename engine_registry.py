@@ -0,0 +1,198 @@
+"""
+engine_registry.py - Lazy, shared engine construction
+
+Engines used to be built at import time in server.py (and again inside
+DashboardEngine), so every cold start and every test run paid for all of
+them. The registry instead:
+- builds each engine on first use, exactly once, even under concurrent requests
+- hands out LazyEngine proxies so module-level names keep working unchanged
+- shares one instance between server.py, DashboardEngine and BriefingEngine
+- can warm everything in a background thread once the port is bound
+- records how long each engine took to build
+- restores engines from warm-start snapshots when their source files are
+  unchanged (see engine_snapshot.py)
+
+Usage:
+    engines = EngineRegistry()
+    goblin_engine = engines.register('goblin', build_goblin)
+    goblin_engine.analyze_market()      # built here, on first attribute access
+    engines.warm_in_background(port=5005)
+"""
+
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+
+
+class LazyEngine:
+    """Stand-in for a registered engine; attribute access builds the real one"""
+
+    __slots__ = ('_registry', '_name')
+
+    def __init__(self, registry: 'EngineRegistry', name: str):
+        object.__setattr__(self, '_registry', registry)
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._registry.get(self._name), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self._registry.is_loaded(self._name) else "not loaded"
+        return f"<LazyEngine {self._name} ({state})>"
+
+
+class EngineRegistry:
+    """Named engine factories, each run at most once"""
+
+    def __init__(self, snapshots=None):
+        self._factories: Dict[str, Callable] = {}
+        self._sources: Dict[str, List[str]] = {}
+        self._instances: Dict[str, object] = {}
+        self._locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+        self.snapshots = snapshots  # optional engine_snapshot.SnapshotStore
+        self.timings: Dict[str, float] = {}  # name -> seconds to build or restore
+        self.origins: Dict[str, str] = {}    # name -> "built" | "snapshot"
+        self.errors: Dict[str, str] = {}
+        self._cold = set()                   # registered with warm=False
+
+    def register(self, name: str, factory: Callable[[], object],
+                 sources: List[str] = None, warm: bool = True) -> LazyEngine:
+        """
+        Register a zero-argument factory; returns a proxy for module-level use.
+
+        `sources` lists the files (globs allowed) the engine is built from.
+        Only engines with sources are snapshotted; an empty list means the
+        state depends on code alone.
+        `warm=False` keeps the engine out of warm() unless named explicitly
+        (e.g. engines that connect to the database when built).
+        """
+        with self._lock:
+            self._factories[name] = factory
+            if sources is not None:
+                self._sources[name] = list(sources)
+            if warm:
+                self._cold.discard(name)
+            else:
+                self._cold.add(name)
+            self._locks.setdefault(name, threading.RLock())
+        return LazyEngine(self, name)
+
+    def lazy(self, name: str) -> LazyEngine:
+        if name not in self._factories:
+            raise KeyError(f"No engine registered as '{name}'")
+        return LazyEngine(self, name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def get(self, name: str):
+        """Return the engine, building it (and its dependencies) on first use"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        # Per-engine lock: other engines keep building in parallel, and a
+        # factory may call get() for its own dependencies
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+
+            start = time.perf_counter()
+            sources = self._sources.get(name)
+            snapshots = self.snapshots if sources is not None else None
+            try:
+                instance = snapshots.load(name, sources, self.get) if snapshots else None
+                origin = "snapshot"
+                if instance is None:
+                    instance = self._factories[name]()
+                    origin = "built"
+                    if snapshots:
+                        snapshots.save(name, instance, sources, dict(self._instances))
+            except Exception as e:
+                self.errors[name] = str(e)
+                raise
+            self.timings[name] = time.perf_counter() - start
+            self.origins[name] = origin
+            self.errors.pop(name, None)
+            self._instances[name] = instance
+            return instance
+
+    def reset(self, name: str):
+        """Drop a built engine so the next use rebuilds it (e.g. after new uploads)"""
+        with self._locks[name]:
+            self._instances.pop(name, None)
+            self.timings.pop(name, None)
+            self.origins.pop(name, None)
+
+    def warm(self, names: Iterable[str] = None):
+        """Build engines now (default: all but warm=False); failures are logged and left for first use"""
+        for name in list(names or [n for n in self._factories if n not in self._cold]):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"⚠️  Engine '{name}' failed to load: {e}")
+
+    def warm_in_background(self, names: Iterable[str] = None, port: int = None,
+                           host: str = '127.0.0.1', timeout: float = 30.0) -> threading.Thread:
+        """
+        Warm engines on a daemon thread. With `port`, waits until the server
+        accepts connections first so warming never delays binding.
+        """
+        def run():
+            if port:
+                self._wait_for_port(host, port, timeout)
+            start = time.perf_counter()
+            self.warm(names)
+            self.print_report(total=time.perf_counter() - start)
+
+        thread = threading.Thread(target=run, name="engine-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _wait_for_port(host: str, port: int, timeout: float):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                with socket.create_connection((host, port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.1)
+
+    def report(self) -> List[Dict]:
+        """Per-engine build times, slowest first"""
+        rows = []
+        for name in self._factories:
+            rows.append({
+                "engine": name,
+                "loaded": self.is_loaded(name),
+                "seconds": round(self.timings[name], 4) if name in self.timings else None,
+                "origin": self.origins.get(name),
+                "error": self.errors.get(name),
+            })
+        rows.sort(key=lambda r: r["seconds"] or 0, reverse=True)
+        return rows
+
+    def print_report(self, total: float = None):
+        print("\n⏱️  Engine startup timings")
+        print("-" * 50)
+        for row in self.report():
+            if row["error"]:
+                status = f"FAILED ({row['error']})"
+            elif row["loaded"]:
+                status = f"{row['seconds'] * 1000:8.1f} ms  ({row['origin']})"
+            else:
+                status = "not loaded"
+            print(f"  {row['engine']:24} {status}")
+        if total is not None:
+            print("-" * 50)
+            print(f"  {'total (wall)':24} {total * 1000:8.1f} ms")
@@ -0,0 +1,236 @@
+"""
+engine_snapshot.py - Warm-start snapshots of engine state
+
+Restarting server.py used to re-parse wowhead_encounters.json, the uploaded
+DataStore_*.json files and the SavedVariables Lua, and rebuild the pathfinder
+graph. A SnapshotStore keeps each engine's built state on disk, keyed by a
+fingerprint of the files it was built from:
+
+- one file per engine: magic + format version + JSON header + pickled state
+- fingerprint = every source file's size, mtime and SHA-1 (globs allowed),
+  plus the engine's own module so code changes also force a rebuild
+- loads memory-map the file and check the fingerprint; only engines whose
+  inputs changed are rebuilt
+- references to other registered engines are stored by name and re-linked
+  on load, so shared instances stay shared
+
+Snapshots hold pickled objects: the cache directory must only be writable
+by the server, like any other local cache.
+
+Usage (via EngineRegistry):
+    engines = EngineRegistry(snapshots=SnapshotStore())
+    engines.register('codex', build_codex, sources=['data/wowhead_encounters.json'])
+"""
+
+import glob
+import hashlib
+import importlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from engine_registry import LazyEngine
+
+SNAPSHOT_DIR = os.getenv('HOLOCRON_SNAPSHOT_DIR', '.cache/snapshots')
+SNAPSHOT_MAGIC = b'HSNP'
+SNAPSHOT_FORMAT_VERSION = 1
+# magic, format version, header length
+_PREAMBLE = struct.Struct('<4sHI')
+
+# Where DiplomatEngine/UtilityTracker look for SavedVariables
+SAVED_VARIABLES_DIRS = [
+    os.environ.get('WOW_SAVED_VARIABLES_PATH'),
+    "~/Documents/holocron/SavedVariables",
+    "/Applications/World of Warcraft/_retail_/WTF/Account/*/SavedVariables",
+    "C:/Program Files (x86)/World of Warcraft/_retail_/WTF/Account/*/SavedVariables",
+]
+
+
+def saved_variables(filename: str) -> List[str]:
+    """Glob patterns for a SavedVariables file in every location engines search"""
+    return [os.path.join(d, filename) for d in SAVED_VARIABLES_DIRS if d]
+
+
+def module_source(cls) -> str:
+    """Source file of a class, so code changes invalidate its snapshot"""
+    return sys.modules[cls.__module__].__file__
+
+
+def _sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _expand(pattern: str) -> List[str]:
+    return sorted(glob.glob(os.path.expanduser(pattern)))
+
+
+def fingerprint(sources: List[str]) -> Dict[str, List]:
+    """{pattern: [[path, size, mtime_ns, sha1], ...]} for every matching file"""
+    result = {}
+    for pattern in sources:
+        entries = []
+        for path in _expand(pattern):
+            st = os.stat(path)
+            entries.append([path, st.st_size, st.st_mtime_ns, _sha1(path)])
+        result[pattern] = entries
+    return result
+
+
+def fingerprint_matches(recorded: Dict[str, List], sources: List[str]) -> bool:
+    """
+    True when every source is unchanged. Size+mtime is trusted as-is; a file
+    that was only touched is re-hashed and still counts as unchanged.
+    """
+    if sorted(recorded) != sorted(sources):
+        return False
+    for pattern in sources:
+        entries = recorded[pattern]
+        paths = _expand(pattern)
+        if paths != [entry[0] for entry in entries]:
+            return False
+        for path, size, mtime_ns, sha1 in entries:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return False
+            if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                continue
+            if st.st_size != size or _sha1(path) != sha1:
+                return False
+    return True
+
+
+class _EngineRef:
+    """Placeholder for an attribute that pointed at another registered engine"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class SnapshotStore:
+    """Per-engine snapshot files under `directory`"""
+
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "saved": 0, "errors": 0}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.snap")
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def save(self, name: str, engine, sources: List[str], shared: Dict[str, object] = None) -> bool:
+        """
+        Write `engine`'s state. Attributes that are other engines in `shared`
+        ({name: instance}) are saved as references. Returns False if the
+        engine's state cannot be pickled (e.g. it holds a DB connection).
+        """
+        shared_ids = {id(obj): other for other, obj in (shared or {}).items() if other != name}
+        state = {}
+        for attr, value in vars(engine).items():
+            ref = value._name if isinstance(value, LazyEngine) else None
+            if ref is None and id(value) in shared_ids:
+                ref = shared_ids[id(value)]
+            state[attr] = _EngineRef(ref) if ref else value
+
+        cls = type(engine)
+        try:
+            payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            header = json.dumps({
+                "engine": name,
+                "class": [cls.__module__, cls.__qualname__],
+                "created": time.time(),
+                "code": fingerprint([module_source(cls)]),
+                "sources": fingerprint(sources),
+            }).encode('utf-8')
+        except Exception as e:
+            self._count('errors')
+            print(f"⚠️  Snapshot of '{name}' skipped: {e}")
+            return False
+
+        path = self._path(name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header)))
+                f.write(header)
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self._count('errors')
+            print(f"⚠️  Could not write snapshot of '{name}': {e}")
+            return False
+        self._count('saved')
+        return True
+
+    def load(self, name: str, sources: List[str], resolve: Callable[[str], object]) -> Optional[object]:
+        """
+        Return the engine rebuilt from its snapshot, or None if there is no
+        usable snapshot (missing, other format version, or sources changed).
+        `resolve(name)` supplies the live instance for engine references.
+        """
+        try:
+            with open(self._path(name), 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    magic, version, header_len = _PREAMBLE.unpack_from(mm, 0)
+                    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_FORMAT_VERSION:
+                        self._count('misses')
+                        return None
+
+                    start = _PREAMBLE.size
+                    header = json.loads(mm[start:start + header_len].decode('utf-8'))
+                    module_name, qualname = header["class"]
+                    module = importlib.import_module(module_name)
+                    if not (fingerprint_matches(header["code"], [module.__file__])
+                            and fingerprint_matches(header["sources"], sources)):
+                        self._count('misses')
+                        return None
+
+                    # Both views must be released before the map is closed
+                    with memoryview(mm) as view, view[start + header_len:] as body:
+                        state = pickle.loads(body)
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        except Exception as e:
+            self._count('errors')
+            print(f"⚠️  Snapshot of '{name}' unreadable, rebuilding: {e}")
+            return None
+
+        cls = module
+        for part in qualname.split('.'):
+            cls = getattr(cls, part)
+
+        engine = cls.__new__(cls)
+        vars(engine).update({
+            attr: resolve(value.name) if isinstance(value, _EngineRef) else value
+            for attr, value in state.items()
+        })
+        self._count('hits')
+        return engine
+
+    def clear(self, name: str = None):
+        """Delete one engine's snapshot, or all of them"""
+        if name:
+            paths = [self._path(name)]
+        else:
+            paths = glob.glob(os.path.join(self.directory, '*.snap'))
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -6,64 +6,28 @@ Fetches detailed recipe data for crafting leveling guides.
 
 import os
 import psycopg2
-import requests
-import time
 import json
 from dotenv import load_dotenv
 
+from blizzard_client import BlizzardAPIClient, BulkUpserter
+
 load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://jgrayson@localhost/holocron')
 CLIENT_ID = os.getenv('BLIZZARD_CLIENT_ID')
 CLIENT_SECRET = os.getenv('BLIZZARD_CLIENT_SECRET')
 
-class BlizzardAPIClient:
-    """Client for Blizzard's WoW Game Data API"""
-    
-    def __init__(self, client_id, client_secret, region='us'):
-        self.client_id = client_id
-        self.client_secret = client_secret
-        self.region = region
-        self.token = None
-        self.token_expires = 0
-        
-    def get_access_token(self):
-        """Get OAuth access token"""
-        if self.token and time.time() < self.token_expires:
-            return self.token
-            
-        url = f"https://{self.region}.battle.net/oauth/token"
-        response = requests.post(
-            url,
-            data={'grant_type': 'client_credentials'},
-            auth=(self.client_id, self.client_secret)
-        )
-        response.raise_for_status()
-        
-        data = response.json()
-        self.token = data['access_token']
-        self.token_expires = time.time() + data['expires_in'] - 60
-        
-        return self.token
-    
-    def get_recipe_details(self, recipe_id):
-        """Get detailed recipe information including materials"""
-        token = self.get_access_token()
-        url = f"https://{self.region}.api.blizzard.com/data/wow/recipe/{recipe_id}"
-        
-        response = requests.get(
-            url,
-            params={
-                'namespace': f'static-{self.region}',
-                'locale': 'en_US'
-            },
-            headers={'Authorization': f'Bearer {token}'}
-        )
-        
-        if response.status_code != 200:
-            return None
-            
-        return response.json()
+# Bulk UPDATE ... FROM (VALUES ...) so each batch is one statement
+UPDATE_MATERIALS_SQL = """
+    UPDATE goblin.recipe_reference AS r
+    SET materials = v.materials,
+        crafted_item_id = v.crafted_item_id,
+        crafted_quantity = v.crafted_quantity,
+        last_updated = CURRENT_TIMESTAMP
+    FROM (VALUES %s) AS v(recipe_id, materials, crafted_item_id, crafted_quantity)
+    WHERE r.recipe_id = v.recipe_id
+"""
+UPDATE_MATERIALS_TEMPLATE = "(%s, %s::jsonb, %s::int, %s::int)"
 
 def get_db_connection():
     """Connect to PostgreSQL database"""
@@ -132,18 +96,22 @@ def fetch_recipe_materials(limit=100):
         updated = 0
         skipped = 0
         
-        for recipe_id, recipe_name, profession in recipes:
+        # Recipes still missing materials are re-selected next run, so the
+        # WHERE materials IS NULL filter doubles as the resume checkpoint
+        upserter = BulkUpserter(conn, UPDATE_MATERIALS_SQL, page_size=200,
+                                template=UPDATE_MATERIALS_TEMPLATE, unique_column=0)
+        
+        recipe_ids = [row[0] for row in recipes]
+        for recipe_id, details in client.fetch_many(
+                recipe_ids, lambda rid: f"/data/wow/recipe/{rid}"):
+            if not details:
+                skipped += 1
+                continue
+            
             try:
-                details = client.get_recipe_details(recipe_id)
-                
-                if not details:
-                    skipped += 1
-                    continue
-                
                 # Extract materials
-                reagents = details.get('reagents', [])
                 materials = []
-                for reagent in reagents:
+                for reagent in details.get('reagents', []):
                     materials.append({
                         'item_id': reagent['reagent']['id'],
                         'quantity': reagent['quantity']
@@ -153,34 +121,17 @@ def fetch_recipe_materials(limit=100):
                 crafted_item = details.get('crafted_item', {})
                 crafted_item_id = crafted_item.get('id')
                 crafted_quantity = details.get('crafted_quantity', {}).get('value', 1)
-                
-                # Update database
-                cur.execute("""
-                    UPDATE goblin.recipe_reference
-                    SET materials = %s,
-                        crafted_item_id = %s,
-                        crafted_quantity = %s,
-                        last_updated = CURRENT_TIMESTAMP
-                    WHERE recipe_id = %s
-                """, (
-                    json.dumps(materials),
-                    crafted_item_id,
-                    crafted_quantity,
-                    recipe_id
-                ))
-                
-                updated += 1
-                if updated % 10 == 0:
-                    print(f"  ✅ Updated {updated}/{len(recipes)} recipes...")
-                    conn.commit()
-                
-                time.sleep(0.1)  # Rate limiting
-                
             except Exception as e:
                 print(f"  ⚠️  Error for recipe {recipe_id}: {e}")
                 skipped += 1
                 continue
+            
+            upserter.add((recipe_id, json.dumps(materials), crafted_item_id, crafted_quantity))
+            updated += 1
+            if updated % 100 == 0:
+                print(f"  ✅ Updated {updated}/{len(recipes)} recipes...")
         
+        upserter.flush()
         conn.commit()
         print(f"\n✅ Updated {updated} recipes with materials")
         print(f"⚠️  Skipped {skipped} recipes (API errors or missing data)")
@@ -0,0 +1,154 @@
+"""
+fanout.py - Run independent engine calls in parallel with deadlines
+
+DashboardEngine and BriefingEngine used to call every sub-engine in turn,
+so one slow section (a DB-backed Codex, a market analysis) stalled the whole
+page. FanOut runs each section on a shared thread pool instead:
+
+- every section has its own deadline; page latency ~= the slowest section
+  still inside its deadline, not the sum of all of them
+- results are memoized per section with their own TTL
+- a section that misses its deadline (or raises) serves its last value
+  marked "stale", or its fallback marked "timeout"/"error"
+- a timed-out call keeps running and refreshes the memo when it finishes;
+  later requests wait on that same call rather than starting another
+- each call runs in a copy of the caller's context, so context variables
+  (the per-request SQL stats in request_metrics) follow it to the pool
+
+Usage:
+    fanout = FanOut()
+    results = fanout.run({
+        "goblin": Section(goblin.analyze_market, timeout=1.0, ttl=60, fallback={}),
+        "scout": Section(scout.get_alerts, timeout=0.5, ttl=30, fallback=[]),
+    })
+    results["goblin"].value, results["goblin"].status
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class Section:
+    fn: Callable[[], Any]
+    timeout: float = 2.0      # seconds this request will wait for the call
+    ttl: float = 30.0         # seconds a result is served without recomputing
+    fallback: Any = None      # value when there is no result at all
+
+
+@dataclass
+class SectionResult:
+    value: Any
+    status: str               # "ok" | "cached" | "stale" | "timeout" | "error"
+    age: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        info = {"status": self.status}
+        if self.age is not None:
+            info["age"] = round(self.age, 2)
+        if self.error:
+            info["error"] = self.error
+        return info
+
+
+@dataclass
+class _Memo:
+    value: Any = None
+    stored_at: Optional[float] = None
+    inflight: Any = None      # Future of a call that is still running
+    error: Optional[str] = None
+    invalidated: bool = False # value kept as a stale fallback, but never served as cached
+    generation: int = 0       # bumped by invalidate(); calls started earlier are not stored
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class FanOut:
+    """Memoizing parallel executor for named sections"""
+
+    def __init__(self, max_workers: int = 8, name: str = "fanout"):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._memos: Dict[str, _Memo] = {}
+        self._lock = threading.Lock()
+
+    def _memo(self, key: str) -> _Memo:
+        with self._lock:
+            return self._memos.setdefault(key, _Memo())
+
+    def _submit(self, key: str, section: Section, memo: _Memo):
+        """Start the call (or join the one already running) for a section"""
+        with memo.lock:
+            if memo.inflight is not None:
+                return memo.inflight
+            future = self._pool.submit(contextvars.copy_context().run, section.fn)
+            memo.inflight = future
+            generation = memo.generation
+
+        def store(done):
+            with memo.lock:
+                if memo.inflight is done:
+                    memo.inflight = None
+                if memo.generation != generation:
+                    return  # started before the data changed
+                if done.exception() is None:
+                    memo.value = done.result()
+                    memo.stored_at = time.monotonic()
+                    memo.error = None
+                    memo.invalidated = False
+                else:
+                    memo.error = str(done.exception())
+
+        future.add_done_callback(store)
+        return future
+
+    def run(self, sections: Dict[str, Section]) -> Dict[str, SectionResult]:
+        """Run all sections concurrently; returns once each is done or past its deadline"""
+        start = time.monotonic()
+        results = {}
+        pending = {}
+
+        for key, section in sections.items():
+            memo = self._memo(key)
+            if memo.stored_at is not None and not memo.invalidated and start - memo.stored_at < section.ttl:
+                results[key] = SectionResult(memo.value, "cached", start - memo.stored_at)
+            else:
+                pending[key] = self._submit(key, section, memo)
+
+        # Every future is already running, so waiting on them in turn costs
+        # max(deadline), not the sum of them
+        for key, future in pending.items():
+            section = sections[key]
+            remaining = max(0.0, start + section.timeout - time.monotonic())
+            try:
+                results[key] = SectionResult(future.result(timeout=remaining), "ok", 0.0)
+            except FutureTimeout:
+                results[key] = self._degraded(key, section, "timeout", None)
+            except Exception as e:
+                results[key] = self._degraded(key, section, "error", str(e))
+
+        return {key: results[key] for key in sections}
+
+    def _degraded(self, key: str, section: Section, status: str, error: Optional[str]) -> SectionResult:
+        memo = self._memo(key)
+        if memo.stored_at is not None:
+            return SectionResult(memo.value, "stale", time.monotonic() - memo.stored_at, error)
+        return SectionResult(section.fallback, status, None, error)
+
+    def invalidate(self, key: str = None):
+        """
+        Recompute sections (one or all) on their next run because their data
+        changed. Calls already running are not joined or stored; the old
+        value only serves as the stale fallback.
+        """
+        with self._lock:
+            keys = [key] if key else list(self._memos)
+            memos = [self._memos[k] for k in keys if k in self._memos]
+        for memo in memos:
+            with memo.lock:
+                memo.invalidated = True
+                memo.generation += 1
+                memo.inflight = None
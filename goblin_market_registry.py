@@ -0,0 +1,397 @@
+"""
+goblin_market_registry.py - Per-realm/faction sharded market engine
+
+auctionhouse.scans records realm and faction, but a single GoblinEngine keeps
+one global price dict. The registry keeps one shard per
+(region, connected realm group, faction), each with:
+- its own PriceBook (sorted NumPy arrays built from the latest scans)
+- its own GoblinEngine, priced from that book
+- a cached analyze_market() snapshot
+
+Shards load lazily on first request and are evicted least-recently-used
+once the registry exceeds its memory budget. Region-wide prices merge the
+arrays of every shard the loader knows (discover()): resident books as they
+are, cold ones built for the merge only and not kept.
+
+Usage:
+    registry = MarketRegistry()
+    shard = registry.get('us', 'Area 52', 'horde')
+    shard.analysis()
+    book, keys = registry.region_prices('us')
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from goblin_engine import GoblinEngineExpanded
+
+COPPER_PER_GOLD = 10000
+DEFAULT_REGION = os.getenv('WOW_REGION', 'us')
+DEFAULT_MEMORY_BUDGET = int(os.getenv('MARKET_MEMORY_BUDGET_MB', '256')) * 1024 * 1024
+CONNECTED_REALMS_FILE = os.getenv('CONNECTED_REALMS_FILE', 'connected_realms.json')
+
+ShardKey = namedtuple('ShardKey', ['region', 'realm', 'faction'])
+
+
+def make_key(region: str, realm: str, faction: str) -> ShardKey:
+    """Shard keys are case-insensitive ("Area 52"/"area 52", "Horde"/"horde")"""
+    return ShardKey(region.strip().lower(), realm.strip().lower(), faction.strip().lower())
+
+
+# ============================================================================
+# Price Book
+# ============================================================================
+
+class PriceBook:
+    """
+    Aggregated prices for one market, as parallel arrays sorted by item_id.
+
+    Prices are stored in copper. get_market_value() returns gold so a book can
+    stand in for the TSM engine GoblinEngine already knows how to query.
+    """
+
+    def __init__(self, item_ids, min_buyout, market_value, quantity):
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.min_buyout = np.asarray(min_buyout, dtype=np.int64)
+        self.market_value = np.asarray(market_value, dtype=np.int64)
+        self.quantity = np.asarray(quantity, dtype=np.int64)
+
+    @classmethod
+    def empty(cls) -> 'PriceBook':
+        return cls([], [], [], [])
+
+    @classmethod
+    def from_listings(cls, item_ids, prices, quantities) -> 'PriceBook':
+        """Build a book from raw (item_id, unit price, quantity) listings"""
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.int64)
+        quantities = np.maximum(np.asarray(quantities, dtype=np.int64), 1)
+        return cls._aggregate(item_ids, prices, prices * quantities, quantities)
+
+    @classmethod
+    def merge(cls, books: Iterable['PriceBook']) -> 'PriceBook':
+        """
+        Combine several books into one (e.g. every realm in a region).
+        min_buyout is the lowest across books, market_value is weighted by
+        each book's listed quantity.
+        """
+        books = [b for b in books if len(b)]
+        if not books:
+            return cls.empty()
+        item_ids = np.concatenate([b.item_ids for b in books])
+        min_buyout = np.concatenate([b.min_buyout for b in books])
+        quantity = np.concatenate([b.quantity for b in books])
+        weighted = np.concatenate([b.market_value * b.quantity for b in books])
+        return cls._aggregate(item_ids, min_buyout, weighted, quantity)
+
+    @classmethod
+    def _aggregate(cls, item_ids, min_prices, weighted_totals, quantities) -> 'PriceBook':
+        if not len(item_ids):
+            return cls.empty()
+        unique_ids, min_buyout, weighted, total_quantity = cls._reduce(
+            item_ids, min_prices, weighted_totals, quantities)
+        return cls(unique_ids, min_buyout, weighted // total_quantity, total_quantity)
+
+    @staticmethod
+    def _reduce(item_ids, min_prices, weighted_totals, quantities):
+        """One row per item: (item_ids, min price, quantity-weighted total, quantity)"""
+        order = np.argsort(item_ids, kind='stable')
+        unique_ids, starts = np.unique(item_ids[order], return_index=True)
+        return (unique_ids,
+                np.minimum.reduceat(min_prices[order], starts),
+                np.add.reduceat(weighted_totals[order], starts),
+                np.add.reduceat(quantities[order], starts))
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.item_ids.nbytes + self.min_buyout.nbytes
+                + self.market_value.nbytes + self.quantity.nbytes)
+
+    def _index(self, item_id: int) -> int:
+        idx = int(np.searchsorted(self.item_ids, item_id))
+        if idx < len(self.item_ids) and self.item_ids[idx] == item_id:
+            return idx
+        return -1
+
+    def get_market_value(self, item_id: int) -> int:
+        """Market value in gold (0 when the item is not listed)"""
+        idx = self._index(item_id)
+        if idx < 0:
+            return 0
+        return int(self.market_value[idx]) // COPPER_PER_GOLD
+
+    def to_dict(self) -> Dict[int, Dict]:
+        return {
+            int(item_id): {
+                "min_buyout": int(mb),
+                "market_value": int(mv),
+                "quantity": int(q),
+            }
+            for item_id, mb, mv, q in zip(self.item_ids, self.min_buyout,
+                                          self.market_value, self.quantity)
+        }
+
+
+# ============================================================================
+# Shards
+# ============================================================================
+
+class MarketShard:
+    """One market: its price book, a GoblinEngine bound to it, and a snapshot"""
+
+    # Rough fixed cost of the engine/recipes per shard, on top of the arrays
+    BASE_BYTES = 64 * 1024
+
+    def __init__(self, key: ShardKey, book: PriceBook):
+        self.key = key
+        self.book = book
+        self.engine = GoblinEngineExpanded()
+        self.engine.load_mock_data()
+        self.engine.tsm_engine = book
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self._analysis = None
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self.BASE_BYTES + self.book.nbytes
+
+    def analysis(self) -> Dict:
+        """analyze_market() for this shard, computed once per price book"""
+        with self._lock:
+            if self._analysis is None:
+                self._analysis = self.engine.analyze_market()
+            return self._analysis
+
+    def to_dict(self) -> Dict:
+        return {
+            "region": self.key.region,
+            "realm": self.key.realm,
+            "faction": self.key.faction,
+            "items": len(self.book),
+            "bytes": self.nbytes,
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+        }
+
+
+# ============================================================================
+# Loaders
+# ============================================================================
+
+def load_realm_groups(path: str = CONNECTED_REALMS_FILE) -> Dict[str, List[str]]:
+    """
+    Connected-realm groups as {group name: [member realm, ...]}.
+    Realms not listed in the file form a group of their own.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️  Could not read {path}: {e}")
+        return {}
+
+
+class ScanLoader:
+    """Builds shard price books from the latest auctionhouse scans"""
+
+    def __init__(self, get_connection: Callable, realm_groups: Dict[str, List[str]] = None,
+                 region: str = DEFAULT_REGION):
+        self.get_connection = get_connection
+        self.region = region.lower()
+        groups = realm_groups if realm_groups is not None else load_realm_groups()
+        self.members = {group.lower(): [r.lower() for r in realms] for group, realms in groups.items()}
+        self.group_of = {realm: group for group, realms in self.members.items() for realm in realms}
+
+    def __call__(self, key: ShardKey) -> PriceBook:
+        if key.region != self.region:
+            return PriceBook.empty()
+        realms = self.members.get(key.realm, [key.realm])
+
+        conn = self.get_connection()
+        try:
+            cur = conn.cursor()
+            # Listings from the newest scan of each member realm
+            cur.execute("""
+                SELECT si.item_id, si.price, si.quantity
+                FROM auctionhouse.scan_items si
+                JOIN (
+                    SELECT DISTINCT ON (lower(realm)) scan_id
+                    FROM auctionhouse.scans
+                    WHERE lower(realm) = ANY(%s) AND lower(faction) = %s
+                    ORDER BY lower(realm), timestamp DESC
+                ) latest ON latest.scan_id = si.scan_id
+            """, (realms, key.faction))
+            rows = cur.fetchall()
+            cur.close()
+        finally:
+            conn.close()
+
+        if not rows:
+            return PriceBook.empty()
+        item_ids, prices, quantities = zip(*rows)
+        return PriceBook.from_listings(item_ids, prices, quantities)
+
+    def discover(self) -> List[ShardKey]:
+        """Every (region, realm group, faction) that has at least one scan"""
+        conn = self.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT DISTINCT lower(realm), lower(faction) FROM auctionhouse.scans")
+            rows = cur.fetchall()
+            cur.close()
+        finally:
+            conn.close()
+        return sorted({ShardKey(self.region, self.group_of.get(realm, realm), faction)
+                       for realm, faction in rows})
+
+    def key_for(self, region: str, realm: str, faction: str) -> ShardKey:
+        """Map a member realm onto its connected-realm group"""
+        key = make_key(region, realm, faction)
+        return key._replace(realm=self.group_of.get(key.realm, key.realm))
+
+
+# ============================================================================
+# Registry
+# ============================================================================
+
+class MarketRegistry:
+    """
+    Lazily loaded, LRU-evicted collection of MarketShards.
+
+    `loader(key) -> PriceBook` builds a cold shard; it may also provide
+    discover() (all known keys) and key_for() (realm -> realm group).
+    """
+
+    def __init__(self, loader: Callable[[ShardKey], PriceBook],
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        self.loader = loader
+        self.memory_budget = memory_budget
+        self._shards = OrderedDict()  # ShardKey -> MarketShard, oldest first
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.stats = {"hits": 0, "loads": 0, "evictions": 0}
+
+    def key_for(self, region: str, realm: str, faction: str) -> ShardKey:
+        if hasattr(self.loader, 'key_for'):
+            return self.loader.key_for(region, realm, faction)
+        return make_key(region, realm, faction)
+
+    def get(self, region: str, realm: str, faction: str) -> MarketShard:
+        """Return the shard for a market, loading it on first use"""
+        key = self.key_for(region, realm, faction)
+
+        with self._lock:
+            shard = self._touch(key)
+            if shard:
+                return shard
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other shards stay available;
+        # the per-key lock stops concurrent requests loading the same shard twice
+        with load_lock:
+            with self._lock:
+                shard = self._touch(key)
+                if shard:
+                    return shard
+
+            shard = MarketShard(key, self.loader(key))
+
+            with self._lock:
+                self._shards[key] = shard
+                self.stats["loads"] += 1
+                self._evict(keep=key)
+                self._load_locks.pop(key, None)
+            return shard
+
+    def _touch(self, key: ShardKey) -> Optional[MarketShard]:
+        shard = self._shards.get(key)
+        if shard:
+            self._shards.move_to_end(key)
+            shard.last_used = time.time()
+            self.stats["hits"] += 1
+        return shard
+
+    def _evict(self, keep: ShardKey):
+        """Drop least-recently-used shards until we are back under budget"""
+        while self._memory_usage() > self.memory_budget and len(self._shards) > 1:
+            oldest = next(iter(self._shards))
+            if oldest == keep:
+                break
+            del self._shards[oldest]
+            self.stats["evictions"] += 1
+
+    def invalidate(self, region: str, realm: str, faction: str):
+        """Forget a shard (e.g. after a new scan) so the next request reloads it"""
+        key = self.key_for(region, realm, faction)
+        with self._lock:
+            self._shards.pop(key, None)
+
+    def _memory_usage(self) -> int:
+        return sum(shard.nbytes for shard in self._shards.values())
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return self._memory_usage()
+
+    def status(self) -> Dict:
+        """Resident shards, memory and counters, read together"""
+        with self._lock:
+            return {"shards": [shard.to_dict() for shard in self._shards.values()],
+                    "memory_bytes": self._memory_usage(), "memory_budget": self.memory_budget,
+                    "stats": dict(self.stats)}
+
+    def loaded(self) -> List[Dict]:
+        with self._lock:
+            return [shard.to_dict() for shard in self._shards.values()]
+
+    def known_keys(self, region: str, faction: str = None) -> List[ShardKey]:
+        """Shards in a region: everything the loader knows about plus anything resident"""
+        keys = set(self.loader.discover()) if hasattr(self.loader, 'discover') else set()
+        with self._lock:
+            keys.update(self._shards)
+        region = region.lower()
+        faction = faction.lower() if faction else None
+        return sorted(k for k in keys if k.region == region and (faction is None or k.faction == faction))
+
+    def region_prices(self, region: str, faction: str = None) -> Tuple[PriceBook, List[ShardKey]]:
+        """
+        Region-wide price book over every known shard of the region (and
+        faction), with the keys it covers. Resident shards lend their books;
+        cold ones are built through the loader for this merge only, never
+        inserted into the LRU, so the shards in active use stay loaded. The
+        merge is folded one book at a time to keep a single cold book in
+        memory.
+        """
+        keys = self.known_keys(region, faction)
+        with self._lock:
+            resident = {key: shard.book for key, shard in self._shards.items()}
+
+        merged = None
+        for key in keys:
+            book = resident.get(key)
+            if book is None:
+                book = self.loader(key)
+            if not len(book):
+                continue
+            parts = (book.item_ids, book.min_buyout, book.market_value * book.quantity, book.quantity)
+            if merged is not None:
+                parts = tuple(np.concatenate(pair) for pair in zip(merged, parts))
+            merged = PriceBook._reduce(*parts)
+
+        if merged is None:
+            return PriceBook.empty(), keys
+        item_ids, min_buyout, weighted, quantity = merged
+        return PriceBook(item_ids, min_buyout, weighted // quantity, quantity), keys
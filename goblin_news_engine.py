@@ -24,24 +24,41 @@ from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import re
-from collections import defaultdict
-import os
-import pickle
-from goblin_training import MarketPredictionModel
+import hashlib
+import threading
+from collections import defaultdict, OrderedDict
+from goblin_training import MarketModelLoader
 
 # ============================================================================
 # News Scraper
 # ============================================================================
 
+DEFAULT_NEWS_SOURCES = {
+    "wowhead": "https://www.wowhead.com/news",
+    "mmochampion": "https://www.mmo-champion.com/",
+    "blizzard": "https://worldofwarcraft.blizzard.com/en-us/news",
+}
+
+def article_hash(article: Dict) -> str:
+    """
+    Stable dedupe key for an article.
+    
+    Sources without per-article links report their landing page as the URL,
+    so the title is folded in to keep those articles distinct.
+    """
+    key = article['url']
+    if key == article.get('source_url'):
+        key = f"{key}#{article['title']}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
 class WoWNewsScraper:
-    def __init__(self):
-        self.sources = {
-            "wowhead": "https://www.wowhead.com/news",
-            "mmochampion": "https://www.mmo-champion.com/",
-            "blizzard": "https://worldofwarcraft.blizzard.com/en-us/news",
-        }
+    def __init__(self, sources: Dict[str, str] = None):
+        self.sources = dict(sources or DEFAULT_NEWS_SOURCES)
         self.cache = {}
         self.last_scrape = None
+        # Keep-alive session + per-source ETag/Last-Modified validators
+        self.session = requests.Session()
+        self.validators = {}
     
     def scrape_all_sources(self) -> List[Dict]:
         """Scrape all news sources and return articles"""
@@ -59,78 +76,136 @@ class WoWNewsScraper:
         self.last_scrape = datetime.now()
         return articles
     
+    def scrape_changed_sources(self) -> List[Dict]:
+        """
+        Conditionally re-fetch every source (If-None-Match/If-Modified-Since).
+        
+        Sources that answer 304 Not Modified contribute nothing, so only pages
+        that actually changed are parsed.
+        """
+        parsers = {
+            "wowhead": self._parse_wowhead,
+            "mmochampion": self._parse_mmochampion,
+            "blizzard": self._parse_blizzard,
+        }
+        
+        articles = []
+        for source, parse in parsers.items():
+            if source not in self.sources:
+                continue
+            try:
+                html = self._fetch_if_modified(source)
+                if html is not None:
+                    articles.extend(parse(html))
+            except Exception as e:
+                print(f"Error scraping {source}: {e}")
+        
+        self.last_scrape = datetime.now()
+        return articles
+    
+    def _fetch_if_modified(self, source: str):
+        """GET a source page, returning None when the server says it is unchanged"""
+        headers = {}
+        validators = self.validators.get(source, {})
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        
+        response = self.session.get(self.sources[source], headers=headers, timeout=10)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        
+        self.validators[source] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        return response.text
+    
     def _scrape_wowhead(self) -> List[Dict]:
         """Scrape Wowhead news"""
         try:
-            response = requests.get(self.sources["wowhead"], timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            articles = []
-            # Find news articles (simplified - actual selectors may vary)
-            for article in soup.find_all('article', limit=10):
-                title_elem = article.find('h2') or article.find('h3')
-                link_elem = article.find('a')
-                
-                if title_elem and link_elem:
-                    articles.append({
-                        "source": "wowhead",
-                        "title": title_elem.get_text(strip=True),
-                        "url": f"https://www.wowhead.com{link_elem.get('href', '')}",
-                        "timestamp": datetime.now().isoformat(),
-                    })
-            
-            return articles
+            response = self.session.get(self.sources["wowhead"], timeout=10)
+            return self._parse_wowhead(response.text)
         except Exception as e:
             print(f"Error scraping Wowhead: {e}")
             return []
     
+    def _parse_wowhead(self, html: str) -> List[Dict]:
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        articles = []
+        # Find news articles (simplified - actual selectors may vary)
+        for article in soup.find_all('article', limit=10):
+            title_elem = article.find('h2') or article.find('h3')
+            link_elem = article.find('a')
+            
+            if title_elem and link_elem:
+                articles.append({
+                    "source": "wowhead",
+                    "title": title_elem.get_text(strip=True),
+                    "url": f"https://www.wowhead.com{link_elem.get('href', '')}",
+                    "timestamp": datetime.now().isoformat(),
+                })
+        
+        return articles
+    
     def _scrape_mmochampion(self) -> List[Dict]:
         """Scrape MMO-Champion"""
         try:
-            response = requests.get(self.sources["mmochampion"], timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            articles = []
-            # MMO-Champion structure (simplified)
-            for item in soup.find_all('div', class_='news-item', limit=10):
-                title_elem = item.find('h3') or item.find('a')
-                
-                if title_elem:
-                    articles.append({
-                        "source": "mmochampion",
-                        "title": title_elem.get_text(strip=True),
-                        "url": self.sources["mmochampion"],
-                        "timestamp": datetime.now().isoformat(),
-                    })
-            
-            return articles
+            response = self.session.get(self.sources["mmochampion"], timeout=10)
+            return self._parse_mmochampion(response.text)
         except Exception as e:
             print(f"Error scraping MMO-Champion: {e}")
             return []
     
+    def _parse_mmochampion(self, html: str) -> List[Dict]:
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        articles = []
+        # MMO-Champion structure (simplified)
+        for item in soup.find_all('div', class_='news-item', limit=10):
+            title_elem = item.find('h3') or item.find('a')
+            
+            if title_elem:
+                articles.append({
+                    "source": "mmochampion",
+                    "title": title_elem.get_text(strip=True),
+                    "url": self.sources["mmochampion"],
+                    "source_url": self.sources["mmochampion"],
+                    "timestamp": datetime.now().isoformat(),
+                })
+        
+        return articles
+    
     def _scrape_blizzard(self) -> List[Dict]:
         """Scrape official Blizzard news"""
         try:
-            response = requests.get(self.sources["blizzard"], timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            articles = []
-            # Blizzard news structure (simplified)
-            for article in soup.find_all('article', limit=10):
-                title_elem = article.find('h3')
-                
-                if title_elem:
-                    articles.append({
-                        "source": "blizzard",
-                        "title": title_elem.get_text(strip=True),
-                        "url": self.sources["blizzard"],
-                        "timestamp": datetime.now().isoformat(),
-                    })
-            
-            return articles
+            response = self.session.get(self.sources["blizzard"], timeout=10)
+            return self._parse_blizzard(response.text)
         except Exception as e:
             print(f"Error scraping Blizzard: {e}")
             return []
+    
+    def _parse_blizzard(self, html: str) -> List[Dict]:
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        articles = []
+        # Blizzard news structure (simplified)
+        for article in soup.find_all('article', limit=10):
+            title_elem = article.find('h3')
+            
+            if title_elem:
+                articles.append({
+                    "source": "blizzard",
+                    "title": title_elem.get_text(strip=True),
+                    "url": self.sources["blizzard"],
+                    "source_url": self.sources["blizzard"],
+                    "timestamp": datetime.now().isoformat(),
+                })
+        
+        return articles
 
 # ============================================================================
 # News Analysis Engine
@@ -289,24 +364,20 @@ class NewsAnalysisEngine:
 # Predictive Market Engine (Combines News + Historical Data)
 # ============================================================================
 
+# Shared across engine instances so the artifact is read once per change,
+# not once per request
+_model_loader = MarketModelLoader()
+
 class PredictiveMarketEngine:
-    def __init__(self):
+    def __init__(self, model_loader: MarketModelLoader = None):
         self.news_scraper = WoWNewsScraper()
         self.news_analyzer = NewsAnalysisEngine()
-        self.model = None
-        self._load_model()
-        
-    def _load_model(self):
-        """Load trained ML model if available"""
-        try:
-            if os.path.exists('market_prediction_model.pkl'):
-                self.model = MarketPredictionModel()
-                self.model.load_model('market_prediction_model.pkl')
-                print("ML Model loaded successfully into News Engine")
-            else:
-                print("No ML model found (market_prediction_model.pkl)")
-        except Exception as e:
-            print(f"Error loading ML model: {e}")
+        self.model_loader = model_loader or _model_loader
+    
+    @property
+    def model(self):
+        """Trained ML model, loaded on first use and reloaded when the file changes"""
+        return self.model_loader.get()
     
     def predict_market_shifts(self, historical_data: List[Dict] = None) -> List[Dict]:
         """
@@ -321,6 +392,11 @@ class PredictiveMarketEngine:
         # Analyze news for market impacts
         predictions = self.news_analyzer.analyze_news(articles)
         
+        return self.build_recommendations(predictions, historical_data)
+    
+    def build_recommendations(self, predictions: List[Dict],
+                              historical_data: List[Dict] = None) -> List[Dict]:
+        """Turn analyzed news predictions into actionable recommendations"""
         # Enhance with historical correlation
         if historical_data:
             predictions = self._enhance_with_history(predictions, historical_data)
@@ -350,7 +426,8 @@ class PredictiveMarketEngine:
         """
         Enhance predictions using historical price correlations
         """
-        if not self.model or not self.model.trained:
+        model = self.model
+        if not model or not model.trained:
             return predictions
             
         enhanced = []
@@ -372,8 +449,8 @@ class PredictiveMarketEngine:
             elif pred['type'] == 'profession_change':
                 model_event_type = 'profession'
             
-            if model_event_type and model_event_type in self.model.event_type_weights:
-                weights = self.model.event_type_weights[model_event_type]
+            if model_event_type and model_event_type in model.event_type_weights:
+                weights = model.event_type_weights[model_event_type]
                 
                 # Add historical context
                 avg_impact = weights['avg_price_change']
@@ -391,14 +468,19 @@ class PredictiveMarketEngine:
             
         return enhanced
     
-    def get_stockpile_recommendations(self) -> List[Dict]:
+    def get_stockpile_recommendations(self, predictions: List[Dict] = None) -> List[Dict]:
         """
         Get items to stockpile based on predicted events
         
+        Args:
+            predictions: Recommendations from predict_market_shifts; scraped
+                         fresh when omitted
+        
         Returns:
             List of items to buy now before price spike
         """
-        predictions = self.predict_market_shifts()
+        if predictions is None:
+            predictions = self.predict_market_shifts()
         
         stockpile = []
         
@@ -413,6 +495,116 @@ class PredictiveMarketEngine:
         
         return stockpile
 
+# ============================================================================
+# Background Ingestion
+# ============================================================================
+
+class NewsIngestionScheduler:
+    """
+    Polls the news sources on an interval and keeps a published prediction
+    snapshot, so the API never waits on the remote sites.
+    
+    Each cycle conditionally re-fetches the sources, drops articles already
+    seen (by URL hash) and only runs the analyzer on the new ones.
+    """
+    def __init__(self, engine: PredictiveMarketEngine = None,
+                 interval: float = 900, max_articles: int = 500):
+        self.engine = engine or PredictiveMarketEngine()
+        self.interval = interval
+        self.max_articles = max_articles
+        
+        # article hash -> predictions for that article (insertion ordered)
+        self._predictions_by_article = OrderedDict()
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"cycles": 0, "new_articles": 0, "errors": 0}
+    
+    def start(self):
+        """Start the background thread (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="news-ingest", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"News ingestion error: {e}")
+            self._stop.wait(self.interval)
+    
+    def run_once(self) -> int:
+        """Run one ingestion cycle; returns the number of new articles"""
+        articles = self.engine.news_scraper.scrape_changed_sources()
+        
+        new_articles = {}
+        for article in articles:
+            key = article_hash(article)
+            if key not in self._predictions_by_article:
+                new_articles.setdefault(key, article)
+        
+        # Analyze only what we have not seen before. An article is marked seen
+        # only once analyzed; after a failure its source is fetched in full next
+        # cycle (no If-None-Match) so the article comes back for another try
+        for key, article in list(new_articles.items()):
+            try:
+                self._predictions_by_article[key] = self.engine.news_analyzer.analyze_news([article])
+            except Exception as e:
+                del new_articles[key]
+                self.engine.news_scraper.validators.pop(article.get('source'), None)
+                self.stats["errors"] += 1
+                print(f"News analysis failed for {article.get('title', key)}: {e}")
+        
+        while len(self._predictions_by_article) > self.max_articles:
+            self._predictions_by_article.popitem(last=False)
+        
+        if new_articles or self._snapshot is None:
+            self._publish()
+        
+        self.stats["cycles"] += 1
+        self.stats["new_articles"] += len(new_articles)
+        return len(new_articles)
+    
+    def _publish(self):
+        predictions = [
+            pred for preds in self._predictions_by_article.values() for pred in preds
+        ]
+        recommendations = self.engine.build_recommendations(predictions)
+        snapshot = {
+            "predictions": recommendations,
+            "stockpile_now": self.engine.get_stockpile_recommendations(recommendations),
+            "last_updated": datetime.now().isoformat(),
+        }
+        with self._lock:
+            self._snapshot = snapshot
+    
+    def get_snapshot(self) -> Dict:
+        """Latest published predictions, or None before the first cycle finishes"""
+        with self._lock:
+            return self._snapshot
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_news_scheduler() -> NewsIngestionScheduler:
+    """Process-wide scheduler, started on first access"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = NewsIngestionScheduler()
+            _scheduler.start()
+    return _scheduler
+
 # ============================================================================
 # Flask Endpoint Integration
 # ============================================================================
@@ -421,21 +613,24 @@ def get_market_predictions_endpoint() -> Dict:
     """
     Flask endpoint for news-based market predictions
     
+    Serves the background scheduler's cached snapshot; never scrapes inline.
+    
     Usage in server.py:
         @app.route('/api/goblin/predictions')
         def goblin_predictions():
             return get_market_predictions_endpoint()
     """
-    engine = PredictiveMarketEngine()
+    snapshot = get_news_scheduler().get_snapshot()
     
-    recommendations = engine.predict_market_shifts()
-    stockpile = engine.get_stockpile_recommendations()
+    if snapshot is None:
+        return {
+            "predictions": [],
+            "stockpile_now": [],
+            "last_updated": None,
+            "status": "warming_up",
+        }
     
-    return {
-        "predictions": recommendations,
-        "stockpile_now": stockpile,
-        "last_updated": datetime.now().isoformat(),
-    }
+    return snapshot
 
 # ============================================================================
 # Example Usage
@@ -455,7 +650,7 @@ if __name__ == "__main__":
         print(f"  Confidence: {pred['confidence']:.0%}")
     
     print("\n=== Stockpile Recommendations ===")
-    stockpile = engine.get_stockpile_recommendations()
+    stockpile = engine.get_stockpile_recommendations(predictions)
     for item in stockpile:
         print(f"\nBuy: {item['items']}")
         print(f"  Why: {item['reason']}")
@@ -20,14 +20,16 @@ Process:
 5. Save trained model for predictions
 """
 
+import sys
 import json
 import pickle
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from collections import defaultdict
 import psycopg2
 import os
+import threading
 
 # ============================================================================
 # Historical Data Loader
@@ -217,10 +219,19 @@ class EventPriceCorrelator:
 # ML Model Trainer
 # ============================================================================
 
+MODEL_PATH = 'market_prediction_model.npz'
+MODEL_FORMAT = 'goblin-market-model'
+MODEL_FORMAT_VERSION = 1
+
+# Per-event-type statistics, one array per column (row i = event_types[i])
+MODEL_COLUMNS = ('avg_price_change', 'std_price_change', 'avg_peak_time',
+                 'confidence', 'sample_count')
+
 class MarketPredictionModel:
     def __init__(self):
         self.event_type_weights = {}
         self.trained = False
+        self._build_arrays()
     
     def train(self, training_data: List[Dict]):
         """
@@ -251,14 +262,15 @@ class MarketPredictionModel:
             peak_times = [i['peak_time'] for i in impacts]
             
             self.event_type_weights[event_type] = {
-                "avg_price_change": np.mean(price_changes),
-                "std_price_change": np.std(price_changes),
-                "avg_peak_time": np.mean(peak_times),
+                "avg_price_change": float(np.mean(price_changes)),
+                "std_price_change": float(np.std(price_changes)),
+                "avg_peak_time": float(np.mean(peak_times)),
                 "confidence": min(len(impacts) / 20, 1.0),  # More data = higher confidence
                 "sample_count": len(impacts),
             }
         
         self.trained = True
+        self._build_arrays()
         
         print("\nTraining complete!")
         print("\nLearned Patterns:")
@@ -269,6 +281,70 @@ class MarketPredictionModel:
             print(f"  Confidence: {weights['confidence']:.2f}")
             print(f"  Samples: {weights['sample_count']}")
     
+    def _build_arrays(self):
+        """Rebuild the sorted column arrays used by predict_batch"""
+        event_types = sorted(self.event_type_weights)
+        self._event_types = np.array(event_types, dtype=str)
+        self._columns = {
+            column: np.array([self.event_type_weights[e][column] for e in event_types],
+                             dtype=np.int64 if column == 'sample_count' else np.float64)
+            for column in MODEL_COLUMNS
+        }
+    
+    def _lookup(self, event_types) -> Tuple[np.ndarray, np.ndarray]:
+        """Map event type strings to row indices; returns (rows, known_mask)"""
+        event_types = np.asarray(event_types, dtype=str)
+        if len(self._event_types) == 0:
+            rows = np.zeros(event_types.shape, dtype=np.intp)
+            return rows, np.zeros(event_types.shape, dtype=bool)
+        
+        rows = np.searchsorted(self._event_types, event_types)
+        rows = np.minimum(rows, len(self._event_types) - 1)
+        known = self._event_types[rows] == event_types
+        return rows, known
+    
+    def predict_batch(self, event_types, item_ids) -> Dict[str, np.ndarray]:
+        """
+        Vectorized prediction over arrays of event types and item IDs
+        
+        Args:
+            event_types: A single event type or an array broadcastable
+                         against item_ids
+            item_ids: Array of item IDs
+        
+        Returns:
+            Dict of column arrays (item_id, event_type, known, predicted_change_pct,
+            expected_peak_hours, confidence, buy). Rows whose event type the model
+            has never seen have known=False and zeroed statistics.
+        """
+        if not self.trained:
+            raise Exception("Model not trained yet!")
+        
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        event_types = np.broadcast_to(np.asarray(event_types, dtype=str), item_ids.shape)
+        
+        rows, known = self._lookup(event_types)
+        
+        change = np.where(known, self._column('avg_price_change', rows), 0.0)
+        peak = np.where(known, self._column('avg_peak_time', rows), 0.0)
+        confidence = np.where(known, self._column('confidence', rows), 0.0)
+        
+        return {
+            "item_id": item_ids,
+            "event_type": event_types,
+            "known": known,
+            "predicted_change_pct": np.round(change, 1),
+            "expected_peak_hours": np.round(peak, 1),
+            "confidence": confidence,
+            "buy": known & (change > 20),
+        }
+    
+    def _column(self, column: str, rows: np.ndarray) -> np.ndarray:
+        values = self._columns[column]
+        if len(values) == 0:
+            return np.zeros(rows.shape, dtype=np.float64)
+        return values[rows]
+    
     def predict(self, event_type: str, item_ids: List[int]) -> List[Dict]:
         """
         Predict price impact for a new event
@@ -279,44 +355,138 @@ class MarketPredictionModel:
         if not self.trained:
             raise Exception("Model not trained yet!")
         
-        weights = self.event_type_weights.get(event_type)
-        
-        if not weights:
+        if event_type not in self.event_type_weights:
             return []
         
-        predictions = []
+        batch = self.predict_batch(event_type, item_ids)
         
-        for item_id in item_ids:
-            predictions.append({
-                "item_id": item_id,
-                "predicted_change_pct": round(weights['avg_price_change'], 1),
-                "expected_peak_hours": round(weights['avg_peak_time'], 1),
-                "confidence": weights['confidence'],
-                "action": "BUY NOW" if weights['avg_price_change'] > 20 else "MONITOR",
-            })
-        
-        return predictions
+        return [
+            {
+                "item_id": int(item_id),
+                "predicted_change_pct": float(change),
+                "expected_peak_hours": float(peak),
+                "confidence": float(confidence),
+                "action": "BUY NOW" if buy else "MONITOR",
+            }
+            for item_id, change, peak, confidence, buy in zip(
+                batch['item_id'], batch['predicted_change_pct'],
+                batch['expected_peak_hours'], batch['confidence'], batch['buy'])
+        ]
     
     def save_model(self, filepath: str):
-        """Save trained model to disk"""
-        with open(filepath, 'wb') as f:
-            pickle.dump({
-                "weights": self.event_type_weights,
-                "trained": self.trained,
-            }, f)
+        """
+        Save trained model to disk
+        
+        Format: uncompressed .npz with one array per statistic column, the
+        event type names, and a JSON header (format name + version). No pickled
+        objects are written, so loading never executes arbitrary code.
+        """
+        header = {
+            "format": MODEL_FORMAT,
+            "version": MODEL_FORMAT_VERSION,
+            "trained": self.trained,
+            "columns": list(MODEL_COLUMNS),
+            "saved_at": datetime.now().isoformat(),
+        }
+        
+        # Write to a temp file and rename so readers never see a partial model
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                header=np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8),
+                event_types=self._event_types,
+                **self._columns,
+            )
+        os.replace(tmp_path, filepath)
         
         print(f"Model saved to {filepath}")
     
     def load_model(self, filepath: str):
         """Load trained model from disk"""
-        with open(filepath, 'rb') as f:
-            data = pickle.load(f)
-        
-        self.event_type_weights = data['weights']
-        self.trained = data['trained']
+        with np.load(filepath, allow_pickle=False) as data:
+            header = json.loads(data['header'].tobytes().decode('utf-8'))
+            
+            if header.get('format') != MODEL_FORMAT:
+                raise ValueError(f"{filepath} is not a market prediction model")
+            if header.get('version', 0) > MODEL_FORMAT_VERSION:
+                raise ValueError(
+                    f"Model format v{header['version']} is newer than supported "
+                    f"v{MODEL_FORMAT_VERSION}"
+                )
+            
+            event_types = [str(e) for e in data['event_types']]
+            columns = {column: data[column] for column in MODEL_COLUMNS}
+        
+        self.event_type_weights = {
+            event_type: {
+                column: (int(columns[column][i]) if column == 'sample_count'
+                         else float(columns[column][i]))
+                for column in MODEL_COLUMNS
+            }
+            for i, event_type in enumerate(event_types)
+        }
+        self.trained = bool(header.get('trained', True))
+        self._build_arrays()
         
         print(f"Model loaded from {filepath}")
 
+class MarketModelLoader:
+    """
+    Lazily loads the model artifact on first use and hot-reloads it when the
+    file on disk changes (checked by mtime + size on each access).
+    """
+    def __init__(self, filepath: str = MODEL_PATH):
+        self.filepath = filepath
+        self._model = None
+        self._signature = None
+        self._lock = threading.Lock()
+    
+    def get(self) -> Optional[MarketPredictionModel]:
+        """Return the current model, or None if no artifact exists"""
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return self._model
+        
+        with self._lock:
+            if signature != self._signature:
+                model = MarketPredictionModel()
+                try:
+                    model.load_model(self.filepath)
+                except Exception as e:
+                    print(f"Error loading ML model: {e}")
+                    # Keep serving the previous model rather than failing
+                    self._signature = signature
+                    return self._model
+                self._model = model
+                self._signature = signature
+        
+        return self._model
+
+def convert_legacy_model(pkl_path: str, npz_path: str = MODEL_PATH):
+    """
+    One-off migration of a legacy pickled model to the .npz format.
+    
+    Only run this on pickles you produced yourself - unpickling executes code.
+    """
+    with open(pkl_path, 'rb') as f:
+        data = pickle.load(f)
+    
+    model = MarketPredictionModel()
+    model.event_type_weights = {
+        event_type: {column: weights[column] for column in MODEL_COLUMNS}
+        for event_type, weights in data['weights'].items()
+    }
+    model.trained = data['trained']
+    model._build_arrays()
+    model.save_model(npz_path)
+    return model
+
 # ============================================================================
 # Training Script
 # ============================================================================
@@ -373,6 +543,7 @@ def train_model():
     
     Usage:
         python goblin_training.py
+        python goblin_training.py --convert market_prediction_model.pkl
     """
     training_data = []
     
@@ -411,9 +582,12 @@ def train_model():
     model.train(training_data)
     
     # Save model
-    model.save_model('market_prediction_model.pkl')
+    model.save_model(MODEL_PATH)
     
     print("\nTraining complete! Model ready for predictions.")
 
 if __name__ == "__main__":
-    train_model()
+    if len(sys.argv) == 3 and sys.argv[1] == '--convert':
+        convert_legacy_model(sys.argv[2])
+    else:
+        train_model()
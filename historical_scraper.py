@@ -17,10 +17,16 @@ from datetime import datetime, timedelta
 import time
 import json
 import psycopg2
+from psycopg2.extras import execute_values
 import os
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Tuple, Callable
 import re
 
+from utils.http_fetch import TokenBucket, ResponseCache, Checkpoint, thread_session
+
+CHECKPOINT_DIR = os.getenv('HOLOCRON_UNDERMINE_CHECKPOINTS', '.cache/undermine/checkpoints')
+
 # ============================================================================
 # Wowhead News Archive Scraper
 # ============================================================================
@@ -143,11 +149,21 @@ class WowheadArchiveScraper:
 # ============================================================================
 
 class UndermineJournalScraper:
-    def __init__(self, realm: str = "area-52", region: str = "us"):
-        self.base_url = "https://theunderminejournal.com"
+    # An interrupted scrape resumes within a day of its start; older
+    # checkpoints are ignored so the history window does not drift
+    CHECKPOINT_MAX_AGE = 24 * 3600
+    
+    def __init__(self, realm: str = "area-52", region: str = "us",
+                 base_url: str = "https://theunderminejournal.com",
+                 cache_dir: str = ".cache/undermine", rate: float = 4.0,
+                 workers: int = 4):
+        self.base_url = base_url
         self.realm = realm.lower().replace(" ", "-")
         self.region = region.lower()
-        self.session = requests.Session()
+        # Shared by every worker thread, so total request rate stays bounded
+        self.rate_limiter = TokenBucket(rate)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.workers = workers
     
     def scrape_item_history(self, item_id: int, days_back: int = 180) -> List[Dict]:
         """
@@ -156,6 +172,14 @@ class UndermineJournalScraper:
         Returns:
             List of {timestamp, price, quantity} dicts
         """
+        try:
+            return self._fetch_item_history(item_id, days_back)
+        except Exception as e:
+            print(f"Error scraping item {item_id}: {e}")
+            return []
+    
+    def _fetch_item_history(self, item_id: int, days_back: int) -> List[Dict]:
+        """Fetch (or load from cache) and parse one item's history; raises on failure"""
         # TheUndermineJournal uses data endpoints
         # Example: https://theunderminejournal.com/api/history.php?house=XXX&item=210814
         
@@ -166,39 +190,42 @@ class UndermineJournalScraper:
             print(f"Could not find house ID for {self.realm}")
             return []
         
-        url = f"{self.base_url}/api/history.php"
-        params = {
-            'house': house_id,
-            'item': item_id,
-        }
+        # History only changes once per day, so that is the cache granularity
+        cache_key = (house_id, item_id, datetime.now().strftime('%Y-%m-%d'))
+        data = self.cache.get(cache_key) if self.cache else None
         
-        try:
-            response = self.session.get(url, params=params, timeout=15)
+        if data is None:
+            self.rate_limiter.acquire()
+            session = thread_session(self.workers)
+            response = session.get(
+                f"{self.base_url}/api/history.php",
+                params={'house': house_id, 'item': item_id},
+                timeout=15,
+            )
+            response.raise_for_status()
             data = response.json()
+            if self.cache:
+                self.cache.set(cache_key, data)
+        
+        return self._parse_history(data, days_back)
+    
+    def _parse_history(self, data: Dict, days_back: int) -> List[Dict]:
+        # Parse response (format may vary)
+        history = []
+        cutoff = datetime.now() - timedelta(days=days_back)
+        
+        for entry in data.get('stats', []):
+            timestamp = datetime.fromtimestamp(entry.get('when', 0))
             
-            # Parse response (format may vary)
-            history = []
-            
-            if 'stats' in data:
-                for entry in data['stats']:
-                    timestamp = datetime.fromtimestamp(entry.get('when', 0))
-                    price = entry.get('price', 0)
-                    quantity = entry.get('quantity', 0)
-                    
-                    # Filter to timeframe
-                    cutoff = datetime.now() - timedelta(days=days_back)
-                    if timestamp >= cutoff:
-                        history.append({
-                            'timestamp': timestamp,
-                            'price': price,
-                            'quantity': quantity,
-                        })
-            
-            return history
-            
-        except Exception as e:
-            print(f"Error scraping item {item_id}: {e}")
-            return []
+            # Filter to timeframe
+            if timestamp >= cutoff:
+                history.append({
+                    'timestamp': timestamp,
+                    'price': entry.get('price', 0),
+                    'quantity': entry.get('quantity', 0),
+                })
+        
+        return history
     
     def _get_house_id(self) -> int:
         """Get house ID for realm"""
@@ -216,24 +243,59 @@ class UndermineJournalScraper:
         
         return house_map.get(self.realm, 113)  # Default to Area 52
     
-    def bulk_scrape_items(self, item_ids: List[int], days_back: int = 180) -> Dict[int, List[Dict]]:
+    def bulk_scrape_items(self, item_ids: List[int], days_back: int = 180,
+                          on_result: Callable[[int, List[Dict]], None] = None,
+                          checkpoint_path: str = None) -> Dict[int, List[Dict]]:
         """
-        Scrape multiple items with rate limiting
+        Scrape multiple items concurrently under the shared rate limit
+        
+        Args:
+            on_result: Called on the calling thread with (item_id, history) as
+                       each item finishes, e.g. to stream into the database
+            checkpoint_path: Items already recorded here are skipped; items
+                             are recorded once on_result has returned. The
+                             checkpoint is removed once every item has been
+                             tried and expires after CHECKPOINT_MAX_AGE
         
         Returns:
-            Dict mapping item_id -> price history
+            Dict mapping item_id -> price history (skipped/failed items omitted)
         """
         results = {}
+        checkpoint = (Checkpoint(checkpoint_path, max_age=self.CHECKPOINT_MAX_AGE)
+                      if checkpoint_path else None)
         
-        print(f"Scraping {len(item_ids)} items from TheUndermineJournal...")
+        pending = [i for i in item_ids if not (checkpoint is not None and checkpoint.is_done(i))]
+        skipped = len(item_ids) - len(pending)
         
-        for i, item_id in enumerate(item_ids):
-            print(f"  [{i+1}/{len(item_ids)}] Item {item_id}...")
-            
-            history = self.scrape_item_history(item_id, days_back)
-            results[item_id] = history
+        print(f"Scraping {len(pending)} items from TheUndermineJournal"
+              f"{f' ({skipped} already done)' if skipped else ''}...")
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(self._fetch_item_history, item_id, days_back): item_id
+                for item_id in pending
+            }
             
-            time.sleep(1)  # Rate limiting - 1 request per second
+            for i, future in enumerate(as_completed(futures)):
+                item_id = futures[future]
+                try:
+                    history = future.result()
+                except Exception as e:
+                    print(f"  [{i+1}/{len(pending)}] Item {item_id} failed: {e}")
+                    continue
+                
+                print(f"  [{i+1}/{len(pending)}] Item {item_id}: {len(history)} points")
+                results[item_id] = history
+                
+                if on_result:
+                    on_result(item_id, history)
+                if checkpoint is not None:
+                    checkpoint.mark_done(item_id)
+        
+        # Every item was tried: the next run starts fresh (and retries the
+        # failures) instead of skipping everything
+        if checkpoint is not None:
+            checkpoint.clear()
         
         return results
 
@@ -270,28 +332,33 @@ class HistoricalDataImporter:
         
         print("News events imported successfully")
     
-    def import_price_history(self, item_id: int, history: List[Dict]):
-        """Import price history for an item"""
+    def import_price_history(self, item_id: int, history: List[Dict], page_size: int = 1000):
+        """Import price history for an item (batched inserts, one commit)"""
+        if not history:
+            return
+        
         cur = self.conn.cursor()
         
-        # Create a synthetic scan for each price point
-        for entry in history:
-            # Insert scan
-            cur.execute("""
-                INSERT INTO auctionhouse.scans 
-                (realm, faction, character, timestamp, item_count)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING scan_id
-            """, ('Historical', 'Both', 'Scraper', entry['timestamp'], 1))
-            
-            scan_id = cur.fetchone()[0]
-            
-            # Insert scan item
-            cur.execute("""
-                INSERT INTO auctionhouse.scan_items 
-                (scan_id, item_id, price, quantity)
-                VALUES (%s, %s, %s, %s)
-            """, (scan_id, item_id, entry['price'], entry['quantity']))
+        # Create a synthetic scan for each price point; RETURNING rows come
+        # back in VALUES order, so they line up with history
+        scan_ids = execute_values(cur, """
+            INSERT INTO auctionhouse.scans 
+            (realm, faction, character, timestamp, item_count)
+            VALUES %s
+            RETURNING scan_id
+        """, [
+            ('Historical', 'Both', 'Scraper', entry['timestamp'], 1)
+            for entry in history
+        ], page_size=page_size, fetch=True)
+        
+        execute_values(cur, """
+            INSERT INTO auctionhouse.scan_items 
+            (scan_id, item_id, price, quantity)
+            VALUES %s
+        """, [
+            (row[0], item_id, entry['price'], entry['quantity'])
+            for row, entry in zip(scan_ids, history)
+        ], page_size=page_size)
         
         self.conn.commit()
         cur.close()
@@ -342,18 +409,26 @@ def scrape_and_import(months: int = 6, realm: str = "Area 52"):
         # Add more item IDs
     ]
     
-    # Step 4: Scrape price history
+    # Step 4 + 5: Scrape price history, streaming each item into the
+    # database as it arrives (or save everything to file)
     price_scraper = UndermineJournalScraper(realm=realm)
-    price_data = price_scraper.bulk_scrape_items(common_items, days_back=months * 30)
     
-    # Step 5: Import price history or Save to File
     if conn:
-        for item_id, history in price_data.items():
+        def import_item(item_id, history):
             if history:
                 print(f"Importing {len(history)} price points for item {item_id}...")
                 importer.import_price_history(item_id, history)
+        
+        price_data = price_scraper.bulk_scrape_items(
+            common_items, days_back=months * 30,
+            on_result=import_item,
+            # Keyed by run parameters so only an interrupted run of the same scrape resumes
+            checkpoint_path=os.path.join(
+                CHECKPOINT_DIR, f"{price_scraper.realm}_{months * 30}d.json"),
+        )
         conn.close()
     else:
+        price_data = price_scraper.bulk_scrape_items(common_items, days_back=months * 30)
         # Save to file
         output = {
             "news": articles,
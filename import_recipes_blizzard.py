@@ -6,105 +6,28 @@ Populates the database with real recipe information
 
 import os
 import psycopg2
-import requests
-import time
 from dotenv import load_dotenv
 
+from blizzard_client import BlizzardAPIClient, BulkUpserter
+from utils.http_fetch import Checkpoint
+
 # Load environment variables
 load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://jgrayson@localhost/holocron')
 CLIENT_ID = os.getenv('BLIZZARD_CLIENT_ID')
 CLIENT_SECRET = os.getenv('BLIZZARD_CLIENT_SECRET')
+CHECKPOINT_FILE = 'recipe_import_checkpoint.json'
 
-class BlizzardAPIClient:
-    """Client for Blizzard's WoW Game Data API"""
-    
-    def __init__(self, client_id, client_secret, region='us'):
-        self.client_id = client_id
-        self.client_secret = client_secret
-        self.region = region
-        self.token = None
-        self.token_expires = 0
-        
-    def get_access_token(self):
-        """Get OAuth access token"""
-        if self.token and time.time() < self.token_expires:
-            return self.token
-            
-        url = f"https://{self.region}.battle.net/oauth/token"
-        response = requests.post(
-            url,
-            data={'grant_type': 'client_credentials'},
-            auth=(self.client_id, self.client_secret)
-        )
-        response.raise_for_status()
-        
-        data = response.json()
-        self.token = data['access_token']
-        self.token_expires = time.time() + data['expires_in'] - 60
-        
-        return self.token
-    
-    def get_profession_index(self):
-        """Get list of all professions"""
-        token = self.get_access_token()
-        url = f"https://{self.region}.api.blizzard.com/data/wow/profession/index"
-        
-        response = requests.get(
-            url,
-            params={
-                'namespace': f'static-{self.region}',
-                'locale': 'en_US'
-            },
-            headers={'Authorization': f'Bearer {token}'}
-        )
-        
-        if response.status_code != 200:
-            print(f"❌ Profession index failed: {response.status_code}")
-            print(f"URL: {url}")
-            print(f"Response: {response.text[:200]}")
-            return {}
-            
-        return response.json()
-    
-    def get_profession_details(self, profession_id):
-        """Get profession details including skill tiers"""
-        token = self.get_access_token()
-        url = f"https://{self.region}.api.blizzard.com/data/wow/profession/{profession_id}"
-        
-        response = requests.get(
-            url,
-            params={
-                'namespace': f'static-{self.region}',
-                'locale': 'en_US'
-            },
-            headers={'Authorization': f'Bearer {token}'}
-        )
-        
-        if response.status_code != 200:
-            return {}
-            
-        return response.json()
-    
-    def get_skill_tier(self, profession_id, skill_tier_id):
-        """Get specific skill tier with recipes"""
-        token = self.get_access_token()
-        url = f"https://{self.region}.api.blizzard.com/data/wow/profession/{profession_id}/skill-tier/{skill_tier_id}"
-        
-        response = requests.get(
-            url,
-            params={
-                'namespace': f'static-{self.region}',
-                'locale': 'en_US'
-            },
-            headers={'Authorization': f'Bearer {token}'}
-        )
-        
-        if response.status_code != 200:
-            return {}
-            
-        return response.json()
+UPSERT_RECIPES_SQL = """
+    INSERT INTO goblin.recipe_reference 
+    (recipe_id, recipe_name, profession_name, profession_id, skill_tier_name)
+    VALUES %s
+    ON CONFLICT (recipe_id) 
+    DO UPDATE SET
+        recipe_name = EXCLUDED.recipe_name,
+        last_updated = CURRENT_TIMESTAMP
+"""
 
 def get_db_connection():
     """Connect to PostgreSQL database"""
@@ -156,55 +79,46 @@ def import_recipes():
         print(f"✅ Found {len(professions)} total professions")
         print(f"Professions: {', '.join([p['name'] for p in professions])}")
         
-        total_recipes = 0
-        
-        for prof in professions:  # Import ALL professions from the API
-            prof_id = prof['id']
-            prof_name = prof['name']
+        # Fetch every profession's details concurrently
+        prof_names = {p['id']: p['name'] for p in professions}
+        tiers = []
+        for prof_id, prof_details in client.fetch_many(
+                prof_names, lambda pid: f"/data/wow/profession/{pid}"):
+            skill_tiers = (prof_details or {}).get('skill_tiers', [])
+            print(f"\n📖 {prof_names[prof_id]} (ID: {prof_id}): {len(skill_tiers)} skill tiers")
+            for tier in skill_tiers:
+                tiers.append((prof_id, tier['id'], tier['name']))
+        
+        # Then every skill tier (all expansions), resuming past finished tiers
+        tier_info = {f"{prof_id}:{tier_id}": (prof_id, tier_id, tier_name)
+                     for prof_id, tier_id, tier_name in tiers}
+        checkpoint = Checkpoint(CHECKPOINT_FILE)
+        upserter = BulkUpserter(conn, UPSERT_RECIPES_SQL, checkpoint=checkpoint, unique_column=0)
+        
+        def tier_path(key):
+            prof_id, tier_id, _ = tier_info[key]
+            return f"/data/wow/profession/{prof_id}/skill-tier/{tier_id}"
+        
+        for key, tier_data in client.fetch_many(tier_info, tier_path, checkpoint=checkpoint):
+            if tier_data is None:
+                continue
+            prof_id, _, tier_name = tier_info[key]
+            prof_name = prof_names[prof_id]
             
-            print(f"\n📖 {prof_name} (ID: {prof_id})")
+            tier_recipe_count = 0
+            for category in tier_data.get('categories', []):
+                for recipe in category.get('recipes', []):  # Import ALL recipes
+                    upserter.add((recipe['id'], recipe['name'], prof_name, prof_id, tier_name))
+                    tier_recipe_count += 1
             
-            try:
-                # Get profession details
-                prof_details = client.get_profession_details(prof_id)
-                skill_tiers = prof_details.get('skill_tiers', [])
-                
-                print(f"  Found {len(skill_tiers)} skill tiers (expansions)")
-                
-                # Import recipes from ALL skill tiers (all expansions)
-                for tier in skill_tiers:
-                    tier_name = tier['name']
-                    print(f"  📚 {tier_name}")
-                    
-                    # Get recipes from this tier
-                    tier_data = client.get_skill_tier(prof_id, tier['id'])
-                    categories = tier_data.get('categories', [])
-                    
-                    tier_recipe_count = 0
-                    for category in categories:
-                        recipes = category.get('recipes', [])
-                        
-                        for recipe in recipes:  # Import ALL recipes
-                            cur.execute("""
-                                INSERT INTO goblin.recipe_reference 
-                                (recipe_id, recipe_name, profession_name, profession_id, skill_tier_name)
-                                VALUES (%s, %s, %s, %s, %s)
-                                ON CONFLICT (recipe_id) 
-                                DO UPDATE SET
-                                    recipe_name = EXCLUDED.recipe_name,
-                                    last_updated = CURRENT_TIMESTAMP
-                            """, (recipe['id'], recipe['name'], prof_name, prof_id, tier_name))
-                            total_recipes += 1
-                            tier_recipe_count += 1
-                    
-                    print(f"    ✅ Imported {tier_recipe_count} recipes from {tier_name}")
-                    time.sleep(0.5)  # Small delay between tiers
-                
-                time.sleep(1)  # Rate limiting
-                
-            except Exception as e:
-                print(f"  ❌ Error fetching {prof_name}: {e}")
-                continue
+            upserter.complete(key)
+            total_recipes += tier_recipe_count
+            print(f"  ✅ {prof_name} / {tier_name}: {tier_recipe_count} recipes")
+        
+        upserter.flush()
+        if all(checkpoint.is_done(key) for key in tier_info):
+            # Whole crawl finished; next run starts fresh
+            checkpoint.clear()
         
         conn.commit()
         print(f"\n✅ Imported {total_recipes} recipes from Blizzard API")
@@ -0,0 +1,275 @@
+"""
+ingest_queue.py - Background processing of /upload_data payloads
+
+upload_data used to parse the Lua payload, write the JSON file and run the
+SQL ingest inside the HTTP request, and byte-identical re-uploads (the
+bridge fires on every SavedVariables write) redid all of it. IngestQueue:
+
+- spools the raw payload to disk and returns a job immediately (202)
+- skips payloads whose SHA-256 matches the last one processed for that
+  source (kept across restarts in the spool's state file)
+- supersedes a still-queued job when a newer upload for the same source
+  arrives: SavedVariables are whole-file snapshots, only the latest matters
+- processes jobs on a small worker pool, one job per source at a time
+- re-queues spooled payloads left behind by a crash on start; a payload
+  whose ingest fails is moved to failed/ with its error, not retried
+- reports queue depth, job counts and throughput via status()
+
+Usage:
+    queue = IngestQueue(process_upload)     # process_upload(source, text) -> dict
+    job, accepted = queue.submit("DataStore_Reputations", lua_text)
+    queue.job(job["id"])
+"""
+
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional, Tuple
+
+SPOOL_DIR = os.getenv('HOLOCRON_UPLOAD_SPOOL', '.cache/uploads')
+STATE_FILE = 'state.json'
+FAILED_DIR = 'failed'
+RECENT_JOBS = 500
+THROUGHPUT_WINDOW = 300  # seconds
+
+
+def content_hash(data: str) -> str:
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class IngestQueue:
+    """Spooled, deduplicating upload queue with a worker pool"""
+
+    def __init__(self, handler: Callable[[str, str], Dict], spool_dir: str = SPOOL_DIR,
+                 workers: int = 2, start: bool = True):
+        self.handler = handler
+        self.spool_dir = spool_dir
+        self.workers = workers
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._pending: Dict[str, str] = {}         # source -> queued job id
+        self._source_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._finished = deque()                   # (finished_at, bytes, seconds)
+        self.counters = {"submitted": 0, "skipped": 0, "superseded": 0, "done": 0, "failed": 0}
+
+        os.makedirs(spool_dir, exist_ok=True)
+        self._last_hash: Dict[str, str] = self._load_state()
+        self._recover()
+        if start:
+            self.start()
+
+    # --- persistence ---
+
+    def _state_path(self) -> str:
+        return os.path.join(self.spool_dir, STATE_FILE)
+
+    def _load_state(self) -> Dict[str, str]:
+        try:
+            with open(self._state_path()) as f:
+                return json.load(f).get("last_hash", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self):
+        tmp_path = f"{self._state_path()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"last_hash": self._last_hash}, f)
+        os.replace(tmp_path, self._state_path())
+
+    def _spool_path(self, job_id: str, source: str) -> str:
+        safe_source = re.sub(r'[^\w.-]', '_', source)
+        return os.path.join(self.spool_dir, f"{job_id}__{safe_source}.lua")
+
+    def _recover(self):
+        """Queue payloads spooled before a crash or restart, oldest first"""
+        spooled = sorted(
+            (f for f in os.listdir(self.spool_dir) if f.endswith('.lua') and '__' in f),
+            key=lambda f: os.path.getmtime(os.path.join(self.spool_dir, f)))
+        for filename in spooled:
+            job_id, source = filename[:-len('.lua')].split('__', 1)
+            path = os.path.join(self.spool_dir, filename)
+            with open(path, encoding='utf-8') as f:
+                data = f.read()
+            self._enqueue(job_id, source, content_hash(data), len(data), path)
+
+    # --- submission ---
+
+    def submit(self, source: str, data: str) -> Tuple[Dict, bool]:
+        """
+        Queue a payload. Returns (job, accepted); accepted is False when the
+        payload is identical to the last one processed for `source`.
+        """
+        digest = content_hash(data)
+        with self._lock:
+            self.counters["submitted"] += 1
+            pending_id = self._pending.get(source)
+            pending = self._jobs.get(pending_id) if pending_id else None
+
+            if pending and pending["hash"] == digest:
+                self.counters["skipped"] += 1
+                return dict(pending), False
+            if not pending and self._last_hash.get(source) == digest:
+                self.counters["skipped"] += 1
+                job = self._record(uuid.uuid4().hex, source, digest, len(data), "skipped")
+                job["finished_at"] = job["submitted_at"]
+                return dict(job), False
+            if pending:
+                pending["status"] = "superseded"
+                self.counters["superseded"] += 1
+                self._discard_spool(pending)
+
+        job_id = uuid.uuid4().hex
+        path = self._spool_path(job_id, source)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return dict(self._enqueue(job_id, source, digest, len(data), path)), True
+
+    def forget(self, source: str):
+        """Drop the dedupe hash for `source` (its stored state changed another way)"""
+        with self._lock:
+            if self._last_hash.pop(source, None) is not None:
+                self._save_state()
+
+    def _record(self, job_id: str, source: str, digest: str, size: int, status: str) -> Dict:
+        job = {"id": job_id, "source": source, "hash": digest, "bytes": size,
+               "status": status, "submitted_at": time.time()}
+        self._jobs[job_id] = job
+        while len(self._jobs) > RECENT_JOBS:
+            self._jobs.popitem(last=False)
+        return job
+
+    def _enqueue(self, job_id: str, source: str, digest: str, size: int, path: str) -> Dict:
+        with self._lock:
+            job = self._record(job_id, source, digest, size, "queued")
+            job["_path"] = path
+            self._pending[source] = job_id
+        self._queue.put(job_id)
+        return job
+
+    def _discard_spool(self, job: Dict):
+        try:
+            os.remove(job.pop("_path"))
+        except (KeyError, OSError):
+            pass
+
+    def _quarantine(self, job: Dict, error: str):
+        """Move a failed payload to failed/ (with its error) so a restart does not retry it"""
+        failed_dir = os.path.join(self.spool_dir, FAILED_DIR)
+        try:
+            path = job.pop("_path")
+            os.makedirs(failed_dir, exist_ok=True)
+            target = os.path.join(failed_dir, os.path.basename(path))
+            os.replace(path, target)
+            with open(f"{target}.error", 'w', encoding='utf-8') as f:
+                f.write(error)
+        except (KeyError, OSError):
+            pass
+
+    # --- workers ---
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"ingest-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._process(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["status"] != "queued":
+                return  # superseded (or evicted) while waiting
+            source = job["source"]
+            source_lock = self._source_locks.setdefault(source, threading.Lock())
+
+        with source_lock:
+            with self._lock:
+                if job["status"] != "queued":
+                    return
+                job["status"] = "running"
+                job["started_at"] = time.time()
+                if self._pending.get(source) == job_id:
+                    del self._pending[source]
+
+            start = time.perf_counter()
+            try:
+                with open(job["_path"], encoding='utf-8') as f:
+                    data = f.read()
+                result = self.handler(source, data)
+                status, error = "done", None
+            except Exception as e:
+                result, status, error = None, "failed", str(e)
+                print(f"Ingest of {source} failed: {e}")
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                job.update(status=status, finished_at=time.time(), seconds=round(elapsed, 4))
+                if error:
+                    job["error"] = error
+                else:
+                    job["result"] = result
+                    self._last_hash[source] = job["hash"]
+                    self._save_state()
+                self.counters[status] += 1
+                self._finished.append((time.time(), job["bytes"], elapsed))
+            if status == "done":
+                self._discard_spool(job)
+            else:
+                self._quarantine(job, error)
+
+    def join(self, timeout: float = None) -> bool:
+        """Wait until every queued job has been processed"""
+        deadline = time.monotonic() + timeout if timeout else None
+        while self._queue.unfinished_tasks:
+            if deadline and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    # --- reporting ---
+
+    def job(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return {k: v for k, v in job.items() if not k.startswith('_')} if job else None
+
+    def status(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            while self._finished and now - self._finished[0][0] > THROUGHPUT_WINDOW:
+                self._finished.popleft()
+            recent = list(self._finished)
+            running = sum(1 for j in self._jobs.values() if j["status"] == "running")
+            queued = sum(1 for j in self._jobs.values() if j["status"] == "queued")
+            busy = sum(seconds for _, _, seconds in recent)
+            return {
+                "queue_depth": queued,
+                "running": running,
+                "workers": self.workers,
+                "counters": dict(self.counters),
+                "throughput": {
+                    "window_seconds": THROUGHPUT_WINDOW,
+                    "jobs": len(recent),
+                    "jobs_per_minute": round(len(recent) * 60 / THROUGHPUT_WINDOW, 2),
+                    "mb_per_second": round(sum(b for _, b, _ in recent) / busy / 1e6, 3) if busy else None,
+                    "avg_seconds": round(busy / len(recent), 4) if recent else None,
+                },
+                "last_hash": dict(self._last_hash),
+            }
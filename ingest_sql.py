@@ -1,18 +1,63 @@
 import os
 import sqlite3
 import json
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime
 from lua_parser import parse_lua_table
 
 # Configuration
 WTF_PATH = "/Applications/World of Warcraft/_retail_/WTF/Account/NIGHTHWK77/SavedVariables"
-DB_FILE = "/Users/jgrayson/Documents/holocron/holocron.db"
+DB_FILE = os.getenv('HOLOCRON_SQLITE', "/Users/jgrayson/Documents/holocron/holocron.db")
+
+# WAL lets the engines keep reading while an ingest writes; NORMAL sync is
+# safe in WAL mode (a crash can lose the last commit, never corrupt the file)
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -64000,       # KiB
+    "mmap_size": 268435456,
+    "busy_timeout": 5000,       # ms
+}
 
 def get_db_connection():
     conn = sqlite3.connect(DB_FILE)
     conn.row_factory = sqlite3.Row
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
     return conn
 
+@contextmanager
+def transaction(conn=None, name="ingest"):
+    """
+    One transaction for a batch of ingest steps. Without `conn`, opens a
+    connection and commits (or rolls back) on exit. With `conn`, runs inside
+    the caller's transaction as a savepoint, so a failing step is undone
+    without losing the steps before it.
+    """
+    if conn is not None:
+        conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield conn
+        except Exception:
+            conn.execute(f"ROLLBACK TO {name}")
+            conn.execute(f"RELEASE {name}")
+            raise
+        conn.execute(f"RELEASE {name}")
+        return
+
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
 def init_db():
     """
     Initialize SQLite database with schema.
@@ -135,99 +180,126 @@ def init_db():
         )
     """)
 
+    # Indexes for the per-character lookups and diffs below
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reputation_history_char_faction
+        ON reputation_history (character_guid, faction_id, id)
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_inventory_char_item ON inventory (character_guid, item_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_inventory_item ON inventory (item_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_heirlooms_item ON heirlooms (item_id)")
+
     conn.commit()
     conn.close()
     print("✓ Database initialized (SQLite)")
 
 def ingest_all():
     """
-    Main entry point for ingestion.
+    Main entry point for ingestion. Every file is parsed first, then all
+    steps run in a single transaction.
     """
     print(f"--- Starting Data Ingestion (SQLite: {DB_FILE}) ---")
     init_db()
-    
-    # 1. Ingest Reputations (Diplomat)
-    rep_file = os.path.join(WTF_PATH, "DataStore_Reputations.lua")
-    if os.path.exists(rep_file):
-        print(f"Parsing {rep_file}...")
-        data = parse_lua_table(rep_file)
-        ingest_reputations(data)
-    else:
-        print(f"Skipping Reputations: {rep_file} not found.")
-
-    # 2. Ingest SavedInstances (Pathfinder)
-    inst_file = os.path.join(WTF_PATH, "SavedInstances.lua")
-    if os.path.exists(inst_file):
-        print(f"Parsing {inst_file}...")
-        data = parse_lua_table(inst_file)
-        ingest_saved_instances(data)
-    else:
-        print(f"Skipping SavedInstances: {inst_file} not found.")
-        
-    # 3. Ingest Inventory (DeepPockets)
-    dp_file = os.path.join(WTF_PATH, "DeepPockets.lua")
-    if os.path.exists(dp_file):
-        print(f"Parsing {dp_file}...")
-        data = parse_lua_table(dp_file)
-        ingest_inventory(data)
-        ingest_recipes(data)
-        ingest_quests(data)
-        ingest_collections(data)
-    else:
-        print(f"Skipping Inventory: {dp_file} not found.")
-
-def ingest_reputations(data):
+
+    parsed = {}
+    for filename in ("DataStore_Reputations.lua", "SavedInstances.lua", "DeepPockets.lua"):
+        path = os.path.join(WTF_PATH, filename)
+        if os.path.exists(path):
+            print(f"Parsing {path}...")
+            parsed[filename] = parse_lua_table(path)
+        else:
+            print(f"Skipping {filename}: {path} not found.")
+
+    with transaction() as conn:
+        # 1. Ingest Reputations (Diplomat)
+        if "DataStore_Reputations.lua" in parsed:
+            ingest_reputations(parsed["DataStore_Reputations.lua"], conn)
+
+        # 2. Ingest SavedInstances (Pathfinder)
+        if "SavedInstances.lua" in parsed:
+            ingest_saved_instances(parsed["SavedInstances.lua"], conn)
+
+        # 3. Ingest Inventory (DeepPockets)
+        if "DeepPockets.lua" in parsed:
+            data = parsed["DeepPockets.lua"]
+            ingest_inventory(data, conn)
+            ingest_recipes(data, conn)
+            ingest_quests(data, conn)
+            ingest_collections(data, conn)
+
+# Latest recorded amount per faction for one character
+LATEST_REPUTATION_SQL = """
+    SELECT faction_id, reputation_amount FROM reputation_history
+    WHERE id IN (
+        SELECT MAX(id) FROM reputation_history
+        WHERE character_guid = ?
+        GROUP BY faction_id
+    )
+"""
+
+INSERT_REPUTATION_SQL = """
+    INSERT INTO reputation_history
+    (character_guid, faction_id, reputation_amount, timestamp)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+"""
+
+def _reputation_amount(rep_data):
+    if isinstance(rep_data, dict):
+        return rep_data.get("earned", 0)
+    if isinstance(rep_data, list) and len(rep_data) > 1:
+        return rep_data[1]
+    return 0
+
+def ingest_reputations(data, conn=None):
     """
-    Ingest DataStore_Reputations data into SQL
+    Ingest DataStore_Reputations data into SQL. A history row is only
+    written when a faction's amount differs from the latest one recorded.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
     try:
         # DataStore structure: global.Characters[GUID].Factions[FactionID]
         db_global = data.get("global", {})
         characters = db_global.get("Characters", {})
-        
-        for char_key, char_data in characters.items():
-            factions = char_data.get("Factions", {})
-            
-            for faction_id_str, rep_data in factions.items():
-                faction_id = int(faction_id_str)
-                
-                # Extract values
-                current_rep = 0
-                if isinstance(rep_data, dict):
-                    current_rep = rep_data.get("earned", 0)
-                elif isinstance(rep_data, list) and len(rep_data) > 1:
-                    current_rep = rep_data[1]
-                
-                cur.execute("""
-                    INSERT INTO reputation_history 
-                    (character_guid, faction_id, reputation_amount, timestamp)
-                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                """, (char_key, faction_id, current_rep))
-                
-        conn.commit()
-        print(f"✓ Ingested reputation data for {len(characters)} characters")
-        
+
+        rows = []
+        with transaction(conn, "reputations") as db:
+            for char_key, char_data in characters.items():
+                latest = dict(db.execute(LATEST_REPUTATION_SQL, (char_key,)).fetchall())
+                for faction_id_str, rep_data in char_data.get("Factions", {}).items():
+                    faction_id = int(faction_id_str)
+                    current_rep = _reputation_amount(rep_data)
+                    if latest.get(faction_id) != current_rep:
+                        rows.append((char_key, faction_id, current_rep))
+
+            db.executemany(INSERT_REPUTATION_SQL, rows)
+
+        print(f"✓ Ingested reputation data for {len(characters)} characters ({len(rows)} changes)")
+        return {"changed": len(rows)}
+
     except Exception as e:
         print(f"Error ingesting reputations: {e}")
-    finally:
-        conn.close()
 
-def ingest_saved_instances(data):
+UPSERT_CHARACTER_SQL = """
+    INSERT INTO characters (name, realm, class, level, last_seen_zone, last_updated)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(name, realm) DO UPDATE SET
+        level = excluded.level,
+        last_seen_zone = excluded.last_seen_zone,
+        last_updated = CURRENT_TIMESTAMP
+    WHERE characters.level IS NOT excluded.level
+       OR characters.last_seen_zone IS NOT excluded.last_seen_zone
+"""
+
+def ingest_saved_instances(data, conn=None):
     """
     Ingest SavedInstances data into SQL (Pathfinder/Vault)
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
     try:
         # SavedInstances structure: DB.Toons[Key]
         toons = data.get("Toons", {}) 
         if not toons:
             toons = data.get("DB", {}).get("Toons", {})
-        
+
+        rows = []
         for toon_key, info in toons.items():
             zone = info.get("Zone", "Unknown")
             level = info.get("Level", 0)
@@ -238,196 +310,143 @@ def ingest_saved_instances(data):
                 realm, name = toon_key.split(" - ", 1)
             else:
                 realm, name = "Unknown", toon_key
-                
-            # Upsert Character
-            cur.execute("""
-                INSERT INTO characters (name, realm, class, level, last_seen_zone, last_updated)
-                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(name, realm) DO UPDATE SET
-                    level = excluded.level,
-                    last_seen_zone = excluded.last_seen_zone,
-                    last_updated = CURRENT_TIMESTAMP
-            """, (name, realm, cls, level, zone))
-            
-        conn.commit()
-        print(f"✓ Ingested SavedInstances for {len(toons)} characters")
-        
+            rows.append((name, realm, cls, level, zone))
+
+        # Upsert Characters (rows whose level and zone are unchanged are left alone)
+        with transaction(conn, "saved_instances") as db:
+            changed = db.executemany(UPSERT_CHARACTER_SQL, rows).rowcount
+
+        print(f"✓ Ingested SavedInstances for {len(toons)} characters ({changed} changed)")
+        return {"changed": changed}
+
     except Exception as e:
         print(f"Error ingesting SavedInstances: {e}")
-    finally:
-        conn.close()
 
-def ingest_inventory(data):
+def ingest_inventory(data, conn=None, prune=True):
     """
-    Ingest DeepPockets inventory data.
+    Ingest DeepPockets inventory data. Stacks are diffed per character:
+    unchanged stacks are left alone, only added and removed stacks are
+    written. With `prune`, characters missing from `data` lose their rows
+    (pass False when `data` only holds some characters).
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
     try:
         # Structure: global.Inventory[CharacterKey] = [ {id, count, loc, link}, ... ]
+        # char_key is "Name - Realm"; we don't have GUIDs here, so it is stored as character_guid
         db_global = data.get("global", {})
         inventory = db_global.get("Inventory", {})
-        
-        # Clear old inventory data? Or timestamp it?
-        # For now, let's clear to avoid duplicates on re-ingest
-        cur.execute("DELETE FROM inventory")
-        
-        count = 0
-        for char_key, items in inventory.items():
-            # char_key is "Name - Realm"
-            # We ideally want GUID, but we might not have it here. 
-            # We can use the Name-Realm as a proxy or look it up if we had a mapping.
-            # For now, store Name-Realm as GUID or lookup from characters table?
-            # Let's just use char_key as the identifier for now.
-            
-            for item in items:
-                item_id = item.get("id")
-                stack_count = item.get("count", 1)
-                loc = item.get("loc", "Bag")
-                link = item.get("link", "")
-                
-                cur.execute("""
-                    INSERT INTO inventory (character_guid, item_id, count, location, link, last_updated)
-                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (char_key, item_id, stack_count, loc, link))
-                count += 1
-                
-        conn.commit()
-        print(f"✓ Ingested {count} inventory items for {len(inventory)} characters")
-        
+
+        inserts, deletes = [], []
+        with transaction(conn, "inventory") as db:
+            for char_key, items in inventory.items():
+                existing = defaultdict(list)  # (item_id, count, location, link) -> rowids
+                for rowid, *stack in db.execute(
+                        "SELECT rowid, item_id, count, location, link FROM inventory WHERE character_guid = ?",
+                        (char_key,)):
+                    existing[tuple(stack)].append(rowid)
+
+                if isinstance(items, dict):
+                    items = items.values()
+                for item in items:
+                    stack = (item.get("id"), item.get("count", 1), item.get("loc", "Bag"), item.get("link", ""))
+                    if existing.get(stack):
+                        existing[stack].pop()
+                    else:
+                        inserts.append((char_key,) + stack)
+                deletes.extend((rowid,) for rowids in existing.values() for rowid in rowids)
+
+            if prune:
+                stored = [row[0] for row in db.execute("SELECT DISTINCT character_guid FROM inventory")]
+                db.executemany("DELETE FROM inventory WHERE character_guid = ?",
+                               [(guid,) for guid in stored if guid not in inventory])
+
+            db.executemany("DELETE FROM inventory WHERE rowid = ?", deletes)
+            db.executemany("""
+                INSERT INTO inventory (character_guid, item_id, count, location, link, last_updated)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, inserts)
+
+        print(f"✓ Ingested inventory for {len(inventory)} characters "
+              f"({len(inserts)} stacks added, {len(deletes)} removed)")
+        return {"added": len(inserts), "removed": len(deletes)}
+
     except Exception as e:
         print(f"Error ingesting inventory: {e}")
-    finally:
-        conn.close()
 
-def ingest_recipes(data):
+def ingest_recipes(data, conn=None):
     """
     Ingest DeepPockets recipe data.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
     try:
         # Structure: global.Recipes[CharacterKey][ProfID] = { name, recipes, timestamp }
         db_global = data.get("global", {})
         recipes_db = db_global.get("Recipes", {})
-        
-        count = 0
-        for char_key, professions in recipes_db.items():
-            for prof_id, prof_data in professions.items():
-                # prof_data has 'recipes' which is a list of IDs
-                recipe_ids = prof_data.get("recipes", [])
-                
-                rows = [(char_key, rid, prof_id) for rid in recipe_ids]
-                
-                cur.executemany("""
-                    INSERT INTO recipes (character_guid, recipe_id, profession_id, last_updated)
-                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                    ON CONFLICT(character_guid, recipe_id) DO UPDATE SET
-                        last_updated = CURRENT_TIMESTAMP
-                """, rows)
-                
-                count += len(rows)
-                
-        conn.commit()
-        print(f"✓ Ingested {count} recipes for {len(recipes_db)} characters")
-        
+
+        # prof_data has 'recipes' which is a list of IDs
+        rows = [(char_key, rid, prof_id)
+                for char_key, professions in recipes_db.items()
+                for prof_id, prof_data in professions.items()
+                for rid in prof_data.get("recipes", [])]
+
+        with transaction(conn, "recipes") as db:
+            changed = db.executemany("""
+                INSERT INTO recipes (character_guid, recipe_id, profession_id, last_updated)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(character_guid, recipe_id) DO UPDATE SET
+                    profession_id = excluded.profession_id,
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE recipes.profession_id IS NOT excluded.profession_id
+            """, rows).rowcount
+
+        print(f"✓ Ingested {len(rows)} recipes for {len(recipes_db)} characters ({changed} changed)")
+        return {"changed": changed}
+
     except Exception as e:
         print(f"Error ingesting recipes: {e}")
-    finally:
-        conn.close()
 
-def ingest_quests(data):
+def _ingest_id_lists(db, lists, table, id_column):
+    """Insert-if-missing (character, id) pairs from {char_key: [id, ...]}; returns rows added"""
+    rows = [(char_key, value) for char_key, values in lists.items() if values for value in values]
+    return db.executemany(f"""
+        INSERT INTO {table} (character_guid, {id_column}, last_updated)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(character_guid, {id_column}) DO NOTHING
+    """, rows).rowcount
+
+def ingest_quests(data, conn=None):
     """
     Ingest DeepPockets quest data.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
     try:
         # Structure: global.Quests[CharacterKey] = [qID, qID, ...]
         db_global = data.get("global", {})
         quests_db = db_global.get("Quests", {})
-        
-        count = 0
-        for char_key, quest_list in quests_db.items():
-            if not quest_list: continue
-            
-            rows = [(char_key, qid) for qid in quest_list]
-            
-            cur.executemany("""
-                INSERT INTO completed_quests (character_guid, quest_id, last_updated)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(character_guid, quest_id) DO NOTHING
-            """, rows)
-            
-            count += len(rows)
-            
-        conn.commit()
-        print(f"✓ Ingested {count} completed quests for {len(quests_db)} characters")
-        
+
+        with transaction(conn, "quests") as db:
+            added = _ingest_id_lists(db, quests_db, "completed_quests", "quest_id")
+
+        print(f"✓ Ingested {added} new completed quests for {len(quests_db)} characters")
+        return {"added": added}
+
     except Exception as e:
         print(f"Error ingesting quests: {e}")
-    finally:
-        conn.close()
 
-def ingest_collections(data):
+def ingest_collections(data, conn=None):
     """
-    Ingest DeepPockets collection data (Mounts, Heirlooms).
+    Ingest DeepPockets collection data (Mounts, Heirlooms, Pets).
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
     try:
         db_global = data.get("global", {})
-        
-        # Mounts
-        mounts_db = db_global.get("Mounts", {})
-        m_count = 0
-        for char_key, m_list in mounts_db.items():
-            if not m_list: continue
-            rows = [(char_key, mid) for mid in m_list]
-            cur.executemany("""
-                INSERT INTO mounts (character_guid, mount_id, last_updated)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(character_guid, mount_id) DO NOTHING
-            """, rows)
-            m_count += len(rows)
-            
-        # Heirlooms
-        heirlooms_db = db_global.get("Heirlooms", {})
-        h_count = 0
-        for char_key, h_list in heirlooms_db.items():
-            if not h_list: continue
-            rows = [(char_key, hid) for hid in h_list]
-            cur.executemany("""
-                INSERT INTO heirlooms (character_guid, item_id, last_updated)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(character_guid, item_id) DO NOTHING
-            """, rows)
-            h_count += len(rows)
-            
-        # Pets
-        pets_db = db_global.get("Pets", {})
-        p_count = 0
-        for char_key, p_list in pets_db.items():
-            if not p_list: continue
-            rows = [(char_key, pid) for pid in p_list]
-            cur.executemany("""
-                INSERT INTO pets (character_guid, species_id, last_updated)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(character_guid, species_id) DO NOTHING
-            """, rows)
-            p_count += len(rows)
-            
-        conn.commit()
-        print(f"✓ Ingested {m_count} mounts, {h_count} heirlooms, {p_count} pets")
-        
+
+        with transaction(conn, "collections") as db:
+            m_count = _ingest_id_lists(db, db_global.get("Mounts", {}), "mounts", "mount_id")
+            h_count = _ingest_id_lists(db, db_global.get("Heirlooms", {}), "heirlooms", "item_id")
+            p_count = _ingest_id_lists(db, db_global.get("Pets", {}), "pets", "species_id")
+
+        print(f"✓ Ingested {m_count} new mounts, {h_count} heirlooms, {p_count} pets")
+        return {"mounts": m_count, "heirlooms": h_count, "pets": p_count}
+
     except Exception as e:
         print(f"Error ingesting collections: {e}")
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
     ingest_all()
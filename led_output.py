@@ -0,0 +1,209 @@
+"""
+led_output.py - One output stage for all RGB lighting
+
+Lumos and SkillWeaver used to call the iCUE SDK directly from their event
+loops, on every matching line, and Lumos slept inside the combat log loop
+to time its flashes. LedOutput decouples producers from the device:
+
+- producers set named layers (a color for "all" LEDs and/or for named
+  keys) with a priority and optional time-to-live; setting a layer is a
+  dict assignment under a lock, so event handlers never block on I/O
+- a single output thread composes the layers into one frame (highest
+  priority wins per target; expired layers drop out, which is how a flash
+  ends) and pushes it to the device at a fixed frame rate
+- a frame identical to the last one pushed is not sent again, and any
+  number of updates between two ticks collapse into one frame
+
+Named key targets (e.g. SkillWeaver's "RAMPAGE") reach the keyboard
+through KEYBINDS, action -> key as bound in game; set HOLOCRON_KEYBINDS
+as "RAMPAGE=2,EXECUTE=3" to override. CorsairDevice finds each key's LED
+by its SDK name (K_2, K_Q, ...).
+
+Usage:
+    output = get_output()
+    output.set("lumos.state", (255, 0, 0))                          # persistent
+    output.set("lumos.flash", (255, 255, 255), priority=10, ttl=0.1)  # flash
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    from cuesdk import CueSdk
+    ICUE_AVAILABLE = True
+except ImportError:
+    ICUE_AVAILABLE = False
+
+FPS = 30
+ALL = "all"
+
+
+def parse_keybinds(spec: str) -> Dict[str, str]:
+    """"RAMPAGE=2,EXECUTE=3" -> {"RAMPAGE": "2", "EXECUTE": "3"}"""
+    pairs = (item.split("=", 1) for item in spec.split(",") if "=" in item)
+    return {target.strip(): key.strip().upper() for target, key in pairs}
+
+
+KEYBINDS = parse_keybinds(os.getenv('HOLOCRON_KEYBINDS', "BLOODTHIRST=1,RAMPAGE=2,EXECUTE=3"))
+
+Color = Tuple[int, int, int]
+Frame = Dict[str, Color]
+
+
+class MockDevice:
+    """Records pushed frames (tests, machines without iCUE)"""
+
+    def __init__(self, maxlen: Optional[int] = 1000):
+        self.frames = deque(maxlen=maxlen)
+
+    def show(self, frame: Frame):
+        self.frames.append((time.monotonic(), dict(frame)))
+
+
+class CorsairDevice:
+    """iCUE SDK: the "all" color on every LED, named keys through `key_leds` and `keybinds`"""
+
+    def __init__(self, sdk, key_leds: Optional[Dict[str, List[int]]] = None,
+                 keybinds: Optional[Dict[str, str]] = None):
+        self.sdk = sdk
+        self.key_leds = dict(key_leds or {})
+        self.keybinds = keybinds or {}
+        self._positions = None
+
+    def _leds(self):
+        # LED layouts are fixed while connected; look them up once
+        if self._positions is None:
+            self.sdk.request_control()
+            self._positions = [self.sdk.get_led_positions_by_device_index(i) or []
+                               for i in range(self.sdk.get_device_count())]
+            self._bind_keys()
+        return self._positions
+
+    def _bind_keys(self):
+        """Resolve keybinds to LED ids by their SDK names (CorsairLedId.K_Q -> "Q")"""
+        by_key: Dict[str, List] = {}
+        for positions in self._positions:
+            for led in positions:
+                name = getattr(led, "name", "")
+                if name.startswith("K_"):
+                    by_key.setdefault(name[2:].upper(), []).append(led)
+        for target, key in self.keybinds.items():
+            if target not in self.key_leds and key in by_key:
+                self.key_leds[target] = by_key[key]
+
+    def show(self, frame: Frame):
+        positions = self._leds()
+        base = frame.get(ALL)
+        keyed = {led: frame[key] for key, leds in self.key_leds.items() if key in frame for led in leds}
+        for index, leds in enumerate(positions):
+            colors = {led: keyed.get(led, base) for led in leds if led in keyed or base is not None}
+            if colors:
+                self.sdk.set_led_colors_buffer_by_device_index(index, colors)
+        self.sdk.set_led_colors_flush_buffer()
+
+
+class LedOutput:
+    """Layered frame buffer, pushed to `device` at `fps` on its own thread"""
+
+    def __init__(self, device, fps: float = FPS, autostart: bool = True):
+        self.device = device
+        self.autostart = autostart
+        self.interval = 1.0 / fps
+        self.layers: Dict[str, Tuple[int, Frame, Optional[float]]] = {}
+        self.lock = threading.Lock()
+        self.last_frame: Optional[Frame] = None
+        self.running = False
+        self.thread = None
+        self.counters = {"updates": 0, "frames": 0, "unchanged": 0, "errors": 0}
+
+    def set(self, layer: str, color: Union[Color, Frame], priority: int = 0, ttl: Optional[float] = None):
+        """Set a layer: a color for all LEDs, or {target: color}. `ttl` seconds, then it expires."""
+        targets = color if isinstance(color, dict) else {ALL: tuple(color)}
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self.lock:
+            self.layers[layer] = (priority, targets, expires)
+            self.counters["updates"] += 1
+        if self.autostart and not self.running:
+            self.start()
+
+    def clear(self, layer: str):
+        with self.lock:
+            self.layers.pop(layer, None)
+
+    def compose(self, now: Optional[float] = None) -> Frame:
+        now = time.monotonic() if now is None else now
+        frame: Frame = {}
+        ranks: Dict[str, int] = {}
+        with self.lock:
+            for name in [n for n, (_, _, expires) in self.layers.items() if expires is not None and expires <= now]:
+                del self.layers[name]
+            for priority, targets, _ in self.layers.values():
+                for target, color in targets.items():
+                    if target not in ranks or priority >= ranks[target]:
+                        ranks[target] = priority
+                        frame[target] = color
+        return frame
+
+    def tick(self) -> bool:
+        """Compose and push one frame; False if nothing changed"""
+        frame = self.compose()
+        if frame == self.last_frame:
+            self.counters["unchanged"] += 1
+            return False
+        try:
+            self.device.show(frame)
+        except Exception as e:
+            self.counters["errors"] += 1
+            print(f"⚠️ LED output error: {e}")
+        self.last_frame = frame
+        self.counters["frames"] += 1
+        return True
+
+    def start(self):
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name="led-output", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while self.running:
+            self.tick()
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()  # fell behind: don't burst to catch up
+
+
+_output: Optional[LedOutput] = None
+_output_lock = threading.Lock()
+
+
+def get_output() -> LedOutput:
+    """The process-wide output stage (iCUE when available, else a MockDevice)"""
+    global _output
+    with _output_lock:
+        if _output is None:
+            device = MockDevice()
+            if ICUE_AVAILABLE:
+                sdk = CueSdk()
+                if sdk.connect():
+                    print("[Lumos] iCUE Connected!")
+                    device = CorsairDevice(sdk, keybinds=KEYBINDS)
+                else:
+                    print("[Lumos] iCUE Connection Failed.")
+            _output = LedOutput(device)
+        return _output
@@ -3,11 +3,33 @@
 
 import sys
 import os
+import math
 from sandbox import Sandbox
 
+# Adaptive search (run_adaptive): every loadout starts at START_ITERATIONS;
+# each round keeps the best KEEP_FRACTION by upper confidence bound (plus any
+# loadout whose interval still overlaps the leader's) and doubles the
+# iterations, until the leader is separated or MAX_ITERATIONS is reached.
+START_ITERATIONS = 100
+MAX_ITERATIONS = 10000
+GROWTH = 2
+KEEP_FRACTION = 0.5
+Z_SCORE = 1.96                # 95% confidence intervals
+SHARD_SIZE = 20               # loadouts per SimC process
+
 class LoadoutLottery:
-    def __init__(self):
-        self.sandbox = Sandbox()
+    def __init__(self, sandbox=None, queue=None):
+        self.sandbox = sandbox or Sandbox()
+        self._queue = queue
+        self.last_search = None
+
+    @property
+    def queue(self):
+        """SimQueue the adaptive search shards its batches onto (created on first use)"""
+        if self._queue is None:
+            from sim_queue import SimQueue
+            self._queue = SimQueue(self.sandbox)
+        return self._queue
         
     def run_comparison(self, base_simc, talent_strings):
         """
@@ -42,7 +64,10 @@ class LoadoutLottery:
             
         # Find winner
         winner = max(results, key=lambda x: x['dps'])
-        
+        self._report(results, winner)
+        return winner
+
+    def _report(self, results, winner):
         print("-" * 40)
         print(f"Simulation Complete: {len(results)} profiles simulated.")
         print("-" * 40)
@@ -54,9 +79,105 @@ class LoadoutLottery:
         print("-" * 40)
         print(f"Winner: {winner['name']} with {winner['dps']:.0f} DPS")
         print(f"Talents: {winner['talents']}")
-        
+
+    def run_adaptive(self, base_simc, talent_strings, start_iterations=START_ITERATIONS,
+                     max_iterations=MAX_ITERATIONS, keep_fraction=KEEP_FRACTION,
+                     z=Z_SCORE, shard_size=SHARD_SIZE):
+        """
+        Successive-halving version of run_comparison: cheap sims for every
+        loadout, more iterations only for the ones still in contention.
+        Returns the same winner dict (None if a sim failed); round-by-round
+        numbers are kept in self.last_search.
+        """
+        # Pooled estimate per loadout name: iterations, sum(n * mean), sum((n * error)^2)
+        pooled = {}
+        names = {f"Loadout_{i+1}": talent_str for i, talent_str in enumerate(talent_strings)}
+        contenders = list(names)
+        iterations = start_iterations
+        rounds = []
+        print(f"Adaptive search over {len(talent_strings)} loadouts...")
+
+        while True:
+            players = self._simulate_round(base_simc, contenders, names, iterations, shard_size)
+            if players is None:
+                print("Simulation failed.")
+                return
+            for res in players:
+                n, total, variance, _ = pooled.get(res['name'], (0, 0.0, 0.0, None))
+                pooled[res['name']] = (n + iterations, total + iterations * res['dps'],
+                                       variance + (iterations * res.get('dps_error', 0.0)) ** 2, res)
+            # The base profile rides along in every shard, so it competes too
+            base_names = [name for name in pooled if name not in names]
+            candidates = [name for name in contenders + base_names if name in pooled]
+            estimates = {name: self._estimate(pooled[name]) for name in candidates}
+
+            leader = max(candidates, key=lambda name: estimates[name][0])
+            leader_low = estimates[leader][0] - z * estimates[leader][1]
+            upper = {name: mean + z * error for name, (mean, error) in estimates.items()}
+            overlapping = [name for name in candidates if name != leader and upper[name] >= leader_low]
+            separated = not overlapping
+            rounds.append({"iterations": iterations, "simulated": len(contenders),
+                           "in_contention": len(overlapping) + 1})
+            print(f"  {iterations} iterations: {len(contenders)} loadouts, {len(overlapping) + 1} in contention")
+
+            if separated or iterations >= max_iterations:
+                break
+            ranked = sorted(overlapping, key=lambda name: upper[name], reverse=True)
+            keep = max(1, math.ceil(len(candidates) * keep_fraction)) - 1
+            contenders = [name for name in [leader] + ranked[:keep] if name in names]
+            if not contenders:
+                contenders = [name for name in ranked if name in names][:1]
+                if not contenders:
+                    break
+            iterations = min(iterations * GROWTH, max_iterations)
+
+        # Every loadout is reported with its estimate from the rounds it survived
+        results = []
+        for name in pooled:
+            mean, error = self._estimate(pooled[name])
+            res = dict(pooled[name][3])
+            res.update(dps=mean, dps_error=error)
+            if name in names and not res.get('talents'):
+                res['talents'] = names[name]
+            results.append(res)
+        results.sort(key=lambda res: res['dps'], reverse=True)
+        winner = next(res for res in results if res['name'] == leader)
+
+        actor_iterations = sum(r["iterations"] * r["simulated"] for r in rounds)
+        self.last_search = {"rounds": rounds, "separated": separated, "actor_iterations": actor_iterations,
+                            "fixed_actor_iterations": 1000 * len(talent_strings)}
+        self._report(results, winner)
+        if not separated:
+            print(f"Leader not separated within {max_iterations} iterations; picked by mean DPS")
         return winner
 
+    @staticmethod
+    def _estimate(pooled):
+        n, total, variance, _ = pooled
+        return total / n, math.sqrt(variance) / n
+
+    def _simulate_round(self, base_simc, contenders, names, iterations, shard_size):
+        """Sim `contenders` at `iterations`, split into shards that run in parallel"""
+        # Enough shards to keep every worker busy, none bigger than shard_size
+        per_shard = max(1, min(shard_size, math.ceil(len(contenders) / self.queue.workers)))
+        jobs = []
+        for start in range(0, len(contenders), per_shard):
+            batch_input = base_simc + "\n\n"
+            for name in contenders[start:start + per_shard]:
+                batch_input += f"copy={name}\n"
+                batch_input += f"talents={names[name]}\n\n"
+            job, _ = self.queue.submit(batch_input, iterations)
+            jobs.append(job["id"])
+
+        players = []
+        for job_id in jobs:
+            job = self.queue.wait(job_id)
+            if not job or job["status"] != "done":
+                print(f"Shard failed: {(job or {}).get('error')}")
+                return None
+            players.extend(job["result"]["players"])
+        return players
+
 if __name__ == "__main__":
     # Example usage
     lottery = LoadoutLottery()
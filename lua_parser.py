@@ -18,41 +18,52 @@ def parse_lua_table(file_path):
     try:
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             content = f.read()
-            
-        # WoW SavedVariables usually look like:
-        # MyAddonDB = {
-        #    ["profileKeys"] = {
-        #       ["Char - Realm"] = "Default",
-        #    },
-        #    ["global"] = {
-        #       ...
-        #    }
-        # }
-        
-        # 1. Extract the main table content (everything after the first " = ")
-        # We assume one main variable per file for simplicity, or we split by variable.
-        # Let's try to find the first assignment.
-        match = re.search(r'^\s*[\w_]+\s*=\s*({.*})', content, re.DOTALL)
-        if not match:
-            # Fallback: maybe it starts with the brace?
-            match = re.search(r'({.*})', content, re.DOTALL)
-            
-        if not match:
-            print(f"Could not find Lua table in {file_path}")
-            return {}
-            
-        lua_str = match.group(1)
-        
-        # 2. Parse using SLPP
-        # SLPP handles native Lua syntax including comments, booleans, nil, and key formats.
-        try:
-            data = slpp_decode(lua_str)
-            return data
-        except Exception as e:
-            print(f"SLPP parsing failed: {e}")
-            return {}
-            
     except Exception as e:
         print(f"Error reading {file_path}: {e}")
         return {}
 
+    return parse_lua_string(content, file_path)
+
+def parse_lua_string(content, label="payload"):
+    """
+    Parses the text of a SavedVariables file (e.g. an uploaded payload).
+
+    Args:
+        content (str): Lua source.
+        label (str): Name used in error messages.
+
+    Returns:
+        dict: A dictionary representing the Lua table ({} if none found).
+    """
+    # WoW SavedVariables usually look like:
+    # MyAddonDB = {
+    #    ["profileKeys"] = {
+    #       ["Char - Realm"] = "Default",
+    #    },
+    #    ["global"] = {
+    #       ...
+    #    }
+    # }
+
+    # 1. Extract the main table content (everything after the first " = ")
+    # We assume one main variable per file for simplicity, or we split by variable.
+    # Let's try to find the first assignment.
+    match = re.search(r'^\s*[\w_]+\s*=\s*({.*})', content, re.DOTALL)
+    if not match:
+        # Fallback: maybe it starts with the brace?
+        match = re.search(r'({.*})', content, re.DOTALL)
+
+    if not match:
+        print(f"Could not find Lua table in {label}")
+        return {}
+
+    lua_str = match.group(1)
+
+    # 2. Parse using SLPP
+    # SLPP handles native Lua syntax including comments, booleans, nil, and key formats.
+    try:
+        data = slpp_decode(lua_str)
+        return data
+    except Exception as e:
+        print(f"SLPP parsing failed: {e}")
+        return {}
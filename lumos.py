@@ -1,13 +1,11 @@
 import time
 import os
 import json
+from combat_log_tailer import get_tailer
+from led_output import ICUE_AVAILABLE, get_output
 # import requests # For WLED API
 
-try:
-    from cuesdk import CueSdk
-    ICUE_AVAILABLE = True
-except ImportError:
-    ICUE_AVAILABLE = False
+if not ICUE_AVAILABLE:
     print("[Lumos] cuesdk not installed. iCUE support disabled.")
 
 # try:
@@ -34,30 +32,27 @@ ZONE_PALETTES = {
     "Unknown": (255, 147, 41)     # Default Warm White
 }
 
+# Flashes sit above the state color and expire on their own
+FLASH_PRIORITY = 10
+
 class CorsairController:
-    def __init__(self):
-        self.sdk = None
-        if ICUE_AVAILABLE:
-            self.sdk = CueSdk()
-            connected = self.sdk.connect()
-            if connected:
-                print("[Lumos] iCUE Connected!")
-            else:
-                print("[Lumos] iCUE Connection Failed.")
-    
+    """Lumos' lighting producer; the LED output stage does the device I/O"""
+    def __init__(self, output=None):
+        self._output = output
+
+    @property
+    def output(self):
+        if self._output is None:
+            self._output = get_output()
+        return self._output
+
     def set_all_leds(self, r, g, b):
-        """Sets all LEDs to a single color."""
-        if not self.sdk: return
-        self.sdk.request_control()
-        
-        device_count = self.sdk.get_device_count()
-        for i in range(device_count):
-            led_positions = self.sdk.get_led_positions_by_device_index(i)
-            if not led_positions: continue
-            
-            colors = {led_id: (r, g, b) for led_id in led_positions}
-            self.sdk.set_led_colors_buffer_by_device_index(i, colors)
-            self.sdk.set_led_colors_flush_buffer()
+        """Sets the base (state) color of all LEDs."""
+        self.output.set("lumos.state", (r, g, b))
+
+    def flash(self, r, g, b, duration=0.1):
+        """Shows a color over the state color for `duration` seconds (never blocks)."""
+        self.output.set("lumos.flash", (r, g, b), priority=FLASH_PRIORITY, ttl=duration)
 
     def update_health_bar(self, health_pct):
         """Maps health % to F1-F12 keys (if supported/mapped)."""
@@ -83,7 +78,6 @@ class CorsairController:
 
     def set_resource_bar(self, power_pct, power_type_val):
         """Lights up Number Row (1-9) based on power."""
-        if not self.sdk: return
         # Mock mapping for Number Row (would need specific LED IDs)
         # For now, we'll tint the whole keyboard based on Power Type
         
@@ -165,15 +159,18 @@ def process_status(file_path):
     except Exception as e:
         print(f"[Lumos] Error: {e}")
 
-def follow(file):
-    """Generator that yields new lines from a file (tail -f)."""
-    file.seek(0, os.SEEK_END)
-    while True:
-        line = file.readline()
-        if not line:
-            time.sleep(0.1)
-            continue
-        yield line
+# Lighting reacts to these events only; stale ones are worthless, so a slow
+# LED device drops the oldest instead of holding up the shared tailer
+LIGHTING_EVENTS = {"SPELL_CAST_SUCCESS", "UNIT_DIED", "ENVIRONMENTAL_DAMAGE"}
+
+def follow(log_path, name="lumos"):
+    """Yields combat log events from the shared tailer (tail -f)."""
+    tailer = get_tailer(log_path)
+    subscription = tailer.subscribe(name, events=LIGHTING_EVENTS, maxsize=256, overflow="drop_oldest")
+    try:
+        yield from subscription
+    finally:
+        tailer.unsubscribe(subscription)
 
 def run_combat_log_monitor(log_path):
     """Monitors WoWCombatLog.txt for real-time events."""
@@ -183,25 +180,21 @@ def run_combat_log_monitor(log_path):
 
     print(f"[Lumos] Watching Combat Log: {log_path}")
     
-    with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-        for line in follow(f):
-            # Parse Events
-            # Format: Timestamp, Event, HideCaster, SourceGUID, SourceName, ...
+    for event in follow(log_path):
+        # Fields are decoded by name (see combat_log_parser.py)
+        if event.event == "SPELL_CAST_SUCCESS" and event.involves("YourName"): # Replace YourName
+            # Flash White for ability cast, then back to Combat Red
+            corsair.set_all_leds(255, 0, 0)
+            corsair.flash(255, 255, 255, 0.1)
             
-            if "SPELL_CAST_SUCCESS" in line and "YourName" in line: # Replace YourName
-                # Flash White for ability cast
-                corsair.set_all_leds(255, 255, 255)
-                time.sleep(0.1)
-                # Return to previous state (Combat Red)
-                corsair.set_all_leds(255, 0, 0)
-                
-            elif "UNIT_DIED" in line and "YourName" in line:
-                # Death State
-                corsair.set_all_leds(50, 50, 50)
-                
-            elif "ENVIRONMENTAL_DAMAGE" in line and "FIRE" in line and "YourName" in line:
-                # Standing in Fire -> Orange Flash
-                corsair.set_all_leds(255, 100, 0)
+        elif event.event == "UNIT_DIED" and event.involves("YourName"):
+            # Death State
+            corsair.set_all_leds(50, 50, 50)
+            
+        elif (event.event == "ENVIRONMENTAL_DAMAGE" and event.involves("YourName")
+              and (event.get("environmental_type") or "").upper() == "FIRE"):
+            # Standing in Fire -> Orange Flash
+            corsair.flash(255, 100, 0, 0.5)
 
 if __name__ == "__main__":
     import threading
@@ -252,58 +245,55 @@ if __name__ == "__main__":
 
         print(f"[Lumos] Watching Combat Log: {combat_log_path}")
         
-        with open(combat_log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in follow(f):
-                # Advanced Logging Format:
-                # ... event, ..., health, maxHealth, ...
-                # The health/maxHealth are usually the last fields for the relevant unit.
-                
-                parts = line.split(',')
-                if len(parts) < 10: continue
+        for event in follow(combat_log_path, "lumos-events"):
+            # Advanced Logging Format:
+            # ... event, ..., health, maxHealth, ...
+            # The health/maxHealth are usually the last fields for the relevant unit.
+            
+            line, parts = event.raw, event.fields
+            if len(parts) < 8: continue
+            
+            # Check for Player GUID in the line
+            if player_guid in line:
+                # Try to extract Health (Advanced Logging required)
+                # This is a heuristic: Look for the sequence "Health, MaxHealth" 
+                # which are typically large integers near the end.
                 
-                # Check for Player GUID in the line
-                if player_guid in line:
-                    # Try to extract Health (Advanced Logging required)
-                    # This is a heuristic: Look for the sequence "Health, MaxHealth" 
-                    # which are typically large integers near the end.
+                try:
+                    # Reverse scan for the player's health
+                    # In many events, it's: ... sourceGUID, ... sourceHealth, sourceMaxHealth, ... destGUID, ... destHealth, destMaxHealth
                     
-                    try:
-                        # Reverse scan for the player's health
-                        # In many events, it's: ... sourceGUID, ... sourceHealth, sourceMaxHealth, ... destGUID, ... destHealth, destMaxHealth
+                    # Find index of player GUID
+                    indices = [i for i, x in enumerate(parts) if player_guid in x]
+                    
+                    for idx in indices:
+                        # Health/MaxHealth are usually at offset +X from GUID depending on event type.
+                        # But simpler: Advanced logs end with: ... UIInfo, UIInfo, Health, MaxHealth, AttackPower, ...
+                        # Let's try to parse the last few integers.
+                        
+                        # Robust approach:
+                        # If Player is Source: Health is usually around index 30-34 or end-ish
+                        # If Player is Dest: Health is usually around index 30-34 or end-ish
+                        
+                        # Let's look for the specific pattern of "currentHP/maxHP"
+                        # We'll assume the user has decent gear, so MaxHP > 1000.
                         
-                        # Find index of player GUID
-                        indices = [i for i, x in enumerate(parts) if player_guid in x]
+                        # Scan parts for integer pairs that look like health
+                        # This is "fuzzy" parsing but effective for a workaround.
                         
-                        for idx in indices:
-                            # Health/MaxHealth are usually at offset +X from GUID depending on event type.
-                            # But simpler: Advanced logs end with: ... UIInfo, UIInfo, Health, MaxHealth, AttackPower, ...
-                            # Let's try to parse the last few integers.
-                            
-                            # Robust approach:
-                            # If Player is Source: Health is usually around index 30-34 or end-ish
-                            # If Player is Dest: Health is usually around index 30-34 or end-ish
-                            
-                            # Let's look for the specific pattern of "currentHP/maxHP"
-                            # We'll assume the user has decent gear, so MaxHP > 1000.
-                            
-                            # Scan parts for integer pairs that look like health
-                            # This is "fuzzy" parsing but effective for a workaround.
-                            
-                            # We only care if we are in combat (where Lua fails)
-                            # Update the global 'health' variable if we find a match
-                            pass 
-                            
-                        # Specific Event Triggers (Keep these)
-                        if "SPELL_CAST_SUCCESS" in line and player_guid in parts[1]: # Source is player
-                             corsair.set_all_leds(255, 255, 255) # Flash White
-                             time.sleep(0.05)
-                             # Revert handled by next loop update
-                             
-                        if "UNIT_DIED" in line and player_guid in parts[6]: # Dest is player
-                             corsair.set_all_leds(50, 50, 50) # Death
-                             
-                    except Exception as e:
-                        pass
+                        # We only care if we are in combat (where Lua fails)
+                        # Update the global 'health' variable if we find a match
+                        pass 
+                        
+                    # Specific Event Triggers (Keep these)
+                    if event.event == "SPELL_CAST_SUCCESS" and event.source_guid == player_guid: # Source is player
+                         corsair.flash(255, 255, 255, 0.05) # Flash White; state color returns when it expires
+                         
+                    if event.event == "UNIT_DIED" and event.dest_guid == player_guid: # Dest is player
+                         corsair.set_all_leds(50, 50, 50) # Death
+                         
+                except Exception as e:
+                    pass
 
 
     t1 = threading.Thread(target=state_loop, daemon=True)
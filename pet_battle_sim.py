@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+pet_battle_sim.py - Monte Carlo pet battle simulator for PetWeaver
+
+/api/petweaver/validate_team used to answer a fixed 0.75. This plays the
+battle out thousands of times instead:
+
+- a team, an encounter and a script are compiled once into small NumPy
+  tables (per side and slot: health, power, speed, family; per ability:
+  kind, family, base, accuracy, cooldown, duration, hits)
+- the state of every battle lives in arrays shaped (battles, side, slot)
+  (health, cooldowns, damage-over-time, vulnerability, blocks, script
+  position), so one round of all battles is a few dozen array operations;
+  finished battles are dropped from the arrays as they end
+- misses, crits and speed ties are the random parts; each batch gets its
+  own seed, and large validations are split over a process pool
+- results (win probability with a Wilson confidence interval, average
+  rounds) are memoized per hash of (team, encounter, script)
+
+Team entries are species ids or {species_id, level, breed, abilities},
+where breed scales health/power/speed (BREEDS) and abilities picks, per
+ability slot, the species' default (0) or its alternate (1).
+
+Scripts are one action per line, in order: an ability name of the active
+pet, "Swap to <pet>" or (first line) the pet to lead with. An ability of
+another living pet swaps to that pet first; an ability on cooldown, or a
+finished script, falls back to the ready ability with the longest
+cooldown (so the basic attack comes last). A dead active pet is replaced
+by the next living one. NPC pets use the same fallback.
+
+Usage:
+    sim = PetBattleSimulator()
+    sim.simulate([1387, 1266, 0], "squirt", "Ikky\\nBlack Claw\\nFlock", battles=5000)
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+DEFAULT_BATTLES = 2000
+MAX_ROUNDS = 50
+PARALLEL_MIN = 20000          # battles before a process pool is worth starting
+MEMO_SIZE = 256
+CRIT_CHANCE = 0.05
+CRIT_MULTIPLIER = 1.5
+HEAL_BELOW = 0.75
+Z_SCORE = 1.96
+
+# ============================================================================
+# Game data
+# ============================================================================
+
+FAMILIES = ["humanoid", "dragonkin", "flying", "undead", "critter",
+            "magic", "elemental", "beast", "aquatic", "mechanical"]
+# Attack family -> the family it deals +50% to / -33% to
+STRONG = {"humanoid": "dragonkin", "dragonkin": "magic", "flying": "aquatic", "undead": "humanoid",
+          "critter": "undead", "magic": "flying", "elemental": "mechanical", "beast": "critter",
+          "aquatic": "elemental", "mechanical": "beast"}
+WEAK = {"humanoid": "beast", "dragonkin": "undead", "flying": "dragonkin", "undead": "aquatic",
+        "critter": "humanoid", "magic": "mechanical", "elemental": "critter", "beast": "flying",
+        "aquatic": "magic", "mechanical": "elemental"}
+
+TYPE_MODIFIER = np.ones((len(FAMILIES), len(FAMILIES)))
+for _attack, _defend in STRONG.items():
+    TYPE_MODIFIER[FAMILIES.index(_attack), FAMILIES.index(_defend)] = 1.5
+for _attack, _defend in WEAK.items():
+    TYPE_MODIFIER[FAMILIES.index(_attack), FAMILIES.index(_defend)] = 2 / 3
+
+# Ability kinds. base is damage/healing before power scaling (x (1 + power / 20)),
+# percent extra damage taken for "vulnerability", attacks blocked for "block".
+KINDS = ["damage", "heal", "dot", "vulnerability", "block"]
+DAMAGE, HEAL, DOT, VULNERABILITY, BLOCK = range(len(KINDS))
+ABILITY, SWAP = 0, 1
+SLOTS = 3
+MAX_HITS = 3
+
+
+# Breed -> (health, power, speed) multipliers on the base (B/B) stats
+BREEDS = {"B/B": (1.0, 1.0, 1.0), "P/P": (0.9, 1.2, 0.9), "S/S": (0.9, 0.9, 1.2), "H/H": (1.2, 0.9, 0.9),
+          "H/P": (1.1, 1.1, 0.8), "P/S": (0.8, 1.1, 1.1), "H/S": (1.1, 0.8, 1.1),
+          "P/B": (0.95, 1.1, 0.95), "S/B": (0.95, 0.95, 1.1), "H/B": (1.1, 0.95, 0.95)}
+
+
+def _ability(name, family, kind="damage", base=20, accuracy=1.0, cooldown=0, duration=0, hits=1):
+    return {"name": name, "family": family, "kind": kind, "base": base, "accuracy": accuracy,
+            "cooldown": cooldown, "duration": duration, "hits": hits}
+
+
+# Level 25 rare B/B stats; "alternates" are the other choice for each ability slot
+SPECIES = {
+    0: {"name": "Leveling Pet", "family": "critter", "health": 1250, "power": 250, "speed": 250,
+        "abilities": [_ability("Scratch", "critter")]},
+    1387: {"name": "Ikky", "family": "flying", "health": 1400, "power": 290, "speed": 340,
+           "abilities": [_ability("Peck", "flying", accuracy=0.95),
+                         _ability("Black Claw", "beast", "vulnerability", base=50, cooldown=3, duration=3),
+                         _ability("Flock", "flying", base=12, cooldown=3, hits=3)],
+           "alternates": [_ability("Slicing Wind", "flying", base=24, accuracy=0.9),
+                          _ability("Hunting Party", "beast", base=12, cooldown=1, hits=2),
+                          _ability("Lift-Off", "flying", base=30, cooldown=4)]},
+    1266: {"name": "Mechanical Pandaren Dragonling", "aliases": ["MPD"], "family": "mechanical",
+           "health": 1550, "power": 280, "speed": 260,
+           "abilities": [_ability("Breath", "dragonkin"),
+                         _ability("Decoy", "mechanical", "block", cooldown=4, hits=2),
+                         _ability("Bombardment", "mechanical", base=25, accuracy=0.9, cooldown=2)],
+           "alternates": [_ability("Tail Sweep", "dragonkin", base=24, accuracy=0.9),
+                          _ability("Thunderbolt", "elemental", base=18, cooldown=1),
+                          _ability("Explode", "mechanical", base=40, accuracy=0.95, cooldown=6)]},
+    233: {"name": "Cogblade Raptor", "family": "mechanical", "health": 1500, "power": 300, "speed": 260,
+          "abilities": [_ability("Batter", "humanoid", base=10, accuracy=0.8, hits=3),
+                        _ability("Rip", "beast", "dot", base=6, cooldown=3, duration=4),
+                        _ability("Exposed Wounds", "beast", "vulnerability", base=25, cooldown=3, duration=3)],
+          "alternates": [_ability("Bite", "beast"), None,
+                         _ability("Overtune", "mechanical", "heal", base=30, cooldown=3)]},
+    868: {"name": "Pandaren Water Spirit", "family": "aquatic", "health": 1650, "power": 260, "speed": 260,
+          "abilities": [_ability("Water Jet", "aquatic"),
+                        _ability("Whirlpool", "aquatic", "dot", base=15, cooldown=4, duration=2),
+                        _ability("Healing Wave", "aquatic", "heal", base=40, cooldown=3)],
+          "alternates": [_ability("Water Jet", "aquatic", base=24, accuracy=0.9),
+                         _ability("Geyser", "aquatic", base=45, accuracy=0.8, cooldown=5), None]},
+    1155: {"name": "Chrominius", "family": "dragonkin", "health": 1550, "power": 300, "speed": 250,
+           "abilities": [_ability("Bite", "beast"),
+                         _ability("Howl", "beast", "vulnerability", base=100, cooldown=5, duration=2),
+                         _ability("Surge of Power", "dragonkin", base=45, accuracy=0.9, cooldown=4)],
+           "alternates": [_ability("Arcane Explosion", "magic", base=18), None,
+                          _ability("Ancient Blessing", "dragonkin", "heal", base=35, cooldown=4)]},
+    1117: {"name": "Zandalari Anklerender", "family": "beast", "health": 1450, "power": 300, "speed": 325,
+           "abilities": [_ability("Hunting Party", "beast", base=12, hits=2, cooldown=1),
+                         _ability("Black Claw", "beast", "vulnerability", base=50, cooldown=3, duration=3),
+                         _ability("Leap", "beast", base=15)],
+           "alternates": [_ability("Bite", "beast"),
+                          _ability("Rake", "beast", "dot", base=8, cooldown=3, duration=3), None]},
+    648: {"name": "Anubisath Idol", "family": "elemental", "health": 1800, "power": 260, "speed": 200,
+          "abilities": [_ability("Crush", "elemental"),
+                        _ability("Deflection", "elemental", "block", cooldown=4, hits=1),
+                        _ability("Sandstorm", "elemental", "dot", base=8, cooldown=5, duration=5)],
+          "alternates": [_ability("Stone Rush", "elemental", base=40, cooldown=4), None, None]},
+    1165: {"name": "Emerald Proto-Whelp", "family": "dragonkin", "health": 1500, "power": 280, "speed": 280,
+           "abilities": [_ability("Emerald Bite", "dragonkin"),
+                         _ability("Healing Flame", "dragonkin", "heal", base=35, cooldown=3),
+                         _ability("Emerald Presence", "dragonkin", "block", cooldown=5, hits=1)]},
+    1238: {"name": "Unborn Val'kyr", "family": "undead", "health": 1500, "power": 290, "speed": 270,
+           "abilities": [_ability("Shadow Slash", "undead"),
+                         _ability("Curse of Doom", "undead", "dot", base=25, cooldown=6, duration=3),
+                         _ability("Haunt", "undead", "dot", base=12, cooldown=4, duration=4)],
+           "alternates": [_ability("Siphon Life", "undead", "heal", base=20, cooldown=2), None,
+                          _ability("Unholy Ascension", "undead", base=35, cooldown=5)]},
+    374: {"name": "Black Tabby Cat", "family": "critter", "health": 1400, "power": 270, "speed": 310,
+          "abilities": [_ability("Claw", "beast"),
+                        _ability("Pounce", "beast", base=25, cooldown=2),
+                        _ability("Prowl", "critter", "block", cooldown=4, hits=1)]},
+}
+
+ENCOUNTERS = {
+    "squirt": {"name": "Squirt", "zone": "Garrison", "difficulty": "Medium", "pets": [
+        {"name": "Deebs", "family": "critter", "health": 1200, "power": 230, "speed": 260,
+         "abilities": [_ability("Scratch", "critter"), _ability("Rip", "beast", "dot", base=8, cooldown=3, duration=4)]},
+        {"name": "Tyri", "family": "flying", "health": 1100, "power": 240, "speed": 300,
+         "abilities": [_ability("Peck", "flying"), _ability("Lift-Off", "flying", base=30, cooldown=4)]},
+        {"name": "Puzzle", "family": "magic", "health": 1100, "power": 240, "speed": 270,
+         "abilities": [_ability("Psychic Blast", "magic", base=25, cooldown=2), _ability("Arcane Blast", "magic")]},
+    ]},
+    "tiun": {"name": "Ti'un the Wanderer", "zone": "Krasarang Wilds", "difficulty": "Hard", "pets": [
+        {"name": "Greyhoof", "family": "beast", "health": 1700, "power": 280, "speed": 240,
+         "abilities": [_ability("Horn Attack", "beast"), _ability("Stampede", "beast", base=12, cooldown=3, hits=3)]},
+        {"name": "Lucky Yi", "family": "critter", "health": 1600, "power": 280, "speed": 300,
+         "abilities": [_ability("Burrow", "beast", base=30, cooldown=4), _ability("Bite", "beast"),
+                       _ability("Survival", "critter", "block", cooldown=5, hits=1)]},
+        {"name": "Ka'wi", "family": "humanoid", "health": 1650, "power": 280, "speed": 260,
+         "abilities": [_ability("Punch", "humanoid"), _ability("Recovery", "humanoid", "heal", base=35, cooldown=3)]},
+    ]},
+    "akali": {"name": "Aki the Chosen", "zone": "Vale of Eternal Blossoms", "difficulty": "Easy", "pets": [
+        {"name": "Whispertail", "family": "dragonkin", "health": 1000, "power": 210, "speed": 240,
+         "abilities": [_ability("Tail Sweep", "dragonkin"), _ability("Lift-Off", "flying", base=25, cooldown=4)]},
+        {"name": "Chirrup", "family": "critter", "health": 900, "power": 200, "speed": 280,
+         "abilities": [_ability("Chomp", "critter")]},
+    ]},
+}
+
+
+# ============================================================================
+# Compilation
+# ============================================================================
+
+def _pet_entry(entry) -> Dict:
+    """A team entry (species id or {species_id, level, breed, abilities}) as catalog stats"""
+    entry = entry if isinstance(entry, dict) else {"species_id": entry}
+    species_id, level = int(entry.get("species_id", 0)), int(entry.get("level", 25))
+    species = SPECIES.get(species_id)
+    if species is None:
+        raise ValueError(f"Unknown species {species_id}")
+    breed = BREEDS.get(entry.get("breed", "B/B"))
+    if breed is None:
+        raise ValueError(f"Unknown breed {entry.get('breed')}")
+
+    scale = max(1, min(level, 25)) / 25
+    pet = dict(species, species_id=species_id, level=level)
+    for stat, multiplier in zip(("health", "power", "speed"), breed):
+        pet[stat] = species[stat] * scale * multiplier
+    alternates = species.get("alternates", [])
+    choices = entry.get("abilities") or []
+    pet["abilities"] = [alternates[i] if i < len(choices) and choices[i] and i < len(alternates) and alternates[i]
+                        else ability for i, ability in enumerate(species["abilities"])]
+    return pet
+
+
+def validate_encounter(encounter: Dict) -> Dict:
+    """Check an encounter's npc_data ({"pets": [...]}) has what a battle needs; ValueError if not"""
+    pets = encounter.get("pets") if isinstance(encounter, dict) else None
+    if not isinstance(pets, list) or not 1 <= len(pets) <= SLOTS:
+        raise ValueError(f"Encounter needs a \"pets\" list of 1 to {SLOTS} pets")
+    for slot, pet in enumerate(pets, 1):
+        if not isinstance(pet, dict):
+            raise ValueError(f"Encounter pet {slot} is not an object")
+        missing = [key for key in ("name", "health", "power", "speed", "family", "abilities") if key not in pet]
+        if missing:
+            raise ValueError(f"Encounter pet {slot} is missing {', '.join(missing)}")
+        if pet["family"] not in FAMILIES:
+            raise ValueError(f"Encounter pet {slot} has unknown family {pet['family']}")
+        for ability in pet["abilities"]:
+            if not isinstance(ability, dict) or "name" not in ability or ability.get("family") not in FAMILIES:
+                raise ValueError(f"Encounter pet {slot} has an ability without a name and known family")
+            if ability.get("kind", "damage") not in KINDS:
+                raise ValueError(f"Encounter pet {slot} has unknown ability kind {ability['kind']}")
+    return encounter
+
+
+def resolve_encounter(encounter: Union[str, Dict]) -> Dict:
+    if isinstance(encounter, dict):
+        return validate_encounter(encounter)
+    if encounter not in ENCOUNTERS:
+        raise ValueError(f"Unknown encounter {encounter}")
+    return ENCOUNTERS[encounter]
+
+
+def _side(pets: List[Dict]) -> Dict[str, np.ndarray]:
+    if not 1 <= len(pets) <= SLOTS:
+        raise ValueError(f"A team has 1 to {SLOTS} pets")
+    side = {"health": np.zeros(SLOTS), "power": np.zeros(SLOTS), "speed": np.zeros(SLOTS),
+            "family": np.zeros(SLOTS, dtype=np.int64)}
+    for field, dtype, empty in (("kind", np.int64, -1), ("ab_family", np.int64, 0), ("base", float, 0),
+                                ("accuracy", float, 0), ("cooldown", np.int64, 0), ("duration", np.int64, 0),
+                                ("hits", np.int64, 0)):
+        side[field] = np.full((SLOTS, SLOTS), empty, dtype=dtype)
+    for slot, pet in enumerate(pets):
+        side["health"][slot], side["power"][slot], side["speed"][slot] = pet["health"], pet["power"], pet["speed"]
+        side["family"][slot] = FAMILIES.index(pet["family"])
+        for k, ability in enumerate(pet["abilities"][:SLOTS]):
+            side["kind"][slot, k] = KINDS.index(ability.get("kind", "damage"))
+            side["ab_family"][slot, k] = FAMILIES.index(ability["family"])
+            side["base"][slot, k] = ability.get("base", 20)
+            side["accuracy"][slot, k] = ability.get("accuracy", 1.0)
+            side["cooldown"][slot, k] = ability.get("cooldown", 0)
+            side["duration"][slot, k] = ability.get("duration", 0)
+            side["hits"][slot, k] = min(ability.get("hits", 1), MAX_HITS)
+    return side
+
+
+def _find_pet(pets: List[Dict], name: str) -> Optional[int]:
+    name = name.strip().lower()
+    for slot, pet in enumerate(pets):
+        names = [pet["name"]] + pet.get("aliases", [])
+        if any(n.lower() == name for n in names):
+            return slot
+    for slot, pet in enumerate(pets):
+        if pet["name"].lower().startswith(name):
+            return slot
+    return None
+
+
+def parse_script(script: str, pets: List[Dict]):
+    """Script lines -> (lead slot, [(ABILITY, slot, k) | (SWAP, slot, -1)])"""
+    abilities = {}
+    for slot, pet in enumerate(pets):
+        for k, ability in enumerate(pet["abilities"][:SLOTS]):
+            abilities.setdefault(ability["name"].lower(), (slot, k))
+
+    lead, steps = 0, []
+    for line in (script or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        lower = line.lower()
+        if lower.startswith("swap to "):
+            slot = _find_pet(pets, line[8:])
+            if slot is None:
+                raise ValueError(f"Unknown pet in script: {line}")
+            steps.append((SWAP, slot, -1))
+        elif lower in abilities:
+            steps.append((ABILITY,) + abilities[lower])
+        elif _find_pet(pets, line) is not None:
+            if steps:
+                steps.append((SWAP, _find_pet(pets, line), -1))
+            else:
+                lead = _find_pet(pets, line)
+        else:
+            raise ValueError(f"Unknown script line: {line}")
+    return lead, steps
+
+
+def compile_battle(team: List, encounter: Union[str, Dict], script: str = "") -> Dict:
+    """Everything a batch of battles needs, as plain arrays (picklable for workers)"""
+    pets = [_pet_entry(entry) for entry in team]
+    npc = resolve_encounter(encounter)["pets"]
+    lead, steps = parse_script(script, pets)
+    sides = [_side(pets), _side(npc)]
+    compiled = {field: np.stack([side[field] for side in sides]) for field in sides[0]}
+    compiled["lead"] = lead
+    compiled["steps"] = np.array(steps or [(ABILITY, 0, -1)], dtype=np.int64).reshape(-1, 3)
+    compiled["script_length"] = len(steps)
+    return compiled
+
+
+# ============================================================================
+# Batched battles
+# ============================================================================
+
+def _first_ready(state, c, side: int, rows: np.ndarray) -> np.ndarray:
+    """Ready ability with the longest cooldown for each battle's active pet on `side` (-1: none)"""
+    active = state["active"][:, side]
+    ready = (state["cd"][rows, side, active] == 0) & (c["kind"][side][active] >= 0)
+    # Heals wait until the pet is below HEAL_BELOW of its health
+    hurt = state["hp"][rows, side, active] < HEAL_BELOW * c["health"][side][active]
+    ready &= (c["kind"][side][active] != HEAL) | hurt[:, None]
+    priority = np.where(ready, c["cooldown"][side][active] + 1, 0)
+    return np.where(ready.any(axis=1), priority.argmax(axis=1), -1)
+
+
+def _act(state, c, rng, side: int, ability: np.ndarray, mask: np.ndarray):
+    """Active pets on `side` use `ability` in the battles selected by `mask`"""
+    hp, active = state["hp"], state["active"]
+    rows = np.nonzero(mask & (ability >= 0))[0]
+    if rows.size == 0:
+        return
+    other = 1 - side
+    pet, k, target = active[rows, side], ability[rows], active[rows, other]
+    alive = hp[rows, side, pet] > 0
+    rows, pet, k, target = rows[alive], pet[alive], k[alive], target[alive]
+
+    kind = c["kind"][side][pet, k]
+    state["cd"][rows, side, pet, k] = c["cooldown"][side][pet, k]
+    amount = c["base"][side][pet, k] * (1 + c["power"][side][pet] / 20)
+    modifier = TYPE_MODIFIER[c["ab_family"][side][pet, k], c["family"][other][target]]
+    hit = rng.random(rows.size) < c["accuracy"][side][pet, k]
+
+    damage = kind == DAMAGE
+    if damage.any():
+        vulnerable = state["vuln_left"][rows, other, target] > 0
+        per_hit = amount * modifier * (1 + np.where(vulnerable, state["vuln"][rows, other, target], 0))
+        hits = c["hits"][side][pet, k]
+        for h in range(MAX_HITS):
+            swing = damage & (h < hits)
+            if not swing.any():
+                break
+            landed = swing & (rng.random(rows.size) < c["accuracy"][side][pet, k])
+            blocked = landed & (state["block"][rows, other, target] > 0)
+            state["block"][rows, other, target] -= blocked
+            crit = np.where(rng.random(rows.size) < CRIT_CHANCE, CRIT_MULTIPLIER, 1.0)
+            hp[rows, other, target] -= per_hit * crit * (landed & ~blocked)
+
+    heal = kind == HEAL
+    if heal.any():
+        healed = np.minimum(hp[rows, side, pet] + amount, c["health"][side][pet])
+        hp[rows, side, pet] = np.where(heal, healed, hp[rows, side, pet])
+
+    dot = (kind == DOT) & hit
+    if dot.any():
+        state["dot"][rows[dot], other, target[dot]] = (amount * modifier)[dot]
+        state["dot_left"][rows[dot], other, target[dot]] = c["duration"][side][pet, k][dot]
+
+    vuln = (kind == VULNERABILITY) & hit
+    if vuln.any():
+        state["vuln"][rows[vuln], other, target[vuln]] = c["base"][side][pet, k][vuln] / 100
+        state["vuln_left"][rows[vuln], other, target[vuln]] = c["duration"][side][pet, k][vuln]
+
+    block = kind == BLOCK
+    if block.any():
+        state["block"][rows[block], side, pet[block]] = c["hits"][side][pet, k][block]
+
+
+def _player_choice(state, c, rows: np.ndarray):
+    """Follow the script: returns (ability or -1, swap target or -1) per battle"""
+    steps, length = c["steps"], c["script_length"]
+    ptr, active, hp = state["ptr"], state["active"][:, 0], state["hp"]
+    has = ptr < length
+    kind, slot, k = steps[np.minimum(ptr, len(steps) - 1)].T
+    slot_alive = hp[rows, 0, slot] > 0
+
+    swap_step = has & (kind == SWAP)
+    ability_step = has & (kind == ABILITY)
+    other_pet = ability_step & (slot != active)
+    swap = (swap_step | other_pet) & slot_alive & (slot != active)
+    own = ability_step & (slot == active)
+    ready = own & (state["cd"][rows, 0, active, np.maximum(k, 0)] == 0)
+
+    # Swap steps are done once taken (or moot); abilities of dead pets are skipped
+    state["ptr"] = ptr + (swap_step | (other_pet & ~slot_alive) | ready)
+    ability = np.where(ready, k, _first_ready(state, c, 0, rows))
+    return np.where(swap, -1, ability), np.where(swap, slot, -1)
+
+
+def run_battles(compiled: Dict, battles: int, seed=None, max_rounds: int = MAX_ROUNDS) -> Dict:
+    """Play `battles` battles of one compiled matchup; returns summed counts"""
+    c, rng = compiled, np.random.default_rng(seed)
+    if c["health"][0][c["lead"]] <= 0:
+        raise ValueError("Lead pet has no health")
+    state = {
+        "hp": np.broadcast_to(c["health"], (battles, 2, SLOTS)).copy(),
+        "cd": np.zeros((battles, 2, SLOTS, SLOTS), dtype=np.int64),
+        "active": np.zeros((battles, 2), dtype=np.int64),
+        "dot": np.zeros((battles, 2, SLOTS)),
+        "dot_left": np.zeros((battles, 2, SLOTS), dtype=np.int64),
+        "vuln": np.zeros((battles, 2, SLOTS)),
+        "vuln_left": np.zeros((battles, 2, SLOTS), dtype=np.int64),
+        "block": np.zeros((battles, 2, SLOTS), dtype=np.int64),
+        "ptr": np.zeros(battles, dtype=np.int64),
+    }
+    state["active"][:, 0] = c["lead"]
+    totals = {"battles": battles, "wins": 0, "timeouts": 0, "rounds": 0, "rounds_won": 0, "pets_lost": 0}
+
+    for round_no in range(1, max_rounds + 1):
+        rows = np.arange(len(state["ptr"]))
+        player, swap = _player_choice(state, c, rows)
+        npc = _first_ready(state, c, 1, rows)
+        swapping = swap >= 0
+        state["active"][swapping, 0] = swap[swapping]
+
+        speed = c["speed"][0][state["active"][:, 0]], c["speed"][1][state["active"][:, 1]]
+        player_first = (speed[0] > speed[1]) | ((speed[0] == speed[1]) & (rng.random(rows.size) < 0.5))
+        _act(state, c, rng, 0, player, player_first)
+        _act(state, c, rng, 1, npc, np.ones(rows.size, dtype=bool))
+        _act(state, c, rng, 0, player, ~player_first)
+
+        # End of round: damage over time ticks, auras and cooldowns count down
+        hp = state["hp"]
+        ticking = (state["dot_left"] > 0) & (hp > 0)
+        hp -= state["dot"] * ticking
+        for aura in ("dot_left", "vuln_left"):
+            np.maximum(state[aura] - 1, 0, out=state[aura])
+        np.maximum(state["cd"] - 1, 0, out=state["cd"])
+
+        living = hp > 0
+        wiped = ~living.any(axis=2)
+        for side in (0, 1):
+            active = state["active"][:, side]
+            replace = ~living[rows, side, active] & ~wiped[:, side]
+            state["active"][replace, side] = living[replace, side].argmax(axis=1)
+
+        done = wiped.any(axis=1)
+        if done.any():
+            won = done & wiped[:, 1] & ~wiped[:, 0]
+            totals["wins"] += int(won.sum())
+            totals["rounds"] += round_no * int(done.sum())
+            totals["rounds_won"] += round_no * int(won.sum())
+            totals["pets_lost"] += int((~living[won, 0] & (c["health"][0] > 0)).sum())
+            keep = ~done
+            state = {name: values[keep] for name, values in state.items()}
+            if not len(state["ptr"]):
+                break
+
+    remaining = len(state["ptr"])
+    totals["timeouts"] += remaining
+    totals["rounds"] += max_rounds * remaining
+    return totals
+
+
+# ============================================================================
+# Simulator
+# ============================================================================
+
+def wilson_interval(wins: int, battles: int, z: float = Z_SCORE):
+    if not battles:
+        return 0.0, 1.0
+    p = wins / battles
+    denominator = 1 + z * z / battles
+    center = (p + z * z / (2 * battles)) / denominator
+    spread = z * math.sqrt(p * (1 - p) / battles + z * z / (4 * battles * battles)) / denominator
+    return max(0.0, center - spread), min(1.0, center + spread)
+
+
+def matchup_key(team: List, encounter: Union[str, Dict], script: str = "") -> str:
+    canonical = json.dumps([[entry if isinstance(entry, dict) else int(entry) for entry in team],
+                            encounter, "\n".join(line.strip() for line in (script or "").strip().splitlines())],
+                           sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class PetBattleSimulator:
+    """Monte Carlo validation of a team + script against an encounter, memoized"""
+
+    def __init__(self, memo_size: int = MEMO_SIZE, max_rounds: int = MAX_ROUNDS):
+        self.memo_size = memo_size
+        self.max_rounds = max_rounds
+        self.memo: "OrderedDict[str, Dict]" = OrderedDict()
+        self.counters = {"simulated": 0, "memo_hits": 0, "battles": 0}
+        self._lock = threading.Lock()   # memo and counters; Flask serves requests on threads
+
+    def simulate(self, team: List, encounter: Union[str, Dict], script: str = "",
+                 battles: int = DEFAULT_BATTLES, workers: Optional[int] = None, seed=None) -> Dict:
+        """
+        Win probability (with 95% interval) and average rounds over `battles`.
+        A memoized result with at least `battles` battles is returned as is.
+        workers: processes for the batches (default: all cores from PARALLEL_MIN battles).
+        """
+        key = matchup_key(team, encounter, script)
+        with self._lock:
+            cached = self.memo.get(key)
+            if cached and cached["battles"] >= battles:
+                self.memo.move_to_end(key)
+                self.counters["memo_hits"] += 1
+                return dict(cached, cached=True)
+
+        compiled = compile_battle(team, encounter, script)
+        if workers is None:
+            workers = (os.cpu_count() or 1) if battles >= PARALLEL_MIN else 1
+        workers = max(1, min(workers, battles))
+        # Seeded from the matchup by default, so the same question gets the same answer
+        seeds = np.random.SeedSequence(int(key[:16], 16) if seed is None else seed).spawn(workers)
+        sizes = [battles // workers + (i < battles % workers) for i in range(workers)]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(run_battles, [compiled] * workers, sizes, seeds,
+                                      [self.max_rounds] * workers))
+        else:
+            parts = [run_battles(compiled, battles, seeds[0], self.max_rounds)]
+
+        totals = {name: sum(part[name] for part in parts) for name in parts[0]}
+        result = self._summarize(totals)
+        result["key"] = key
+        with self._lock:
+            self.counters["simulated"] += 1
+            self.counters["battles"] += battles
+            self.memo[key] = result
+            self.memo.move_to_end(key)
+            while len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+        return dict(result, cached=False)
+
+    @staticmethod
+    def _summarize(totals: Dict) -> Dict:
+        battles, wins = totals["battles"], totals["wins"]
+        low, high = wilson_interval(wins, battles)
+        return {
+            "battles": battles,
+            "wins": wins,
+            "win_probability": round(wins / battles, 4),
+            "confidence_interval": [round(low, 4), round(high, 4)],
+            "avg_rounds": round(totals["rounds"] / battles, 2),
+            "avg_rounds_won": round(totals["rounds_won"] / wins, 2) if wins else None,
+            "avg_pets_lost": round(totals["pets_lost"] / wins, 2) if wins else None,
+            "timeouts": totals["timeouts"],
+        }
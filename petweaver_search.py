@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+petweaver_search.py - Genetic search for PetWeaver teams
+
+Evolves teams for one encounter, with the batched battle simulator
+(pet_battle_sim.py) as the fitness function:
+
+- a genome is three pets, each [species_id, breed, ability choices]
+  (one 0/1 per ability slot: the species' default or alternate ability)
+- fitness is the simulated win rate, with fewer rounds as a tie-break;
+  every genome is simulated once and its result kept in a fitness cache,
+  so elites and re-discovered teams cost nothing
+- each generation's new genomes are evaluated on a process pool (one
+  worker per core by default)
+- tournament selection, per-pet uniform crossover, mutation of species,
+  breed or an ability choice, and elitism
+- the whole search (population, fitness cache, history, RNG state) is
+  checkpointed as JSON after every generation; a search with the same
+  encounter and parameters resumes from its checkpoint
+
+SearchJobs runs searches in the background for the server and writes the
+best teams to petweaver.strategies when a search finishes.
+
+Usage:
+    search = GeneticSearch("tiun", ENCOUNTERS["tiun"], population=40)
+    search.run(generations=30)
+    search.best(3)
+"""
+
+import copy
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from pet_battle_sim import (BREEDS, MAX_ROUNDS, SLOTS, SPECIES, PetBattleSimulator, compile_battle,
+                            matchup_key, run_battles)
+
+CHECKPOINT_DIR = os.getenv('HOLOCRON_PETWEAVER_SEARCHES', '.cache/petweaver/searches')
+CHECKPOINT_VERSION = 1
+POPULATION = 40
+GENERATIONS = 30
+BATTLES = 400                 # battles per fitness evaluation
+ELITE = 2
+TOURNAMENT = 3
+MUTATION = 0.2                # per pet
+STRATEGY_PREFIX = "Evolved"
+RECENT_JOBS = 100
+
+
+def team_entries(genome: List) -> List[Dict]:
+    """Genome -> team entries for the simulator"""
+    return [{"species_id": species_id, "level": 25, "breed": breed, "abilities": list(choices)}
+            for species_id, breed, choices in genome]
+
+
+def genome_key(genome: List) -> str:
+    return json.dumps(genome, separators=(',', ':'))
+
+
+def evaluate(genome: List, encounter: Dict, battles: int) -> Dict:
+    """Simulate one genome (top level so worker processes can run it)"""
+    team = team_entries(genome)
+    seed = int(matchup_key(team, encounter)[:16], 16)
+    result = PetBattleSimulator._summarize(run_battles(compile_battle(team, encounter), battles, seed))
+    result["fitness"] = round(result["win_probability"] + 0.01 * (1 - result["avg_rounds"] / MAX_ROUNDS), 6)
+    return result
+
+
+class GeneticSearch:
+    """One resumable evolutionary search for an encounter"""
+
+    def __init__(self, encounter_id: str, encounter: Dict, population: int = POPULATION, battles: int = BATTLES,
+                 seed: int = 0, workers: Optional[int] = None, checkpoint_dir: Optional[str] = CHECKPOINT_DIR,
+                 species: Optional[List[int]] = None, elite: int = ELITE, mutation: float = MUTATION):
+        self.encounter_id = encounter_id
+        self.encounter = encounter
+        self.population_size = population
+        self.battles = battles
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint_dir = checkpoint_dir
+        # The leveling pet slot (species 0) is a carry, not something to evolve
+        self.species = sorted(species or [s for s in SPECIES if s != 0])
+        if len(self.species) < SLOTS:
+            raise ValueError(f"Need at least {SLOTS} species to build teams")
+        self.elite = elite
+        self.mutation = mutation
+        self.breeds = sorted(BREEDS)
+
+        self.generation = 0
+        self.population: List[List] = []
+        self.fitness: Dict[str, Dict] = {}
+        self.history: List[Dict] = []
+        self.rng = random.Random(seed)
+        self.resumed = self.load()
+
+    @property
+    def search_id(self) -> str:
+        params = [self.encounter_id, self.encounter, self.population_size, self.battles, self.seed,
+                  self.species, self.elite, self.mutation, CHECKPOINT_VERSION]
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    # --- checkpoints ---
+
+    @property
+    def checkpoint_path(self) -> Optional[str]:
+        if not self.checkpoint_dir:
+            return None
+        return os.path.join(self.checkpoint_dir, f"{self.encounter_id}-{self.search_id}.json")
+
+    def save(self):
+        path = self.checkpoint_path
+        if not path:
+            return
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        state = {"version": CHECKPOINT_VERSION, "search_id": self.search_id, "generation": self.generation,
+                 "population": self.population, "fitness": self.fitness, "history": self.history,
+                 "rng": self.rng.getstate()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def load(self) -> bool:
+        path = self.checkpoint_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Ignoring unreadable search checkpoint {path}: {e}")
+            return False
+        self.generation = state["generation"]
+        self.population = state["population"]
+        self.fitness = state["fitness"]
+        self.history = state["history"]
+        version, internal, gauss = state["rng"]
+        self.rng.setstate((version, tuple(internal), gauss))
+        return True
+
+    # --- genetic operators ---
+
+    def random_pet(self, exclude=()) -> List:
+        species_id = self.rng.choice([s for s in self.species if s not in exclude])
+        return [species_id, self.rng.choice(self.breeds), [self.rng.randint(0, 1) for _ in range(SLOTS)]]
+
+    def random_genome(self) -> List:
+        genome = []
+        for _ in range(SLOTS):
+            genome.append(self.random_pet(exclude=[pet[0] for pet in genome]))
+        return genome
+
+    def _dedupe(self, genome: List) -> List:
+        """A team holds each species once; later duplicates become random pets"""
+        seen = set()
+        for i, pet in enumerate(genome):
+            if pet[0] in seen:
+                genome[i] = self.random_pet(exclude=seen | {p[0] for p in genome})
+            seen.add(genome[i][0])
+        return genome
+
+    def crossover(self, a: List, b: List) -> List:
+        return self._dedupe([copy.deepcopy(self.rng.choice(pair)) for pair in zip(a, b)])
+
+    def mutate(self, genome: List) -> List:
+        for i, pet in enumerate(genome):
+            if self.rng.random() >= self.mutation:
+                continue
+            gene = self.rng.randrange(3)
+            if gene == 0:
+                genome[i] = self.random_pet(exclude=[p[0] for p in genome])
+            elif gene == 1:
+                pet[1] = self.rng.choice(self.breeds)
+            else:
+                slot = self.rng.randrange(SLOTS)
+                pet[2][slot] = 1 - pet[2][slot]
+        return genome
+
+    def select(self) -> List:
+        contenders = self.rng.sample(self.population, min(TOURNAMENT, len(self.population)))
+        return max(contenders, key=lambda genome: self.fitness[genome_key(genome)]["fitness"])
+
+    # --- evaluation ---
+
+    def evaluate_population(self, pool=None) -> int:
+        """Simulate genomes not in the fitness cache; returns how many were new"""
+        pending = list({genome_key(g): g for g in self.population if genome_key(g) not in self.fitness}.items())
+        if not pending:
+            return 0
+        genomes = [genome for _, genome in pending]
+        if pool is not None and len(genomes) > 1:
+            results = pool.map(evaluate, genomes, [self.encounter] * len(genomes), [self.battles] * len(genomes),
+                               chunksize=max(1, len(genomes) // (self.workers * 4)))
+        else:
+            results = (evaluate(genome, self.encounter, self.battles) for genome in genomes)
+        for (key, _), result in zip(pending, results):
+            self.fitness[key] = result
+        return len(pending)
+
+    def step(self, pool=None) -> Dict:
+        """Evaluate the current population, record it, and breed the next one"""
+        if not self.population:
+            self.population = [self.random_genome() for _ in range(self.population_size)]
+        start = time.perf_counter()
+        evaluated = self.evaluate_population(pool)
+
+        ranked = sorted(self.population, key=lambda g: self.fitness[genome_key(g)]["fitness"], reverse=True)
+        best = self.fitness[genome_key(ranked[0])]
+        record = {"generation": self.generation, "best_fitness": best["fitness"],
+                  "best_win_probability": best["win_probability"], "best_team": ranked[0],
+                  "mean_fitness": round(sum(self.fitness[genome_key(g)]["fitness"] for g in ranked) / len(ranked), 6),
+                  "evaluated": evaluated, "seconds": round(time.perf_counter() - start, 3)}
+        self.history.append(record)
+
+        children = copy.deepcopy(ranked[:self.elite])
+        while len(children) < self.population_size:
+            children.append(self.mutate(self.crossover(self.select(), self.select())))
+        self.population = children
+        self.generation += 1
+        self.save()
+        return record
+
+    def run(self, generations: int = GENERATIONS, progress: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Evolve until `generations` generations exist (a resumed search only runs the rest)"""
+        if self.generation >= generations:
+            return self.best()
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            while self.generation < generations:
+                record = self.step(pool)
+                if progress:
+                    progress(record)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return self.best()
+
+    def best(self, n: int = 3) -> List[Dict]:
+        """Top `n` distinct teams ever evaluated, best first"""
+        seen = [(json.loads(key), result) for key, result in self.fitness.items()]
+        seen.sort(key=lambda item: item[1]["fitness"], reverse=True)
+        return [{"genome": genome, "team": team_entries(genome), **result} for genome, result in seen[:n]]
+
+
+# ============================================================================
+# Strategies table
+# ============================================================================
+
+def strategy_script(genome: List) -> str:
+    """Lead pet, then the simulator's default play (best ready ability, swap on death)"""
+    return SPECIES[genome[0][0]]["name"]
+
+
+def save_strategies(conn, encounter_id: str, encounter: Dict, results: List[Dict]):
+    """Replace the evolved strategies for an encounter in petweaver.strategies"""
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO petweaver.encounters (encounter_id, name, npc_data) VALUES (%s, %s, %s) "
+        "ON CONFLICT (encounter_id) DO NOTHING",
+        (encounter_id, encounter.get("name", encounter_id), json.dumps({"pets": encounter["pets"]})))
+    cur.execute("DELETE FROM petweaver.strategies WHERE encounter_id = %s AND name LIKE %s",
+                (encounter_id, f"{STRATEGY_PREFIX} %"))
+    for rank, result in enumerate(results, 1):
+        species_ids = [pet["species_id"] for pet in result["team"]] + [None] * SLOTS
+        cur.execute(
+            "INSERT INTO petweaver.strategies (encounter_id, name, script, pet_1_species_id, pet_2_species_id, "
+            "pet_3_species_id, team, win_rate, avg_rounds) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            (encounter_id, f"{STRATEGY_PREFIX} #{rank}", strategy_script(result["genome"]), *species_ids[:SLOTS],
+             json.dumps(result["team"]), result["win_probability"], result["avg_rounds"]))
+    conn.commit()
+    cur.close()
+
+
+class SearchJobs:
+    """Background searches, one at a time (each one already uses every core)"""
+
+    def __init__(self, connect: Optional[Callable] = None, checkpoint_dir: Optional[str] = CHECKPOINT_DIR,
+                 workers: Optional[int] = None, start: bool = True):
+        self.connect = connect
+        self.checkpoint_dir = checkpoint_dir
+        self.workers = workers
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._searches: Dict[str, GeneticSearch] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        if start:
+            self.start()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._work, name="petweaver-search", daemon=True)
+        self._thread.start()
+
+    def submit(self, encounter_id: str, encounter: Dict, generations: int = GENERATIONS,
+               population: int = POPULATION, battles: int = BATTLES, seed: int = 0) -> Dict:
+        """Queue a search; the same search already queued or running is returned instead"""
+        search = GeneticSearch(encounter_id, encounter, population, battles, seed, self.workers, self.checkpoint_dir)
+        with self._lock:
+            for job in self._jobs.values():
+                if job["search_id"] == search.search_id and job["status"] in ("queued", "running"):
+                    return dict(job)
+            job = {"id": uuid.uuid4().hex, "search_id": search.search_id, "encounter_id": encounter_id,
+                   "status": "queued", "generation": search.generation, "generations": generations,
+                   "resumed": search.resumed, "submitted_at": time.time()}
+            self._jobs[job["id"]] = job
+            self._searches[job["id"]] = search
+            while len(self._jobs) > RECENT_JOBS:
+                old_id, old = next(iter(self._jobs.items()))
+                if old["status"] in ("queued", "running"):
+                    break
+                del self._jobs[old_id]
+        self._queue.put(job["id"])
+        return dict(job)
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._process(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _progress(self, job: Dict, record: Dict):
+        with self._lock:
+            job.update(generation=record["generation"] + 1, best_fitness=record["best_fitness"],
+                       best_win_probability=record["best_win_probability"], best_team=record["best_team"])
+
+    def _process(self, job_id: str):
+        with self._lock:
+            job = self._jobs[job_id]
+            search = self._searches.pop(job_id)
+            job.update(status="running", started_at=time.time())
+        try:
+            best = search.run(job["generations"], progress=lambda record: self._progress(job, record))
+            saved = False
+            if self.connect:
+                conn = None
+                try:
+                    conn = self.connect()
+                    save_strategies(conn, search.encounter_id, search.encounter, best)
+                    saved = True
+                except Exception as e:
+                    print(f"⚠️ Could not save PetWeaver strategies: {e}")
+                finally:
+                    if conn is not None:
+                        conn.close()
+            status, extra = "done", {"best": best, "saved": saved}
+        except Exception as e:
+            print(f"PetWeaver search {job_id} failed: {e}")
+            status, extra = "failed", {"error": str(e)}
+        with self._lock:
+            job.update(status=status, finished_at=time.time(), **extra)
+
+    def job(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Poll until the job finishes (tests, CLI)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.job(job_id)
+            if not job or job["status"] in ("done", "failed"):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(0.05)
@@ -0,0 +1,288 @@
+"""
+request_metrics.py - Per-route request instrumentation for server.py
+
+Until now the only signal from server.py was print() lines in server.log.
+RequestMetrics hooks into Flask's request cycle and records, per route
+template (e.g. /api/codex/instance/<int:instance_id>):
+
+- latency histogram and request count by status
+- SQL statements and DB time per request, via InstrumentedCursor
+  (pass it as cursor_factory to psycopg2.connect)
+- response size histogram
+- optional tracemalloc peak allocation (HOLOCRON_TRACE_ALLOC=1; the peak
+  is process-wide, so concurrent requests blur into each other)
+
+A request that runs more statements than `statement_budget` is flagged as
+a probable N+1 pattern with the most repeated statement (e.g. the
+per-quest lookups in solve_dependency), printed and kept in `flags`.
+
+render() returns everything in Prometheus text exposition format for
+/metrics; add_collector() lets other components (the response cache)
+append their own series.
+"""
+
+import contextvars
+import os
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict, deque
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import psycopg2.extensions
+from flask import request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+DEFAULT_STATEMENT_BUDGET = 25
+
+_current: contextvars.ContextVar = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """What one request did; lives in a context variable while it runs"""
+
+    __slots__ = ('started', 'statements', 'sql_seconds', 'alloc_start')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements: Counter = Counter()
+        self.sql_seconds = 0.0
+        self.alloc_start = None
+
+    @property
+    def statement_count(self) -> int:
+        return sum(self.statements.values())
+
+
+def _normalize(sql) -> str:
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    return re.sub(r'\s+', ' ', str(sql)).strip()
+
+
+def record_query(sql, seconds: float, count: int = 1):
+    """Attribute a statement to the current request (no-op outside one)"""
+    stats = _current.get()
+    if stats is not None:
+        stats.statements[_normalize(sql)] += count
+        stats.sql_seconds += seconds
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that reports every statement to RequestMetrics"""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(query, time.perf_counter() - start)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(query, time.perf_counter() - start, len(vars_list))
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        sep = ',' if labels else ''
+        out = [f'{name}_bucket{{{labels}{sep}le="{_fmt(b)}"}} {c}'
+               for b, c in zip(self.buckets, self.counts)]
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        out.append(f'{name}_sum{{{labels}}} {_fmt(self.sum)}')
+        out.append(f'{name}_count{{{labels}}} {self.count}')
+        return out
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RouteStats:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.sizes = Histogram(SIZE_BUCKETS)
+        self.statuses: Counter = Counter()
+        self.sql_seconds = 0.0
+        self.peak_alloc = 0
+        self.over_budget = 0
+
+
+class RequestMetrics:
+    """Flask extension collecting per-route latency, SQL and size metrics"""
+
+    def __init__(self, app=None, statement_budget: int = DEFAULT_STATEMENT_BUDGET,
+                 trace_allocations: bool = None):
+        self.statement_budget = statement_budget
+        if trace_allocations is None:
+            trace_allocations = os.environ.get('HOLOCRON_TRACE_ALLOC') == '1'
+        self.trace_allocations = trace_allocations
+        self.routes: Dict[Tuple[str, str], RouteStats] = defaultdict(RouteStats)
+        self.flags = deque(maxlen=100)  # recent N+1 suspects
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]):
+        """Register a function returning extra Prometheus lines for render()"""
+        self._collectors.append(collector)
+
+    # --- request hooks ---
+
+    def _before(self):
+        stats = RequestStats()
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            stats.alloc_start = tracemalloc.get_traced_memory()[0]
+        request.environ['holocron.metrics_token'] = _current.set(stats)
+
+    def _after(self, response):
+        stats = _current.get()
+        if stats is None:
+            return response
+
+        elapsed = time.perf_counter() - stats.started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        if response.is_streamed or response.direct_passthrough:
+            size = response.content_length or 0
+        else:
+            size = len(response.get_data())
+        peak = None
+        if stats.alloc_start is not None:
+            peak = max(0, tracemalloc.get_traced_memory()[1] - stats.alloc_start)
+        count = stats.statement_count
+
+        with self._lock:
+            entry = self.routes[(route, request.method)]
+            entry.latency.observe(elapsed)
+            entry.statements.observe(count)
+            entry.sizes.observe(size)
+            entry.statuses[response.status_code] += 1
+            entry.sql_seconds += stats.sql_seconds
+            if peak is not None:
+                entry.peak_alloc = max(entry.peak_alloc, peak)
+            if count > self.statement_budget:
+                entry.over_budget += 1
+
+        if count > self.statement_budget:
+            self._flag(route, stats)
+        return response
+
+    def _teardown(self, exc=None):
+        token = request.environ.pop('holocron.metrics_token', None)
+        if token is not None:
+            _current.reset(token)
+
+    def _flag(self, route: str, stats: RequestStats):
+        statement, repeats = stats.statements.most_common(1)[0]
+        flag = {
+            "route": route,
+            "path": request.full_path.rstrip('?'),
+            "statements": stats.statement_count,
+            "sql_seconds": round(stats.sql_seconds, 4),
+            "most_repeated": statement[:200],
+            "repeats": repeats,
+            "at": time.time(),
+        }
+        self.flags.append(flag)
+        print(f"⚠️  Possible N+1 on {route}: {flag['statements']} SQL statements "
+              f"({repeats}x \"{flag['most_repeated'][:80]}\")")
+
+    # --- exposition ---
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format"""
+        lines = [
+            '# HELP holocron_requests_total Requests by route, method and status.',
+            '# TYPE holocron_requests_total counter',
+        ]
+        with self._lock:
+            routes = sorted(self.routes.items())
+            for (route, method), entry in routes:
+                for status, n in sorted(entry.statuses.items()):
+                    lines.append(f'holocron_requests_total{{route="{_label(route)}",'
+                                 f'method="{method}",status="{status}"}} {n}')
+
+            series = (
+                ('holocron_request_duration_seconds', 'Request latency.', 'latency'),
+                ('holocron_request_sql_statements', 'SQL statements per request.', 'statements'),
+                ('holocron_response_size_bytes', 'Response body size.', 'sizes'),
+            )
+            for name, help_text, attr in series:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (route, method), entry in routes:
+                    labels = f'route="{_label(route)}",method="{method}"'
+                    lines.extend(getattr(entry, attr).lines(name, labels))
+
+            counters = (
+                ('holocron_sql_seconds_total', 'Time spent in SQL.', 'sql_seconds', 'counter'),
+                ('holocron_sql_budget_exceeded_total',
+                 'Requests over the SQL statement budget (possible N+1).', 'over_budget', 'counter'),
+            )
+            if self.trace_allocations:
+                counters += (('holocron_request_peak_alloc_bytes',
+                              'Largest tracemalloc peak seen for a request.', 'peak_alloc', 'gauge'),)
+            for name, help_text, attr, kind in counters:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for (route, method), entry in routes:
+                    lines.append(f'{name}{{route="{_label(route)}",method="{method}"}} '
+                                 f'{_fmt(getattr(entry, attr))}')
+
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+def cache_collector(cache) -> Callable[[], List[str]]:
+    """Prometheus lines for a response_cache.ApiCache"""
+    def collect():
+        report = cache.report()
+        lines = ['# HELP holocron_api_cache_events_total Response cache events.',
+                 '# TYPE holocron_api_cache_events_total counter']
+        for event, n in sorted(report["stats"].items()):
+            lines.append(f'holocron_api_cache_events_total{{event="{event}"}} {n}')
+        lines += ['# HELP holocron_api_cache_bytes Bytes held by the response cache.',
+                  '# TYPE holocron_api_cache_bytes gauge',
+                  f'holocron_api_cache_bytes {report["bytes"]}']
+        return lines
+    return collect
@@ -0,0 +1,237 @@
+"""
+request_profiler.py - Opt-in profiling of live requests
+
+Slow pages (/codex, /api/goblin/dominate) could only be investigated by
+reproducing them locally. RequestProfiler captures real requests instead:
+
+- send `X-Holocron-Profile: sample` (or `cprofile`) with a request, or arm
+  a route for its next N requests via arm() / POST /debug/profiles/arm
+- "sample" mode: a background thread samples the request thread's stack
+  every few milliseconds; cheap enough for production and written as
+  flamegraph-compatible collapsed stacks (`<id>.collapsed`, one
+  "frame;frame;frame count" line per stack)
+- "cprofile" mode: deterministic cProfile of the request thread, written
+  as `<id>.prof` for pstats/snakeviz
+- recent captures (route, duration, top functions) are listed by index()
+
+Only loopback clients may trigger or read profiles unless
+HOLOCRON_PROFILE_TOKEN is set, in which case the X-Holocron-Profile-Token
+header must match it.
+
+Usage:
+    profiler = RequestProfiler(app)
+    profiler.arm('/api/goblin/dominate', count=5)
+    curl -H 'X-Holocron-Profile: sample' localhost:5005/codex
+"""
+
+import cProfile
+import hmac
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from flask import request
+
+PROFILE_DIR = os.getenv('HOLOCRON_PROFILE_DIR', '.cache/profiles')
+PROFILE_HEADER = 'X-Holocron-Profile'
+TOKEN_HEADER = 'X-Holocron-Profile-Token'
+MODES = ('sample', 'cprofile')
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 10
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+
+class _Capture:
+    """One request being profiled"""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.sampler = None
+        self.profile = None
+        if mode == 'cprofile':
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            self.sampler = StackSampler(threading.get_ident())
+            self.sampler.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        if self.profile:
+            self.profile.disable()
+        else:
+            self.stacks = self.sampler.stop()
+
+
+class RequestProfiler:
+    """Flask extension that profiles flagged or armed requests"""
+
+    def __init__(self, app=None, directory: str = PROFILE_DIR, keep: int = 50,
+                 token: str = None):
+        self.directory = directory
+        self.token = token if token is not None else os.environ.get('HOLOCRON_PROFILE_TOKEN')
+        self._armed: Dict[str, List] = {}   # route -> [remaining, mode]
+        self._captures = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.teardown_request(self._teardown)
+
+    # --- access and arming ---
+
+    def allowed(self) -> bool:
+        """Loopback clients, or anyone presenting the configured token"""
+        if self.token:
+            return hmac.compare_digest(request.headers.get(TOKEN_HEADER, ''), self.token)
+        return request.remote_addr in ('127.0.0.1', '::1')
+
+    def arm(self, route: str, count: int = 1, mode: str = 'sample'):
+        """Profile the next `count` requests to `route` (rule template or path)"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode '{mode}' (expected one of {MODES})")
+        with self._lock:
+            self._armed[route] = [int(count), mode]
+
+    def armed(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {route: {"remaining": n, "mode": mode} for route, (n, mode) in self._armed.items()}
+
+    def _take_armed(self) -> Optional[str]:
+        rule = request.url_rule.rule if request.url_rule else None
+        with self._lock:
+            for route in (rule, request.path):
+                slot = self._armed.get(route)
+                if slot:
+                    slot[0] -= 1
+                    if slot[0] <= 0:
+                        del self._armed[route]
+                    return slot[1]
+        return None
+
+    # --- request hooks ---
+
+    def _before(self):
+        if request.path.startswith('/debug/profiles'):
+            return
+        mode = request.headers.get(PROFILE_HEADER)
+        if mode:
+            mode = mode.lower() if mode.lower() in MODES else 'sample'
+            if not self.allowed():
+                return
+        else:
+            mode = self._take_armed()
+        if mode:
+            request.environ['holocron.profile'] = _Capture(mode)
+
+    def _teardown(self, exc=None):
+        capture = request.environ.pop('holocron.profile', None)
+        if capture is None:
+            return
+        capture.stop()
+        try:
+            self._save(capture)
+        except Exception as e:
+            print(f"⚠️  Could not save request profile: {e}")
+
+    # --- storage ---
+
+    def _save(self, capture: _Capture):
+        capture_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {
+            "id": capture_id,
+            "route": request.url_rule.rule if request.url_rule else request.path,
+            "path": request.full_path.rstrip('?'),
+            "method": request.method,
+            "mode": capture.mode,
+            "duration_ms": round(capture.duration * 1000, 2),
+            "at": time.time(),
+        }
+
+        if capture.mode == 'cprofile':
+            path = os.path.join(self.directory, f"{capture_id}.prof")
+            capture.profile.dump_stats(path)
+            stats = pstats.Stats(capture.profile)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+            entry["top"] = [
+                {"function": f"{func} ({os.path.basename(filename)}:{line})",
+                 "self_ms": round(tottime * 1000, 3), "calls": ncalls}
+                for (filename, line, func), (_, ncalls, tottime, _, _) in rows[:TOP_FUNCTIONS]
+            ]
+        else:
+            path = os.path.join(self.directory, f"{capture_id}.collapsed")
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in capture.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            leaves = Counter()
+            for stack, count in capture.stacks.items():
+                leaves[stack.rsplit(';', 1)[-1]] += count
+            total = sum(leaves.values())
+            entry["samples"] = total
+            entry["top"] = [{"function": func, "samples": n, "share": round(n / total, 3)}
+                            for func, n in leaves.most_common(TOP_FUNCTIONS)]
+
+        entry["file"] = os.path.basename(path)
+        with self._lock:
+            if len(self._captures) == self._captures.maxlen:
+                self._remove(self._captures[0])
+            self._captures.append(entry)
+
+    def _remove(self, entry: Dict):
+        try:
+            os.remove(os.path.join(self.directory, entry["file"]))
+        except OSError:
+            pass
+
+    def index(self) -> List[Dict]:
+        """Recent captures, newest first"""
+        with self._lock:
+            return list(reversed(self._captures))
+
+    def path_for(self, capture_id: str) -> Optional[str]:
+        with self._lock:
+            for entry in self._captures:
+                if entry["id"] == capture_id:
+                    return os.path.join(self.directory, entry["file"])
+        return None
@@ -0,0 +1,209 @@
+"""
+response_cache.py - In-process cache for JSON API responses
+
+holocron_sync, the React frontends and the dashboard poll the same GET
+endpoints over and over; every poll re-ran the engine and re-serialized
+the result. ApiCache wraps a Flask view:
+
+- key = endpoint + path + sorted query args
+- each route has a TTL and/or data tags; bump('goblin') after a scan
+  upload makes every entry built from older goblin data a miss
+- strong ETag (hash of the body) on every response, and `304 Not Modified`
+  when If-None-Match matches, whether or not the body came from the cache
+- bounded by a byte budget with LRU eviction
+- hit/miss/304/eviction counters, overall and per endpoint
+
+Only successful GET responses are stored. A request sent with
+`Cache-Control: no-cache` recomputes and refreshes its entry.
+
+Usage:
+    api_cache = ApiCache(max_bytes=32 * 1024 * 1024)
+
+    @app.route('/api/goblin/prices')
+    @api_cache.cached(ttl=60, tags=('goblin',))
+    def goblin_prices(): ...
+
+    api_cache.bump('goblin')    # after new scan data arrives
+"""
+
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import current_app, request
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# Rough per-entry cost of the key, headers and bookkeeping
+ENTRY_OVERHEAD = 256
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    mimetype: str
+    etag: str
+    stored_at: float
+    expires_at: Optional[float]
+    generation: Tuple[int, ...]
+    size: int
+
+
+def make_etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ApiCache:
+    """LRU response cache for Flask views, bounded by `max_bytes`"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, default_ttl: float = 30.0):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "stores": 0,
+                      "evictions": 0, "invalidations": 0}
+        self.route_stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "not_modified": 0})
+
+    # --- invalidation ---
+
+    def bump(self, *tags: str):
+        """Start a new data generation for `tags`; older entries become misses"""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] += 1
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _generation(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._generations[tag] for tag in tags)
+
+    # --- storage ---
+
+    def _get(self, key: tuple, generation: Tuple[int, ...]) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expired = entry.expires_at is not None and time.monotonic() >= entry.expires_at
+            if expired or entry.generation != generation:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key: tuple, entry: CachedResponse):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self.stats["stores"] += 1
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _drop(self, key: tuple):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _count(self, endpoint: str, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+            self.route_stats[endpoint][stat] += 1
+
+    def memory_usage(self) -> int:
+        return self._bytes
+
+    def report(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+                "stats": dict(self.stats),
+                "routes": {name: dict(counts) for name, counts in self.route_stats.items()},
+                "generations": dict(self._generations),
+            }
+
+    # --- the decorator ---
+
+    @staticmethod
+    def _key() -> tuple:
+        args = tuple(sorted(request.args.items(multi=True)))
+        return (request.endpoint, request.path, args)
+
+    @staticmethod
+    def _not_modified(etag: str) -> bool:
+        return request.if_none_match.contains(etag)
+
+    def _respond(self, body: bytes, mimetype: str, etag: str, endpoint: str):
+        if self._not_modified(etag):
+            self._count(endpoint, "not_modified")
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        # Clients may keep the body but must revalidate; a 304 is cheap
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def cached(self, ttl: float = None, tags: Iterable[str] = ()):
+        """
+        Cache a view's successful GET responses for `ttl` seconds (None = the
+        cache default, 0 = no time limit) or until one of `tags` is bumped.
+        """
+        tags = tuple(tags)
+        ttl = self.default_ttl if ttl is None else ttl
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return view(*args, **kwargs)
+
+                key = self._key()
+                endpoint = request.endpoint
+                generation = self._generation(tags)
+                refresh = 'no-cache' in request.headers.get('Cache-Control', '')
+
+                entry = None if refresh else self._get(key, generation)
+                if entry is not None:
+                    self._count(endpoint, "hits")
+                    return self._respond(entry.body, entry.mimetype, entry.etag, endpoint)
+
+                self._count(endpoint, "misses")
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+
+                body = response.get_data()
+                etag = make_etag(body)
+                now = time.monotonic()
+                self._put(key, CachedResponse(
+                    body=body,
+                    mimetype=response.mimetype,
+                    etag=etag,
+                    stored_at=now,
+                    expires_at=now + ttl if ttl else None,
+                    generation=generation,
+                    size=len(body) + ENTRY_OVERHEAD,
+                ))
+                return self._respond(body, response.mimetype, etag, endpoint)
+
+            return wrapper
+        return decorator
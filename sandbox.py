@@ -4,9 +4,10 @@
 import subprocess
 import json
 import os
+import re
 import sys
 import shutil
-import shutil
+import tempfile
 
 # Configuration
 def find_simc():
@@ -33,49 +34,103 @@ def find_simc():
     return "simc"
 
 SIMC_PATH = find_simc()
+# Run SimC in this Docker image instead of a local binary (e.g. simulationcraftorg/simc)
+SIMC_DOCKER_IMAGE = os.getenv("SIMC_DOCKER_IMAGE")
+SIMC_TIMEOUT = int(os.getenv("SIMC_TIMEOUT", "600"))  # seconds
+
+class SimcError(Exception):
+    """SimC could not be run or produced no result"""
 
 class Sandbox:
-    def __init__(self, simc_path=None):
+    def __init__(self, simc_path=None, docker_image=None, timeout=SIMC_TIMEOUT, version=None):
         self.simc_path = simc_path or SIMC_PATH
-        
-    def run_sim(self, simc_input, iterations=1000, json_output=True):
+        self.docker_image = docker_image if docker_image is not None else SIMC_DOCKER_IMAGE
+        self.timeout = timeout
+        self._version = version
+
+    def _command(self, workdir=None):
+        if self.docker_image:
+            mount = ["-v", f"{workdir}:{workdir}"] if workdir else []
+            return ["docker", "run", "--rm", *mount, self.docker_image]
+        return [self.simc_path]
+
+    @property
+    def version(self):
+        """SimC build string (part of the result cache key); "unknown" if it can't be run"""
+        if self._version is None:
+            try:
+                # Without arguments SimC prints its banner ("SimulationCraft 1105-01 for ...") and exits
+                result = subprocess.run(self._command(), capture_output=True, text=True, timeout=30)
+                match = re.search(r"SimulationCraft\s+(\S+)", result.stdout + result.stderr)
+                self._version = match.group(1) if match else "unknown"
+            except (OSError, subprocess.TimeoutExpired):
+                self._version = "unknown"
+        return self._version
+
+    def simulate(self, simc_input, iterations=1000, workdir=None, threads=None):
         """
-        Runs a simulation with the given input string.
+        Runs one simulation inside `workdir` (a fresh temp dir if None) and
+        returns SimC's JSON report. iterations=None keeps the profile's own
+        setting. Raises SimcError on failure.
         """
-        # Create temporary input file
-        input_file = "temp_sim.simc"
+        if workdir is None:
+            with tempfile.TemporaryDirectory(prefix="simc-") as tmp:
+                return self.simulate(simc_input, iterations, tmp, threads)
+
+        input_file = os.path.join(workdir, "input.simc")
+        result_file = os.path.join(workdir, "result.json")
         with open(input_file, "w") as f:
             f.write(simc_input)
-            f.write(f"\niterations={iterations}\n")
-            if json_output:
-                f.write("json2=temp_result.json\n")
-                
-        # Run SimC
-        cmd = [self.simc_path, input_file]
+            f.write("\n")
+            if iterations is not None:
+                f.write(f"iterations={iterations}\n")
+            if threads:
+                f.write(f"threads={threads}\n")
+            f.write(f"json2={result_file}\n")
+
+        cmd = self._command(workdir) + [input_file]
+        print(f"Running SimC: {' '.join(cmd)}")
         try:
-            print(f"Running SimC: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                print(f"SimC Error: {result.stderr}")
-                return None
-                
-            # Parse JSON output
-            if json_output and os.path.exists("temp_result.json"):
-                with open("temp_result.json", "r") as f:
-                    data = json.load(f)
-                
-                # Cleanup
-                os.remove(input_file)
-                os.remove("temp_result.json")
-                
-                return self.parse_results(data)
-                
-            return result.stdout
-            
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout)
         except FileNotFoundError:
-            print(f"Error: SimC executable not found at {self.simc_path}")
+            raise SimcError(f"SimC executable not found at {cmd[0]}")
+        except subprocess.TimeoutExpired:
+            # SimC sometimes hangs on exit after writing its report
+            if not os.path.exists(result_file):
+                raise SimcError(f"Simulation timed out after {self.timeout}s")
+        else:
+            if result.returncode != 0:
+                raise SimcError(result.stderr.strip() or f"SimC exited with code {result.returncode}")
+
+        try:
+            with open(result_file, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise SimcError(f"No SimC report: {e}")
+        
+    def run_sim(self, simc_input, iterations=1000, json_output=True):
+        """
+        Runs a simulation with the given input string (in its own temp dir,
+        so concurrent calls don't collide).
+        """
+        try:
+            data = self.simulate(simc_input, iterations)
+        except SimcError as e:
+            print(f"SimC Error: {e}")
             return None
+        return self.parse_results(data) if json_output else data
+
+    def summarize(self, data):
+        """Per-player results plus raid-level numbers from a SimC JSON report"""
+        sim = data.get('sim', {})
+        players = self.parse_results(data)
+        return {
+            "players": players if isinstance(players, list) else [players] if players else [],
+            "raid_dps": sim.get('statistics', {}).get('raid_dps', {}).get('mean'),
+            "sim_length": sim.get('options', {}).get('max_time'),
+            "iterations": sim.get('options', {}).get('iterations'),
+            "timestamp": data.get('timestamp', 0),
+        }
             
     def parse_results(self, data):
         """
@@ -89,11 +144,14 @@ class Sandbox:
             parsed_results = []
             
             for player in players:
+                dps = player['collected_data']['dps']
                 res = {
                     "name": player['name'],
-                    "dps": player['collected_data']['dps']['mean'],
-                    "dps_min": player['collected_data']['dps']['min'],
-                    "dps_max": player['collected_data']['dps']['max'],
+                    "dps": dps['mean'],
+                    "dps_min": dps['min'],
+                    "dps_max": dps['max'],
+                    # Standard error of the mean; the confidence interval is dps +- z * dps_error
+                    "dps_error": dps.get('mean_std_dev', 0.0),
                     "talents": player.get('talents'),
                     "gear_ilvl": player.get('gear_ilvl_mean'),
                     "timestamp": sim['options']['timestamp']
@@ -115,10 +115,18 @@ CREATE TABLE IF NOT EXISTS petweaver.strategies (
     pet_1_species_id INT,
     pet_2_species_id INT,
     pet_3_species_id INT,
+    team TEXT, -- JSON team entries (species_id, level, breed, abilities)
+    win_rate FLOAT, -- simulated (pet_battle_sim.py)
+    avg_rounds FLOAT,
     is_favorite BOOLEAN DEFAULT FALSE,
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Databases created before the simulated columns existed
+ALTER TABLE petweaver.strategies ADD COLUMN IF NOT EXISTS team TEXT;
+ALTER TABLE petweaver.strategies ADD COLUMN IF NOT EXISTS win_rate FLOAT;
+ALTER TABLE petweaver.strategies ADD COLUMN IF NOT EXISTS avg_rounds FLOAT;
+
 -- Collection: Stores player's pet collection
 CREATE TABLE IF NOT EXISTS petweaver.collection (
     character_guid VARCHAR(255) REFERENCES holocron.characters(character_guid),
@@ -4,85 +4,16 @@ Blizzard API Encounter Scraper
 Gets official encounter journal data from Blizzard's Game Data API
 """
 
-import requests
 import json
-import time
+import os
+import sys
 
-class BlizzardAPIClient:
-    """
-    Client for Blizzard's WoW Game Data API
-    Docs: https://develop.battle.net/documentation/world-of-warcraft/game-data-apis
-    """
-    
-    def __init__(self, client_id, client_secret, region='us'):
-        self.client_id = client_id
-        self.client_secret = client_secret
-        self.region = region
-        self.token = None
-        self.token_expires = 0
-        
-    def get_access_token(self):
-        """Get OAuth access token"""
-        if self.token and time.time() < self.token_expires:
-            return self.token
-            
-        url = f"https://{self.region}.battle.net/oauth/token"
-        response = requests.post(
-            url,
-            data={'grant_type': 'client_credentials'},
-            auth=(self.client_id, self.client_secret)
-        )
-        response.raise_for_status()
-        
-        data = response.json()
-        self.token = data['access_token']
-        self.token_expires = time.time() + data['expires_in'] - 60  # 60s buffer
-        
-        return self.token
-    
-    def get_journal_instance(self, instance_id):
-        """
-        Get instance data from encounter journal
-        Args:
-            instance_id: e.g., 1273 for Nerub-ar Palace
-        """
-        token = self.get_access_token()
-        url = f"https://{self.region}.api.blizzard.com/data/wow/journal-instance/{instance_id}"
-        
-        response = requests.get(
-            url,
-            params={
-                'namespace': f'static-{self.region}',
-                'locale': 'en_US',
-                'access_token': token
-            }
-        )
-        response.raise_for_status()
-        return response.json()
-    
-    def get_journal_encounter(self, encounter_id):
-        """
-        Get encounter details
-        Args:
-            encounter_id: e.g., 2922 for Queen Ansurek
-        """
-        token = self.get_access_token()
-        url = f"https://{self.region}.api.blizzard.com/data/wow/journal-encounter/{encounter_id}"
-        
-        response = requests.get(
-            url,
-            params={
-                'namespace': f'static-{self.region}',
-                'locale': 'en_US',
-                'access_token': token
-            }
-        )
-        response.raise_for_status()
-        return response.json()
+# The client lives at the repo root so every importer shares it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from blizzard_client import BlizzardAPIClient  # noqa: E402
 
 # Example usage
 if __name__ == "__main__":
-    import os
     from dotenv import load_dotenv
     
     # Load credentials from .env
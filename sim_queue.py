@@ -0,0 +1,227 @@
+"""
+sim_queue.py - SimulationCraft job queue
+
+/api/sandbox/run used to block its request on subprocess.run, with every
+call writing temp_sim.simc / temp_result.json in the working directory
+(concurrent sims overwrote each other), and SkillWeaver started a fresh
+docker run per request. SimQueue:
+
+- runs sims on a bounded worker pool (one worker per core by default;
+  each sim gets cores // workers SimC threads so they don't oversubscribe)
+- gives every job its own temp directory
+- caches results by content: sha256 of (profile text, iterations, SimC
+  version), stored as JSON under CACHE_DIR; a repeated sim is answered
+  from the cache without queueing
+- folds identical submissions that are already queued or running into
+  the existing job
+- rejects submissions beyond `max_queued` waiting jobs (SimQueueFull)
+- iterations=None leaves the profile's own iterations= setting alone
+
+Usage:
+    queue = SimQueue()
+    job, cached = queue.submit(profile_text, iterations=1000)
+    queue.job(job["id"])            # poll; or queue.wait(job["id"], timeout)
+"""
+
+import hashlib
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from sandbox import Sandbox
+
+CACHE_DIR = os.getenv('HOLOCRON_SIMC_CACHE', '.cache/simc')
+MAX_QUEUED = 64
+WAIT_TIMEOUT = float(os.getenv('HOLOCRON_SIM_WAIT', '120'))  # seconds a blocking endpoint waits
+RECENT_JOBS = 500
+
+
+class SimQueueFull(Exception):
+    """Too many sims waiting; try again later"""
+
+
+def cache_key(profile: str, iterations: Optional[int], version: str) -> str:
+    canonical = json.dumps(["\n".join(line.rstrip() for line in profile.strip().splitlines()),
+                            None if iterations is None else int(iterations), version])
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class SimQueue:
+    """Worker pool for SimC runs with a content-addressed result cache"""
+
+    def __init__(self, sandbox: Optional[Sandbox] = None, workers: Optional[int] = None,
+                 cache_dir: str = CACHE_DIR, max_queued: int = MAX_QUEUED, start: bool = True,
+                 simulate: Optional[Callable[[str, int, str, int], Dict]] = None):
+        self.sandbox = sandbox or Sandbox()
+        cores = os.cpu_count() or 1
+        self.workers = workers or cores
+        self.threads = max(1, cores // self.workers)
+        self.cache_dir = cache_dir
+        self.max_queued = max_queued
+        # simulate(profile, iterations, workdir, threads) -> summary dict
+        self._simulate = simulate or self._run_simc
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._active: Dict[str, str] = {}          # cache key -> queued/running job id
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self.counters = {"submitted": 0, "cached": 0, "joined": 0, "done": 0, "failed": 0, "rejected": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        if start:
+            self.start()
+
+    # --- cache ---
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _cached(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._cache_path(key)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _store(self, key: str, result: Dict):
+        path = self._cache_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
+
+    # --- submission ---
+
+    def submit(self, profile: str, iterations: Optional[int] = 1000) -> Tuple[Dict, bool]:
+        """
+        Queue a sim. Returns (job, cached); cached jobs are already "done".
+        Raises SimQueueFull when max_queued jobs are waiting.
+        """
+        key = cache_key(profile, iterations, self.sandbox.version)
+        result = self._cached(key)
+        with self._lock:
+            self.counters["submitted"] += 1
+            if result is not None:
+                self.counters["cached"] += 1
+                job = self._record(key, iterations, "done")
+                job.update(result=result, cached=True, finished_at=job["submitted_at"])
+                self._events[job["id"]].set()
+                return self._public(job), True
+
+            active = self._jobs.get(self._active.get(key))
+            if active:
+                self.counters["joined"] += 1
+                return self._public(active), False
+
+            queued = sum(1 for j in self._jobs.values() if j["status"] == "queued")
+            if queued >= self.max_queued:
+                self.counters["rejected"] += 1
+                raise SimQueueFull(f"{queued} simulations already waiting")
+
+            job = self._record(key, iterations, "queued")
+            job["_profile"] = profile
+            self._active[key] = job["id"]
+        self._queue.put(job["id"])
+        return self._public(job), False
+
+    def _record(self, key: str, iterations: Optional[int], status: str) -> Dict:
+        job = {"id": uuid.uuid4().hex, "key": key, "iterations": iterations, "status": status,
+               "cached": False, "submitted_at": time.time()}
+        self._jobs[job["id"]] = job
+        self._events[job["id"]] = threading.Event()
+        if len(self._jobs) > RECENT_JOBS:
+            finished = [i for i, j in self._jobs.items() if j["status"] not in ("queued", "running")]
+            for old_id in finished[:len(self._jobs) - RECENT_JOBS]:
+                del self._jobs[old_id]
+                self._events.pop(old_id, None)
+        return job
+
+    # --- workers ---
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"simc-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._process(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _run_simc(self, profile: str, iterations: Optional[int], workdir: str, threads: int) -> Dict:
+        return self.sandbox.summarize(self.sandbox.simulate(profile, iterations, workdir, threads))
+
+    def _process(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["status"] != "queued":
+                return
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            profile = job.pop("_profile")
+
+        start = time.perf_counter()
+        try:
+            with tempfile.TemporaryDirectory(prefix="simc-") as workdir:
+                result = self._simulate(profile, job["iterations"], workdir, self.threads)
+            self._store(job["key"], result)
+            status, error = "done", None
+        except Exception as e:
+            result, status, error = None, "failed", str(e)
+            print(f"Simulation {job_id} failed: {e}")
+
+        with self._lock:
+            job.update(status=status, finished_at=time.time(), seconds=round(time.perf_counter() - start, 3))
+            if error:
+                job["error"] = error
+            else:
+                job["result"] = result
+            self.counters[status] += 1
+            if self._active.get(job["key"]) == job_id:
+                del self._active[job["key"]]
+            event = self._events.get(job_id)
+        if event:
+            event.set()
+
+    # --- reporting ---
+
+    @staticmethod
+    def _public(job: Dict) -> Dict:
+        return {k: v for k, v in job.items() if not k.startswith('_')}
+
+    def job(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Block until the job finishes (or `timeout`); returns its current state"""
+        with self._lock:
+            event = self._events.get(job_id)
+        if event:
+            event.wait(timeout)
+        return self.job(job_id)
+
+    def status(self) -> Dict:
+        version = self.sandbox.version      # may run SimC once; keep it outside the lock
+        with self._lock:
+            statuses = [j["status"] for j in self._jobs.values()]
+            return {
+                "queue_depth": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "workers": self.workers,
+                "threads_per_sim": self.threads,
+                "max_queued": self.max_queued,
+                "simc_version": version,
+                "counters": dict(self.counters),
+            }
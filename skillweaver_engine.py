@@ -2,11 +2,9 @@ import time
 import os
 import threading
 import re
-try:
-    from cuesdk import CueSdk
-    ICUE_AVAILABLE = True
-except ImportError:
-    ICUE_AVAILABLE = False
+from combat_log_parser import Dispatcher
+from combat_log_tailer import get_tailer
+from led_output import get_output
 
 # --- CONFIG ---
 # TODO: Load from config file
@@ -14,24 +12,6 @@ BASE_DIR = "/Users/jgrayson/Documents/WoW"
 LOG_PATH = f"{BASE_DIR}/Logs/WoWCombatLog.txt"
 PLAYER_NAME = "YourCharacterName" # Replace with dynamic lookup later
 
-# --- iCUE CONTROLLER (Simplified) ---
-class CorsairController:
-    def __init__(self):
-        self.sdk = None
-        if ICUE_AVAILABLE:
-            self.sdk = CueSdk()
-            self.sdk.connect()
-    
-    def flash_key(self, key_id, r, g, b):
-        """Flashes a specific key (mock implementation for now)."""
-        if not self.sdk: return
-        # In a real implementation, we'd map 'Q', 'E', etc. to LED IDs.
-        # For this prototype, we'll flash the whole keyboard to signal the 'Type' of action.
-        print(f"[SkillWeaver] Flashing {key_id} -> ({r},{g},{b})")
-        # self.sdk.set_led_colors... (omitted for brevity)
-
-corsair = CorsairController()
-
 # --- GAME STATE ---
 class GameState:
     def __init__(self):
@@ -43,7 +23,6 @@ class GameState:
     def update_resource(self, amount, type="Rage"):
         if type == "Rage":
             self.rage = min(100, max(0, self.rage + amount))
-            print(f"[State] Rage: {self.rage}")
 
     def update_target_health(self, pct):
         self.target_hp_pct = pct
@@ -67,13 +46,19 @@ class WarriorRotation:
 
 # --- ENGINE ---
 class SkillWeaverEngine:
-    def __init__(self):
+    def __init__(self, tailer=None, output=None):
         self.state = GameState()
         self.rotation = WarriorRotation(self.state)
+        self.tailer = tailer
+        self.subscription = None
+        self.dispatch = Dispatcher()
+        self.dispatch.on("SPELL_ENERGIZE")(self._on_energize)
+        self.dispatch.on("SPELL_CAST_SUCCESS")(self._on_cast)
         self.running = False
         self.thread = None
         self.current_suggestion = None
         self.mistakes = []
+        self.output = output
 
     def start(self):
         if self.running: return
@@ -84,6 +69,8 @@ class SkillWeaverEngine:
 
     def stop(self):
         self.running = False
+        if self.subscription:
+            self.tailer.unsubscribe(self.subscription)
         if self.thread:
             self.thread.join()
 
@@ -107,24 +94,22 @@ class SkillWeaverEngine:
             "expected": expected_spell_id
         })
 
-    def _follow(self, file):
-        file.seek(0, os.SEEK_END)
-        while self.running:
-            line = file.readline()
-            if not line:
-                time.sleep(0.05)
-                continue
-            yield line
-
     def _run_loop(self):
         if not os.path.exists(LOG_PATH):
             print(f"[SkillWeaver] Log not found: {LOG_PATH}. Using Mock Mode.")
             self._mock_loop()
             return
 
-        with open(LOG_PATH, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in self._follow(f):
-                self._process_line(line)
+        # Only the dispatched events change GameState, so the rest never reach our queue
+        self.tailer = self.tailer or get_tailer(LOG_PATH)
+        self.subscription = self.tailer.subscribe("skillweaver", events=self.dispatch.events)
+        if not self.running:  # stopped while subscribing
+            self.tailer.unsubscribe(self.subscription)
+        for event in self.subscription:
+            if not self.running:
+                break
+            self._process_event(event)
+        self.tailer.unsubscribe(self.subscription)
 
     def _mock_loop(self):
         """Simulate rotation for testing"""
@@ -134,32 +119,33 @@ class SkillWeaverEngine:
             self.state.update_resource(10, "Rage")
             self._update_suggestion()
 
-    def _process_line(self, line):
-        # 1. Parse Resources (SPELL_ENERGIZE)
-        if "SPELL_ENERGIZE" in line and PLAYER_NAME in line:
-            parts = line.split(',')
-            try:
-                amount = int(parts[-2])
-                self.state.update_resource(amount, "Rage")
-            except:
-                pass
-        
-        # 2. Parse Spells (SPELL_CAST_SUCCESS)
-        if "SPELL_CAST_SUCCESS" in line and PLAYER_NAME in line:
-            if "Rampage" in line:
-                self.state.rage = max(0, self.state.rage - 80)
-                print(f"[State] Rampage Cast. Rage: {self.state.rage}")
+    def _process_event(self, event):
+        self.dispatch.dispatch(event)
 
         # 3. Evaluate Rotation
         self._update_suggestion()
 
+    # 1. Parse Resources (SPELL_ENERGIZE)
+    def _on_energize(self, event):
+        if event.involves(PLAYER_NAME) and event.amount is not None:
+            self.state.update_resource(event.amount, "Rage")
+
+    # 2. Parse Spells (SPELL_CAST_SUCCESS)
+    def _on_cast(self, event):
+        if event.involves(PLAYER_NAME) and event.spell_name == "Rampage":
+            self.state.rage = max(0, self.state.rage - 80)
+
     def _update_suggestion(self):
-        action, color, spell_id = self.rotation.get_suggestion()
-        self.current_suggestion = (action, color, spell_id)
-        
-        # Output (Debounced in real app)
-        # print(f"[Coach] Suggestion: {action}")
-        # corsair.flash_key(action, *color)
+        suggestion = self.rotation.get_suggestion()
+        if suggestion == self.current_suggestion:
+            return
+        self.current_suggestion = suggestion
+        action, color, spell_id = suggestion
+
+        # Light the suggested action's key; the LED output stage coalesces and frame-limits
+        if self.output is None:
+            self.output = get_output()
+        self.output.set("skillweaver.suggestion", {action: color})
 
 if __name__ == "__main__":
     engine = SkillWeaverEngine()
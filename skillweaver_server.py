@@ -132,9 +132,6 @@ def get_gear(character):
         ]
     })
 
-import subprocess
-import tempfile
-import json
 import re
 
 @app.route('/api/simc/run/<profile_name>')
@@ -188,85 +185,92 @@ def run_simc_profile(profile_name):
     # Let's change the route to accept an ID for precision.
     return jsonify({"error": "Use /api/simc/run/<id>"})
 
+# Sims go through a shared worker pool with per-job temp dirs and a result
+# cache (sim_queue.py); this server runs SimC from Docker unless SIMC_PATH is set
+from sim_queue import SimQueue, SimQueueFull, WAIT_TIMEOUT
+from sandbox import Sandbox
+import threading
+_sim_queue = None
+_sim_queue_lock = threading.Lock()
+
+def get_sim_queue():
+    global _sim_queue
+    with _sim_queue_lock:
+        if _sim_queue is None:
+            image = None if os.getenv("SIMC_PATH") else os.getenv("SIMC_DOCKER_IMAGE", "simulationcraftorg/simc")
+            _sim_queue = SimQueue(Sandbox(docker_image=image))
+    return _sim_queue
+
+def fetch_profile_content(profile_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT content FROM skillweaver.profiles WHERE profile_id = %s", (profile_id,))
+    row = cur.fetchone()
+    cur.close()
+    conn.close()
+    return row[0] if row else None
+
+def sim_response(job):
+    """Raid-level numbers from a finished job"""
+    result = job["result"]
+    return {
+        "dps": result["raid_dps"],
+        "sim_length": result["sim_length"],
+        "iterations": result["iterations"],
+        "timestamp": result["timestamp"],
+        "cached": job["cached"]
+    }
+
 @app.route('/api/simc/run_id/<int:profile_id>')
 def run_simc_by_id(profile_id):
+    """Run a stored profile and wait for the result (see /api/simc/submit for async)"""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT content FROM skillweaver.profiles WHERE profile_id = %s", (profile_id,))
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
-        
-        if not row:
+        content = fetch_profile_content(profile_id)
+        if not content:
             return jsonify({"error": "Profile not found"}), 404
-            
-        content = row[0]
-        
-        # 2. Write to Temp File
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.simc', delete=False) as tmp:
-            tmp.write(content)
-            # Add JSON output option
-            tmp.write(f"\njson={tmp.name}.json")
-            tmp_path = tmp.name
-            
-        json_path = f"{tmp_path}.json"
-        
-        # 3. Run SimC (Dockerized)
-        # Mount the temp directory to /data in the container
-        # Note: On macOS Docker, /var/folders is usually shared by default.
-        # We need the directory of the temp file.
-        tmp_dir = os.path.dirname(tmp_path)
-        tmp_filename = os.path.basename(tmp_path)
-        
-        # Docker command:
-        # docker run --rm -v /host/path:/data simulationcraftorg/simc /data/input.simc json=/data/output.json
-        cmd = [
-            "docker", "run", "--rm",
-            "-v", f"{tmp_dir}:/data",
-            "simulationcraftorg/simc",
-            f"/data/{tmp_filename}",
-            f"json=/data/{tmp_filename}.json"
-        ]
-        
-        print(f"Running Docker SimC: {' '.join(cmd)}")
-        try:
-            # Add timeout (SimC can be slow, give it 60s)
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            
-            if result.returncode != 0:
-                print(f"SimC Docker Failed (Code {result.returncode}): {result.stderr}")
-                return jsonify({"error": "SimC failed", "details": result.stderr}), 500
-        except subprocess.TimeoutExpired:
-            print("SimC timed out after 60s")
-            # Check if JSON was created anyway
-            if not os.path.exists(json_path):
-                return jsonify({"error": "Simulation timed out"}), 504
-            # If JSON exists, we might be okay to proceed (SimC sometimes hangs on exit)
-            pass
-            
-        # 4. Parse JSON Output
-        with open(json_path, 'r') as f:
-            sim_data = json.load(f)
-            
-        # Cleanup
-        os.remove(tmp_path)
-        os.remove(json_path)
-        
-        # Extract key metrics
-        dps = sim_data['sim']['statistics']['raid_dps']['mean']
-        
-        return jsonify({
-            "dps": dps,
-            "sim_length": sim_data['sim']['options']['max_time'],
-            "iterations": sim_data['sim']['options']['iterations'],
-            "timestamp": sim_data.get('timestamp', 0)
-        })
-        
+
+        job, _ = get_sim_queue().submit(content, iterations=None)
+        job_id = job["id"]
+        job = get_sim_queue().wait(job_id, WAIT_TIMEOUT)
+        if job is None:
+            return jsonify({"error": "Job not found", "job_id": job_id}), 404
+        if job["status"] in ("queued", "running"):
+            return jsonify({"error": "Simulation still running; poll /api/simc/jobs/<job_id>",
+                            "job_id": job_id}), 504
+        if job["status"] != "done":
+            return jsonify({"error": "SimC failed", "details": job.get("error")}), 500
+        return jsonify(sim_response(job))
+
+    except SimQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        print(f"SimC Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/simc/submit/<int:profile_id>', methods=['POST'])
+def submit_simc(profile_id):
+    """Queue a stored profile; 202 + job id, or 200 with the result when cached"""
+    try:
+        content = fetch_profile_content(profile_id)
+        if not content:
+            return jsonify({"error": "Profile not found"}), 404
+        job, cached = get_sim_queue().submit(content, iterations=None)
+        return jsonify(job), (200 if cached else 202)
+    except SimQueueFull as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         print(f"SimC Error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/simc/jobs/<job_id>')
+def simc_job(job_id):
+    job = get_sim_queue().job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] == "done":
+        job.update(sim_response(job))
+    return jsonify(job)
+
 @app.route('/api/profiles')
 def list_profiles():
     """List available SimC profiles for the dropdown"""
@@ -46,7 +46,7 @@ def test_arbiter():
     # SkillWeaver expects BLOODTHIRST (SpellID 23881) by default
     print("📝 Simulating Correct Cast (Bloodthirst)...")
     timestamp = time.strftime("%m/%d %H:%M:%S.000")
-    line = f"{timestamp},SPELL_CAST_SUCCESS,PlayerGUID,\"MyPlayerName\",TargetGUID,\"Target\",23881,\"Bloodthirst\",0x1,100,0,0,0,0,0,0,0,0"
+    line = f"{timestamp}  SPELL_CAST_SUCCESS,PlayerGUID,\"MyPlayerName\",0x511,0x0,TargetGUID,\"Target\",0x10a48,0x0,23881,\"Bloodthirst\",0x1"
     write_log_line(line)
     time.sleep(0.5)
     
@@ -57,7 +57,7 @@ def test_arbiter():
     # 2. Simulate "Wrong" Cast
     # Cast Heroic Strike (SpellID 12345) instead
     print("📝 Simulating Wrong Cast (Heroic Strike)...")
-    line = f"{timestamp},SPELL_CAST_SUCCESS,PlayerGUID,\"MyPlayerName\",TargetGUID,\"Target\",12345,\"Heroic Strike\",0x1,100,0,0,0,0,0,0,0,0"
+    line = f"{timestamp}  SPELL_CAST_SUCCESS,PlayerGUID,\"MyPlayerName\",0x511,0x0,TargetGUID,\"Target\",0x10a48,0x0,12345,\"Heroic Strike\",0x1"
     write_log_line(line)
     time.sleep(0.5)
     
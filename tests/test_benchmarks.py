@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks import generators, runner
+from benchmarks.cases import CASES
+
+class TestGenerators(unittest.TestCase):
+    def test_same_seed_same_data(self):
+        self.assertEqual(generators.saved_variables(20000, seed=3), generators.saved_variables(20000, seed=3))
+        self.assertNotEqual(generators.combat_log(50, seed=1), generators.combat_log(50, seed=2))
+        a, b = generators.ah_scan(1000, seed=5), generators.ah_scan(1000, seed=5)
+        self.assertTrue(all((x == y).all() for x, y in zip(a, b)))
+
+    def test_saved_variables_size_and_shape(self):
+        text = generators.saved_variables(50000)
+        self.assertGreaterEqual(len(text), 50000)
+        self.assertLess(len(text), 60000)
+        self.assertTrue(text.startswith("DataStore_ReputationsDB = {"))
+
+    def test_recipe_dag_is_acyclic(self):
+        dag = generators.recipe_dag(500, seed=1)
+        crafted = {r["crafted_item_id"]: r for r in dag}
+        for r in dag:
+            for reagent in r["reagents"]:
+                if reagent in crafted:
+                    self.assertLess(reagent, r["crafted_item_id"])
+
+class TestRunner(unittest.TestCase):
+    def test_every_case_runs_at_tiny_scale(self):
+        if isinstance(sys.modules.get('networkx'), MagicMock):
+            self.skipTest("networkx is mocked by another test module")
+        results = runner.run("tiny", repeat=1, quiet=True)
+        self.assertEqual(set(results["results"]), set(CASES))
+        for name, result in results["results"].items():
+            self.assertNotIn("error", result, name)
+            self.assertGreater(result["units"], 0, name)
+        self.assertEqual(results["meta"]["scale"], "tiny")
+
+    def test_compare_flags_regressions(self):
+        def run_with(**mins):
+            return {"meta": {"scale": "small"},
+                    "results": {name: {"min": value} for name, value in mins.items()}}
+
+        report = runner.compare(run_with(parse=1.0, ingest=1.0, route=1.0, old=1.0),
+                                run_with(parse=1.5, ingest=0.5, route=1.05, new=1.0))
+        statuses = {row["case"]: row["status"] for row in report["rows"]}
+        self.assertEqual(statuses, {"parse": "regression", "ingest": "improvement", "route": "same",
+                                    "old": "removed", "new": "new"})
+        self.assertEqual(report["regressions"], ["parse"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+import json
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blizzard_client import BlizzardAPIClient, BulkUpserter
+from utils.http_fetch import Checkpoint
+
+class BlizzardHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Battle.net OAuth + Game Data endpoints"""
+    token_requests = 0
+    paths_seen = []
+    not_modified = 0
+
+    def do_POST(self):
+        BlizzardHandler.token_requests += 1
+        self._json({"access_token": "tok", "expires_in": 3600})
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        BlizzardHandler.paths_seen.append(path)
+        if self.headers.get('Authorization') != 'Bearer tok':
+            self.send_response(401)
+            self.end_headers()
+            return
+        etag = f'"{path}"'
+        if self.headers.get('If-None-Match') == etag:
+            BlizzardHandler.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        if path.endswith('/404'):
+            self.send_response(404)
+            self.end_headers()
+            return
+        self._json({"id": int(path.rsplit('/', 1)[-1]), "path": path}, etag=etag)
+
+    def _json(self, payload, etag=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestBlizzardAPIClient(unittest.TestCase):
+    def setUp(self):
+        BlizzardHandler.token_requests = 0
+        BlizzardHandler.paths_seen = []
+        BlizzardHandler.not_modified = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), BlizzardHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def _client(self):
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        return BlizzardAPIClient('id', 'secret', rate=1000, max_workers=4,
+                                 cache_dir=os.path.join(self.tmpdir.name, 'cache'),
+                                 oauth_url=f"{base}/oauth/token", api_url=base)
+
+    def test_token_is_shared_across_concurrent_requests(self):
+        client = self._client()
+        results = dict(client.fetch_many(range(1, 21), lambda i: f"/data/wow/recipe/{i}"))
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results[5]['id'], 5)
+        self.assertEqual(BlizzardHandler.token_requests, 1)
+
+    def test_unchanged_resources_are_served_from_cache(self):
+        self._client().get_recipe_details(42)
+        body = self._client().get_recipe_details(42)
+
+        self.assertEqual(body['id'], 42)
+        self.assertEqual(BlizzardHandler.not_modified, 1)
+
+    def test_expired_token_is_refreshed_on_401(self):
+        client = self._client()
+        client.token = 'stale'
+        client.token_expires = float('inf')
+
+        self.assertEqual(client.get_quest_details(7)['id'], 7)
+        self.assertEqual(BlizzardHandler.token_requests, 1)
+
+    def test_failed_request_returns_none(self):
+        client = self._client()
+
+        self.assertIsNone(client.get_recipe_details(404))
+        self.assertEqual(client.stats['errors'], 1)
+
+    def test_fetch_many_skips_checkpointed_keys(self):
+        checkpoint = Checkpoint(os.path.join(self.tmpdir.name, 'checkpoint.json'))
+        checkpoint.mark_done_many([1, 2])
+
+        keys = [key for key, _ in self._client().fetch_many(
+            [1, 2, 3], lambda i: f"/data/wow/quest/{i}", checkpoint=checkpoint)]
+
+        self.assertEqual(keys, [3])
+
+class TestBulkUpserter(unittest.TestCase):
+    @patch('psycopg2.extras.execute_values')
+    def test_batches_and_checkpoints_after_commit(self, mock_execute_values):
+        conn = MagicMock()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            checkpoint = Checkpoint(os.path.join(tmpdir, 'checkpoint.json'))
+            upserter = BulkUpserter(conn, "INSERT INTO t VALUES %s", page_size=3,
+                                    checkpoint=checkpoint, unique_column=0)
+
+            upserter.add((1, 'a'))
+            upserter.add((2, 'b'))
+            upserter.complete('tier-1')
+            self.assertFalse(checkpoint.is_done('tier-1'))
+
+            upserter.add((2, 'c'))  # fills the page -> flush
+            self.assertTrue(checkpoint.is_done('tier-1'))
+
+            rows = mock_execute_values.call_args[0][2]
+            self.assertEqual(rows, [(1, 'a'), (2, 'c')])
+            conn.commit.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
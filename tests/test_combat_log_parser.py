@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from combat_log_parser import CombatLogParser, Dispatcher, parse_line, parse_timestamp, split_fields
+
+DAMAGE = ('10/18 21:00:01.250  SPELL_DAMAGE,Player-1-0001,"Hero-Area52",0x511,0x0,Creature-0-1,"Dummy, Training",'
+          '0x10a48,0x0,23881,"Bloodthirst",0x1,5000,-1,1,0,0,0,nil,nil,nil')
+
+
+class TestCombatLogParser(unittest.TestCase):
+    def test_quoted_fields_keep_commas(self):
+        self.assertEqual(split_fields('A,"B, C",D,"E"'), ["A", "B, C", "D", "E"])
+        self.assertEqual(split_fields('1,2,3'), ["1", "2", "3"])
+
+    def test_named_fields_are_decoded_on_demand(self):
+        record = parse_line(DAMAGE)
+        self.assertIsNone(record._fields)
+        self.assertEqual((record.timestamp, record.event), ("10/18 21:00:01.250", "SPELL_DAMAGE"))
+        self.assertEqual(record.dest_name, "Dummy, Training")
+        self.assertEqual((record.spell_id, record.spell_name, record.amount), (23881, "Bloodthirst", 5000))
+        self.assertTrue(record.involves("Hero"))
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_special_layouts_and_advanced_logging(self):
+        parser = CombatLogParser()
+        end = parser.parse('10/18 21:05:00.000  ENCOUNTER_END,2902,"Ulgrax the Devourer",16,20,1,312000')
+        self.assertEqual((end.get("encounter_id"), end.get("success"), end.get("fight_time")), (2902, 1, 312000))
+
+        parser.parse('10/18 21:00:00.000  COMBAT_LOG_VERSION,20,ADVANCED_LOG_ENABLED,1,BUILD_VERSION,11.0.2,PROJECT_ID,1')
+        self.assertTrue(parser.advanced)
+        advanced = ",".join(["Player-1-0001", "0000000000000000", "400000", "500000"] + ["0"] * 13)
+        record = parser.parse(DAMAGE.replace(",5000,", f",{advanced},5000,"))
+        self.assertEqual((record.amount, record.get("current_hp")), (5000, 400000))
+
+    def test_timestamp(self):
+        expected = datetime(datetime.now().year, 10, 18, 21, 0, 1).timestamp() + 0.25
+        self.assertAlmostEqual(parse_line(DAMAGE).time, expected)
+        self.assertAlmostEqual(parse_timestamp("10/18/2024 21:00:01.2500-4"),
+                               datetime(2024, 10, 18, 21, 0, 1).timestamp() + 0.25)
+
+    def test_iter_file_offsets_and_dispatch(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "WoWCombatLog.txt")
+            with open(path, 'w') as f:
+                f.write(DAMAGE + "\n" + DAMAGE.replace("SPELL_DAMAGE", "SPELL_HEAL") + "\n")
+            records = list(CombatLogParser().iter_file(path, block_size=16))
+
+        self.assertEqual([r.event for r in records], ["SPELL_DAMAGE", "SPELL_HEAL"])
+        self.assertEqual(records[0].offset, len(DAMAGE) + 1)
+
+        dispatch, seen = Dispatcher(), []
+        dispatch.on("SPELL_HEAL")(lambda record: seen.append(record.amount))
+        self.assertEqual(dispatch.events, {"SPELL_HEAL"})
+        self.assertEqual([dispatch.dispatch(r) for r in records], [False, True])
+        self.assertEqual(seen, [5000])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from combat_log_tailer import CombatLogTailer
+from arbiter_engine import ArbiterEngine
+
+CAST = '10/18 21:00:00.000  SPELL_CAST_SUCCESS,Player-1-0001,"Hero",0x511,0x0,Creature-0-1,"Dummy",0x10a48,0x0,23881,"Bloodthirst",0x1\n'
+DAMAGE = '10/18 21:00:00.050  SPELL_DAMAGE,Player-1-0001,"Hero",0x511,0x0,Creature-0-1,"Dummy",0x10a48,0x0,23881,"Bloodthirst",0x1,5000\n'
+
+
+class TestCombatLogTailer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmpdir.name, "WoWCombatLog.txt")
+        self.checkpoint = os.path.join(self.tmpdir.name, "state", "tailer.json")
+        open(self.log, 'w').close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, text):
+        with open(self.log, 'a') as f:
+            f.write(text)
+
+    def _drain(self, sub):
+        events = []
+        while True:
+            event = sub.get(timeout=0)
+            if event is None:
+                return events
+            events.append(event)
+
+    def test_one_read_fans_out_with_filters(self):
+        tailer = CombatLogTailer(self.log, block_size=64)
+        everything = tailer.subscribe("all", start=False)
+        casts = tailer.subscribe("casts", events={"SPELL_CAST_SUCCESS"}, start=False)
+        tailer.poll()
+
+        self._write(CAST + DAMAGE + CAST[:20])   # last line still being written
+        self.assertEqual(tailer.poll(), 2)
+        self.assertEqual([e.event for e in self._drain(everything)], ["SPELL_CAST_SUCCESS", "SPELL_DAMAGE"])
+        self.assertEqual(len(self._drain(casts)), 1)
+
+        self._write(CAST[20:])
+        self.assertEqual(tailer.poll(), 1)
+        self.assertEqual(self._drain(casts)[0].raw, CAST.rstrip('\n'))
+        self.assertEqual(tailer.offset, os.path.getsize(self.log))
+
+    def test_truncation_restarts_from_beginning(self):
+        tailer = CombatLogTailer(self.log)
+        sub = tailer.subscribe("all", start=False)
+        tailer.poll()
+        self._write(CAST + DAMAGE)
+        tailer.poll()
+        self._drain(sub)
+
+        with open(self.log, 'w') as f:   # /combatlog restarted: file truncated
+            f.write(DAMAGE)
+        self.assertEqual(tailer.poll(), 1)
+        self.assertEqual(tailer.counters["rotations"], 1)
+        self.assertEqual(self._drain(sub)[0].event, "SPELL_DAMAGE")
+
+    def test_checkpoint_resumes_after_restart(self):
+        tailer = CombatLogTailer(self.log, checkpoint_path=self.checkpoint, from_start=True)
+        tailer.subscribe("all", start=False)
+        self._write(CAST)
+        tailer.poll()
+        tailer.checkpoint()
+
+        self._write(DAMAGE)   # written while nothing was running
+        restarted = CombatLogTailer(self.log, checkpoint_path=self.checkpoint, from_start=True)
+        sub = restarted.subscribe("all", start=False)
+        restarted.poll()
+        self.assertEqual([e.event for e in self._drain(sub)], ["SPELL_DAMAGE"])
+
+    def test_stop_with_full_queue_keeps_undelivered_events(self):
+        tailer = CombatLogTailer(self.log, checkpoint_path=self.checkpoint, from_start=True)
+        sub = tailer.subscribe("slow", maxsize=2)
+        self._write(CAST * 2 + DAMAGE + CAST)
+        deadline = time.monotonic() + 5
+        while sub.queue.qsize() < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        tailer.stop()                          # tailer is blocked offering the DAMAGE line
+        self.assertEqual(tailer.offset, len(CAST) * 2)
+
+        restarted = CombatLogTailer(self.log, checkpoint_path=self.checkpoint, from_start=True)
+        resumed = restarted.subscribe("slow", start=False)
+        restarted.poll()
+        self.assertEqual([e.event for e in self._drain(resumed)], ["SPELL_DAMAGE", "SPELL_CAST_SUCCESS"])
+
+    def test_drop_oldest_keeps_newest(self):
+        tailer = CombatLogTailer(self.log, from_start=True)
+        sub = tailer.subscribe("lights", maxsize=2, overflow="drop_oldest", start=False)
+        self._write(CAST * 4 + DAMAGE)
+        tailer.poll()
+        self.assertEqual(sub.dropped, 3)
+        self.assertEqual([e.event for e in self._drain(sub)], ["SPELL_CAST_SUCCESS", "SPELL_DAMAGE"])
+
+    def test_arbiter_consumes_shared_tailer(self):
+        class Coach:
+            mistakes = []
+            def get_recommendation(self):
+                return {"spell_id": 999, "spell_name": "Correct Spell"}
+            def report_mistake(self, actual, expected):
+                self.mistakes.append(actual)
+
+        tailer = CombatLogTailer(self.log, poll_interval=0.005)
+        arbiter = ArbiterEngine(Coach(), tailer=tailer)
+        arbiter.log_path = self.log
+        arbiter.start()
+        try:
+            deadline = time.time() + 5
+            while tailer._inode is None and time.time() < deadline:   # log opened at its end
+                time.sleep(0.01)
+            self._write('10/18 21:00:00.000  SPELL_CAST_SUCCESS,Player-1-0001,"MyPlayerName-Area52",0x511,0x0,'
+                        'Creature-0-1,"Target",0x10a48,0x0,12345,"Heroic Strike",0x1\n')
+            while arbiter.mistake_count == 0 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            arbiter.stop()
+        self.assertEqual(arbiter.mistake_count, 1)
+        self.assertFalse(tailer.running)
+
+
+if __name__ == '__main__':
+    unittest.main()
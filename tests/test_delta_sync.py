@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from delta_sync import (DeltaClient, DeltaStore, DeltaConflict, split_subtrees,
+                        assemble, encode_payload, decode_payload)
+
+
+def reputations(characters):
+    return {"global": {"Characters": characters}, "Version": 3}
+
+
+class TestDeltaSync(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = DeltaStore(self.tmpdir.name, flush_delay=60)
+        self.client = DeltaClient()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _send(self, source, tree):
+        payload, hashes = self.client.build(source, tree)
+        body = encode_payload(payload)
+        partial, digest = self.store.apply(source, decode_payload(body, 'gzip'))
+        self.client.acknowledge(source, hashes)
+        return payload, partial
+
+    def test_split_is_per_character(self):
+        tree = reputations({"A": {"Factions": {"2600": 100}}, "B": {}})
+        subtrees = split_subtrees(tree)
+        self.assertEqual(set(subtrees), {("global", "Characters", "A"), ("global", "Characters", "B"),
+                                         ("Version",)})
+        self.assertEqual(assemble(subtrees), tree)
+
+    def test_only_changed_characters_are_sent_and_ingested(self):
+        tree = reputations({"A": {"Factions": {"2600": 100}}, "B": {"Factions": {"2600": 5}}})
+        first, _ = self._send("DataStore_Reputations", tree)
+        self.assertIsNone(first["base"])
+        self.assertEqual(len(first["changed"]), 3)
+
+        tree["global"]["Characters"]["B"]["Factions"]["2600"] = 6
+        delta, partial = self._send("DataStore_Reputations", tree)
+        self.assertEqual([c["path"] for c in delta["changed"]], [["global", "Characters", "B"]])
+        self.assertEqual(partial, {"global": {"Characters": {"B": {"Factions": {"2600": 6}}}}})
+
+        self.assertEqual(self.client.build("DataStore_Reputations", tree)[0], None)
+
+    def test_removed_character_and_flush(self):
+        tree = reputations({"A": {"x": 1}, "B": {"x": 2}})
+        self._send("DataStore_Reputations", tree)
+        del tree["global"]["Characters"]["A"]
+        delta, _ = self._send("DataStore_Reputations", tree)
+        self.assertEqual(delta["removed"], [["global", "Characters", "A"]])
+
+        self.store.flush()
+        with open(os.path.join(self.tmpdir.name, "DataStore_Reputations.json")) as f:
+            self.assertEqual(json.load(f), tree)
+
+        # A fresh store (server restart) picks up the same state from disk
+        restarted = DeltaStore(self.tmpdir.name)
+        self.assertEqual(restarted.digest("DataStore_Reputations"),
+                         self.store.digest("DataStore_Reputations"))
+
+    def test_stale_base_conflicts(self):
+        tree = reputations({"A": {"x": 1}})
+        self._send("SavedInstances", tree)
+        self.store.invalidate("SavedInstances")  # e.g. a full upload replaced the file
+        with open(os.path.join(self.tmpdir.name, "SavedInstances.json"), "w") as f:
+            json.dump({"Toons": {}}, f)
+
+        tree["global"]["Characters"]["A"]["x"] = 2
+        payload, _ = self.client.build("SavedInstances", tree)
+        with self.assertRaises(DeltaConflict) as ctx:
+            self.store.apply("SavedInstances", payload)
+        self.assertEqual(ctx.exception.digest, self.store.digest("SavedInstances"))
+
+        # Resending everything resolves it
+        payload, _ = self.client.build("SavedInstances", tree, full=True)
+        partial, digest = self.store.apply("SavedInstances", payload)
+        self.assertEqual(digest, payload["digest"])
+
+
+if __name__ == '__main__':
+    unittest.main()
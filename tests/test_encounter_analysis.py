@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from encounter_analysis import analyze_log, find_segments
+
+HERO = 'Player-1-0001,"Hero-Area52",0x511,0x0'
+BOSS = 'Creature-0-1,"Ulgrax",0x10a48,0x0'
+
+
+def fight(encounter_id, name, second, success=1):
+    stamp = lambda offset: f'10/18 21:{second + offset // 60:02d}:{offset % 60:02d}.100  '
+    return [
+        stamp(0) + f'ENCOUNTER_START,{encounter_id},"{name}",16,20,2657',
+        stamp(0) + f'SPELL_CAST_SUCCESS,{HERO},{BOSS},23881,"Bloodthirst",0x1',
+        stamp(1) + f'SPELL_DAMAGE,{HERO},{BOSS},23881,"Bloodthirst",0x1,5000',
+        stamp(1) + f'SPELL_CAST_SUCCESS,{HERO},{BOSS},1464,"Slam",0x1',      # not the rotation's pick
+        stamp(2) + f'SPELL_HEAL,{HERO},{HERO},23880,"Bloodthirst",0x1,700',
+        stamp(2) + f'SPELL_DAMAGE,{BOSS},{HERO},434697,"Brutal Crush",0x1,90000',
+        stamp(3) + f'UNIT_DIED,0000000000000000,nil,0x80000000,0x80000000,{HERO}',
+        stamp(3) + f'ENCOUNTER_END,{encounter_id},"{name}",16,20,{success},3000',
+    ]
+
+
+class TestEncounterAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmpdir.name, "WoWCombatLog.txt")
+        self.cache = os.path.join(self.tmpdir.name, "cache")
+        trash = f'10/18 20:59:00.000  SPELL_DAMAGE,{HERO},{BOSS},23881,"Bloodthirst",0x1,1'
+        lines = [trash] + fight(2902, "Ulgrax the Devourer", 0, success=0) + [trash] + fight(2917, "The Bloodbound Horror", 5)
+        lines += fight(2898, "Sikran", 10)[:3]      # logged off mid-pull
+        with open(self.log, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_segments_come_from_boundary_lines(self):
+        segments = find_segments(self.log)
+        self.assertEqual([s["name"] for s in segments], ["Ulgrax the Devourer", "The Bloodbound Horror", "Sikran"])
+        self.assertEqual([s["success"] for s in segments], [0, 1, None])
+        with open(self.log, 'rb') as f:
+            data = f.read()
+        self.assertTrue(data[segments[0]["start"]:segments[0]["end"]].endswith(b'3000\n'))
+        self.assertEqual(segments[2]["end"], len(data))
+        self.assertNotEqual(segments[0]["fingerprint"], segments[1]["fingerprint"])
+
+    def test_per_encounter_report(self):
+        report = analyze_log(self.log, workers=1, players=["Hero"], cache_dir=None)
+        first = report["encounters"][0]
+        self.assertEqual(first["duration"], 4)
+        self.assertEqual(first["damage"]["total"], 5000)      # trash before the pull is excluded
+        self.assertEqual(first["dps_timeline"], [0, 5000, 0, 0])
+        self.assertEqual(first["hps_timeline"], [0, 0, 700, 0])
+        self.assertEqual(first["deaths"][0]["player"], "Hero-Area52")
+        self.assertEqual(first["deaths"][0]["recap"][0]["spell"], "Brutal Crush")
+        self.assertEqual((first["casts"], first["mistakes"]), ({"Hero": 2}, {"Hero": 1}))
+
+    def test_parallel_results_are_cached_per_segment(self):
+        first = analyze_log(self.log, workers=2, cache_dir=self.cache)
+        self.assertEqual((first["analyzed"], first["cached"]), (3, 0))
+
+        with open(self.log, 'a') as f:        # another pull logged
+            f.write("\n".join(fight(2921, "Broodtwister Ovi'nax", 20)) + "\n")
+        second = analyze_log(self.log, workers=2, cache_dir=self.cache)
+        self.assertEqual((second["analyzed"], second["cached"]), (1, 3))
+        strip = lambda e: {k: v for k, v in e.items() if k != "cached"}
+        self.assertEqual([strip(e) for e in second["encounters"][:3]], [strip(e) for e in first["encounters"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
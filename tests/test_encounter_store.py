@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from arbiter_engine import ArbiterEngine
+from combat_log_parser import parse_line
+from encounter_analysis import analyze_log
+from encounter_store import EncounterStore, EncounterWriter
+
+HERO = 'Player-1-0001,"Hero-Area52",0x511,0x0'
+HEALER = 'Player-1-0002,"Medic-Area52",0x511,0x0'
+BOSS = 'Creature-0-1,"Ulgrax",0x10a48,0x0'
+LINES = [
+    '10/18 21:00:00.000  ENCOUNTER_START,2902,"Ulgrax the Devourer",16,20,2657',
+    f'10/18 21:00:00.500  SPELL_CAST_SUCCESS,{HERO},{BOSS},23881,"Bloodthirst",0x1',
+    f'10/18 21:00:00.600  SPELL_DAMAGE,{HERO},{BOSS},23881,"Bloodthirst",0x1,5000',
+    f'10/18 21:00:01.000  SWING_DAMAGE,{BOSS},{HERO},20000',
+    f'10/18 21:00:01.200  SPELL_CAST_SUCCESS,{HERO},{BOSS},23881,"Bloodthirst",0x1',
+    f'10/18 21:00:02.000  SPELL_HEAL,{HEALER},{HERO},2061,"Flash Heal",0x2,8000',
+    f'10/18 21:00:05.500  SPELL_DAMAGE,{BOSS},{HERO},434697,"Brutal Crush",0x1,90000',
+    f'10/18 21:00:06.000  SPELL_DAMAGE,{BOSS},{HERO},434697,"Brutal Crush",0x1,90000',
+    f'10/18 21:00:07.000  UNIT_DIED,0000000000000000,nil,0x80000000,0x80000000,{HERO}',
+    '10/18 21:00:08.000  ENCOUNTER_END,2902,"Ulgrax the Devourer",16,20,0,8000',
+]
+
+
+class TestEncounterStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = EncounterStore(os.path.join(self.tmpdir.name, "columns"))
+        writer = EncounterWriter()
+        writer.extend(parse_line(line) for line in LINES)
+        self.store.save("ulgrax", writer, {"name": "Ulgrax the Devourer"})
+        self.encounter = self.store.open("ulgrax")
+
+    def tearDown(self):
+        del self.encounter
+        self.tmpdir.cleanup()
+
+    def test_round_trip_is_memory_mapped_and_interned(self):
+        enc = self.encounter
+        self.assertEqual((len(enc), enc.meta["name"], self.store.keys()), (10, "Ulgrax the Devourer", ["ulgrax"]))
+        self.assertIsInstance(enc.amount, np.memmap)
+        self.assertEqual([guid for guid, _ in enc.units], ["Player-1-0001", "Creature-0-1", "Player-1-0002"])
+        self.assertEqual(enc.spells[23881], "Bloodthirst")
+        self.assertAlmostEqual(float(enc.time[2] - enc.time[0]), 0.6, places=6)
+        self.assertEqual(int(enc.columns["source"][0]), -1)   # ENCOUNTER_START has no units
+
+    def test_vectorized_queries(self):
+        enc = self.encounter
+        death = float(enc.deaths("Hero")[0])
+        recap = enc.describe(enc.damage_taken("Hero", before=death, seconds=5.0))
+        self.assertEqual([(r["spell"], r["amount"]) for r in recap], [("Brutal Crush", 90000)] * 2)
+        self.assertEqual(len(enc.damage_taken("Hero", before=death, seconds=10.0)["amount"]), 3)
+
+        self.assertEqual(enc.per_second(source="Hero").tolist(), [5000, 0, 0, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(int(enc.hps().sum()), 8000)
+        self.assertEqual(enc.ability_counts("Hero"), {"Bloodthirst": 2})
+
+    def test_offline_analysis_and_arbiter_fill_the_store(self):
+        log = os.path.join(self.tmpdir.name, "WoWCombatLog.txt")
+        with open(log, 'w') as f:
+            f.write("\n".join(LINES) + "\n")
+        report = analyze_log(log, workers=1, cache_dir=None, store_dir=self.store.directory)
+        stored = self.store.open(report["encounters"][0]["store_key"])
+        self.assertEqual(stored.ability_counts("Hero"), {"Bloodthirst": 2})
+
+        arbiter = ArbiterEngine(store=self.store)
+        for line in ["10/18 20:59:59.000  SPELL_CAST_SUCCESS," + LINES[1].split(",", 1)[1]] + LINES:
+            arbiter._process_line(line)
+        live = self.store.open(arbiter.last_encounter)
+        self.assertEqual((len(live), live.meta["success"]), (10, 0))   # pre-pull cast not recorded
+        self.assertIsNone(arbiter.recording)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine_registry import EngineRegistry
+from dashboard_engine import DashboardEngine
+
+class TestEngineRegistry(unittest.TestCase):
+    def test_engines_build_on_first_use(self):
+        engines = EngineRegistry()
+        factory = MagicMock(return_value=MagicMock(name='goblin'))
+        goblin = engines.register('goblin', factory)
+
+        factory.assert_not_called()
+        goblin.analyze_market()
+        goblin.analyze_market()
+
+        factory.assert_called_once()
+        self.assertTrue(engines.is_loaded('goblin'))
+        self.assertIn('goblin', engines.timings)
+
+    def test_concurrent_first_use_builds_once(self):
+        engines = EngineRegistry()
+        calls = []
+
+        def slow_factory():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        engines.register('slow', slow_factory)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(engines.get('slow')))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_dependencies_are_shared(self):
+        engines = EngineRegistry()
+        engines.register('warden', object)
+        engines.register('museum', lambda: {'warden': engines.get('warden')})
+
+        self.assertIs(engines.get('museum')['warden'], engines.get('warden'))
+
+    def test_failed_build_is_reported_and_retried(self):
+        engines = EngineRegistry()
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("db down")
+            return object()
+
+        engines.register('flaky', flaky)
+        engines.warm()
+        report = {row['engine']: row for row in engines.report()}
+        self.assertEqual(report['flaky']['error'], "db down")
+
+        engines.get('flaky')
+        self.assertTrue(engines.is_loaded('flaky'))
+
+    def test_warm_skips_cold_engines(self):
+        engines = EngineRegistry()
+        db_factory = MagicMock()
+        engines.register('cheap', object)
+        engines.register('profession', db_factory, warm=False)
+
+        engines.warm()
+        db_factory.assert_not_called()
+        self.assertTrue(engines.is_loaded('cheap'))
+
+        engines.warm(['profession'])
+        db_factory.assert_called_once()
+
+    def test_background_warmup(self):
+        engines = EngineRegistry()
+        engines.register('a', object)
+        engines.register('b', object)
+
+        engines.warm_in_background().join(timeout=5)
+
+        self.assertTrue(engines.is_loaded('a') and engines.is_loaded('b'))
+
+    def test_dashboard_reuses_registry_engines(self):
+        engines = EngineRegistry()
+        built = {}
+        for attr, name in DashboardEngine.SHARED_ENGINES.items():
+            engines.register(name, lambda name=name: built.setdefault(name, MagicMock()))
+
+        dashboard = DashboardEngine(engines)
+        self.assertEqual(built, {})  # nothing built until the dashboard is used
+
+        dashboard.goblin.analyze_market()
+        built['goblin'].analyze_market.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
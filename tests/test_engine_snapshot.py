@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine_registry import EngineRegistry
+from engine_snapshot import SnapshotStore
+
+class ParsedEngine:
+    """Engine whose state is derived from a JSON source file"""
+    builds = 0
+
+    def __init__(self, path, warden=None):
+        ParsedEngine.builds += 1
+        with open(path) as f:
+            self.data = json.load(f)
+        self.warden = warden
+
+class HoldsLock:
+    def __init__(self):
+        self.lock = threading.Lock()
+
+class TestEngineSnapshot(unittest.TestCase):
+    def setUp(self):
+        ParsedEngine.builds = 0
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpdir.name, 'DataStore_Test.json')
+        self._write_source({"factions": [1, 2, 3]})
+        self.snapshot_dir = os.path.join(self.tmpdir.name, 'snapshots')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write_source(self, data):
+        with open(self.source, 'w') as f:
+            json.dump(data, f)
+
+    def _registry(self):
+        """A fresh registry, as on a server restart"""
+        engines = EngineRegistry(snapshots=SnapshotStore(self.snapshot_dir))
+        engines.register('warden', object)
+        engines.register('parsed', lambda: ParsedEngine(self.source, engines.get('warden')),
+                         sources=[self.source])
+        return engines
+
+    def test_restart_restores_unchanged_engine(self):
+        first = self._registry().get('parsed')
+        engines = self._registry()
+        restored = engines.get('parsed')
+
+        self.assertEqual(ParsedEngine.builds, 1)
+        self.assertEqual(restored.data, first.data)
+        self.assertEqual(engines.origins['parsed'], 'snapshot')
+        # Shared engine references point at the new registry's instance
+        self.assertIs(restored.warden, engines.get('warden'))
+
+    def test_changed_source_rebuilds(self):
+        self._registry().get('parsed')
+        self._write_source({"factions": [1, 2, 3, 4]})
+
+        restored = self._registry().get('parsed')
+
+        self.assertEqual(ParsedEngine.builds, 2)
+        self.assertEqual(restored.data["factions"], [1, 2, 3, 4])
+
+    def test_touched_but_identical_source_still_restores(self):
+        self._registry().get('parsed')
+        st = os.stat(self.source)
+        os.utime(self.source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        engines = self._registry()
+        engines.get('parsed')
+
+        self.assertEqual(ParsedEngine.builds, 1)
+        self.assertEqual(engines.snapshots.stats['hits'], 1)
+
+    def test_unpicklable_engine_is_built_not_snapshotted(self):
+        engines = EngineRegistry(snapshots=SnapshotStore(self.snapshot_dir))
+        engines.register('holds_lock', HoldsLock, sources=[])
+        self.assertIsInstance(engines.get('holds_lock'), HoldsLock)
+        self.assertEqual(engines.snapshots.stats['saved'], 0)
+        self.assertEqual(engines.snapshots.stats['errors'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+import contextvars
+import threading
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fanout import FanOut, Section
+from briefing_engine import BriefingEngine
+
+def sleeper(seconds, value):
+    def fn():
+        time.sleep(seconds)
+        return value
+    return fn
+
+class TestFanOut(unittest.TestCase):
+    def test_sections_run_in_parallel(self):
+        fanout = FanOut(max_workers=4)
+        start = time.monotonic()
+        results = fanout.run({
+            name: Section(sleeper(0.2, name), timeout=2) for name in ("a", "b", "c", "d")
+        })
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual({k: r.value for k, r in results.items()}, {"a": "a", "b": "b", "c": "c", "d": "d"})
+        self.assertTrue(all(r.status == "ok" for r in results.values()))
+
+    def test_slow_section_times_out_with_fallback(self):
+        fanout = FanOut()
+        start = time.monotonic()
+        results = fanout.run({
+            "fast": Section(lambda: 1, timeout=1),
+            "slow": Section(sleeper(1.0, 2), timeout=0.1, fallback={}),
+        })
+
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(results["fast"].status, "ok")
+        self.assertEqual(results["slow"].status, "timeout")
+        self.assertEqual(results["slow"].value, {})
+
+    def test_results_are_memoized_per_ttl(self):
+        fanout = FanOut()
+        fn = MagicMock(return_value=5)
+
+        first = fanout.run({"a": Section(fn, ttl=60)})["a"]
+        second = fanout.run({"a": Section(fn, ttl=60)})["a"]
+
+        self.assertEqual((first.status, second.status), ("ok", "cached"))
+        fn.assert_called_once()
+
+    def test_expired_section_serves_stale_while_refreshing(self):
+        fanout = FanOut()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            if len(calls) > 1:
+                release.wait(2)
+            return len(calls)
+
+        fanout.run({"a": Section(fn, ttl=0)})
+        stale = fanout.run({"a": Section(fn, ttl=0, timeout=0.05)})["a"]
+        again = fanout.run({"a": Section(fn, ttl=0, timeout=0.05)})["a"]
+        release.set()
+
+        self.assertEqual((stale.status, stale.value), ("stale", 1))
+        self.assertEqual(again.status, "stale")
+        self.assertEqual(len(calls), 2)  # the in-flight refresh was joined, not repeated
+
+    def test_errors_are_reported_per_section(self):
+        fanout = FanOut()
+        results = fanout.run({
+            "ok": Section(lambda: "fine"),
+            "broken": Section(lambda: 1 / 0, fallback=[]),
+        })
+
+        self.assertEqual(results["ok"].value, "fine")
+        self.assertEqual(results["broken"].status, "error")
+        self.assertEqual(results["broken"].value, [])
+
+    def test_sections_see_caller_context(self):
+        request_id = contextvars.ContextVar('request_id', default=None)
+        request_id.set("req-1")
+        results = FanOut().run({"section": Section(request_id.get)})
+        self.assertEqual(results["section"].value, "req-1")
+
+    def test_invalidate_recomputes_and_drops_calls_already_running(self):
+        fanout = FanOut()
+        version = {"value": 1}
+        release = threading.Event()
+
+        def read():
+            seen = version["value"]
+            release.wait(1)
+            return seen
+
+        release.set()
+        self.assertEqual(fanout.run({"s": Section(read, ttl=60)})["s"].value, 1)
+
+        release.clear()
+        fanout.invalidate("s")
+        self.assertEqual(fanout.run({"s": Section(read, ttl=60, timeout=0.05)})["s"].status, "stale")
+        version["value"] = 2                   # the data changes while that call is running
+        fanout.invalidate("s")
+        release.set()
+        result = fanout.run({"s": Section(read, ttl=60)})["s"]
+        self.assertEqual((result.value, result.status), (2, "ok"))
+        self.assertEqual(fanout.run({"s": Section(read, ttl=60)})["s"].status, "cached")
+
+class TestBriefingFanOut(unittest.TestCase):
+    def test_briefing_returns_partial_results(self):
+        engines = {name: MagicMock() for name in ("scout", "diplomat", "warden", "vault", "knowledge", "goblin")}
+        engines["scout"].get_alerts.side_effect = RuntimeError("scout down")
+        engines["diplomat"].get_active_emissaries.return_value = []
+        engines["diplomat"].get_opportunities.return_value = [{"faction_name": "Council", "percent": 95}]
+        engines["vault"].get_status.return_value = {"summary": {"unlocked_slots": 5}}
+        engines["knowledge"].get_status.return_value = {"weekly_progress": 100}
+        engines["goblin"].analyze_market.return_value = {"opportunities": [{"item": 1}]}
+
+        briefing = BriefingEngine(**engines).generate_briefing()
+
+        self.assertEqual(briefing["sections"]["scout"]["status"], "error")
+        self.assertEqual(briefing["sections"]["summary"]["status"], "error")  # summary reads scout alerts
+        self.assertEqual(briefing["sections"]["market"]["status"], "ok")
+        self.assertEqual(briefing["market"], [{"item": 1}])
+        self.assertEqual([item["source"] for item in briefing["action_items"]], ["Diplomat"])
+
+if __name__ == '__main__':
+    unittest.main()
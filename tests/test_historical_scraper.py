@@ -0,0 +1,149 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from historical_scraper import UndermineJournalScraper, HistoricalDataImporter
+from utils.http_fetch import TokenBucket
+
+class HistoryHandler(BaseHTTPRequestHandler):
+    """Stand-in for TheUndermineJournal history API"""
+    requests_seen = []
+    fail_items = set()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        item_id = int(query['item'][0])
+        self.requests_seen.append(item_id)
+        if item_id in self.fail_items:
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps({"stats": [
+            {"when": int(time.time()) - 3600, "price": item_id * 10, "quantity": 5},
+        ]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestUndermineBulkScrape(unittest.TestCase):
+    def setUp(self):
+        HistoryHandler.requests_seen = []
+        HistoryHandler.fail_items = set()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), HistoryHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmpdir.name, 'checkpoint.json')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def _scraper(self):
+        return UndermineJournalScraper(
+            base_url=f"http://127.0.0.1:{self.server.server_port}",
+            cache_dir=os.path.join(self.tmpdir.name, 'cache'),
+            rate=1000, workers=4,
+        )
+
+    def test_bulk_scrape_streams_results(self):
+        streamed = {}
+        results = self._scraper().bulk_scrape_items(
+            list(range(1, 21)), on_result=lambda i, h: streamed.setdefault(i, h))
+        
+        self.assertEqual(len(results), 20)
+        self.assertEqual(streamed.keys(), results.keys())
+        self.assertEqual(results[7][0]['price'], 70)
+
+    def test_responses_are_cached_per_day(self):
+        self._scraper().bulk_scrape_items([1, 2, 3])
+        self._scraper().bulk_scrape_items([1, 2, 3])
+        
+        self.assertEqual(sorted(HistoryHandler.requests_seen), [1, 2, 3])
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        def interrupt(item_id, history):
+            if item_id == 3:
+                raise KeyboardInterrupt
+        scraper = UndermineJournalScraper(
+            base_url=f"http://127.0.0.1:{self.server.server_port}",
+            cache_dir=None, rate=1000, workers=1,
+        )
+        with self.assertRaises(KeyboardInterrupt):
+            scraper.bulk_scrape_items([1, 2, 3, 4], on_result=interrupt,
+                                      checkpoint_path=self.checkpoint)
+        with open(self.checkpoint) as f:
+            saved = json.load(f)
+        self.assertEqual(saved['done'], ['1', '2'])
+        self.assertLessEqual(saved['started'], time.time())
+        
+        handed_off = []
+        second = scraper.bulk_scrape_items(
+            [1, 2, 3, 4], on_result=lambda i, h: handed_off.append(i),
+            checkpoint_path=self.checkpoint)
+        
+        # Only the items not yet handed off are fetched again
+        self.assertEqual(sorted(handed_off), [3, 4])
+        self.assertEqual(sorted(second), [3, 4])
+        # A completed run removes its checkpoint, so the next run imports again
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_run_with_failures_clears_checkpoint(self):
+        HistoryHandler.fail_items = {4}
+        first = self._scraper().bulk_scrape_items(
+            [1, 2, 3, 4], on_result=lambda i, h: None, checkpoint_path=self.checkpoint)
+        
+        self.assertNotIn(4, first)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_stale_checkpoint_is_ignored(self):
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'started': time.time() - UndermineJournalScraper.CHECKPOINT_MAX_AGE - 60,
+                       'done': ['1', '2']}, f)
+        
+        results = self._scraper().bulk_scrape_items(
+            [1, 2, 3], on_result=lambda i, h: None, checkpoint_path=self.checkpoint)
+        
+        self.assertEqual(sorted(results), [1, 2, 3])
+
+class TestTokenBucket(unittest.TestCase):
+    def test_rate_is_enforced(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(11):
+            bucket.acquire()
+        # 1 burst token + 10 refills at 50/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+class TestHistoricalDataImporter(unittest.TestCase):
+    @patch('historical_scraper.execute_values')
+    def test_import_price_history_is_batched(self, mock_execute_values):
+        conn = MagicMock()
+        mock_execute_values.side_effect = [[(101,), (102,)], None]
+        history = [
+            {"timestamp": "t1", "price": 10, "quantity": 1},
+            {"timestamp": "t2", "price": 20, "quantity": 2},
+        ]
+        
+        HistoricalDataImporter(conn).import_price_history(5, history)
+        
+        self.assertEqual(mock_execute_values.call_count, 2)
+        item_rows = mock_execute_values.call_args_list[1][0][2]
+        self.assertEqual(item_rows, [(101, 5, 10, 1), (102, 5, 20, 2)])
+        conn.commit.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
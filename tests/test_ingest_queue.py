@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ingest_queue import IngestQueue
+
+class TestIngestQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.processed = []
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def handler(self, source, data):
+        self.processed.append((source, data))
+        return {"size": len(data)}
+
+    def _queue(self, handler=None, start=True):
+        return IngestQueue(handler or self.handler, spool_dir=self.tmpdir.name, start=start)
+
+    def test_upload_is_processed_in_background(self):
+        queue = self._queue()
+        job, accepted = queue.submit("DataStore_Reputations", "DB = {}")
+        self.assertTrue(accepted)
+        self.assertTrue(queue.join(timeout=5))
+
+        self.assertEqual(self.processed, [("DataStore_Reputations", "DB = {}")])
+        done = queue.job(job["id"])
+        self.assertEqual((done["status"], done["result"]), ("done", {"size": 7}))
+        self.assertEqual(queue.status()["counters"]["done"], 1)
+
+    def test_identical_reupload_is_skipped_across_restarts(self):
+        queue = self._queue()
+        queue.submit("SavedInstances", "DB = {1}")
+        queue.join(timeout=5)
+
+        _, accepted = self._queue().submit("SavedInstances", "DB = {1}")
+        self.assertFalse(accepted)
+        _, accepted = self._queue().submit("SavedInstances", "DB = {2}")
+        self.assertTrue(accepted)
+
+    def test_newer_upload_supersedes_queued_one(self):
+        queue = self._queue(start=False)
+        old, _ = queue.submit("DeepPockets", "DB = {old}")
+        new, _ = queue.submit("DeepPockets", "DB = {new}")
+        queue.start()
+        queue.join(timeout=5)
+
+        self.assertEqual(self.processed, [("DeepPockets", "DB = {new}")])
+        self.assertEqual(queue.job(old["id"])["status"], "superseded")
+        self.assertEqual(queue.job(new["id"])["status"], "done")
+
+    def test_failed_job_is_set_aside_not_retried(self):
+        def broken(source, data):
+            raise ValueError("Failed to parse Lua data")
+
+        queue = self._queue(broken)
+        job, _ = queue.submit("DataStore_Reputations", "DB = {")
+        queue.join(timeout=5)
+        failed = queue.job(job["id"])
+        self.assertEqual((failed["status"], failed["error"]), ("failed", "Failed to parse Lua data"))
+
+        failed_dir = os.path.join(self.tmpdir.name, "failed")
+        payload = f"{job['id']}__DataStore_Reputations.lua"
+        self.assertEqual(sorted(os.listdir(failed_dir)), [payload, f"{payload}.error"])
+        with open(os.path.join(failed_dir, f"{payload}.error")) as f:
+            self.assertEqual(f.read(), "Failed to parse Lua data")
+
+        restarted = self._queue()
+        restarted.join(timeout=5)
+        self.assertEqual(self.processed, [])
+        self.assertIsNone(restarted.job(job["id"]))
+
+    def test_one_job_per_source_at_a_time(self):
+        active, overlap = set(), []
+        release = threading.Event()
+
+        def slow(source, data):
+            if source in active:
+                overlap.append(source)
+            active.add(source)
+            release.wait(0.05)
+            active.discard(source)
+            return {}
+
+        queue = IngestQueue(slow, spool_dir=self.tmpdir.name, workers=4)
+        for i in range(6):
+            queue.submit("DataStore_Reputations", f"DB = {{{i}}}")
+            queue.submit(f"Other{i}", "DB = {}")
+        queue.join(timeout=5)
+        self.assertEqual(overlap, [])
+
+if __name__ == '__main__':
+    unittest.main()
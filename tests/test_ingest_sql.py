@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ingest_sql
+
+
+def inventory(stacks):
+    return {"global": {"Inventory": stacks}}
+
+
+class TestIngestSql(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.patcher = patch.object(ingest_sql, 'DB_FILE', os.path.join(self.tmpdir.name, 'holocron.db'))
+        self.patcher.start()
+        ingest_sql.init_db()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def _rows(self, sql):
+        conn = ingest_sql.get_db_connection()
+        try:
+            return [tuple(row) for row in conn.execute(sql)]
+        finally:
+            conn.close()
+
+    def test_wal_mode(self):
+        self.assertEqual(self._rows("PRAGMA journal_mode"), [("wal",)])
+
+    def test_reputation_history_is_change_only(self):
+        data = {"global": {"Characters": {"A": {"Factions": {"2600": {"earned": 100}, "2601": [0, 50]}}}}}
+        self.assertEqual(ingest_sql.ingest_reputations(data), {"changed": 2})
+        self.assertEqual(ingest_sql.ingest_reputations(data), {"changed": 0})
+
+        data["global"]["Characters"]["A"]["Factions"]["2600"]["earned"] = 150
+        self.assertEqual(ingest_sql.ingest_reputations(data), {"changed": 1})
+        self.assertEqual(self._rows("SELECT faction_id, reputation_amount FROM reputation_history ORDER BY id"),
+                         [(2600, 100), (2601, 50), (2600, 150)])
+
+    def test_inventory_diff_keeps_unchanged_stacks(self):
+        stacks = {"A - Realm": [{"id": 1, "count": 20}, {"id": 1, "count": 20}, {"id": 2, "count": 5}],
+                  "B - Realm": [{"id": 3, "count": 1}]}
+        ingest_sql.ingest_inventory(inventory(stacks))
+        before = dict(self._rows("SELECT rowid, item_id FROM inventory"))
+
+        self.assertEqual(ingest_sql.ingest_inventory(inventory(stacks)), {"added": 0, "removed": 0})
+
+        stacks["A - Realm"][2]["count"] = 6
+        del stacks["B - Realm"]
+        self.assertEqual(ingest_sql.ingest_inventory(inventory(stacks)), {"added": 1, "removed": 1})
+        after = self._rows("SELECT rowid, character_guid, item_id, count FROM inventory ORDER BY item_id, rowid")
+        self.assertEqual([r[1:] for r in after],
+                         [("A - Realm", 1, 20), ("A - Realm", 1, 20), ("A - Realm", 2, 6)])
+        self.assertTrue(all(before.get(r[0]) == 1 for r in after[:2]))
+
+    def test_failed_step_rolls_back_alone(self):
+        with ingest_sql.transaction() as conn:
+            ingest_sql.ingest_quests({"global": {"Quests": {"A": [1, 2]}}}, conn)
+            # Mounts are written before the malformed heirloom list fails the step
+            ingest_sql.ingest_collections({"global": {"Mounts": {"A": [7]}, "Heirlooms": {"A": 5}}}, conn)
+            ingest_sql.ingest_recipes({"global": {"Recipes": {"A": {"171": {"recipes": [9]}}}}}, conn)
+        self.assertEqual(self._rows("SELECT COUNT(*) FROM completed_quests"), [(2,)])
+        self.assertEqual(self._rows("SELECT COUNT(*) FROM mounts"), [(0,)])
+        self.assertEqual(self._rows("SELECT COUNT(*) FROM recipes"), [(1,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import time
+from enum import IntEnum
+from unittest.mock import MagicMock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from combat_log_parser import parse_line
+from led_output import CorsairDevice, LedOutput, MockDevice, parse_keybinds
+from lumos import CorsairController
+from skillweaver_engine import SkillWeaverEngine
+
+
+class TestLedOutput(unittest.TestCase):
+    def setUp(self):
+        self.device = MockDevice()
+        self.output = LedOutput(self.device, autostart=False)
+
+    def frames(self):
+        return [frame for _, frame in self.device.frames]
+
+    def test_updates_between_ticks_coalesce(self):
+        for value in range(100):
+            self.output.set("lumos.state", (value, 0, 0))
+        self.assertTrue(self.output.tick())
+        self.assertFalse(self.output.tick())            # nothing changed: no device write
+        self.output.set("lumos.state", (99, 0, 0))
+        self.assertFalse(self.output.tick())
+        self.assertEqual(self.frames(), [{"all": (99, 0, 0)}])
+        self.assertEqual(self.output.counters["updates"], 101)
+
+    def test_flash_overrides_state_until_it_expires(self):
+        lumos = CorsairController(self.output)
+        lumos.set_all_leds(255, 0, 0)
+        started = time.monotonic()
+        lumos.flash(255, 255, 255, 0.05)
+        self.assertLess(time.monotonic() - started, 0.01)   # producers never wait on the device
+        self.output.tick()
+        time.sleep(0.06)
+        self.output.tick()
+        self.assertEqual(self.frames(), [{"all": (255, 255, 255)}, {"all": (255, 0, 0)}])
+
+    def test_layers_target_keys_by_priority(self):
+        self.output.set("lumos.state", (10, 10, 10))
+        self.output.set("skillweaver.suggestion", {"BLOODTHIRST": (0, 255, 0)})
+        self.output.set("alert", {"BLOODTHIRST": (255, 0, 0)}, priority=5)
+        self.output.set("low", {"BLOODTHIRST": (1, 1, 1)}, priority=-1)
+        self.assertEqual(self.output.compose(), {"all": (10, 10, 10), "BLOODTHIRST": (255, 0, 0)})
+
+    def test_output_thread_is_frame_limited(self):
+        output = LedOutput(self.device, fps=50)
+        started = time.monotonic()
+        for value in range(2000):
+            output.set("lumos.state", (value % 256, 0, 0))
+        time.sleep(0.1)
+        output.stop()
+        elapsed = time.monotonic() - started
+        self.assertLessEqual(len(self.device.frames), elapsed * 50 + 2)
+        self.assertEqual(self.frames()[-1], {"all": (1999 % 256, 0, 0)})
+
+    def test_skillweaver_publishes_only_changed_suggestions(self):
+        engine = SkillWeaverEngine(output=self.output)
+        energize = ('10/18 21:00:00.000  SPELL_ENERGIZE,Player-1-0001,"YourCharacterName",0x511,0x0,'
+                    'Player-1-0001,"YourCharacterName",0x511,0x0,23881,"Bloodthirst",0x1,{},0,1,100')
+        for amount in (10, 10, 10, 60):
+            engine._process_event(parse_line(energize.format(amount)))
+        self.assertEqual(engine.state.rage, 90)
+        self.assertEqual(self.output.counters["updates"], 2)     # BLOODTHIRST, then RAMPAGE
+        self.assertEqual(self.output.compose(), {"RAMPAGE": (255, 0, 0)})
+
+
+    def test_corsair_device_lights_bound_keys(self):
+        Led = IntEnum("CorsairLedId", ["K_1", "K_2", "K_Q", "Logo"])
+        sdk = MagicMock()
+        sdk.get_device_count.return_value = 2
+        sdk.get_led_positions_by_device_index.side_effect = lambda i: (
+            {Led.K_1: (0, 0), Led.K_2: (1, 0), Led.K_Q: (0, 1)} if i == 0 else {Led.Logo: (0, 0)})
+        device = CorsairDevice(sdk, keybinds=parse_keybinds("BLOODTHIRST=1, rampage=q"))
+        self.assertEqual(parse_keybinds("a=q,broken"), {"a": "Q"})
+
+        device.show({"BLOODTHIRST": (0, 255, 0)})
+        sdk.set_led_colors_buffer_by_device_index.assert_called_once_with(0, {Led.K_1: (0, 255, 0)})
+
+        sdk.reset_mock()
+        device.show({"all": (9, 9, 9), "rampage": (255, 0, 0)})
+        calls = [c.args for c in sdk.set_led_colors_buffer_by_device_index.call_args_list]
+        self.assertEqual(calls, [(0, {Led.K_1: (9, 9, 9), Led.K_2: (9, 9, 9), Led.K_Q: (255, 0, 0)}),
+                                 (1, {Led.Logo: (9, 9, 9)})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import random
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sandbox import Sandbox
+from sim_queue import SimQueue
+from loadout_lottery import LoadoutLottery
+
+BASE = 'druid="Base"\nlevel=80\nspec=balance\ntalents=BASE'
+SPREAD = 20000.0   # per-iteration DPS standard deviation
+
+
+class TestLoadoutLottery(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        # True DPS per talent string: a clear winner, a close runner-up, a long tail
+        self.truth = {"BASE": 50000.0, "T0": 61000.0, "T1": 60000.0}
+        self.truth.update({f"T{i}": 40000.0 + 100 * i for i in range(2, 60)})
+        self.sims = []
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def fake(self, profile, iterations, workdir, threads):
+        """SimC stand-in: noisy DPS around the truth, error shrinking with iterations"""
+        rng = random.Random(f"{profile}|{iterations}")
+        actors = [("Base", "BASE")]
+        for line in profile.splitlines():
+            if line.startswith("copy="):
+                actors.append((line[5:], None))
+            elif line.startswith("talents=") and actors[-1][1] is None:
+                actors[-1] = (actors[-1][0], line[8:])
+        self.sims.append((iterations, len(actors) - 1))
+        error = SPREAD / iterations ** 0.5
+        players = [{"name": name, "dps": rng.gauss(self.truth[talents], error), "dps_min": 0, "dps_max": 0,
+                    "dps_error": error, "talents": talents, "gear_ilvl": 610, "timestamp": 1}
+                   for name, talents in actors]
+        return {"players": players}
+
+    def lottery(self, workers=4):
+        sandbox = Sandbox(version="test")
+        queue = SimQueue(sandbox, workers=workers, cache_dir=self.tmpdir.name, simulate=self.fake)
+        return LoadoutLottery(sandbox, queue)
+
+    def test_adaptive_search_finds_winner_with_less_compute(self):
+        lottery = self.lottery()
+        talents = [f"T{i}" for i in range(60)]
+        winner = lottery.run_adaptive(BASE, talents, shard_size=10)
+
+        self.assertEqual((winner["name"], winner["talents"]), ("Loadout_1", "T0"))
+        self.assertEqual(set(winner), {"name", "dps", "dps_min", "dps_max", "dps_error", "talents",
+                                       "gear_ilvl", "timestamp"})
+        search = lottery.last_search
+        self.assertTrue(search["separated"])
+        self.assertLess(search["actor_iterations"], search["fixed_actor_iterations"])
+        # Round one sims everything at the start iterations, sharded across workers
+        first = [count for iterations, count in self.sims if iterations == 100]
+        self.assertEqual(sum(first), 60)
+        self.assertGreater(len(first), 1)
+        self.assertTrue(all(count <= 10 for _, count in self.sims))
+        # Later rounds only re-sim survivors
+        self.assertLess(search["rounds"][1]["simulated"], 60)
+
+    def test_stops_at_max_iterations_when_inseparable(self):
+        self.truth["T1"] = self.truth["T0"]
+        lottery = self.lottery(workers=2)
+        winner = lottery.run_adaptive(BASE, ["T0", "T1", "T2"], max_iterations=400)
+
+        self.assertIn(winner["name"], ("Loadout_1", "Loadout_2"))
+        self.assertFalse(lottery.last_search["separated"])
+        self.assertEqual([r["iterations"] for r in lottery.last_search["rounds"]], [100, 200, 400])
+
+
+if __name__ == '__main__':
+    unittest.main()
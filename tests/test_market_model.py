@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from goblin_training import (
+    MarketPredictionModel, MarketModelLoader, get_mock_training_data
+)
+
+class TestMarketPredictionModel(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'model.npz')
+        self.model = MarketPredictionModel()
+        self.model.train(get_mock_training_data())
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_save_load_roundtrip(self):
+        self.model.save_model(self.path)
+        loaded = MarketPredictionModel()
+        loaded.load_model(self.path)
+        
+        self.assertTrue(loaded.trained)
+        self.assertEqual(loaded.event_type_weights, self.model.event_type_weights)
+        
+        # Artifact must be loadable without pickle support
+        with np.load(self.path, allow_pickle=False) as data:
+            self.assertIn('header', data.files)
+
+    def test_predict_batch_mixed_event_types(self):
+        batch = self.model.predict_batch(['raid', 'unknown', 'holiday'], [1, 2, 3])
+        
+        self.assertEqual(batch['known'].tolist(), [True, False, True])
+        self.assertEqual(batch['predicted_change_pct'].tolist(), [135.0, 0.0, 45.0])
+        self.assertEqual(batch['buy'].tolist(), [True, False, True])
+
+    def test_predict_matches_batch(self):
+        preds = self.model.predict('patch', [10, 20])
+        
+        self.assertEqual(len(preds), 2)
+        self.assertEqual(preds[0]['item_id'], 10)
+        self.assertEqual(preds[0]['predicted_change_pct'], 250.0)
+        self.assertEqual(preds[0]['action'], "BUY NOW")
+        self.assertEqual(self.model.predict('unknown', [10]), [])
+
+    def test_loader_is_lazy_and_hot_reloads(self):
+        loader = MarketModelLoader(self.path)
+        self.assertIsNone(loader.get())
+        
+        self.model.save_model(self.path)
+        first = loader.get()
+        self.assertIs(loader.get(), first)
+        
+        # Retrain with a single event type and overwrite the artifact
+        retrained = MarketPredictionModel()
+        retrained.train(get_mock_training_data()[:1])
+        retrained.save_model(self.path)
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 1))
+        
+        second = loader.get()
+        self.assertIsNot(second, first)
+        self.assertEqual(list(second.event_type_weights), ['class_change'])
+
+if __name__ == '__main__':
+    unittest.main()
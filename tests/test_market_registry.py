@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from goblin_market_registry import MarketRegistry, MarketShard, PriceBook, ScanLoader, ShardKey
+
+# Copper listings per realm: (item_id, price, quantity)
+LISTINGS = {
+    'area 52': [(198765, 450000, 10), (198765, 500000, 10), (194820, 150000, 4)],
+    'illidan': [(198765, 400000, 20), (200111, 2000000, 1)],
+}
+
+class FakeLoader:
+    def __init__(self):
+        self.loaded = []
+
+    def __call__(self, key):
+        self.loaded.append(key)
+        rows = LISTINGS.get(key.realm, [])
+        if not rows:
+            return PriceBook.empty()
+        return PriceBook.from_listings(*zip(*rows))
+
+    def discover(self):
+        return [ShardKey('us', realm, 'horde') for realm in LISTINGS]
+
+class TestPriceBook(unittest.TestCase):
+    def test_listings_are_aggregated_per_item(self):
+        book = PriceBook.from_listings(*zip(*LISTINGS['area 52']))
+
+        self.assertEqual(list(book.item_ids), [194820, 198765])
+        entry = book.to_dict()[198765]
+        self.assertEqual(entry['min_buyout'], 450000)
+        self.assertEqual(entry['market_value'], 475000)
+        self.assertEqual(entry['quantity'], 20)
+        self.assertEqual(book.get_market_value(198765), 47)
+        self.assertEqual(book.get_market_value(1), 0)
+
+    def test_merge_weights_by_quantity(self):
+        books = [PriceBook.from_listings(*zip(*rows)) for rows in LISTINGS.values()]
+        merged = PriceBook.merge(books).to_dict()
+
+        self.assertEqual(sorted(merged), [194820, 198765, 200111])
+        self.assertEqual(merged[198765]['min_buyout'], 400000)
+        self.assertEqual(merged[198765]['quantity'], 40)
+        # (475000 * 20 + 400000 * 20) / 40
+        self.assertEqual(merged[198765]['market_value'], 437500)
+
+class TestMarketRegistry(unittest.TestCase):
+    def test_shards_load_lazily_once(self):
+        loader = FakeLoader()
+        registry = MarketRegistry(loader)
+
+        self.assertEqual(loader.loaded, [])
+        first = registry.get('US', 'Area 52', 'Horde')
+        second = registry.get('us', 'area 52', 'horde')
+
+        self.assertIs(first, second)
+        self.assertEqual(len(loader.loaded), 1)
+        self.assertEqual(registry.stats['hits'], 1)
+
+    def test_shard_analysis_uses_its_own_prices(self):
+        registry = MarketRegistry(FakeLoader())
+        shard = registry.get('us', 'area 52', 'horde')
+
+        self.assertEqual(shard.engine.tsm_engine.get_market_value(198765), 47)
+        self.assertIs(shard.analysis(), shard.analysis())
+
+    def test_lru_eviction_under_budget(self):
+        loader = FakeLoader()
+        registry = MarketRegistry(loader, memory_budget=MarketShard.BASE_BYTES * 2 + 1024)
+
+        registry.get('us', 'area 52', 'horde')
+        registry.get('us', 'illidan', 'horde')
+        registry.get('us', 'area 52', 'horde')  # area 52 is now most recent
+        registry.get('us', 'stormrage', 'horde')
+
+        resident = {s['realm'] for s in registry.loaded()}
+        self.assertEqual(resident, {'area 52', 'stormrage'})
+        self.assertEqual(registry.stats['evictions'], 1)
+
+    def test_region_prices_cover_every_known_shard(self):
+        loader = FakeLoader()
+        registry = MarketRegistry(loader)
+        registry.get('us', 'area 52', 'horde')
+
+        book, keys = registry.region_prices('us', 'horde')
+
+        self.assertEqual([k.realm for k in keys], ['area 52', 'illidan'])
+        self.assertEqual(book.to_dict(), PriceBook.merge(
+            [PriceBook.from_listings(*zip(*rows)) for rows in LISTINGS.values()]).to_dict())
+        # The resident shard lends its book; the cold one is built for the merge and not kept
+        self.assertEqual([k.realm for k in loader.loaded], ['area 52', 'illidan'])
+        self.assertEqual({s['realm'] for s in registry.loaded()}, {'area 52'})
+        self.assertEqual(registry.stats['loads'], 1)
+
+        book, keys = registry.region_prices('eu')
+        self.assertEqual((book.to_dict(), keys), ({}, []))
+
+class TestScanLoader(unittest.TestCase):
+    def test_member_realms_map_to_connected_group(self):
+        conn = MagicMock()
+        conn.cursor.return_value.fetchall.return_value = [(198765, 10000, 2)]
+        loader = ScanLoader(lambda: conn, realm_groups={"Area 52": ["Area 52", "Blade's Edge"]})
+        registry = MarketRegistry(loader)
+
+        shard = registry.get('us', "Blade's Edge", 'Horde')
+
+        self.assertEqual(shard.key, ShardKey('us', 'area 52', 'horde'))
+        params = conn.cursor.return_value.execute.call_args[0][1]
+        self.assertEqual(params, (['area 52', "blade's edge"], 'horde'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from goblin_news_engine import (
+    WoWNewsScraper, PredictiveMarketEngine, NewsIngestionScheduler
+)
+
+WOWHEAD_PAGE = """
+<html><body>
+<article><h2>Fire Mage buffed in latest hotfix</h2><a href="/news/1">read</a></article>
+<article><h2>New raid opens next week</h2><a href="/news/2">read</a></article>
+</body></html>
+"""
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves fixture news pages with ETag support"""
+    pages = {}
+    hits = []
+
+    def do_GET(self):
+        body, etag = self.pages.get(self.path, ("<html></html>", '"empty"'))
+        self.hits.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+class TestNewsIngestionScheduler(unittest.TestCase):
+    def setUp(self):
+        FixtureHandler.pages = {"/wowhead": (WOWHEAD_PAGE, '"v1"')}
+        FixtureHandler.hits = []
+        self.server = HTTPServer(('127.0.0.1', 0), FixtureHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        
+        engine = PredictiveMarketEngine()
+        engine.news_scraper = WoWNewsScraper({
+            "wowhead": f"{base}/wowhead",
+            "mmochampion": f"{base}/mmo",
+            "blizzard": f"{base}/blizzard",
+        })
+        self.scheduler = NewsIngestionScheduler(engine, interval=60)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_snapshot_published_after_first_cycle(self):
+        self.assertIsNone(self.scheduler.get_snapshot())
+        self.assertEqual(self.scheduler.run_once(), 2)
+        
+        snapshot = self.scheduler.get_snapshot()
+        reasons = [p['reason'] for p in snapshot['predictions']]
+        self.assertTrue(any('Mage buff' in r for r in reasons))
+        self.assertTrue(any('Raid event' in r for r in reasons))
+
+    def test_unchanged_sources_use_conditional_requests(self):
+        self.scheduler.run_once()
+        first = self.scheduler.get_snapshot()
+        
+        self.assertEqual(self.scheduler.run_once(), 0)
+        
+        # Second cycle sends the stored ETag and gets 304s back
+        second_hits = FixtureHandler.hits[3:]
+        self.assertIn(('/wowhead', '"v1"'), second_hits)
+        self.assertIs(self.scheduler.get_snapshot(), first)
+
+    def test_only_new_articles_are_analyzed(self):
+        self.scheduler.run_once()
+        before = len(self.scheduler.get_snapshot()['predictions'])
+        FixtureHandler.pages["/wowhead"] = (
+            WOWHEAD_PAGE.replace("</body>",
+                "<article><h2>Alchemy recipes reworked</h2><a href='/news/3'>x</a></article></body>"),
+            '"v2"',
+        )
+        
+        analyzed = []
+        analyzer = self.scheduler.engine.news_analyzer
+        original = analyzer.analyze_news
+        analyzer.analyze_news = lambda articles: analyzed.extend(articles) or original(articles)
+        
+        self.assertEqual(self.scheduler.run_once(), 1)
+        self.assertEqual([a['title'] for a in analyzed], ["Alchemy recipes reworked"])
+        self.assertEqual(len(self.scheduler.get_snapshot()['predictions']), before + 1)
+
+    def test_failed_analysis_is_retried(self):
+        analyzer = self.scheduler.engine.news_analyzer
+        original = analyzer.analyze_news
+
+        def flaky(articles):
+            if articles[0]['title'] == "New raid opens next week":
+                raise RuntimeError("analyzer down")
+            return original(articles)
+
+        analyzer.analyze_news = flaky
+        self.assertEqual(self.scheduler.run_once(), 1)
+        self.assertEqual(self.scheduler.stats["errors"], 1)
+
+        analyzer.analyze_news = original
+        self.assertEqual(self.scheduler.run_once(), 1)
+        reasons = [p['reason'] for p in self.scheduler.get_snapshot()['predictions']]
+        self.assertTrue(any('Raid event' in r for r in reasons))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pet_battle_sim import (PetBattleSimulator, compile_battle, parse_script, run_battles, validate_encounter,
+                            wilson_interval, _pet_entry)
+
+SCRIPT = "Ikky\nBlack Claw\nFlock\nSwap to MPD\nDecoy\nBombardment"
+
+# One pet each, no randomness: 20 * (1 + 200/20) = 220 damage a round
+DUEL = {"name": "Duel", "pets": [{"name": "Dummy", "family": "critter", "health": 1000, "power": 200, "speed": 1,
+                                  "abilities": [{"name": "Poke", "family": "critter", "base": 20}]}]}
+
+
+class TestPetBattleSim(unittest.TestCase):
+    def test_script_parsing(self):
+        pets = [_pet_entry(1266), _pet_entry(1387)]
+        lead, steps = parse_script("Ikky\nBlack Claw\nSwap to MPD\nDecoy\n\nMPD", pets)
+        self.assertEqual(lead, 1)
+        self.assertEqual(steps, [(0, 1, 1), (1, 0, -1), (0, 0, 1), (1, 0, -1)])
+        with self.assertRaises(ValueError):
+            parse_script("Fireball", pets)
+
+    def test_deterministic_duel(self):
+        # Leveling pet (critter, 250 power) hits 20 * 13.5 = 270 a round and is faster:
+        # the dummy (1000 hp) dies by round 4 (sooner with crits), having dealt at most 660
+        compiled = compile_battle([0], DUEL)
+        totals = run_battles(compiled, 50, seed=1)
+        self.assertEqual(totals["wins"], 50)
+        self.assertEqual(totals["battles"], 50)
+        self.assertEqual(totals["timeouts"], 0)
+        self.assertLessEqual(totals["rounds_won"], 4 * totals["wins"])
+
+    def test_simulate_memoizes_and_reports_interval(self):
+        sim = PetBattleSimulator()
+        result = sim.simulate([1387, 1266, 0], "squirt", SCRIPT, battles=2000)
+        self.assertFalse(result["cached"])
+        low, high = result["confidence_interval"]
+        self.assertLessEqual(low, result["win_probability"])
+        self.assertLessEqual(result["win_probability"], high)
+        self.assertGreater(result["win_probability"], 0.9)
+        self.assertGreater(result["avg_rounds"], 3)
+
+        again = sim.simulate([1387, 1266, 0], "squirt", SCRIPT + "\n", battles=500)
+        self.assertTrue(again["cached"])
+        self.assertEqual(again["win_probability"], result["win_probability"])
+        self.assertFalse(sim.simulate([1387, 1266, 0], "squirt", SCRIPT, battles=4000)["cached"])
+
+        # A lone leveling pet has no chance against three trainer pets
+        self.assertLess(sim.simulate([0], "tiun", "", battles=500)["win_probability"], 0.05)
+
+    def test_process_pool_matches_batch_shape(self):
+        sim = PetBattleSimulator()
+        result = sim.simulate([1117, 1238, 648], "tiun", "", battles=600, workers=2, seed=7)
+        self.assertEqual(result["battles"], 600)
+        self.assertTrue(0.0 <= result["win_probability"] <= 1.0)
+
+    def test_memo_is_shared_across_threads(self):
+        sim = PetBattleSimulator(memo_size=4)
+        teams = [[species] for species in (1387, 1266, 1117, 1238, 648, 0)]
+        with ThreadPoolExecutor(6) as pool:
+            list(pool.map(lambda i: sim.simulate(teams[i % 6], DUEL, battles=20), range(60)))
+        self.assertEqual(len(sim.memo), 4)
+        self.assertEqual(sim.counters["simulated"] + sim.counters["memo_hits"], 60)
+
+    def test_malformed_encounter_is_rejected(self):
+        self.assertIs(validate_encounter(DUEL), DUEL)
+        for npc_data in ({}, {"pets": []}, {"pets": [{"name": "Dummy"}]},
+                         {"pets": [dict(DUEL["pets"][0], family="robot")]}):
+            with self.assertRaises(ValueError):
+                compile_battle([0], npc_data)
+
+    def test_wilson_interval(self):
+        low, high = wilson_interval(0, 100)
+        self.assertEqual(low, 0.0)
+        self.assertGreater(high, 0.0)
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual((low + high) / 2, 0.5, places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
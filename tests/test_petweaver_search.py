@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pet_battle_sim import ENCOUNTERS
+from petweaver_search import GeneticSearch, SearchJobs, evaluate, genome_key
+
+
+class TestPetweaverSearch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def search(self, **kwargs):
+        params = dict(population=12, battles=100, workers=1, checkpoint_dir=self.tmpdir.name)
+        params.update(kwargs)
+        return GeneticSearch("tiun", ENCOUNTERS["tiun"], **params)
+
+    def test_search_improves_and_caches_fitness(self):
+        search = self.search()
+        search.run(4)
+        history = search.history
+        self.assertEqual([r["generation"] for r in history], [0, 1, 2, 3])
+        self.assertGreaterEqual(history[-1]["best_fitness"], history[0]["best_fitness"])
+        # Every genome is simulated once: elites and repeats come from the cache
+        self.assertEqual(sum(r["evaluated"] for r in history), len(search.fitness))
+        self.assertLess(len(search.fitness), 12 * 4)
+
+        best = search.best(2)
+        self.assertGreaterEqual(best[0]["fitness"], best[1]["fitness"])
+        self.assertEqual(len({pet["species_id"] for pet in best[0]["team"]}), 3)
+        self.assertEqual(best[0]["win_probability"], evaluate(best[0]["genome"], ENCOUNTERS["tiun"], 100)["win_probability"])
+
+    def test_resume_from_checkpoint(self):
+        self.search().run(2)
+        resumed = self.search()
+        self.assertTrue(resumed.resumed)
+        self.assertEqual(resumed.generation, 2)
+        known = set(resumed.fitness)
+        resumed.run(3)
+        self.assertEqual(len(resumed.history), 3)
+
+        # Resuming reproduces an uninterrupted run exactly
+        straight = self.search(checkpoint_dir=None)
+        straight.run(3)
+        self.assertEqual(straight.population, resumed.population)
+        self.assertTrue(known <= set(straight.fitness))
+        self.assertFalse(self.search(seed=1).resumed)
+
+    def test_generation_on_process_pool(self):
+        search = self.search(population=6, battles=50, workers=2, checkpoint_dir=None)
+        search.run(1)
+        self.assertEqual(search.history[0]["evaluated"], len(search.fitness))
+        self.assertIn(genome_key(search.best(1)[0]["genome"]), search.fitness)
+        self.assertEqual(search.best(1)[0]["win_probability"],
+                         evaluate(search.best(1)[0]["genome"], ENCOUNTERS["tiun"], 50)["win_probability"])
+
+    def test_background_job_saves_strategies(self):
+        conn = MagicMock()
+        jobs = SearchJobs(connect=lambda: conn, checkpoint_dir=self.tmpdir.name, workers=1)
+        job = jobs.submit("akali", ENCOUNTERS["akali"], generations=2, population=6, battles=50)
+        done = jobs.wait(job["id"], timeout=30)
+        self.assertEqual(done["status"], "done")
+        self.assertEqual(done["generation"], 2)
+        self.assertTrue(done["saved"])
+
+        statements = [call.args[0] for call in conn.cursor.return_value.execute.call_args_list]
+        self.assertIn("DELETE FROM petweaver.strategies", statements[1])
+        inserts = [s for s in statements if s.startswith("INSERT INTO petweaver.strategies")]
+        self.assertEqual(len(inserts), 3)
+        conn.commit.assert_called_once()
+        conn.close.assert_called_once()
+
+        # Same search again: picked up from its checkpoint, nothing left to run
+        again = jobs.wait(jobs.submit("akali", ENCOUNTERS["akali"], generations=2, population=6, battles=50)["id"], 30)
+        self.assertTrue(again["resumed"])
+        self.assertEqual(again["best"][0]["genome"], done["best"][0]["genome"])
+
+    def test_connection_closed_when_save_fails(self):
+        conn = MagicMock()
+        conn.commit.side_effect = RuntimeError("db down")
+        jobs = SearchJobs(connect=lambda: conn, checkpoint_dir=None, workers=1)
+        done = jobs.wait(jobs.submit("akali", ENCOUNTERS["akali"], generations=1, population=4, battles=20)["id"], 30)
+        self.assertEqual(done["status"], "done")
+        self.assertFalse(done["saved"])
+        conn.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
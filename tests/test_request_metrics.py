@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, jsonify
+from request_metrics import RequestMetrics, record_query
+
+class TestRequestMetrics(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.metrics = RequestMetrics(app, statement_budget=5)
+
+        @app.route('/quest/<int:quest_id>')
+        def quest(quest_id):
+            # One lookup per prerequisite, like solve_dependency
+            for _ in range(quest_id):
+                record_query("SELECT required_quest_id\n  FROM codex.quest_dependencies WHERE quest_id = %s", 0.002)
+            return jsonify({"quest": quest_id})
+
+        @app.route('/metrics')
+        def prometheus():
+            return self.metrics.render()
+
+        self.client = app.test_client()
+
+    def test_counts_requests_per_route_template(self):
+        self.client.get('/quest/1')
+        self.client.get('/quest/2')
+        self.client.get('/missing')
+
+        text = self.client.get('/metrics').data.decode()
+        self.assertIn('holocron_requests_total{route="/quest/<int:quest_id>",method="GET",status="200"} 2', text)
+        self.assertIn('holocron_requests_total{route="unmatched",method="GET",status="404"} 1', text)
+        self.assertIn('holocron_request_duration_seconds_count{route="/quest/<int:quest_id>",method="GET"} 2', text)
+        self.assertIn('holocron_request_sql_statements_sum{route="/quest/<int:quest_id>",method="GET"} 3.0', text)
+
+    def test_statement_budget_flags_n_plus_one(self):
+        with patch('builtins.print'):
+            self.client.get('/quest/3')
+            self.client.get('/quest/8')
+
+        self.assertEqual(len(self.metrics.flags), 1)
+        flag = self.metrics.flags[0]
+        self.assertEqual((flag["route"], flag["statements"], flag["repeats"]), ("/quest/<int:quest_id>", 8, 8))
+        self.assertIn("SELECT required_quest_id FROM codex.quest_dependencies", flag["most_repeated"])
+        self.assertIn('holocron_sql_budget_exceeded_total{route="/quest/<int:quest_id>",method="GET"} 1',
+                      self.metrics.render())
+
+    def test_queries_outside_a_request_are_ignored(self):
+        record_query("SELECT 1", 0.1)
+        self.assertEqual(self.metrics.routes, {})
+
+    def test_server_connections_use_instrumented_cursor(self):
+        import server
+        from request_metrics import InstrumentedCursor
+        with patch.dict(os.environ, {'DATABASE_URL': 'postgresql://localhost/holocron'}), \
+             patch('server.psycopg2.connect') as connect:
+            server.get_db_connection()
+        self.assertIs(connect.call_args.kwargs['cursor_factory'], InstrumentedCursor)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, jsonify
+from request_profiler import RequestProfiler
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+class TestRequestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        app = Flask(__name__)
+        self.profiler = RequestProfiler(app, directory=self.tmpdir.name, keep=2, token='')
+
+        @app.route('/slow/<int:n>')
+        def slow(n):
+            busy_loop(0.05)
+            return jsonify({"n": n})
+
+        self.client = app.test_client()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_header_captures_collapsed_stacks(self):
+        self.client.get('/slow/1', headers={'X-Holocron-Profile': 'sample'})
+
+        [entry] = self.profiler.index()
+        self.assertEqual((entry["route"], entry["mode"]), ("/slow/<int:n>", "sample"))
+        self.assertGreater(entry["samples"], 0)
+        with open(self.profiler.path_for(entry["id"])) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(any("busy_loop" in line for line in lines))
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertIn(';', stack)
+        self.assertGreater(int(count), 0)
+
+    def test_armed_route_profiles_next_n_requests(self):
+        self.profiler.arm('/slow/<int:n>', count=2, mode='cprofile')
+        for n in range(3):
+            self.client.get(f'/slow/{n}')
+
+        captures = self.profiler.index()
+        self.assertEqual([c["path"] for c in captures], ["/slow/1", "/slow/0"])
+        self.assertTrue(captures[0]["file"].endswith('.prof'))
+        self.assertTrue(any("busy_loop" in row["function"] for row in captures[0]["top"]))
+        self.assertEqual(self.profiler.armed(), {})
+
+    def test_old_captures_are_rotated_off_disk(self):
+        for n in range(3):
+            self.client.get(f'/slow/{n}', headers={'X-Holocron-Profile': 'sample'})
+        self.assertEqual(len(self.profiler.index()), 2)
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 2)
+
+    def test_remote_clients_need_the_token(self):
+        self.profiler.token = 'secret'
+        self.client.get('/slow/1', headers={'X-Holocron-Profile': 'sample'})
+        self.assertEqual(self.profiler.index(), [])
+
+        self.client.get('/slow/1', headers={'X-Holocron-Profile': 'sample',
+                                            'X-Holocron-Profile-Token': 'secret'})
+        self.assertEqual(len(self.profiler.index()), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, jsonify, request
+from response_cache import ApiCache
+
+class TestApiCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ApiCache(max_bytes=10_000)
+        self.calls = 0
+        app = Flask(__name__)
+
+        @app.route('/prices')
+        @self.cache.cached(ttl=60, tags=('goblin',))
+        def prices():
+            self.calls += 1
+            return jsonify({"realm": request.args.get('realm'), "calls": self.calls})
+
+        @app.route('/item/<int:item_id>')
+        @self.cache.cached(ttl=60)
+        def item(item_id):
+            self.calls += 1
+            if item_id == 0:
+                return jsonify({"error": "not found"}), 404
+            return jsonify({"id": item_id, "blob": "x" * 3000})
+
+        self.client = app.test_client()
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.client.get('/prices?realm=Area-52&faction=horde')
+        second = self.client.get('/prices?faction=horde&realm=Area-52')
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first.get_json(), second.get_json())
+        self.assertEqual(self.cache.stats["hits"], 1)
+        self.assertEqual(self.cache.route_stats["prices"], {"hits": 1, "misses": 1, "not_modified": 0})
+
+    def test_query_args_are_part_of_the_key(self):
+        self.client.get('/prices?realm=Area-52')
+        self.client.get('/prices?realm=Stormrage')
+        self.assertEqual(self.calls, 2)
+
+    def test_conditional_get_returns_304(self):
+        etag = self.client.get('/prices').headers['ETag']
+        response = self.client.get('/prices', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.cache.stats["not_modified"], 1)
+
+    def test_bump_invalidates_tagged_routes(self):
+        etag = self.client.get('/prices').headers['ETag']
+        self.cache.bump('goblin')
+        response = self.client.get('/prices', headers={'If-None-Match': etag})
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_ttl_expiry(self):
+        with patch('response_cache.time.monotonic', return_value=1000.0):
+            self.client.get('/prices')
+        with patch('response_cache.time.monotonic', return_value=1061.0):
+            self.client.get('/prices')
+        self.assertEqual(self.calls, 2)
+
+    def test_errors_are_not_cached(self):
+        self.client.get('/item/0')
+        self.assertEqual(self.client.get('/item/0').status_code, 404)
+        self.assertEqual(self.calls, 2)
+
+    def test_lru_eviction_respects_budget(self):
+        for item_id in (1, 2, 3, 1, 4):  # ~3.3KB each; 1 is touched again, so 2 is evicted
+            self.client.get(f'/item/{item_id}')
+
+        self.assertLessEqual(self.cache.memory_usage(), self.cache.max_bytes)
+        self.assertEqual(self.cache.stats["evictions"], 1)
+        calls = self.calls
+        self.client.get('/item/4')
+        self.assertEqual(self.calls, calls)
+        self.client.get('/item/2')
+        self.assertEqual(self.calls, calls + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from server import app
+from dashboard_engine import DashboardEngine
+from engine_registry import EngineRegistry
 
 class TestHolocronServer(unittest.TestCase):
     def setUp(self):
@@ -51,5 +53,65 @@ class TestHolocronServer(unittest.TestCase):
                                  content_type='application/json')
         self.assertEqual(response.status_code, 400)
 
+    @patch('server.get_pet_searches')
+    def test_petweaver_search_bounds(self, mock_searches):
+        for body in ({"population": 1}, {"population": 201}, {"generations": 0}, {"generations": 201}):
+            response = self.app.post('/api/petweaver/search', json={"encounter_id": "tiun", **body})
+            self.assertEqual(response.status_code, 400, body)
+        mock_searches.assert_not_called()
+
+        mock_searches.return_value.submit.return_value = {"id": "job"}
+        response = self.app.post('/api/petweaver/search', json={"encounter_id": "tiun", "population": 200})
+        self.assertEqual(response.status_code, 202)
+
+    @patch('server.get_db_connection')
+    def test_petweaver_malformed_encounter_is_400(self, mock_get_db):
+        mock_get_db.return_value.cursor.return_value.fetchone.return_value = ("Broken", '{"npcs": []}')
+        response = self.app.post('/api/petweaver/validate_team', json={"encounter_id": "broken", "pets": [1387]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pets", response.json["error"])
+
+    def test_goblin_errors_are_not_cached(self):
+        engine = MagicMock()
+        engine.analyze_market.side_effect = RuntimeError("db down")
+        with patch('server.goblin_engine', engine):
+            for route in ('/api/goblin/prices?fresh=1', '/api/goblin/opportunities?fresh=1'):
+                self.assertEqual(self.app.get(route).status_code, 503, route)
+
+            engine.analyze_market.side_effect = None
+            engine.analyze_market.return_value = {"opportunities": [
+                {"item_id": 1, "market_value": 50, "avg_buyout": 40, "profit": 10}]}
+            response = self.app.get('/api/goblin/prices?fresh=1')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json["prices"], {"1": 50})
+            self.assertEqual(len(self.app.get('/api/goblin/opportunities?fresh=1').json["opportunities"]), 1)
+
+    def test_knowledge_bump_refreshes_dashboard_sections(self):
+        progress = {"percent": 0}
+        knowledge = MagicMock()
+        knowledge.get_checklist.side_effect = lambda *args: {
+            "weekly": {"percent": progress["percent"], "points_earned": 0},
+            "reset": {"days_remaining": 1, "hours_remaining": 2}}
+        knowledge.mark_complete.side_effect = lambda *args: progress.update(percent=100)
+        diplomat = MagicMock()
+        diplomat.get_opportunities.return_value = []
+
+        engines = EngineRegistry()
+        for name in DashboardEngine.SHARED_ENGINES.values():
+            engines.register(name, object)     # other sections fail over to their fallback
+        engines.register('knowledge', lambda: knowledge)
+        engines.register('diplomat', lambda: diplomat)
+        dashboard = DashboardEngine(engines)
+
+        with patch('server.dashboard_engine', dashboard), patch('server.knowledge_tracker', knowledge):
+            summary = self.app.get('/api/dashboard/summary').json
+            self.assertEqual(summary["modules"]["knowledge"]["weekly_progress"], 0)
+
+            response = self.app.post('/api/knowledge/complete', json={"source_id": 1, "character": "Player-1"})
+            self.assertEqual(response.status_code, 200)
+            summary = self.app.get('/api/dashboard/summary').json
+            self.assertEqual(summary["modules"]["knowledge"]["weekly_progress"], 100)
+            self.assertEqual(summary["sections"]["knowledge"]["status"], "ok")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import stat
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sandbox import Sandbox
+from sim_queue import SimQueue, SimQueueFull
+
+# Stand-in SimC binary: prints its banner without arguments, else writes json2=
+FAKE_SIMC = '''#!{python}
+import json, os, sys
+if len(sys.argv) < 2:
+    print("SimulationCraft 1105-01 for World of Warcraft 11.0.5")
+    sys.exit(0)
+options = dict(line.split("=", 1) for line in open(sys.argv[1]).read().splitlines() if "=" in line)
+players = [{{"name": "Base", "talents": options.get("talents"), "gear_ilvl_mean": 610,
+            "collected_data": {{"dps": {{"mean": 1000.0 * len(options), "min": 1.0, "max": 2.0}}}}}}]
+report = {{"sim": {{"players": players, "options": {{"timestamp": 1, "iterations": int(options["iterations"]),
+          "max_time": 300}}, "statistics": {{"raid_dps": {{"mean": 1000.0 * len(options)}}}}}}}}
+json.dump(report, open(options["json2"], "w"))
+'''
+
+
+class TestSimQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.tmpdir.name, "cache")
+        self.sandbox = Sandbox(version="1105-01")
+        self.workdirs = []
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def fake(self, profile, iterations, workdir, threads):
+        self.workdirs.append(workdir)
+        with open(os.path.join(workdir, "input.simc"), 'w') as f:   # would collide in a shared dir
+            f.write(profile)
+        return {"players": [{"name": "Base", "dps": float(len(profile))}], "raid_dps": float(len(profile))}
+
+    def test_jobs_run_in_own_dirs_and_repeat_from_cache(self):
+        queue = SimQueue(self.sandbox, workers=2, cache_dir=self.cache, simulate=self.fake)
+        with ThreadPoolExecutor(4) as pool:
+            jobs = list(pool.map(lambda p: queue.submit(p)[0], ["warrior=a", "mage=bb", "druid=ccc"]))
+        results = [queue.wait(job["id"], timeout=5) for job in jobs]
+        self.assertEqual([r["result"]["raid_dps"] for r in results], [9.0, 7.0, 9.0])
+        self.assertEqual(len(set(self.workdirs)), 3)
+
+        job, cached = queue.submit("mage=bb  \n", iterations=1000)   # same content, trailing whitespace
+        self.assertTrue(cached)
+        self.assertEqual((job["status"], job["result"]["raid_dps"]), ("done", 7.0))
+        self.assertEqual(len(self.workdirs), 3)
+        rerun, cached = queue.submit("mage=bb", iterations=5000)         # iterations are part of the key
+        self.assertFalse(cached)
+        self.assertEqual(queue.wait(rerun["id"], timeout=5)["status"], "done")
+
+    def test_identical_inflight_submissions_share_a_job(self):
+        release = threading.Event()
+
+        def slow(*args):
+            release.wait(5)
+            return self.fake(*args)
+
+        queue = SimQueue(self.sandbox, workers=1, cache_dir=self.cache, simulate=slow)
+        first, _ = queue.submit("warrior=a")
+        second, _ = queue.submit("warrior=a")
+        self.assertEqual(first["id"], second["id"])
+        release.set()
+        self.assertEqual(queue.wait(first["id"], timeout=5)["status"], "done")
+        self.assertEqual(queue.status()["counters"]["joined"], 1)
+
+    def test_failures_and_backpressure(self):
+        def broken(*args):
+            raise RuntimeError("simc crashed")
+
+        queue = SimQueue(self.sandbox, workers=1, cache_dir=self.cache, simulate=broken)
+        job = queue.wait(queue.submit("warrior=a")[0]["id"], timeout=5)
+        self.assertEqual((job["status"], job["error"]), ("failed", "simc crashed"))
+        self.assertFalse(os.listdir(self.cache))          # failures are not cached
+
+        idle = SimQueue(self.sandbox, cache_dir=self.cache, max_queued=1, start=False, simulate=self.fake)
+        idle.submit("warrior=a")
+        with self.assertRaises(SimQueueFull):
+            idle.submit("warrior=b")
+
+    def test_sandbox_runs_simc_in_a_temp_dir(self):
+        simc = os.path.join(self.tmpdir.name, "simc")
+        with open(simc, 'w') as f:
+            f.write(FAKE_SIMC.format(python=sys.executable))
+        os.chmod(simc, os.stat(simc).st_mode | stat.S_IEXEC)
+
+        sandbox = Sandbox(simc_path=simc, docker_image="")
+        self.assertEqual(sandbox.version, "1105-01")
+        queue = SimQueue(sandbox, workers=2, cache_dir=self.cache)
+        job = queue.wait(queue.submit("warrior=\"Base\"\ntalents=ABC", iterations=10)[0]["id"], timeout=30)
+        self.assertEqual(job["status"], "done", job.get("error"))
+        self.assertEqual(job["result"]["players"][0]["talents"], "ABC")
+        self.assertEqual((job["result"]["iterations"], job["result"]["sim_length"]), (10, 300))
+        self.assertFalse(os.path.exists("temp_sim.simc"))
+
+        # iterations=None runs the profile's own setting
+        job = queue.wait(queue.submit("warrior=\"Base\"\niterations=25", iterations=None)[0]["id"], timeout=30)
+        self.assertEqual(job["result"]["iterations"], 25, job.get("error"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from arbiter_engine import ArbiterEngine
+from unit_tracker import RingBuffer, WindowedSums
+
+HERO = 'Player-1-0001,"MyPlayerName-Area52",0x511,0x0'
+BOSS = 'Creature-0-1,"Ulgrax",0x10a48,0x0'
+
+
+def stamp(seconds):
+    return f"10/18 21:{int(seconds // 60):02d}:{seconds % 60:06.3f}"
+
+
+class TestUnitTracker(unittest.TestCase):
+    def test_ring_buffer_overwrites_oldest(self):
+        ring = RingBuffer(capacity=3)
+        for i in range(5):
+            ring.append(float(i), f"r{i}")
+        self.assertEqual(len(ring), 3)
+        self.assertEqual(ring.latest(), [(2.0, "r2"), (3.0, "r3"), (4.0, "r4")])
+        self.assertEqual([r for _, r in ring.latest(seconds=1)], ["r3", "r4"])
+
+    def test_windowed_sums_expire_buckets(self):
+        sums = WindowedSums(windows=(1, 5), resolution=0.5)
+        sums.add(100.0, 10)
+        sums.add(100.5, 20)
+        self.assertEqual(sums.sums(100.9), {1: 30, 5: 30})
+        self.assertEqual(sums.sums(101.2), {1: 20, 5: 30})
+        self.assertEqual(sums.sums(105.2), {1: 0, 5: 20})
+        self.assertEqual(sums.rates(200.0), {1: 0.0, 5: 0.0})    # long gap resets everything
+        self.assertEqual(sums.sums(), {1: 30, 5: 30})            # reading never advances the buckets
+        sums.add(200.0, 50)
+        self.assertEqual(sums.rates(), {1: 50.0, 5: 10.0})
+
+    def test_arbiter_recap_and_rolling_dps(self):
+        arbiter = ArbiterEngine()
+        arbiter.target_dps = 2000.0
+        lines = []
+        for i in range(60):
+            t = i * 0.5
+            lines.append(f'{stamp(t)}  SPELL_DAMAGE,{HERO},{BOSS},23881,"Bloodthirst",0x1,1000')
+            for raider in range(20):   # noise that would flood a single shared buffer
+                lines.append(f'{stamp(t)}  SPELL_DAMAGE,Player-1-1{raider:03d},"Raider{raider}",0x511,0x0,'
+                             f'{BOSS},1,"Hit",0x1,10')
+        lines.append(f'{stamp(30)}  SPELL_CAST_SUCCESS,{HERO},{BOSS},23881,"Bloodthirst",0x1')
+        lines.append(f'{stamp(22)}  SPELL_DAMAGE,{BOSS},{HERO},434697,"Brutal Crush",0x1,90000')
+        lines.append(f'{stamp(30.5)}  UNIT_DIED,0000000000000000,nil,0x80000000,0x80000000,{HERO}')
+        for line in lines:
+            arbiter._process_line(line)
+
+        status = arbiter.get_status()
+        self.assertEqual(status["dps"], {"1s": 0.0, "5s": 1600.0, "30s": 1933.3})   # as of the death
+        self.assertEqual(status["performance"], "98.3%")   # 30 s DPS at the last cast
+        recap = status["last_death"]
+        self.assertEqual(recap["events"][-1]["spell"], "Brutal Crush")
+        self.assertTrue(all(e["seconds_before_death"] <= 10 for e in recap["events"]))
+        self.assertFalse(any("Raider" in (e["source"] or "") for e in recap["events"]))
+        self.assertEqual(recap["damage_taken"]["30s"], 90000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -31,7 +31,7 @@ from goblin_ml_engine import GoblinMLEngine
 from goblin_training import MarketPredictionModel
 
 model = MarketPredictionModel()
-model.load_model('market_prediction_model.pkl')
+model.load_model('market_prediction_model.npz')
 
 print('Model loaded successfully!')
 print('Event type weights:', model.event_type_weights.keys())
@@ -43,11 +43,11 @@ echo "========================================="
 echo "TRAINING COMPLETE!"
 echo "========================================="
 echo ""
-echo "Model saved to: market_prediction_model.pkl"
+echo "Model saved to: market_prediction_model.npz"
 echo "Training data saved to: training_data.json"
 echo ""
 echo "Next steps:"
-echo "1. Deploy model.pkl to production server"
+echo "1. Deploy market_prediction_model.npz to production server"
 echo "2. Server will use trained model for predictions"
 echo "3. Retrain monthly with new data"
 echo ""
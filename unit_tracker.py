@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+unit_tracker.py - Per-unit recent history and rolling damage for live logs
+
+A single global event buffer is useless in a raid: 20 players and their
+pets produce hundreds of lines a second, so one player's last hits are
+pushed out almost immediately. Here every tracked unit (players by
+default) gets its own:
+
+- RingBuffer: the last `capacity` records involving the unit, with their
+  times in a preallocated array, so a death recap can read "the last N
+  seconds" of that unit only
+- WindowedSums for damage done and damage taken over 1/5/30 s: amounts go
+  into fixed-width time buckets and each window keeps a running total,
+  so adding an event or reading a rate is O(1) (amortized over the
+  buckets that expire)
+
+At most `max_units` units are kept; the least recently seen is dropped
+first, so a long session of trash packs and pets cannot grow it forever.
+
+The log tailer records from its own thread while the web API reads rates;
+UnitTracker serializes both behind one lock and reading a rate never
+modifies the sums.
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from combat_log_parser import DAMAGE_EVENTS, Clock
+
+WINDOWS = (1, 5, 30)          # seconds
+RESOLUTION = 0.1              # bucket width in seconds
+RING_CAPACITY = 256           # records kept per unit
+MAX_UNITS = 256
+NIL_GUID = "0000000000000000"
+
+
+def is_player(guid: str) -> bool:
+    return guid.startswith("Player-")
+
+
+class RingBuffer:
+    """Fixed-size buffer of (time, record); the oldest entry is overwritten"""
+
+    __slots__ = ("capacity", "times", "records", "count", "_next")
+
+    def __init__(self, capacity: int = RING_CAPACITY):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.records: List = [None] * capacity
+        self.count = 0
+        self._next = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, when: float, record):
+        slot = self._next
+        self.times[slot] = when
+        self.records[slot] = record
+        self._next = (slot + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def latest(self, seconds: Optional[float] = None, now: Optional[float] = None) -> List[Tuple[float, object]]:
+        """Oldest-first entries, optionally only those within `seconds` of `now` (default: newest)"""
+        out = []
+        slot = self._next
+        for _ in range(self.count):
+            slot = (slot - 1) % self.capacity
+            when = self.times[slot]
+            if seconds is not None:
+                if now is None:
+                    now = when
+                if when < now - seconds:
+                    break
+            out.append((when, self.records[slot]))
+        out.reverse()
+        return out
+
+
+class WindowedSums:
+    """Sliding-window totals of an amount over several window lengths"""
+
+    __slots__ = ("windows", "resolution", "_spans", "_buckets", "_size", "_head", "totals")
+
+    def __init__(self, windows: Iterable[float] = WINDOWS, resolution: float = RESOLUTION):
+        self.windows = tuple(windows)
+        self.resolution = resolution
+        self._spans = [max(1, round(w / resolution)) for w in self.windows]
+        self._size = max(self._spans)
+        self._buckets = [0] * self._size
+        self._head: Optional[int] = None       # absolute index of the newest bucket
+        self.totals = [0] * len(self.windows)
+
+    def _slices(self, first: int, last: int):
+        """Ring slices covering absolute buckets first..last (fewer than _size of them)"""
+        size = self._size
+        a, b = first % size, last % size
+        return [(a, b + 1)] if a <= b else [(a, size), (0, b + 1)]
+
+    def _expired(self, bucket: int) -> Optional[List[int]]:
+        """Window totals as they will be once `bucket` is the newest, or None if the ring empties"""
+        head = self._head
+        if head is None or bucket - head >= self._size:
+            return None
+        if bucket <= head:
+            return list(self.totals)
+        # Buckets head+1-span .. bucket-span fall out of each window; sliced sums keep
+        # this a handful of operations however many buckets were skipped
+        buckets, steps = self._buckets, bucket - head
+        totals = []
+        for total, span in zip(self.totals, self._spans):
+            if steps >= span:
+                totals.append(0)
+            else:
+                totals.append(total - sum(sum(buckets[a:b]) for a, b in self._slices(head + 1 - span, bucket - span)))
+        return totals
+
+    def _advance(self, bucket: int):
+        head = self._head
+        totals = self._expired(bucket)
+        if totals is None:
+            self._buckets = [0] * self._size
+            self.totals = [0] * len(self.windows)
+            self._head = bucket
+            return
+        if bucket <= head:
+            return
+        buckets = self._buckets
+        for a, b in self._slices(head + 1, bucket):
+            buckets[a:b] = [0] * (b - a)
+        self.totals = totals
+        self._head = bucket
+
+    def add(self, when: float, amount: int):
+        """Late events (older than the newest bucket) count toward the newest bucket"""
+        self._advance(int(when / self.resolution))
+        self._buckets[self._head % self._size] += amount
+        totals = self.totals
+        for i in range(len(totals)):
+            totals[i] += amount
+
+    def sums(self, now: Optional[float] = None) -> Dict[float, int]:
+        """Totals as of `now`; read-only, so safe to call while another thread adds"""
+        totals = self.totals if now is None else self._expired(int(now / self.resolution))
+        return dict(zip(self.windows, totals or [0] * len(self.windows)))
+
+    def rates(self, now: Optional[float] = None) -> Dict[float, float]:
+        """Per-second rate over each window"""
+        return {window: total / window for window, total in self.sums(now).items()}
+
+
+class UnitState:
+    __slots__ = ("guid", "name", "history", "done", "taken")
+
+    def __init__(self, guid: str, name: str, capacity: int, windows, resolution):
+        self.guid = guid
+        self.name = name
+        self.history = RingBuffer(capacity)
+        self.done = WindowedSums(windows, resolution)
+        self.taken = WindowedSums(windows, resolution)
+
+
+class UnitTracker:
+    """Routes each record to the units it involves"""
+
+    def __init__(self, track: Callable[[str], bool] = is_player, capacity: int = RING_CAPACITY,
+                 windows: Iterable[float] = WINDOWS, resolution: float = RESOLUTION, max_units: int = MAX_UNITS):
+        self.track = track
+        self.capacity = capacity
+        self.windows = tuple(windows)
+        self.resolution = resolution
+        self.max_units = max_units
+        self.units: "OrderedDict[str, UnitState]" = OrderedDict()
+        self.clock = Clock()
+        self.now: Optional[float] = None
+        self._damage = frozenset(DAMAGE_EVENTS)
+        self._lock = threading.Lock()
+
+    def _unit(self, guid: Optional[str], name: Optional[str]) -> Optional[UnitState]:
+        if not guid or guid == NIL_GUID:
+            return None
+        units = self.units
+        unit = units.get(guid)
+        if unit is None:
+            if not self.track(guid):
+                return None
+            unit = units[guid] = UnitState(guid, name or '', self.capacity, self.windows, self.resolution)
+            if len(units) > self.max_units:
+                units.popitem(last=False)
+        else:
+            units.move_to_end(guid)
+        return unit
+
+    def record(self, record) -> Optional[float]:
+        """Add one record; returns its time"""
+        with self._lock:
+            return self._record(record)
+
+    def _record(self, record) -> Optional[float]:
+        when = self.clock(record)
+        if when is None:
+            return None
+        self.now = when
+        source = self._unit(record.source_guid, record.source_name)
+        dest = self._unit(record.dest_guid, record.dest_name)
+        if source is None and dest is None:
+            return when
+
+        amount = (record.amount or 0) if record.event in self._damage else 0
+        if source is not None:
+            source.history.append(when, record)
+            if amount:
+                source.done.add(when, amount)
+        if dest is not None and dest is not source:
+            dest.history.append(when, record)
+        if dest is not None and amount:
+            dest.taken.add(when, amount)
+        return when
+
+    def get(self, guid: str) -> Optional[UnitState]:
+        return self.units.get(guid)
+
+    def find(self, name: str) -> Optional[UnitState]:
+        """By name or the Name part of "Name-Realm" """
+        with self._lock:
+            for unit in self.units.values():
+                if unit.name == name or unit.name.startswith(f"{name}-"):
+                    return unit
+        return None
+
+    def recent(self, guid: str, seconds: float) -> List[Tuple[float, object]]:
+        with self._lock:
+            unit = self.units.get(guid)
+            return unit.history.latest(seconds) if unit else []
+
+    def dps(self, guid: str) -> Dict[float, float]:
+        with self._lock:
+            unit = self.units.get(guid)
+            return unit.done.rates(self.now) if unit else {w: 0.0 for w in self.windows}
+
+    def dtps(self, guid: str) -> Dict[float, float]:
+        with self._lock:
+            unit = self.units.get(guid)
+            return unit.taken.rates(self.now) if unit else {w: 0.0 for w in self.windows}
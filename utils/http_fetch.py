@@ -0,0 +1,144 @@
+"""
+utils/http_fetch.py - Shared building blocks for bulk HTTP scrapers/importers
+
+- TokenBucket: thread-safe rate limiter shared by a worker pool
+- ResponseCache: on-disk JSON cache keyed by an arbitrary tuple
+- Checkpoint: persisted set of completed keys so interrupted runs resume
+- thread_session: per-thread keep-alive requests.Session
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, holding at most `capacity`.
+    acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """
+    Stores one JSON document per key under `directory`.
+    Keys are tuples (e.g. (house, item, day)); values must be JSON-serialisable.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key) -> str:
+        digest = hashlib.sha1(json.dumps(key, default=str).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+
+class Checkpoint:
+    """
+    Set of completed keys persisted to a JSON file.
+    Every mark_done() rewrites the file atomically, so a crash loses at most
+    the item that was in flight.
+
+    The file also records when the run started; with max_age (seconds) a
+    checkpoint older than that is ignored and the run starts fresh.
+    """
+
+    def __init__(self, path: str, max_age: float = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._done = set()
+        self.started = time.time()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        started = data.get('started', self.started)
+        if max_age is not None and self.started - started > max_age:
+            return
+        self._done = set(data.get('done', []))
+        self.started = started
+
+    def is_done(self, key) -> bool:
+        return str(key) in self._done
+
+    def mark_done(self, key):
+        self.mark_done_many([key])
+
+    def mark_done_many(self, keys):
+        """Record several keys with a single file write"""
+        with self._lock:
+            self._done.update(str(key) for key in keys)
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'started': self.started, 'done': sorted(self._done)}, f)
+            os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self._done)
+
+    def clear(self):
+        with self._lock:
+            self._done = set()
+            self.started = time.time()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+_local = threading.local()
+
+
+def thread_session(pool_size: int = 4, headers: dict = None) -> requests.Session:
+    """Keep-alive Session owned by the calling thread (Sessions are not thread-safe)"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    if headers:
+        session.headers.update(headers)
+    return session